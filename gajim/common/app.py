@@ -45,14 +45,18 @@
 from gajim.common.multiprocess import init_process
 
 if typing.TYPE_CHECKING:
+    from gajim.common.background_mode import BackgroundMode
     from gajim.common.call_manager import CallManager
     from gajim.common.cert_store import CertificateStore
     from gajim.common.commands import ChatCommands  # noqa: F401
+    from gajim.common.contact_directory import ContactDirectory
     from gajim.common.file_transfer_manager import FileTransferManager
+    from gajim.common.preview_scheduler import PreviewScheduler
     from gajim.common.storage.archive.storage import MessageArchiveStorage
     from gajim.common.storage.cache import CacheStorage
     from gajim.common.storage.events.storage import EventStorage
     from gajim.common.storage.openpgp.storage import OpenPGPStorage
+    from gajim.common.storage.preview_cache import PreviewCacheStorage
     from gajim.common.task_manager import PulseManager
     from gajim.common.task_manager import TaskManager
 
@@ -83,6 +87,7 @@ def __init__(self):
         self.archive: MessageArchiveStorage = None
         self.events: EventStorage = None
         self.openpgp: OpenPGPStorage = None
+        self.preview_cache: PreviewCacheStorage = None
 
 
 storage = Storage()
@@ -101,9 +106,12 @@ def __init__(self):
 call_manager = cast("CallManager", None)
 audio_player: AudioPlayer | None = None
 ftm = cast("FileTransferManager", None)
+preview_scheduler = cast("PreviewScheduler", None)
+contact_directory = cast("ContactDirectory", None)
 
 task_manager = cast("TaskManager", None)
 pulse_manager = cast("PulseManager", None)
+background_mode = cast("BackgroundMode", None)
 
 gupnp_igd = None
 
@@ -27,9 +27,11 @@
 from gajim.common import ged
 from gajim.common import logging_helpers
 from gajim.common import passwords
+from gajim.common.background_mode import BackgroundMode
 from gajim.common.cert_store import CertificateStore
 from gajim.common.client import Client
 from gajim.common.commands import ChatCommands
+from gajim.common.contact_directory import ContactDirectory
 from gajim.common.events import AccountCreated
 from gajim.common.events import AccountDisabled
 from gajim.common.events import AccountDisconnected
@@ -41,11 +43,13 @@
 from gajim.common.events import SignedIn
 from gajim.common.file_transfer_manager import FileTransfer
 from gajim.common.file_transfer_manager import FileTransferManager
+from gajim.common.preview_scheduler import PreviewScheduler
 from gajim.common.settings import Settings
 from gajim.common.storage.archive.storage import MessageArchiveStorage
 from gajim.common.storage.cache import CacheStorage
 from gajim.common.storage.events.storage import EventStorage
 from gajim.common.storage.openpgp.storage import OpenPGPStorage
+from gajim.common.storage.preview_cache import PreviewCacheStorage
 from gajim.common.task_manager import PulseManager
 from gajim.common.task_manager import TaskManager
 from gajim.common.util.text import from_one_line
@@ -96,6 +100,9 @@ def _init_core(self, *, in_memory: bool) -> bool:
 
             app.storage.openpgp = OpenPGPStorage(in_memory=in_memory)
             app.storage.openpgp.init()
+
+            app.storage.preview_cache = PreviewCacheStorage(in_memory=in_memory)
+            app.storage.preview_cache.init()
         except Exception as error:
             app.ged.raise_event(DBMigrationError(exception=error))
             log.exception("Failed to init storage")
@@ -106,6 +113,11 @@ def _init_core(self, *, in_memory: bool) -> bool:
         app.pulse_manager = PulseManager()
 
         app.ftm = FileTransferManager()
+        app.preview_scheduler = PreviewScheduler()
+        app.contact_directory = ContactDirectory()
+
+        app.background_mode = BackgroundMode()
+        app.background_mode.connect("changed", self._on_background_mode_changed)
 
         # from gajim.common.call_manager import CallManager
         # app.call_manager = CallManager()
@@ -143,6 +155,13 @@ def _init_core(self, *, in_memory: bool) -> bool:
 
         return True
 
+    @staticmethod
+    def _on_background_mode_changed(_mode: BackgroundMode, active: bool) -> None:
+        app.pulse_manager.set_background(active)
+        app.preview_scheduler.set_paused(active)
+        app.storage.cache.set_background(active)
+        app.storage.preview_cache.set_background(active)
+
     @property
     def _log(self) -> logging.Logger:
         return app.log("app")
@@ -261,6 +280,7 @@ def _shutdown_core(self) -> None:
         app.process_pool.shutdown(cancel_futures=True)
         app.storage.archive.cleanup_chat_history()
         app.storage.cache.shutdown()
+        app.storage.preview_cache.shutdown()
         app.storage.archive.shutdown()
         app.settings.save()
         app.settings.shutdown()
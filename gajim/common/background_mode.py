@@ -0,0 +1,60 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-only
+
+from __future__ import annotations
+
+import logging
+
+from gi.repository import GObject
+
+from gajim.common import idle
+
+log = logging.getLogger("gajim.c.background_mode")
+
+
+class BackgroundMode(GObject.Object):
+    """
+    Tells if Gajim runs in the background
+
+    Gajim runs in the background while the main window is hidden or the
+    user is away or extended away. Components do less periodic and
+    deferrable work while in the background and catch up once it ends.
+    """
+
+    __gsignals__ = {
+        "changed": (
+            GObject.SignalFlags.RUN_LAST,
+            None,
+            (bool,),
+        )
+    }
+
+    def __init__(self) -> None:
+        GObject.Object.__init__(self)
+        self._window_visible = True
+        self._user_idle = False
+        self._active = False
+
+        idle.Monitor.connect("state-changed", self._on_idle_state_changed)
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    def set_window_visible(self, visible: bool) -> None:
+        self._window_visible = visible
+        self._update()
+
+    def _on_idle_state_changed(self, monitor: idle.IdleMonitorManager) -> None:
+        self._user_idle = monitor.is_away() or monitor.is_xa()
+        self._update()
+
+    def _update(self) -> None:
+        active = not self._window_visible or self._user_idle
+        if active == self._active:
+            return
+
+        self._active = active
+        log.info("Background mode %s", "entered" if active else "left")
+        self.emit("changed", active)
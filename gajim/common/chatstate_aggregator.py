@@ -0,0 +1,160 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-only
+
+from __future__ import annotations
+
+import logging
+
+from nbxmpp.protocol import JID
+
+log = logging.getLogger("gajim.c.chatstate_aggregator")
+
+# Composing participants are removed if they do not send another chat
+# state within this many seconds
+COMPOSING_TIMEOUT = 30
+
+_EMPTY: frozenset[JID] = frozenset()
+
+
+class ComposerAggregator:
+    """
+    Tracks the composing participants of all group chats of an account
+
+    Expiry is handled by a timer wheel with one slot per second, so
+    refreshing or removing a composer never touches a timer. Changes are
+    collected and handed out by pop_changed(), which only returns group
+    chats whose set of composers differs from the one returned before.
+    """
+
+    def __init__(self, timeout: int = COMPOSING_TIMEOUT) -> None:
+        self._timeout = timeout
+        self._slots: list[set[tuple[JID, JID]]] = [
+            set() for _index in range(timeout + 1)
+        ]
+        self._slot_of: dict[tuple[JID, JID], int] = {}
+        self._tick: int | None = None
+
+        self._composers: dict[JID, set[JID]] = {}
+        self._reported: dict[JID, frozenset[JID]] = {}
+        self._dirty: set[JID] = set()
+
+    def get_composers(self, room_jid: JID) -> frozenset[JID]:
+        return frozenset(self._composers.get(room_jid, _EMPTY))
+
+    def has_pending(self) -> bool:
+        """
+        Return True as long as composers can expire or changes were not
+        popped yet
+        """
+
+        return bool(self._slot_of or self._dirty)
+
+    def has_changes(self) -> bool:
+        """
+        Return True if changes were not popped yet
+        """
+
+        return bool(self._dirty)
+
+    def get_next_expiry(self) -> float | None:
+        """
+        Return the time at which advance() removes the next composer, None
+        if no composer can expire
+        """
+
+        if not self._slot_of:
+            return None
+
+        assert self._tick is not None
+        for step in range(1, len(self._slots) + 1):
+            if self._slots[(self._tick + step) % len(self._slots)]:
+                return float(self._tick + step)
+        return None
+
+    def set_composing(self, room_jid: JID, jid: JID, now: float) -> None:
+        self.advance(now)
+        assert self._tick is not None
+
+        key = (room_jid, jid)
+        self._unschedule(key)
+        slot = (self._tick + self._timeout) % len(self._slots)
+        self._slots[slot].add(key)
+        self._slot_of[key] = slot
+
+        composers = self._composers.setdefault(room_jid, set())
+        if jid not in composers:
+            composers.add(jid)
+            self._dirty.add(room_jid)
+
+    def remove(self, room_jid: JID, jid: JID) -> None:
+        key = (room_jid, jid)
+        self._unschedule(key)
+
+        composers = self._composers.get(room_jid)
+        if composers is None or jid not in composers:
+            return
+
+        composers.discard(jid)
+        if not composers:
+            del self._composers[room_jid]
+        self._dirty.add(room_jid)
+
+    def remove_room(self, room_jid: JID) -> None:
+        for jid in list(self._composers.get(room_jid, _EMPTY)):
+            self.remove(room_jid, jid)
+
+    def advance(self, now: float) -> None:
+        """
+        Remove all composers which timed out until now
+        """
+
+        tick = int(now)
+        if self._tick is None:
+            self._tick = tick
+            return
+
+        # After a long gap every slot is due once, further rounds are empty
+        steps = min(tick - self._tick, len(self._slots))
+        for step in range(1, steps + 1):
+            slot = self._slots[(self._tick + step) % len(self._slots)]
+            for room_jid, jid in list(slot):
+                log.info("Composing timed out - %s", jid)
+                self.remove(room_jid, jid)
+
+        self._tick = max(tick, self._tick)
+
+    def pop_changed(self) -> list[JID]:
+        """
+        Return the group chats whose set of composers changed since the
+        last call
+        """
+
+        changed: list[JID] = []
+        for room_jid in self._dirty:
+            composers = frozenset(self._composers.get(room_jid, _EMPTY))
+            if composers == self._reported.get(room_jid, _EMPTY):
+                continue
+
+            changed.append(room_jid)
+            if composers:
+                self._reported[room_jid] = composers
+            else:
+                self._reported.pop(room_jid, None)
+
+        self._dirty.clear()
+        return changed
+
+    def clear(self) -> None:
+        for slot in self._slots:
+            slot.clear()
+        self._slot_of.clear()
+        self._tick = None
+        self._composers.clear()
+        self._reported.clear()
+        self._dirty.clear()
+
+    def _unschedule(self, key: tuple[JID, JID]) -> None:
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            self._slots[slot].discard(key)
@@ -546,24 +546,20 @@ def send_message(self, message: OutgoingMessage) -> None:
             self._send_message(message)
             return
 
-        if method in ("OMEMO", "OpenPGP"):
+        if method == "OMEMO":
+            # Encryption happens in a worker thread, the callbacks are
+            # called in the order the messages were sent
+            self.get_module("OMEMO").encrypt_message(
+                message, self._send_encrypted_message, self._on_encryption_error
+            )
+            return
+
+        if method == "OpenPGP":
             try:
                 self.get_module(method).encrypt_message(message)
             except Exception:
                 self._log.exception("Error")
-                text = message.get_text(with_fallback=False)
-                if text is None:
-                    return
-
-                app.ged.raise_event(
-                    MessageNotSent(
-                        client=self._client,
-                        jid=str(message.contact.jid),
-                        message=text,
-                        error=_("Encryption error"),
-                        time=time.time(),
-                    )
-                )
+                self._on_encryption_error(message)
                 return
 
             self._send_message(message)
@@ -581,6 +577,32 @@ def _send_message(self, message: OutgoingMessage) -> None:
         self.send_stanza(message.get_stanza())
         self.get_module("Message").store_message(message)
 
+    def _send_encrypted_message(self, message: OutgoingMessage) -> None:
+        if not self._state.is_available:
+            self._log.warning("Went offline while encrypting message")
+            self._raise_message_not_sent(message, _("Not connected"))
+            return
+
+        self._send_message(message)
+
+    def _on_encryption_error(self, message: OutgoingMessage) -> None:
+        self._raise_message_not_sent(message, _("Encryption error"))
+
+    def _raise_message_not_sent(self, message: OutgoingMessage, error: str) -> None:
+        text = message.get_text(with_fallback=False)
+        if text is None:
+            return
+
+        app.ged.raise_event(
+            MessageNotSent(
+                client=self._client,
+                jid=str(message.contact.jid),
+                message=text,
+                error=error,
+                time=time.time(),
+            )
+        )
+
     def connect(self, ignored_tls_errors: IgnoredTlsErrorsT = None) -> None:
 
         self._log.info("Connect")
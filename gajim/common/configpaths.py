@@ -201,6 +201,12 @@ def init(self):
             ("PLUGINS_DATA", "plugins_data", PathLocation.DATA, PathType.FOLDER),
             # Cache paths
             ("DOWNLOADS_THUMB", "downloads.thumb", PathLocation.CACHE, PathType.FOLDER),
+            (
+                "PREVIEW_CACHE_DB",
+                "preview_cache.db",
+                PathLocation.CACHE,
+                PathType.FILE,
+            ),
             # Config paths
             ("SETTINGS", "settings.sqlite", PathLocation.CONFIG, PathType.FILE),
             (
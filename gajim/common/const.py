@@ -54,6 +54,9 @@ class EncryptionInfoMsg(Enum):
         "There are devices for which you have not made a trust decision yet."
     )
     SESSION_BUILD = _("Successfully built new session with device {device_id}.")
+    FETCHING_KEYS = _(
+        "Fetching encryption keys of participants… ({finished} of {total} done)"
+    )
 
 
 class Entity(NamedTuple):
@@ -0,0 +1,327 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-only
+
+from __future__ import annotations
+
+import locale
+import logging
+import re
+from collections.abc import Iterable
+
+from nbxmpp.protocol import JID
+
+from gajim.common import app
+from gajim.common import ged
+from gajim.common import types
+from gajim.common.events import AccountDisabled
+from gajim.common.events import BookmarksReceived
+from gajim.common.events import MucDiscoUpdate
+from gajim.common.events import RosterPush
+from gajim.common.events import RosterReceived
+from gajim.common.ged import EventHelper
+from gajim.common.i18n import _
+from gajim.common.modules.contacts import BareContact
+from gajim.common.modules.contacts import GroupchatContact
+
+log = logging.getLogger("gajim.c.contact_directory")
+
+TOKEN_RX = re.compile(r"[^\W_]+")
+
+# Ranks of a match, lower is better
+RANK_NAME_START = 0
+RANK_NAME_WORD = 1
+RANK_ADDRESS_WORD = 2
+RANK_SUBSTRING = 3
+RANK_FUZZY = 4
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RX.findall(text.casefold())
+
+
+def is_subsequence(needle: str, haystack: str) -> bool:
+    chars = iter(haystack)
+    return all(char in chars for char in needle)
+
+
+class DirectoryEntry:
+    """
+    A chat of the start chat dialog with everything needed to sort and
+    match it precomputed
+    """
+
+    __slots__ = (
+        "account",
+        "collation_key",
+        "contact",
+        "groupchat",
+        "is_self",
+        "jid",
+        "name",
+        "search_string",
+        "tokens",
+    )
+
+    def __init__(
+        self,
+        account: str,
+        jid: JID,
+        name: str,
+        *,
+        groupchat: bool = False,
+        is_self: bool = False,
+        contact: BareContact | GroupchatContact | None = None,
+    ) -> None:
+        self.account = account
+        self.jid = jid
+        self.groupchat = groupchat
+        self.is_self = is_self
+        self.contact = contact
+        self.set_name(name)
+
+    @property
+    def sort_key(self) -> tuple[bool, bool, str]:
+        return (self.groupchat, self.is_self, self.collation_key)
+
+    def set_name(self, name: str) -> bool:
+        """
+        Update the name and everything derived from it, returns True if
+        the name changed
+        """
+
+        if getattr(self, "name", None) == name:
+            return False
+
+        address = str(self.jid)
+        self.name = name
+        self.collation_key = locale.strxfrm(name.casefold())
+        self.tokens = (tokenize(name), tokenize(address))
+        self.search_string = f"{name}|{address}".casefold()
+        return True
+
+    def match(self, words: list[str]) -> int | None:
+        """
+        Return the rank of the worst matching word, None if one of the
+        words does not match at all
+        """
+
+        name_tokens, address_tokens = self.tokens
+        worst = RANK_NAME_START
+        for pos, word in enumerate(words):
+            if pos == 0 and self.search_string.startswith(word):
+                rank = RANK_NAME_START
+            elif any(token.startswith(word) for token in name_tokens):
+                rank = RANK_NAME_WORD
+            elif any(token.startswith(word) for token in address_tokens):
+                rank = RANK_ADDRESS_WORD
+            elif word in self.search_string:
+                rank = RANK_SUBSTRING
+            elif len(word) > 1 and is_subsequence(word, self.search_string):
+                rank = RANK_FUZZY
+            else:
+                return None
+
+            worst = max(worst, rank)
+        return worst
+
+    def __repr__(self) -> str:
+        return f"DirectoryEntry: {self.account} - {self.jid}"
+
+
+class DirectorySearch:
+    """
+    Matches entries against a query while it is typed
+
+    A query which extends the previous query can only match a subset of
+    the previous matches, so only those are checked again.
+    """
+
+    def __init__(self, entries: Iterable[DirectoryEntry]) -> None:
+        self._entries = list(entries)
+        self._query = ""
+        self._matches: dict[DirectoryEntry, int] = {}
+
+    def search(self, query: str) -> dict[DirectoryEntry, int]:
+        """
+        Return the matching entries with their rank, an empty query
+        matches nothing
+        """
+
+        query = query.casefold()
+        words = query.split()
+        if not words:
+            self._query = ""
+            self._matches = {}
+            return self._matches
+
+        if self._query and query.startswith(self._query):
+            candidates = self._matches
+        else:
+            candidates = self._entries
+
+        matches: dict[DirectoryEntry, int] = {}
+        for entry in candidates:
+            rank = entry.match(words)
+            if rank is not None:
+                matches[entry] = rank
+
+        self._query = query
+        self._matches = matches
+        return matches
+
+
+class ContactDirectory(EventHelper):
+    """
+    Long-lived index of roster contacts and bookmarked group chats of
+    all accounts
+
+    Entries of an account are created on first use and kept up to date
+    from roster and bookmark events and nickname updates of the contacts
+    afterwards.
+    """
+
+    def __init__(self) -> None:
+        EventHelper.__init__(self)
+
+        self._contacts: dict[str, dict[JID, DirectoryEntry]] = {}
+        self._groupchats: dict[str, dict[JID, DirectoryEntry]] = {}
+
+        self.register_events(
+            [
+                ("roster-received", ged.GUI1, self._on_roster_received),
+                ("roster-push", ged.GUI1, self._on_roster_push),
+                ("bookmarks-received", ged.GUI1, self._on_bookmarks_received),
+                ("muc-disco-update", ged.GUI1, self._on_muc_disco_update),
+                ("account-disabled", ged.GUI1, self._on_account_disabled),
+            ]
+        )
+
+    def get_entries(self, accounts: Iterable[str]) -> list[DirectoryEntry]:
+        """
+        Return the entries of accounts sorted by chat type and name
+        """
+
+        entries: list[DirectoryEntry] = []
+        for account in accounts:
+            entries.extend(self._get_contacts(account).values())
+            entries.extend(self._get_groupchats(account).values())
+        entries.sort(key=lambda entry: entry.sort_key)
+        return entries
+
+    def _get_contacts(self, account: str) -> dict[JID, DirectoryEntry]:
+        entries = self._contacts.get(account)
+        if entries is None:
+            entries = self._load_contacts(app.get_client(account))
+            self._contacts[account] = entries
+        return entries
+
+    def _get_groupchats(self, account: str) -> dict[JID, DirectoryEntry]:
+        entries = self._groupchats.get(account)
+        if entries is None:
+            entries = self._load_groupchats(app.get_client(account))
+            self._groupchats[account] = entries
+        return entries
+
+    def _load_contacts(self, client: types.Client) -> dict[JID, DirectoryEntry]:
+        log.debug("Loading contacts of %s", client.account)
+        entries: dict[JID, DirectoryEntry] = {}
+        for jid, _item in client.get_module("Roster").iter():
+            entry = self._create_contact_entry(client, jid)
+            if entry is not None:
+                entries[jid] = entry
+
+        own_jid = client.get_own_jid().bare
+        self_contact = client.get_module("Contacts").get_contact(own_jid)
+        assert isinstance(self_contact, BareContact)
+        entries[self_contact.jid] = DirectoryEntry(
+            client.account,
+            self_contact.jid,
+            _("Note to myself"),
+            is_self=True,
+            contact=self_contact,
+        )
+        return entries
+
+    def _create_contact_entry(
+        self, client: types.Client, jid: JID
+    ) -> DirectoryEntry | None:
+        contact = client.get_module("Contacts").get_contact(jid)
+        if isinstance(contact, GroupchatContact):
+            # Workaround if groupchats are in the roster
+            return None
+
+        assert isinstance(contact, BareContact)
+        # Roster names and nicknames of PEP and presences are notified
+        contact.connect("nickname-update", self._on_nickname_update)
+        return DirectoryEntry(client.account, jid, contact.name, contact=contact)
+
+    @staticmethod
+    def _load_groupchats(client: types.Client) -> dict[JID, DirectoryEntry]:
+        log.debug("Loading groupchats of %s", client.account)
+        entries: dict[JID, DirectoryEntry] = {}
+        for bookmark in client.get_module("Bookmarks").bookmarks:
+            contact = client.get_module("Contacts").get_contact(
+                bookmark.jid, groupchat=True
+            )
+            assert isinstance(contact, GroupchatContact)
+            entries[bookmark.jid] = DirectoryEntry(
+                client.account,
+                bookmark.jid,
+                contact.name,
+                groupchat=True,
+                contact=contact,
+            )
+        return entries
+
+    def _on_roster_received(self, event: RosterReceived) -> None:
+        self._contacts.pop(event.account, None)
+
+    def _on_roster_push(self, event: RosterPush) -> None:
+        entries = self._contacts.get(event.account)
+        if entries is None:
+            return
+
+        jid = event.item.jid
+        if event.item.subscription == "remove":
+            entries.pop(jid, None)
+            return
+
+        entry = entries.get(jid)
+        if entry is None:
+            client = app.get_client(event.account)
+            entry = self._create_contact_entry(client, jid)
+            if entry is not None:
+                entries[jid] = entry
+            return
+
+        assert entry.contact is not None
+        entry.set_name(entry.contact.name)
+
+    def _on_bookmarks_received(self, event: BookmarksReceived) -> None:
+        self._groupchats.pop(event.account, None)
+
+    def _on_nickname_update(self, contact: BareContact, _signal_name: str) -> None:
+        self._update_name(self._contacts, contact.account, contact.jid)
+
+    def _on_muc_disco_update(self, event: MucDiscoUpdate) -> None:
+        self._update_name(self._groupchats, event.account, event.jid)
+
+    @staticmethod
+    def _update_name(
+        entries: dict[str, dict[JID, DirectoryEntry]], account: str, jid: JID
+    ) -> None:
+        account_entries = entries.get(account)
+        if account_entries is None:
+            return
+
+        entry = account_entries.get(jid)
+        if entry is None or entry.contact is None or entry.is_self:
+            return
+
+        if entry.set_name(entry.contact.name):
+            log.debug("Name of %s changed", entry)
+
+    def _on_account_disabled(self, event: AccountDisabled) -> None:
+        self._contacts.pop(event.account, None)
+        self._groupchats.pop(event.account, None)
@@ -6,13 +6,19 @@
 from typing import cast
 
 import logging
+from datetime import datetime
+from pathlib import Path
 
 from gi.repository import Gio
 from gi.repository import GLib
+from nbxmpp.protocol import InvalidJid
+from nbxmpp.protocol import JID
 
 from gajim.common import app
 from gajim.common import events
 from gajim.common import ged
+from gajim.common.history_export import ExportFormat
+from gajim.common.history_export import HistoryExporter
 from gajim.common.modules.contacts import BareContact
 from gajim.common.modules.contacts import GroupchatContact
 from gajim.common.modules.contacts import GroupchatParticipant
@@ -44,6 +50,13 @@
             <arg name='account' type='s' />
             <arg direction='out' type='b' />
         </method>
+        <method name='export_history'>
+            <arg name='account' type='s' />
+            <arg name='directory' type='s' />
+            <arg name='jid' type='s' />
+            <arg name='format' type='s' />
+            <arg direction='out' type='s' />
+        </method>
         <method name='get_status'>
             <arg name='account' type='s' />
             <arg direction='out' type='s' />
@@ -312,6 +325,37 @@ def change_status(status: str, message: str, account: str) -> bool:
                 GLib.idle_add(app.get_client(acc).change_status, status, message)
         return True
 
+    @staticmethod
+    def export_history(account: str, directory: str, jid: str, format_: str) -> str:
+        """
+        Export the history of a chat, or of all chats if no jid is given,
+        in the background. Returns the directory the files are written to,
+        or an empty string if the arguments are invalid.
+        """
+        if account not in app.settings.get_active_accounts():
+            return ""
+
+        try:
+            export_format = ExportFormat(format_ or ExportFormat.TEXT.value)
+        except ValueError:
+            return ""
+
+        if jid:
+            try:
+                jids = [JID.from_string(jid)]
+            except InvalidJid:
+                return ""
+        else:
+            rows = app.storage.archive.get_conversation_jids(account)
+            jids = [jid for jid, _m_type in rows]
+
+        time_str = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+        export_dir = Path(directory).expanduser() / f"export_{time_str}"
+
+        exporter = HistoryExporter(account, jids, export_dir, export_format)
+        exporter.start()
+        return str(export_dir)
+
     @staticmethod
     def list_accounts() -> list[str]:
         """
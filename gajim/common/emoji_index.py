@@ -0,0 +1,164 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-only
+
+from __future__ import annotations
+
+from typing import Any
+from typing import NamedTuple
+
+import bisect
+import json
+import logging
+import re
+from pathlib import Path
+
+log = logging.getLogger("gajim.c.emoji_index")
+
+INDEX_VERSION = 1
+
+TOKEN_RX = re.compile(r"[^\W_]+")
+
+# Ranks of a match, lower is better
+RANK_SHORT_NAME_START = 0
+RANK_SHORT_NAME_WORD = 1
+RANK_KEYWORD = 2
+
+
+class EmojiIndexEntry(NamedTuple):
+    emoji: str
+    short_name: str
+    keywords: list[str]
+    variations: list[str]
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RX.findall(text.casefold())
+
+
+class EmojiIndex:
+    """
+    Prefix index over emoji short names and keywords
+
+    Entries are expected to be sorted in display order. Every word of the
+    short name and the keywords is a token, a query matches an entry if
+    each word of the query is a prefix of one of its tokens.
+    """
+
+    def __init__(
+        self,
+        entries: list[EmojiIndexEntry],
+        tokens: list[str] | None = None,
+        postings: list[list[tuple[int, int]]] | None = None,
+    ) -> None:
+        self._entries = entries
+
+        if tokens is None or postings is None:
+            tokens, postings = self._build(entries)
+
+        # Sorted list of tokens, postings hold (entry index, rank) tuples
+        # for the token at the same position
+        self._tokens = tokens
+        self._postings = postings
+
+    @staticmethod
+    def _build(
+        entries: list[EmojiIndexEntry],
+    ) -> tuple[list[str], list[list[tuple[int, int]]]]:
+        index: dict[str, dict[int, int]] = {}
+
+        def add(token: str, entry_index: int, rank: int) -> None:
+            ranks = index.setdefault(token, {})
+            ranks[entry_index] = min(rank, ranks.get(entry_index, rank))
+
+        for entry_index, entry in enumerate(entries):
+            for pos, token in enumerate(tokenize(entry.short_name)):
+                rank = RANK_SHORT_NAME_START if pos == 0 else RANK_SHORT_NAME_WORD
+                add(token, entry_index, rank)
+
+            for keyword in entry.keywords:
+                for token in tokenize(keyword):
+                    add(token, entry_index, RANK_KEYWORD)
+
+        tokens = sorted(index)
+        postings = [sorted(index[token].items()) for token in tokens]
+        return tokens, postings
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _match_prefix(self, prefix: str) -> dict[int, int]:
+        matches: dict[int, int] = {}
+        pos = bisect.bisect_left(self._tokens, prefix)
+        while pos < len(self._tokens) and self._tokens[pos].startswith(prefix):
+            for entry_index, rank in self._postings[pos]:
+                if rank < matches.get(entry_index, RANK_KEYWORD + 1):
+                    matches[entry_index] = rank
+            pos += 1
+        return matches
+
+    def search(self, query: str, limit: int) -> list[EmojiIndexEntry]:
+        """
+        Return up to limit entries matching query, best matches first
+        """
+
+        words = tokenize(query)
+        if not words:
+            return []
+
+        matches = self._match_prefix(words[0])
+        for word in words[1:]:
+            if not matches:
+                break
+
+            word_matches = self._match_prefix(word)
+            matches = {
+                entry_index: min(rank, word_matches[entry_index])
+                for entry_index, rank in matches.items()
+                if entry_index in word_matches
+            }
+
+        best = sorted(matches.items(), key=lambda item: (item[1], item[0]))
+        return [self._entries[entry_index] for entry_index, _rank in best[:limit]]
+
+    def save(self, path: Path, key: str) -> None:
+        data = {
+            "version": INDEX_VERSION,
+            "key": key,
+            "entries": self._entries,
+            "tokens": self._tokens,
+            "postings": self._postings,
+        }
+        try:
+            path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf8")
+        except OSError as error:
+            log.warning("Unable to save emoji index %s: %s", path, error)
+
+    @classmethod
+    def load(cls, path: Path, key: str) -> EmojiIndex | None:
+        """
+        Load an index saved with the same key, returns None if there is
+        no such index
+        """
+
+        try:
+            data: dict[str, Any] = json.loads(path.read_text(encoding="utf8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as error:
+            log.warning("Unable to load emoji index %s: %s", path, error)
+            return None
+
+        if data.get("version") != INDEX_VERSION or data.get("key") != key:
+            return None
+
+        try:
+            entries = [EmojiIndexEntry(*entry) for entry in data["entries"]]
+            postings = [
+                [(entry_index, rank) for entry_index, rank in posting]
+                for posting in data["postings"]
+            ]
+            return cls(entries, data["tokens"], postings)
+        except (KeyError, TypeError, ValueError) as error:
+            log.warning("Invalid emoji index %s: %s", path, error)
+            return None
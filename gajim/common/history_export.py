@@ -0,0 +1,411 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-only
+
+from __future__ import annotations
+
+from typing import Any
+from typing import NamedTuple
+from typing import TextIO
+
+import json
+import logging
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections.abc import Callable
+from datetime import UTC
+from enum import Enum
+from pathlib import Path
+from xml.sax.saxutils import escape
+from xml.sax.saxutils import quoteattr
+
+from gi.repository import GLib
+from nbxmpp.protocol import JID
+
+from gajim.common import app
+from gajim.common.helpers import make_path_from_jid
+from gajim.common.i18n import _
+from gajim.common.storage.archive.const import ChatDirection
+from gajim.common.storage.archive.const import MessageType
+from gajim.common.storage.archive.models import Message
+from gajim.common.util.text import remove_invalid_xml_chars
+
+log = logging.getLogger("gajim.c.history_export")
+
+EXPORT_BATCH_SIZE = 500
+WRITE_BUFFER_SIZE = 256 * 1024
+
+# Min seconds between two progress reports
+PROGRESS_INTERVAL = 0.5
+
+
+class ExportFormat(Enum):
+    TEXT = "txt"
+    JSONL = "jsonl"
+    XML = "xml"
+
+
+class ExportProgress(NamedTuple):
+    chats_done: int
+    chats_total: int
+    messages: int
+    elapsed: float
+
+    @property
+    def rate(self) -> float:
+        """
+        Exported messages per second
+        """
+
+        if self.elapsed <= 0:
+            return 0.0
+        return self.messages / self.elapsed
+
+
+class ExportResult(NamedTuple):
+    directory: Path
+    progress: ExportProgress
+    error: str | None
+    cancelled: bool
+
+
+def get_nickname(message: Message) -> str:
+    if message.direction == ChatDirection.OUTGOING:
+        return _("You")
+
+    if message.type == MessageType.GROUPCHAT:
+        if message.occupant is not None:
+            if message.occupant.nickname is not None:
+                return message.occupant.nickname
+
+        if message.resource is not None:
+            return message.resource
+
+        return _("Group Chat")
+
+    return str(message.remote.jid)
+
+
+def get_text(message: Message) -> str:
+    if corrected_message := message.get_last_correction():
+        return corrected_message.text or ""
+    return message.text or ""
+
+
+class HistoryWriter(ABC):
+    """
+    Writes the messages of one chat to a file
+    """
+
+    def __init__(self, file: TextIO, own_jid: JID, jid: JID) -> None:
+        self._file = file
+        self._own_jid = own_jid
+        self._jid = jid
+
+    def write_header(self) -> None:  # noqa: B027
+        """
+        Called before the first message, writes nothing by default
+        """
+
+    @abstractmethod
+    def write_message(self, message: Message) -> None:
+        pass
+
+    def write_footer(self) -> None:  # noqa: B027
+        """
+        Called after the last message, writes nothing by default
+        """
+
+
+class TextWriter(HistoryWriter):
+    def write_header(self) -> None:
+        self._file.write(f"History for {self._jid}\n\n")
+
+    def write_message(self, message: Message) -> None:
+        name = get_nickname(message)
+        timestamp = message.timestamp.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+        self._file.write(f"{timestamp} {name}: {get_text(message)}\n")
+
+
+class JsonLinesWriter(HistoryWriter):
+    def write_message(self, message: Message) -> None:
+        data = {
+            "timestamp": message.timestamp.astimezone(UTC).isoformat(),
+            "type": MessageType(message.type).name.lower(),
+            "direction": ChatDirection(message.direction).name.lower(),
+            "jid": str(self._jid),
+            "resource": message.resource,
+            "nickname": get_nickname(message),
+            "id": message.id,
+            "stanza_id": message.stanza_id,
+            "text": get_text(message),
+            "corrected": message.get_last_correction() is not None,
+        }
+        self._file.write(json.dumps(data, ensure_ascii=False))
+        self._file.write("\n")
+
+
+class XmlWriter(HistoryWriter):
+    """
+    Writes messages as archive of the portable import/export format
+    (XEP-0227), each message is a forwarded MAM result
+    """
+
+    def write_header(self) -> None:
+        assert self._own_jid.localpart is not None
+        self._file.write(
+            "<?xml version='1.0' encoding='UTF-8'?>\n"
+            "<server-data xmlns='urn:xmpp:pie:0'>\n"
+            f"<host jid={quoteattr(self._own_jid.domain)}>\n"
+            f"<user name={quoteattr(self._own_jid.localpart)}>\n"
+            "<archive xmlns='urn:xmpp:pie:0#mam'>\n"
+        )
+
+    def _get_addresses(self, message: Message) -> tuple[str, str]:
+        own_jid = str(self._own_jid)
+        if message.direction == ChatDirection.OUTGOING:
+            return own_jid, str(self._jid)
+
+        remote_jid = self._jid
+        if message.resource is not None:
+            remote_jid = remote_jid.new_with(resource=message.resource)
+        return str(remote_jid), own_jid
+
+    def write_message(self, message: Message) -> None:
+        from_, to = self._get_addresses(message)
+        type_ = "groupchat" if message.type == MessageType.GROUPCHAT else "chat"
+        stamp = message.timestamp.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+        result_id = ""
+        if message.stanza_id is not None:
+            result_id = f" id={quoteattr(message.stanza_id)}"
+
+        message_id = ""
+        if message.id is not None:
+            message_id = f" id={quoteattr(message.id)}"
+
+        text = escape(remove_invalid_xml_chars(get_text(message)))
+
+        self._file.write(
+            f"<result xmlns='urn:xmpp:mam:2'{result_id}>"
+            "<forwarded xmlns='urn:xmpp:forward:0'>"
+            f"<delay xmlns='urn:xmpp:delay' stamp='{stamp}'/>"
+            f"<message xmlns='jabber:client' from={quoteattr(from_)} "
+            f"to={quoteattr(to)} type='{type_}'{message_id}>"
+            f"<body>{text}</body>"
+            "</message>"
+            "</forwarded>"
+            "</result>\n"
+        )
+
+    def write_footer(self) -> None:
+        self._file.write("</archive>\n</user>\n</host>\n</server-data>\n")
+
+
+WRITERS: dict[ExportFormat, type[HistoryWriter]] = {
+    ExportFormat.TEXT: TextWriter,
+    ExportFormat.JSONL: JsonLinesWriter,
+    ExportFormat.XML: XmlWriter,
+}
+
+
+class HistoryExporter:
+    """
+    Exports the history of chats to one file per chat
+
+    The export is either run in the calling thread with run(), or in a
+    background thread with start(). In the latter case the callbacks are
+    called from the main loop.
+    """
+
+    def __init__(
+        self,
+        account: str,
+        jids: list[JID],
+        directory: Path,
+        format_: ExportFormat,
+        progress_callback: Callable[[ExportProgress], Any] | None = None,
+        finished_callback: Callable[[ExportResult], Any] | None = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> None:
+        """
+        :param account:             The account of the chats
+
+        :param jids:                The chats to export
+
+        :param directory:           The directory the files are written to
+
+        :param format_:             The format of the files
+
+        :param progress_callback:   Called periodically while exporting
+
+        :param finished_callback:   Called once when the export is finished,
+                                    failed or was cancelled
+
+        :param batch_size:          Number of messages loaded at once
+        """
+
+        self._account = account
+        self._jids = jids
+        self._directory = directory
+        self._format = format_
+        self._progress_callback = progress_callback
+        self._finished_callback = finished_callback
+        self._batch_size = batch_size
+
+        self._cancel_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pks: dict[JID, tuple[int, int]] | None = None
+
+        self._chats_done = 0
+        self._message_count = 0
+        self._start_time = 0.0
+        self._last_report = 0.0
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def start(self) -> None:
+        assert self._thread is None
+        # Resolving the pks may write to the database, which is only
+        # done on the main thread
+        self._resolve_pks()
+        self._thread = threading.Thread(
+            target=self._run_in_thread, name="HistoryExport", daemon=True
+        )
+        self._thread.start()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    def _run_in_thread(self) -> None:
+        self.run()
+
+    def _resolve_pks(self) -> None:
+        self._pks = app.storage.archive.get_conversation_pks(self._account, self._jids)
+
+    def _call(self, callback: Callable[..., Any] | None, *args: Any) -> None:
+        if callback is None:
+            return
+
+        if self._thread is None:
+            callback(*args)
+            return
+
+        def _idle_call() -> bool:
+            callback(*args)
+            return GLib.SOURCE_REMOVE
+
+        GLib.idle_add(_idle_call)
+
+    def run(self) -> ExportResult:
+        log.info(
+            "Export %s chats of %s as %s to %s",
+            len(self._jids),
+            self._account,
+            self._format.name,
+            self._directory,
+        )
+
+        self._start_time = time.monotonic()
+        self._last_report = self._start_time
+        error = None
+
+        try:
+            if self._pks is None:
+                self._resolve_pks()
+
+            own_jid = JID.from_string(app.get_jid_from_account(self._account))
+            for jid in self._jids:
+                if self._cancel_event.is_set():
+                    break
+
+                self._export_chat(own_jid, jid)
+                self._chats_done += 1
+
+        except OSError as err:
+            log.warning("Export failed: %s", err)
+            error = str(err)
+
+        except Exception as err:
+            # The finished callback has to be called in any case
+            log.exception("Export failed")
+            error = str(err)
+
+        progress = self._get_progress()
+        cancelled = self._cancel_event.is_set()
+        log.info(
+            "Export %s: %s messages of %s chats in %.1fs (%.0f messages/s)",
+            "cancelled" if cancelled else "finished",
+            progress.messages,
+            progress.chats_done,
+            progress.elapsed,
+            progress.rate,
+        )
+
+        result = ExportResult(self._directory, progress, error, cancelled)
+        self._call(self._finished_callback, result)
+        return result
+
+    def _get_progress(self) -> ExportProgress:
+        return ExportProgress(
+            chats_done=self._chats_done,
+            chats_total=len(self._jids),
+            messages=self._message_count,
+            elapsed=time.monotonic() - self._start_time,
+        )
+
+    def _export_chat(self, own_jid: JID, jid: JID) -> None:
+        assert self._pks is not None
+        pks = self._pks.get(jid)
+        if pks is None:
+            # No history
+            return
+
+        messages = app.storage.archive.get_messages_for_export(
+            *pks, batch_size=self._batch_size
+        )
+
+        file = None
+        writer = None
+        try:
+            for message in messages:
+                if self._cancel_event.is_set():
+                    return
+
+                if message.call is not None:
+                    continue
+
+                if writer is None:
+                    # Only create files for chats with messages
+                    file = self._open_file(jid)
+                    writer = WRITERS[self._format](file, own_jid, jid)
+                    writer.write_header()
+
+                writer.write_message(message)
+                self._message_count += 1
+
+                now = time.monotonic()
+                if now - self._last_report >= PROGRESS_INTERVAL:
+                    self._last_report = now
+                    self._call(self._progress_callback, self._get_progress())
+
+            if writer is not None:
+                writer.write_footer()
+
+        finally:
+            if file is not None:
+                file.close()
+
+    def _open_file(self, jid: JID) -> TextIO:
+        path = make_path_from_jid(self._directory, jid)
+        path.mkdir(parents=True, exist_ok=True)
+        return open(  # noqa: SIM115
+            path / f"history.{self._format.value}",
+            "w",
+            encoding="utf-8",
+            buffering=WRITE_BUFFER_SIZE,
+        )
@@ -201,6 +201,9 @@ def cleanup(self) -> None:
 
 
 class EntityCapsTask(Task):
+    # The task is finished once the caps module removes it
+    asynchronous = True
+
     def __init__(
         self, account: str, properties: PresenceProperties, callback: Callable[..., Any]
     ) -> None:
@@ -242,6 +245,10 @@ def preconditions_met(self) -> bool:
 
         return client.is_available()
 
+    def get_key(self) -> tuple[str, str, str]:
+        # Only one query per hash runs, its result makes the others obsolete
+        return (self._account, self.entity.method, self.entity.hash)
+
     def __repr__(self) -> str:
         return f"Entity Caps ({self.entity.jid} {self.entity.hash})"
 
@@ -8,8 +8,8 @@
 
 from typing import Any
 
+import math
 import time
-from collections import defaultdict
 from functools import wraps
 from itertools import chain
 
@@ -24,6 +24,7 @@
 from nbxmpp.structs import StanzaHandler
 
 from gajim.common import types
+from gajim.common.chatstate_aggregator import ComposerAggregator
 from gajim.common.const import ClientState
 from gajim.common.modules.base import BaseModule
 from gajim.common.modules.contacts import BareContact
@@ -34,6 +35,10 @@
 PAUSED_AFTER = 10
 REMOTE_PAUSED_AFTER = 30
 
+# Changed composers are collected for this long before group chats are
+# notified (ms)
+COMPOSERS_UPDATE_INTERVAL = 500
+
 
 def ensure_enabled(func: Any) -> Any:
     @wraps(func)
@@ -84,10 +89,11 @@ def __init__(self, con: types.Client) -> None:
 
         # The current chatstate we received from a contact
         self._remote_chatstate: dict[JID, State] = {}
-        # Cache set of participants that are composing for group chats,
-        # to avoid having to iterate over all their chat states to determine
-        # who is typing a message.
-        self._muc_composers: dict[JID, set[JID]] = defaultdict(set)
+        # Participants that are composing in group chats. Group chats are
+        # only notified in batches and if their set of composers changed.
+        self._muc_composers = ComposerAggregator(REMOTE_PAUSED_AFTER)
+        self._composers_update_id: int | None = None
+        self._composers_update_at: float | None = None
 
         self._remote_composing_timeouts: dict[tuple[JID, str], int] = {}
 
@@ -147,6 +153,13 @@ def _presence_received(
 
         self._log.info("Reset chatstate for %s", jid)
 
+        if properties.is_muc_self_presence:
+            self._muc_composers.remove_room(jid.new_as_bare())
+            self._schedule_composers_update()
+        elif properties.from_muc:
+            self._muc_composers.remove(jid.new_as_bare(), jid)
+            self._schedule_composers_update()
+
         contact = self._get_contact_if_exists(jid)
         if contact is None:
             return
@@ -206,23 +219,51 @@ def _process_groupchat_chatstate(
             # Chatstate from our own joined jid resource
             return self._raise_if_necessary(properties)
 
-        m_type = "groupchat"
         state = properties.chatstate
-        self._log.info("Recv: %-10s - %s (%s)", state, jid, m_type)
-
-        self._set_composing_timeout(jid, m_type, state)
+        self._log.debug("Recv: %-10s - %s (groupchat)", state, jid)
 
         if state == State.COMPOSING:
-            self._muc_composers[muc_jid].add(jid)
+            self._muc_composers.set_composing(muc_jid, jid, time.monotonic())
         else:
-            self._muc_composers[muc_jid].discard(jid)
-
-        contact = self._get_contact_if_exists(muc_jid)
-        if contact is not None:
-            contact.notify("chatstate-update")
+            self._muc_composers.remove(muc_jid, jid)
 
+        self._schedule_composers_update()
         self._raise_if_necessary(properties)
 
+    def _schedule_composers_update(self) -> None:
+        # One timeout is pending at most, either for flushing the collected
+        # changes or for the next composer which expires
+        now = time.monotonic()
+        if self._muc_composers.has_changes():
+            update_at = now + COMPOSERS_UPDATE_INTERVAL / 1000
+        else:
+            update_at = self._muc_composers.get_next_expiry()
+            if update_at is None:
+                return
+
+        if self._composers_update_id is not None:
+            assert self._composers_update_at is not None
+            if self._composers_update_at <= update_at:
+                return
+            GLib.source_remove(self._composers_update_id)
+
+        interval = max(0, math.ceil((update_at - now) * 1000))
+        self._composers_update_at = update_at
+        self._composers_update_id = GLib.timeout_add(interval, self._update_composers)
+
+    def _update_composers(self) -> bool:
+        self._composers_update_id = None
+        self._composers_update_at = None
+
+        self._muc_composers.advance(time.monotonic())
+        for muc_jid in self._muc_composers.pop_changed():
+            contact = self._get_contact_if_exists(muc_jid)
+            if contact is not None:
+                contact.notify("chatstate-update")
+
+        self._schedule_composers_update()
+        return GLib.SOURCE_REMOVE
+
     def _set_composing_timeout(self, jid: JID, m_type: str, state: State) -> None:
         self._remove_remote_composing_timeout(jid, m_type)
         if state not in (State.COMPOSING, State.PAUSED):
@@ -241,15 +282,8 @@ def _on_remote_composing_timeout(self, jid: JID, m_type: str) -> None:
             "Set to ACTIVE after timeout has been reached - %s (%s)", jid, m_type
         )
 
-        if m_type == "groupchat":
-            muc_jid = jid.new_as_bare()
-            self._muc_composers[muc_jid].discard(jid)
-            contact = self._get_contact_if_exists(muc_jid)
-
-        else:
-            self._remote_chatstate[jid] = State.ACTIVE
-            contact = self._get_contact_if_exists(jid)
-
+        self._remote_chatstate[jid] = State.ACTIVE
+        contact = self._get_contact_if_exists(jid)
         if contact is not None:
             contact.notify("chatstate-update")
 
@@ -258,7 +292,7 @@ def get_composers(self, muc_jid: JID) -> list[GroupchatParticipant]:
         List of group chat participants that are composing (=typing) for a MUC.
         """
         composers: list[GroupchatParticipant] = []
-        for jid in self._muc_composers[muc_jid]:
+        for jid in self._muc_composers.get_composers(muc_jid):
             contact = self._get_contact(jid, groupchat=True)
             assert isinstance(contact, GroupchatParticipant)
             composers.append(contact)
@@ -459,6 +493,11 @@ def _remove_all_timeouts(self) -> None:
         self._delay_timeout_ids.clear()
         self._remote_composing_timeouts.clear()
 
+        if self._composers_update_id is not None:
+            GLib.source_remove(self._composers_update_id)
+            self._composers_update_id = None
+            self._composers_update_at = None
+
     def cleanup(self) -> None:
         BaseModule.cleanup(self)
         self._remove_all_timeouts()
@@ -468,6 +507,7 @@ def cleanup(self) -> None:
 
         self._chatstates.clear()
         self._remote_chatstate.clear()
+        self._muc_composers.clear()
         self._last_keyboard_activity.clear()
         self._last_mouse_activity.clear()
         self._blocked = []
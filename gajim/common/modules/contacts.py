@@ -551,12 +551,13 @@ def get_avatar(
             style=style,
         )
 
-    def update_presence(self, presence_data: PresenceData) -> None:
+    def update_presence(self, presence_data: PresenceData, notify: bool = True) -> None:
         self._presence = presence_data
         if not presence_data.available:
             for contact in self._resources.values():
                 contact.update_presence(presence_data, notify=False)
-        self.notify("presence-update")
+        if notify:
+            self.notify("presence-update")
 
     def update_avatar(self, sha: str | None) -> None:
         if self._avatar_sha == sha:
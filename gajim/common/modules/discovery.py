@@ -7,18 +7,28 @@
 from __future__ import annotations
 
 from typing import Any
+from typing import NamedTuple
 
+from collections.abc import Callable
 from collections.abc import Generator
 
 import nbxmpp
+from nbxmpp.errors import BaseError
 from nbxmpp.errors import is_error
+from nbxmpp.errors import MalformedStanzaError
 from nbxmpp.errors import StanzaError
+from nbxmpp.errors import TimeoutStanzaError
+from nbxmpp.modules.discovery import get_disco_request
+from nbxmpp.modules.discovery import parse_disco_items
 from nbxmpp.modules.muc.util import MucInfoResult
+from nbxmpp.modules.rsm import parse_rsm
 from nbxmpp.namespaces import Namespace
 from nbxmpp.protocol import Iq
 from nbxmpp.protocol import JID
 from nbxmpp.structs import DiscoInfo
+from nbxmpp.structs import DiscoItems
 from nbxmpp.structs import IqProperties
+from nbxmpp.structs import RSMData
 from nbxmpp.structs import StanzaHandler
 from nbxmpp.task import Task
 
@@ -32,6 +42,28 @@
 from gajim.common.modules.util import as_task
 from gajim.common.util.muc import get_muc_name_from_disco
 
+DISCO_ITEMS_PAGE_SIZE = 100
+
+# Services which do not answer a query within this many seconds are
+# treated as unreachable
+DISCO_TIMEOUT = 10
+
+
+class DiscoItemsPage(NamedTuple):
+    items: DiscoItems
+    rsm: RSMData | None
+
+    @property
+    def next_after(self) -> str | None:
+        """
+        The id after which the next page starts, None for the last page
+        """
+
+        if self.rsm is None or not self.items.items:
+            # Services without result set management send all items at once
+            return None
+        return self.rsm.last
+
 
 class Discovery(BaseModule):
     _nbxmpp_extends = "Discovery"
@@ -276,3 +308,55 @@ def disco_contact(self, contact: types.ContactT) -> Generator[Any, Any]:
 
         contact = self._con.get_module("Contacts").get_contact(result.jid)
         contact.notify("caps-update")
+
+    def disco_items_page(
+        self,
+        jid: str,
+        node: str | None,
+        callback: Callable[[DiscoItemsPage | BaseError], Any],
+        after: str | None = None,
+        max_: int = DISCO_ITEMS_PAGE_SIZE,
+    ) -> None:
+        """
+        Request a page of items with result set management (XEP-0059)
+
+        Services which do not support it answer with all items at once.
+
+        :param after:       The last item id of the previous page
+        """
+
+        iq = get_disco_request(Namespace.DISCO_ITEMS, jid, node)
+        rsm_set = iq.getQuery().addChild("set", namespace=Namespace.RSM)
+        rsm_set.setTagData("max", max_)
+        if after is not None:
+            rsm_set.setTagData("after", after)
+
+        self._con.connection.send_stanza(
+            iq,
+            callback=self._on_disco_items_page,
+            timeout=DISCO_TIMEOUT,
+            user_data={"callback": callback},
+        )
+
+    def _on_disco_items_page(
+        self,
+        _nbxmpp_client: types.NBXMPPClient,
+        stanza: Iq | None,
+        callback: Callable[[DiscoItemsPage | BaseError], Any],
+    ) -> None:
+        if stanza is None:
+            callback(TimeoutStanzaError())
+            return
+
+        if not nbxmpp.isResultNode(stanza):
+            callback(StanzaError(stanza))
+            return
+
+        try:
+            items = parse_disco_items(stanza)
+        except MalformedStanzaError as error:
+            self._log.warning(error)
+            callback(error)
+            return
+
+        callback(DiscoItemsPage(items=items, rsm=parse_rsm(stanza.getQuery())))
@@ -4,10 +4,16 @@
 
 from __future__ import annotations
 
+from typing import Any
+
 import json
 import logging
 from collections.abc import Callable
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
+from gi.repository import GLib
 from nbxmpp.const import AnonymityMode
 from nbxmpp.structs import MuclumbusItem
 from nbxmpp.structs import MuclumbusResult
@@ -27,12 +33,27 @@ class HttpMucSearch(BaseModule):
     def __init__(self, client: types.Client) -> None:
         BaseModule.__init__(self, client)
 
+        # Responses can be large, they are parsed outside of the main loop
+        self._parse_executor: ThreadPoolExecutor | None = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"muc-search-{self._account}"
+        )
+
     def search(
         self,
         keywords: list[str],
         last: str | None,
-        callback: Callable[[MuclumbusResult], None],
+        callback: Callable[[MuclumbusResult | Exception], Any],
     ) -> None:
+        """
+        Request a page of search results
+
+        :param last:        The last item of the previous page, None for
+                            the first page
+
+        :param callback:    Called with the page or the error on the main
+                            thread
+        """
+
         body: dict[str, str | list[str]] = {"keywords": keywords}
         if last is not None:
             body["after"] = last
@@ -54,49 +75,73 @@ def _on_search_result(self, obj: FileTransfer) -> None:
             result = obj.get_result()
         except Exception as error:
             log.warning("Error while requesting muc search: %s", error)
-            callback(EMPTY_RESULT)
+            callback(error)
             return
 
         log.info("Received search result: %s", len(result.content))
 
+        if self._parse_executor is None:
+            return
+
+        future = self._parse_executor.submit(parse_response, result.content)
+        future.add_done_callback(partial(GLib.idle_add, self._on_parsed, callback))
+
+    def _on_parsed(
+        self,
+        callback: Callable[[MuclumbusResult | Exception], Any],
+        future: Future[MuclumbusResult],
+    ) -> bool:
+        if self._parse_executor is None:
+            # Module was cleaned up in the meantime
+            return GLib.SOURCE_REMOVE
+
         try:
-            res = self._parse_response(result.content)
+            res = future.result()
         except Exception as error:
             log.error("Unable to parse response: %s", error)
-            res = EMPTY_RESULT
+            callback(error)
+            return GLib.SOURCE_REMOVE
 
         callback(res)
+        return GLib.SOURCE_REMOVE
+
+    def cleanup(self) -> None:
+        BaseModule.cleanup(self)
+        if self._parse_executor is not None:
+            self._parse_executor.shutdown(wait=False, cancel_futures=True)
+            self._parse_executor = None
 
-    def _parse_response(self, content: bytes) -> MuclumbusResult:
-        response = json.loads(content)
-        result = response["result"]
-        items = result.get("items")
-        if items is None:
-            return EMPTY_RESULT
-
-        results: list[MuclumbusItem] = []
-        for item in items:
-            try:
-                anonymity_mode = AnonymityMode(item["anonymity_mode"])
-            except (ValueError, KeyError):
-                anonymity_mode = AnonymityMode.UNKNOWN
-
-            results.append(
-                MuclumbusItem(
-                    jid=item["address"],
-                    name=item["name"] or "",
-                    nusers=str(item["nusers"] or ""),
-                    description=item["description"] or "",
-                    language=item["language"] or "",
-                    is_open=item["is_open"],
-                    anonymity_mode=anonymity_mode,
-                )
-            )
 
-        return MuclumbusResult(
-            first=None,
-            last=result["last"],
-            max=None,
-            end=not result["more"],
-            items=results,
+def parse_response(content: bytes) -> MuclumbusResult:
+    response = json.loads(content)
+    result = response["result"]
+    items = result.get("items")
+    if items is None:
+        return EMPTY_RESULT
+
+    results: list[MuclumbusItem] = []
+    for item in items:
+        try:
+            anonymity_mode = AnonymityMode(item["anonymity_mode"])
+        except (ValueError, KeyError):
+            anonymity_mode = AnonymityMode.UNKNOWN
+
+        results.append(
+            MuclumbusItem(
+                jid=item["address"],
+                name=item["name"] or "",
+                nusers=str(item["nusers"] or ""),
+                description=item["description"] or "",
+                language=item["language"] or "",
+                is_open=item["is_open"],
+                anonymity_mode=anonymity_mode,
+            )
         )
+
+    return MuclumbusResult(
+        first=None,
+        last=result["last"],
+        max=None,
+        end=not result["more"],
+        items=results,
+    )
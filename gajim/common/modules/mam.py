@@ -228,9 +228,10 @@ def _mam_message_received(
 
         assert properties.remote_jid is not None
         stanza_id = properties.mam.id
+        timestamp = datetime.fromtimestamp(properties.mam.timestamp, UTC)
 
         if app.storage.archive.check_if_stanza_id_exists(
-            self._account, properties.remote_jid, stanza_id
+            self._account, properties.remote_jid, stanza_id, timestamp
         ):
             self._log.info("Received duplicated message from MAM: %s", stanza_id)
             raise nbxmpp.NodeProcessed
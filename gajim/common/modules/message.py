@@ -165,7 +165,7 @@ def _message_received(
             and origin_id is not None
         ):
             if app.storage.archive.check_if_message_id_exists(
-                self._account, remote_jid, origin_id
+                self._account, remote_jid, origin_id, timestamp
             ):
                 self._log.info("Duplicated message received: %s", origin_id)
                 return
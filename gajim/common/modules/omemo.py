@@ -13,12 +13,19 @@
 from typing import Literal
 
 import datetime as dt
+import time
+from collections.abc import Callable
 from collections.abc import Generator
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
 
 import nbxmpp
+from gi.repository import GLib
 from nbxmpp.errors import is_error
+from nbxmpp.errors import StanzaError
 from nbxmpp.modules.omemo import create_omemo_message
 from nbxmpp.modules.omemo import get_key_transport_message
 from nbxmpp.namespaces import Namespace
@@ -29,6 +36,7 @@
 from nbxmpp.structs import MessageProperties
 from nbxmpp.structs import OMEMOMessage
 from nbxmpp.structs import StanzaHandler
+from nbxmpp.task import Task as nbxmpp_Task
 from omemo_dr.const import OMEMOTrust
 from omemo_dr.exceptions import DecryptionFailed
 from omemo_dr.exceptions import DuplicateMessage
@@ -40,6 +48,7 @@
 from omemo_dr.structs import IdentityInfo
 from omemo_dr.structs import OMEMOBundle
 from omemo_dr.structs import OMEMOConfig
+from omemo_dr.structs import OMEMOMessage as OMEMOMessageT
 
 from gajim.common import app
 from gajim.common import configpaths
@@ -65,7 +74,6 @@
 from gajim.common.modules.util import PublicKeyData
 from gajim.common.storage.omemo import OMEMOStorage
 from gajim.common.structs import OutgoingMessage
-from gajim.common.util.decorators import cache_with_ttl
 from gajim.common.util.decorators import event_filter
 from gajim.common.util.text import format_fingerprint
 
@@ -92,6 +100,15 @@
 DeviceIdT = int
 IdentityT = tuple[DeviceIdT, IdentityKey]
 
+# (jid, None) for a devicelist, (jid, device id) for a bundle
+FetchKeyT = tuple[str, DeviceIdT | None]
+
+# Devicelists and bundles are not requested again within this time,
+# also not after a restart
+FETCH_TTL = 7200
+FETCH_TIMEOUT = 30
+MAX_CONCURRENT_FETCHES = 5
+
 
 @dataclass
 class OMEMOPublicKeyData(PublicKeyData):
@@ -156,7 +173,7 @@ def __init__(self, client: types.Client) -> None:
 
         data_dir = Path(configpaths.get("MY_DATA"))
         db_path = data_dir / f"omemo_{self._own_jid}.db"
-        storage = OMEMOStorage(self._account, db_path, self._log)
+        self._storage = OMEMOStorage(self._account, db_path, self._log)
 
         omemo_config = OMEMOConfig(
             default_prekey_amount=100,
@@ -167,13 +184,27 @@ def __init__(self, client: types.Client) -> None:
         )
 
         self._backend = OMEMOSessionManager(
-            self._own_jid, storage, omemo_config, self._account
+            self._own_jid, self._storage, omemo_config, self._account
         )
         self._backend.register_signal("republish-bundle", self._on_republish_bundle)
 
         self._omemo_groupchats: set[str] = set()
+        self._group_members: dict[str, set[str]] = {}
         self._muc_temp_store: dict[bytes, str] = {}
 
+        # A single worker encrypts messages one after another, this keeps
+        # the order of sent messages intact. Devicelist updates and session
+        # building run on the same worker. All other backend calls are made
+        # inside a storage batch, which holds the storage lock.
+        self._encryption_executor: ThreadPoolExecutor | None = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"omemo-{self._account}"
+        )
+
+        self._fetch_queue: dict[FetchKeyT, None] = {}
+        self._fetching: set[FetchKeyT] = set()
+        self._fetch_total = 0
+        self._fetch_finished = 0
+
     @event_filter(["account"])
     def _on_signed_in(self, _event: SignedIn) -> None:
         self._log.info("Publish our bundle after sign in")
@@ -220,18 +251,23 @@ def _on_affiliation_change(
         self._set_group_members(contact.jid)
 
     def _set_group_members(self, muc_jid: JID) -> None:
-        self._log.info("Set group members: %s", muc_jid)
         affiliations = self._client.get_module("MUC").get_affiliations(muc_jid)
         members: set[JID] = set()
         members.update(*affiliations.values())
         str_jids = set(map(str, members))
 
-        self._backend.set_group_members(str(muc_jid), str_jids)
+        # Affiliation signals are emitted often while joining,
+        # only update the backend if the members actually changed
+        if self._group_members.get(str(muc_jid)) != str_jids:
+            self._log.info("Set group members: %s", muc_jid)
+            self._group_members[str(muc_jid)] = str_jids
+            with self._storage.batch():
+                self._backend.set_group_members(str(muc_jid), set(str_jids))
 
         for jid in str_jids:
             if not self._is_contact_in_roster(jid):
                 self._log.info("%s not in roster, query devicelist...", jid)
-                self._request_device_list_ttl(jid)
+                self._queue_fetch(jid)
 
     def _on_republish_bundle(
         self, _session: OMEMOSessionManager, _signal_name: str, bundle: OMEMOBundle
@@ -244,7 +280,8 @@ def backend(self) -> OMEMOSessionManager:
         return self._backend
 
     def get_our_public_key(self) -> OMEMOPublicKeyData | None:
-        device_id, identity_key = self._backend.get_our_identity()
+        with self._storage.batch():
+            device_id, identity_key = self._backend.get_our_identity()
 
         return OMEMOPublicKeyData(
             active=True,
@@ -258,11 +295,12 @@ def get_our_public_key(self) -> OMEMOPublicKeyData | None:
         )
 
     def get_public_keys(self, jid: JID, *, is_groupchat: bool) -> list[PublicKeyData]:
-        identity_infos = self._backend.get_identity_infos(
-            str(jid),
-            only_active=is_groupchat,
-            trust=OMEMOTrust.UNDECIDED if is_groupchat else None,
-        )
+        with self._storage.batch():
+            identity_infos = self._backend.get_identity_infos(
+                str(jid),
+                only_active=is_groupchat,
+                trust=OMEMOTrust.UNDECIDED if is_groupchat else None,
+            )
 
         return [OMEMOPublicKeyData.from_identity_info(info) for info in identity_infos]
 
@@ -270,19 +308,21 @@ def set_public_key_trust(
         self, public_key_data: PublicKeyData, trust: Trust
     ) -> None:
         public_key_data = cast(OMEMOPublicKeyData, public_key_data)
-        self._backend.set_trust(
-            str(public_key_data.address),
-            public_key_data.public_key,
-            OMEMOTrust[trust.name],
-        )
+        with self._storage.batch():
+            self._backend.set_trust(
+                str(public_key_data.address),
+                public_key_data.public_key,
+                OMEMOTrust[trust.name],
+            )
 
     def remove_public_key(self, public_key_data: PublicKeyData) -> None:
         public_key_data = cast(OMEMOPublicKeyData, public_key_data)
-        self._backend.delete_session(
-            str(public_key_data.address),
-            public_key_data.device_id,
-            delete_identity=True,
-        )
+        with self._storage.batch():
+            self._backend.delete_session(
+                str(public_key_data.address),
+                public_key_data.device_id,
+                delete_identity=True,
+            )
 
     def check_send_preconditions(self, contact: types.ChatContactT) -> bool:
         jid = str(contact.jid)
@@ -294,9 +334,12 @@ def check_send_preconditions(self, contact: types.ChatContactT) -> bool:
             if not self._chat_pre_conditions_satisfied(contact):
                 return False
 
-        if self.backend.get_identity_infos(
-            jid, only_active=True, trust=OMEMOTrust.UNDECIDED
-        ):
+        with self._storage.batch():
+            undecided = self.backend.get_identity_infos(
+                jid, only_active=True, trust=OMEMOTrust.UNDECIDED
+            )
+
+        if undecided:
             self._log.info("Undecided keys for %s", jid)
             app.ged.raise_event(
                 EncryptionInfo(
@@ -331,11 +374,28 @@ def _groupchat_pre_conditions_satisfied(
 
         jid = str(contact.jid)
         has_trusted_keys = False
-        for member_jid in self.backend.get_group_members(jid, without_self=False):
+        with self._storage.batch():
+            members = self.backend.get_group_members(jid, without_self=False)
+
+        for member_jid in members:
             self._request_bundles_for_new_devices(member_jid)
             if self._has_trusted_keys(member_jid):
                 has_trusted_keys = True
 
+        if not has_trusted_keys and self._fetch_total:
+            self._log.info("No trusted keys for %s, fetching keys", jid)
+            app.ged.raise_event(
+                EncryptionInfo(
+                    account=contact.account,
+                    jid=contact.jid,
+                    type=EncryptionInfoMsg.FETCHING_KEYS,
+                    message=EncryptionInfoMsg.FETCHING_KEYS.value.format(
+                        finished=self._fetch_finished, total=self._fetch_total
+                    ),
+                )
+            )
+            return False
+
         if not has_trusted_keys:
             self._log.info("No trusted keys for %s", jid)
             app.ged.raise_event(
@@ -352,8 +412,11 @@ def _groupchat_pre_conditions_satisfied(
     def _chat_pre_conditions_satisfied(self, contact: types.ChatContactT) -> bool:
 
         jid = str(contact.jid)
-        if not self.backend.get_devices(jid, without_self=True):
-            self.request_devicelist(jid)
+        with self._storage.batch():
+            devices = self.backend.get_devices(jid, without_self=True)
+
+        if not devices:
+            self._queue_fetch(jid, force=True)
             app.ged.raise_event(
                 EncryptionInfo(
                     account=contact.account,
@@ -380,22 +443,80 @@ def _chat_pre_conditions_satisfied(self, contact: types.ChatContactT) -> bool:
     def _is_omemo_groupchat(self, room_jid: JID) -> bool:
         return str(room_jid) in self._omemo_groupchats
 
-    def encrypt_message(self, message: OutgoingMessage) -> bool:
-        if not message.has_text():
-            return False
+    def encrypt_message(
+        self,
+        message: OutgoingMessage,
+        callback: Callable[[OutgoingMessage], Any],
+        error_callback: Callable[[OutgoingMessage], Any],
+    ) -> None:
+        """
+        Encrypt a message in a worker thread
+
+        :param message:         The message to encrypt
+
+        :param callback:        Called with the message once it is encrypted,
+                                or right away in order if it has no text
+
+        :param error_callback:  Called with the message if encryption failed
 
-        remote_jid = message.contact.jid
+        Messages are encrypted one after another, the callbacks are called on
+        the main thread in the order the messages were passed in.
+        """
 
-        client = app.get_client(self._account)
-        contact = client.get_module("Contacts").get_contact(remote_jid)
+        assert self._encryption_executor is not None
 
         text = message.get_text()
-        assert text is not None
-        omemo_message = self.backend.encrypt(
-            str(remote_jid), text, groupchat=contact.is_groupchat
+        if not message.has_text() or text is None:
+            future = self._encryption_executor.submit(lambda: None)
+
+        else:
+            remote_jid = message.contact.jid
+            contact = self._client.get_module("Contacts").get_contact(remote_jid)
+            future = self._encryption_executor.submit(
+                self._encrypt, str(remote_jid), text, contact.is_groupchat
+            )
+
+        future.add_done_callback(
+            partial(
+                GLib.idle_add,
+                self._on_encrypt_finished,
+                message,
+                callback,
+                error_callback,
+            )
         )
+
+    def _encrypt(self, jid: str, text: str, groupchat: bool) -> OMEMOMessageT | None:
+        # Runs in the worker thread
+        with self._storage.batch():
+            return self.backend.encrypt(jid, text, groupchat=groupchat)
+
+    def _on_encrypt_finished(
+        self,
+        message: OutgoingMessage,
+        callback: Callable[[OutgoingMessage], Any],
+        error_callback: Callable[[OutgoingMessage], Any],
+        future: Future[OMEMOMessageT | None],
+    ) -> bool:
+        if self._encryption_executor is None:
+            # Module was cleaned up in the meantime
+            return GLib.SOURCE_REMOVE
+
+        if not message.has_text():
+            callback(message)
+            return GLib.SOURCE_REMOVE
+
+        try:
+            omemo_message = future.result()
+        except Exception:
+            self._log.exception("Encryption error")
+            error_callback(message)
+            return GLib.SOURCE_REMOVE
+
         if omemo_message is None:
-            raise Exception("Encryption error")
+            self._log.warning("Encryption error")
+            error_callback(message)
+            return GLib.SOURCE_REMOVE
 
         assert omemo_message.payload is not None
 
@@ -406,6 +527,8 @@ def encrypt_message(self, message: OutgoingMessage) -> bool:
         )
 
         if message.is_groupchat:
+            text = message.get_text()
+            assert text is not None
             self._muc_temp_store[omemo_message.payload] = text
 
         message.set_encryption(
@@ -417,13 +540,17 @@ def encrypt_message(self, message: OutgoingMessage) -> bool:
         )
 
         self._debug_print_stanza(message.get_stanza())
-        return True
+        callback(message)
+        return GLib.SOURCE_REMOVE
 
     def _send_key_transport_message(
-        self, typ: Literal["chat", "groupchat"], jid: str, devices: list[int]
+        self,
+        typ: Literal["chat", "groupchat"],
+        jid: str,
+        devices: list[int],
+        omemo_message: OMEMOMessageT | None,
     ) -> None:
 
-        omemo_message = self.backend.encrypt_key_transport(jid, devices)
         if omemo_message is None:
             self._log.warning("Key transport message to %s (%s) failed", jid, devices)
             return
@@ -462,10 +589,11 @@ def _message_received(
 
         assert isinstance(properties.omemo, OMEMOMessage)
         try:
-            plaintext, fingerprint, trust = self.backend.decrypt_message(
-                properties.omemo,  # type: ignore
-                from_jid,
-            )
+            with self._storage.batch():
+                plaintext, fingerprint, trust = self.backend.decrypt_message(
+                    properties.omemo,  # type: ignore
+                    from_jid,
+                )
         except (KeyExchangeMessage, DuplicateMessage):
             raise NodeProcessed
 
@@ -555,24 +683,107 @@ def _check_if_omemo_capable(self, jid: JID) -> None:
 
     def _request_bundles_for_new_devices(self, jid_: str) -> None:
         for jid in [jid_, self._own_jid]:
-            device_ids = self.backend.get_devices_without_sessions(jid)
+            with self._storage.batch():
+                device_ids = self.backend.get_devices_without_sessions(jid)
             for device_id in device_ids:
-                self._request_bundle_ttl(jid, device_id)
+                self._queue_fetch(jid, device_id)
 
     def _has_trusted_keys(self, jid: str) -> bool:
-        infos = self.backend.get_identity_infos(
-            jid, only_active=True, trust=[OMEMOTrust.VERIFIED, OMEMOTrust.BLIND]
-        )
+        with self._storage.batch():
+            infos = self.backend.get_identity_infos(
+                jid, only_active=True, trust=[OMEMOTrust.VERIFIED, OMEMOTrust.BLIND]
+            )
         return bool(infos)
 
     def set_bundle(self, bundle: OMEMOBundle | None = None) -> None:
-        if bundle is None:
-            bundle = self.backend.get_bundle(Namespace.OMEMO_TEMP)
-        self._nbxmpp("OMEMO").set_bundle(bundle, self.backend.get_our_device())
+        with self._storage.batch():
+            if bundle is None:
+                bundle = self.backend.get_bundle(Namespace.OMEMO_TEMP)
+            device_id = self.backend.get_our_device()
+        self._nbxmpp("OMEMO").set_bundle(bundle, device_id)
+
+    def _queue_fetch(
+        self, jid: str, device_id: int | None = None, *, force: bool = False
+    ) -> None:
+        """
+        Queue a devicelist request, or a bundle request if device_id is given
 
-    @cache_with_ttl(ttl=7200)
-    def _request_bundle_ttl(self, jid: str, device_id: int) -> None:
-        self.request_bundle(jid, device_id)
+        Requests are deduplicated and only a limited number of them is
+        running at the same time. Requests made within FETCH_TTL are not
+        repeated, unless force is set.
+        """
+
+        key = (jid, device_id)
+        if key in self._fetch_queue or key in self._fetching:
+            return
+
+        if not force and self._use_previous_fetch(jid, device_id):
+            return
+
+        self._fetch_queue[key] = None
+        self._fetch_total += 1
+        self._process_fetch_queue()
+
+    def _use_previous_fetch(self, jid: str, device_id: int | None) -> bool:
+        min_timestamp = time.time() - FETCH_TTL
+        with self._storage.batch():
+            if device_id is not None:
+                timestamp = self._storage.get_bundle_request_timestamp(jid, device_id)
+                return timestamp is not None and timestamp > min_timestamp
+
+            result = self._storage.get_devicelist(jid)
+            has_devices = bool(self.backend.get_devices(jid))
+
+        if result is None:
+            return False
+
+        devicelist, timestamp = result
+        if timestamp <= min_timestamp:
+            return False
+
+        if not has_devices:
+            self._log.info("Use stored devicelist for %s: %s", jid, devicelist)
+            self._process_devicelist_update(jid, devicelist, store=False)
+        return True
+
+    def _process_fetch_queue(self) -> None:
+        while self._fetch_queue and len(self._fetching) < MAX_CONCURRENT_FETCHES:
+            key = next(iter(self._fetch_queue))
+            del self._fetch_queue[key]
+            self._fetching.add(key)
+
+            jid, device_id = key
+            if device_id is None:
+                self.request_devicelist(
+                    jid,
+                    timeout=FETCH_TIMEOUT,
+                    callback=self._on_fetch_finished,
+                    user_data=key,
+                )
+            else:
+                self.request_bundle(
+                    jid,
+                    device_id,
+                    timeout=FETCH_TIMEOUT,
+                    callback=self._on_fetch_finished,
+                    user_data=key,
+                )
+
+    def _on_fetch_finished(self, task: nbxmpp_Task) -> None:
+        key = cast(FetchKeyT, task.get_user_data())
+        self._fetching.discard(key)
+        self._fetch_finished += 1
+
+        if self._fetch_queue or self._fetching:
+            self._log.debug(
+                "Fetched %s of %s keys", self._fetch_finished, self._fetch_total
+            )
+            self._process_fetch_queue()
+            return
+
+        self._log.info("Finished fetching %s keys", self._fetch_total)
+        self._fetch_total = 0
+        self._fetch_finished = 0
 
     @as_task
     def request_bundle(self, jid: str, device_id: int) -> Generator[Any, Any]:
@@ -582,19 +793,39 @@ def request_bundle(self, jid: str, device_id: int) -> Generator[Any, Any]:
 
         bundle = yield self._nbxmpp("OMEMO").request_bundle(jid, device_id)
 
+        if bundle is None or isinstance(bundle, StanzaError):
+            # Don't ask again if the device has no bundle
+            with self._storage.batch():
+                self._storage.set_bundle_request_timestamp(jid, device_id)
+
         if is_error(bundle) or bundle is None:
             self._log.info("Bundle request failed: %s %s: %s", jid, device_id, bundle)
             return
 
-        try:
+        self._run_in_worker(
+            partial(self._on_session_built, jid, device_id),
+            self._build_session,
+            jid,
+            device_id,
+            bundle,
+        )
+
+    def _build_session(
+        self, jid: str, device_id: int, bundle: OMEMOBundle
+    ) -> OMEMOMessageT | None:
+        # Runs in the worker thread, returns the key transport message
+        with self._storage.batch():
             self.backend.build_session(jid, bundle)
-        except Exception as error:
-            self._log.error("Building session failed: %s", error)
-            return
+            self._storage.set_bundle_request_timestamp(jid, device_id)
+            return self.backend.encrypt_key_transport(jid, [device_id])
+
+    def _on_session_built(
+        self, jid: str, device_id: int, omemo_message: OMEMOMessageT | None
+    ) -> None:
 
         self._log.info("Session created for: %s", jid)
         # TODO: In MUC we should send a groupchat message
-        self._send_key_transport_message("chat", jid, [device_id])
+        self._send_key_transport_message("chat", jid, [device_id], omemo_message)
 
         # Trigger dialog to trust new Fingerprints if
         # the Chat Window is Open
@@ -610,20 +841,20 @@ def request_bundle(self, jid: str, device_id: int) -> Generator[Any, Any]:
         )
 
     def set_devicelist(self, devicelist: list[int] | None = None) -> None:
-        devicelist_: set[int] = {self.backend.get_our_device()}
+        with self._storage.batch():
+            devicelist_: set[int] = {self.backend.get_our_device()}
         if devicelist is not None:
             devicelist_.update(devicelist)
         self._log.info("Publishing own devicelist: %s", devicelist_)
         self._nbxmpp("OMEMO").set_devicelist(devicelist_)
 
     def clear_keylist(self) -> None:
-        self.backend.update_devicelist(self._own_jid, [self.backend.get_our_device()])
+        with self._storage.batch():
+            self.backend.update_devicelist(
+                self._own_jid, [self.backend.get_our_device()]
+            )
         self.set_devicelist()
 
-    @cache_with_ttl(ttl=7200)
-    def _request_device_list_ttl(self, jid: str) -> None:
-        self.request_devicelist(jid)
-
     @as_task
     def request_devicelist(self, jid: str | None = None) -> Generator[Any, Any]:
         _task = yield  # noqa: F841
@@ -634,11 +865,13 @@ def request_devicelist(self, jid: str | None = None) -> Generator[Any, Any]:
         self._log.info("Request devicelist for %s", jid)
 
         devicelist = yield self._nbxmpp("OMEMO").request_devicelist(jid=jid)
+        # Only store answers, a timeout is no reason to not ask again
+        store = not is_error(devicelist) or isinstance(devicelist, StanzaError)
         if is_error(devicelist) or devicelist is None:
             self._log.info("Devicelist request failed: %s %s", jid, devicelist)
             devicelist = []
 
-        self._process_devicelist_update(jid, cast(list[int], devicelist))
+        self._process_devicelist_update(jid, cast(list[int], devicelist), store=store)
 
     @event_node(Namespace.OMEMO_TEMP_DL)
     def _devicelist_notification_received(
@@ -656,37 +889,90 @@ def _devicelist_notification_received(
 
         self._process_devicelist_update(str(properties.jid), devicelist)
 
-    def _process_devicelist_update(self, jid: str, devicelist: list[int]) -> None:
+    def _process_devicelist_update(
+        self, jid: str, devicelist: list[int], store: bool = True
+    ) -> None:
+
         own_devices = self._client.get_own_jid().bare_match(jid)
         if own_devices:
             jid = self._own_jid
 
         self._log.info("Received device list for %s: %s", jid, devicelist)
         # Pass a copy, we need the full list for potential set_devicelist()
-        self.backend.update_devicelist(jid, list(devicelist))
+        self._run_in_worker(
+            partial(self._on_devicelist_updated, jid, devicelist, own_devices),
+            self._update_devicelist,
+            jid,
+            list(devicelist),
+            store,
+        )
 
-        if own_devices:
-            if not self.backend.is_our_device_published():
-                # Our own device_id is not in the list, it could be
-                # overwritten by some other client
-                self.set_devicelist(devicelist)
+    def _update_devicelist(self, jid: str, devicelist: list[int], store: bool) -> bool:
+        # Runs in the worker thread, returns if our device is published
+        with self._storage.batch():
+            if store:
+                self._storage.store_devicelist(jid, devicelist)
+            self.backend.update_devicelist(jid, devicelist)
+            return self.backend.is_our_device_published()
+
+    def _on_devicelist_updated(
+        self, jid: str, devicelist: list[int], own_devices: bool, published: bool
+    ) -> None:
+
+        if own_devices and not published:
+            # Our own device_id is not in the list, it could be
+            # overwritten by some other client
+            self.set_devicelist(devicelist)
 
         self._request_bundles_for_new_devices(jid)
 
+    def _run_in_worker(
+        self, callback: Callable[[Any], Any], func: Callable[..., Any], *args: Any
+    ) -> None:
+        """
+        Run a backend operation in the worker thread
+
+        The worker runs it after all pending encryptions, callback is called
+        with the result on the main thread. Errors are logged.
+        """
+
+        assert self._encryption_executor is not None
+        future = self._encryption_executor.submit(func, *args)
+        future.add_done_callback(
+            partial(GLib.idle_add, self._on_worker_finished, callback)
+        )
+
+    def _on_worker_finished(
+        self, callback: Callable[[Any], Any], future: Future[Any]
+    ) -> bool:
+        if self._encryption_executor is None:
+            # Module was cleaned up in the meantime
+            return GLib.SOURCE_REMOVE
+
+        try:
+            result = future.result()
+        except Exception as error:
+            self._log.error("Backend operation failed: %s", error)
+            return GLib.SOURCE_REMOVE
+
+        callback(result)
+        return GLib.SOURCE_REMOVE
+
     def _debug_print_stanza(self, stanza: nbxmpp.Node) -> None:
         stanzastr = "\n" + stanza.__str__(fancy=True)
         stanzastr = stanzastr[0:-1]
         self._log.debug(stanzastr)
 
     def compose_trust_uri(self, jid: JID) -> str:
-        verified_identities = [
-            (info.device_id, info.public_key)
-            for info in self._backend.get_identity_infos(
-                jid.bare, only_active=True, trust=OMEMOTrust.VERIFIED
-            )
-        ]
-        if self._client.is_own_jid(jid):
-            verified_identities.insert(0, self._backend.get_our_identity())
+        with self._storage.batch():
+            verified_identities = [
+                (info.device_id, info.public_key)
+                for info in self._backend.get_identity_infos(
+                    jid.bare, only_active=True, trust=OMEMOTrust.VERIFIED
+                )
+            ]
+            if self._client.is_own_jid(jid):
+                verified_identities.insert(0, self._backend.get_our_identity())
 
         query = (
             (
@@ -704,5 +990,8 @@ def compose_trust_uri(self, jid: JID) -> str:
 
     def cleanup(self) -> None:
         BaseModule.cleanup(self)
+        if self._encryption_executor is not None:
+            self._encryption_executor.shutdown(wait=True, cancel_futures=True)
+            self._encryption_executor = None
         self._backend.destroy()
         del self._backend
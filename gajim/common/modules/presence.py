@@ -12,6 +12,7 @@
 import time
 
 import nbxmpp
+from gi.repository import GLib
 from nbxmpp.namespaces import Namespace
 from nbxmpp.protocol import JID
 from nbxmpp.structs import PresenceProperties
@@ -20,6 +21,7 @@
 from gajim.common import app
 from gajim.common import idle
 from gajim.common import types
+from gajim.common.const import SimpleClientState
 from gajim.common.events import PresenceReceived
 from gajim.common.events import ShowChanged
 from gajim.common.events import SubscribedPresenceReceived
@@ -31,6 +33,13 @@
 from gajim.common.modules.contacts import ResourceContact
 from gajim.common.structs import PresenceData
 
+# Presences received after sign in are applied in batches of this
+# interval (ms), until an interval passes without presences
+PRESENCE_BATCH_INTERVAL = 100
+
+# Presences are no longer batched this many seconds after sign in
+PRESENCE_BATCH_MAX_DURATION = 30
+
 
 class Presence(BaseModule):
     _nbxmpp_extends = "BasePresence"
@@ -89,6 +98,85 @@ def __init__(self, con: types.Client) -> None:
         # list of jid to auto-authorize
         self._jids_for_auto_auth: set[JID] = set()
 
+        # Presences of roster contacts received after sign in, only the
+        # latest presence of each resource is kept
+        self._pending_presences: dict[
+            JID, tuple[nbxmpp.protocol.Presence, PresenceProperties]
+        ] = {}
+        self._batching_since: float | None = None
+        self._batch_source_id: int | None = None
+
+        self._client.connect_signal("state-changed", self._on_client_state_changed)
+
+    def _on_client_state_changed(
+        self, _client: types.Client, _signal_name: str, state: SimpleClientState
+    ) -> None:
+        if state.is_connected:
+            # The server sends the presences of all contacts after sign in
+            self._batching_since = time.monotonic()
+
+        elif state.is_disconnected:
+            self._stop_batching()
+            self._pending_presences.clear()
+
+    def _is_batching(self) -> bool:
+        if self._batching_since is None:
+            return False
+
+        if time.monotonic() - self._batching_since > PRESENCE_BATCH_MAX_DURATION:
+            self._stop_batching()
+            self._apply_pending_presences()
+            return False
+        return True
+
+    def _stop_batching(self) -> None:
+        self._batching_since = None
+        if self._batch_source_id is not None:
+            GLib.source_remove(self._batch_source_id)
+            self._batch_source_id = None
+
+    def _queue_presence(
+        self, stanza: nbxmpp.protocol.Presence, properties: PresenceProperties
+    ) -> None:
+        assert properties.jid is not None
+        self._pending_presences.pop(properties.jid, None)
+        self._pending_presences[properties.jid] = (stanza, properties)
+
+        if self._batch_source_id is None:
+            self._batch_source_id = GLib.timeout_add(
+                PRESENCE_BATCH_INTERVAL, self._on_batch_timeout
+            )
+
+    def _on_batch_timeout(self) -> bool:
+        if not self._pending_presences:
+            self._log.info("Stop batching presences")
+            self._batch_source_id = None
+            self._stop_batching()
+            return GLib.SOURCE_REMOVE
+
+        self._apply_pending_presences()
+        return GLib.SOURCE_CONTINUE
+
+    def _apply_pending_presences(self) -> None:
+        if not self._pending_presences:
+            return
+
+        pending = list(self._pending_presences.values())
+        self._pending_presences.clear()
+        self._log.info("Apply %s presences", len(pending))
+
+        contacts: dict[JID, BareContact] = {}
+        for _stanza, properties in pending:
+            contact = self._update_contact(properties, notify=False)
+            contacts[contact.jid] = contact
+
+        # Notify each contact once, no matter how many resources changed
+        for contact in contacts.values():
+            contact.notify("presence-update")
+
+        for stanza, properties in pending:
+            self._raise_presence_received(stanza, properties)
+
     def _presence_received(
         self,
         _con: types.NBXMPPClient,
@@ -119,12 +207,11 @@ def _presence_received(
             self._log.warning(stanza)
             return
 
-        presence_data = PresenceData.from_presence(properties)
-        self._presence_store[properties.jid] = presence_data
+        if not properties.is_self_presence and self._is_batching():
+            self._queue_presence(stanza, properties)
+            return
 
-        contact = self._client.get_module("Contacts").get_contact(properties.jid)
-        assert isinstance(contact, BareContact | ResourceContact)
-        contact.update_presence(presence_data)
+        self._update_contact(properties, notify=True)
 
         assert properties.type is not None
         assert properties.show is not None
@@ -134,6 +221,34 @@ def _presence_received(
             )
             return
 
+        self._raise_presence_received(stanza, properties)
+
+    def _update_contact(
+        self, properties: PresenceProperties, notify: bool
+    ) -> BareContact:
+        assert properties.jid is not None
+        presence_data = PresenceData.from_presence(properties)
+        self._presence_store[properties.jid] = presence_data
+
+        contacts = self._client.get_module("Contacts")
+        contact = contacts.get_contact(properties.jid)
+        assert isinstance(contact, BareContact | ResourceContact)
+        contact.update_presence(presence_data, notify=notify)
+
+        if isinstance(contact, BareContact):
+            return contact
+
+        bare_contact = contacts.get_contact(properties.jid.new_as_bare())
+        assert isinstance(bare_contact, BareContact)
+        return bare_contact
+
+    def _raise_presence_received(
+        self, stanza: nbxmpp.protocol.Presence, properties: PresenceProperties
+    ) -> None:
+        assert properties.jid is not None
+        assert properties.type is not None
+        assert properties.show is not None
+
         show = properties.show.value
         if properties.type.is_unavailable:
             show = "offline"
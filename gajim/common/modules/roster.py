@@ -61,6 +61,7 @@ def load_roster(self) -> None:
             app.settings.set_account_setting(self._account, "roster_version", "")
             return
 
+        app.storage.archive.preload_contacts(self._account)
         for jid in roster:
             self._con.get_module("Contacts").add_contact(jid)
 
@@ -112,6 +113,7 @@ def _set_roster_from_data(self, items: list[RosterItem]) -> None:
         self._roster.clear()
         self._groups = None
 
+        app.storage.archive.preload_contacts(self._account)
         for item in items:
             self._log.info(item)
             self._con.get_module("Contacts").add_contact(item.jid)
@@ -265,19 +265,29 @@ def _muc_update_received(self, properties: PresenceProperties) -> None:
 
 
 class VCardAvatarsTask(Task):
+    asynchronous = True
+
     def __init__(
         self, contact: VCardContactsT, sha: str, callback: Callable[..., Any]
     ) -> None:
 
-        Task.__init__(self)
+        # Avatars of contacts are requested before those of participants
+        priority = 1 if isinstance(contact, GroupchatParticipant) else 0
+        Task.__init__(self, priority)
         self._contact = contact
         self._sha = sha
         self._callback = weakref.WeakMethod(callback)
 
     def execute(self) -> None:
         callback = self._callback()
-        if callback is not None:
-            callback(self._contact, self._sha)
+        if callback is None:
+            self.set_finished()
+            return
+
+        callback(self._contact, self._sha, callback=self._on_finished)
+
+    def _on_finished(self, _task: Any) -> None:
+        self.set_finished()
 
     def preconditions_met(self) -> bool:
         try:
@@ -297,6 +307,10 @@ def preconditions_met(self) -> bool:
 
         return True
 
+    def get_key(self) -> tuple[str, str]:
+        # A task which runs after a similar one finds the avatar in storage
+        return (self._contact.account, self._sha)
+
     def __repr__(self) -> str:
         return f"VCardAvatars ({self._contact.jid} {self._sha})"
 
@@ -0,0 +1,239 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-only
+
+from __future__ import annotations
+
+from typing import Any
+
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from nbxmpp.errors import BaseError
+from nbxmpp.modules.dataforms import SimpleDataForm
+from nbxmpp.structs import MuclumbusResult
+from nbxmpp.task import Task
+
+from gajim.common import app
+from gajim.common import types
+
+log = logging.getLogger("gajim.c.muc_search")
+
+# Result pages of a query are reused for this long
+SEARCH_CACHE_TTL = 15 * 60
+SEARCH_CACHE_SIZE = 20
+
+IQ_ITEMS_PER_PAGE = 50
+
+SearchKeyT = tuple[str, str, str]
+
+
+class SearchPages:
+    """
+    The result pages of a query received so far
+    """
+
+    __slots__ = ("complete", "created", "pages")
+
+    def __init__(self) -> None:
+        self.pages: list[MuclumbusResult] = []
+        self.complete = False
+        self.created = time.monotonic()
+
+    @property
+    def last(self) -> str | None:
+        if not self.pages:
+            return None
+        return self.pages[-1].last
+
+    def add(self, after: str | None, result: MuclumbusResult) -> None:
+        """
+        Add the page which was requested after the item after, pages which
+        were received already are ignored
+        """
+
+        if self.complete or after != self.last:
+            return
+
+        self.pages.append(result)
+        if result.end or result.last is None or result.last == after:
+            # The last check prevents a loop if the service sends the same
+            # page over and over
+            self.complete = True
+
+    def is_expired(self) -> bool:
+        return time.monotonic() - self.created > SEARCH_CACHE_TTL
+
+
+_search_cache: OrderedDict[SearchKeyT, SearchPages] = OrderedDict()
+_parameter_forms: dict[str, SimpleDataForm] = {}
+
+
+def get_search_key(query: str) -> SearchKeyT:
+    api = app.settings.get("muclumbus_api_pref")
+    if api == "http":
+        service = app.settings.get("muclumbus_api_http_uri")
+    else:
+        service = app.settings.get("muclumbus_api_jid")
+    return api, service, " ".join(query.split())
+
+
+def get_search_pages(key: SearchKeyT) -> SearchPages:
+    """
+    Return the cached pages of a query, or new empty pages
+    """
+
+    pages = _search_cache.get(key)
+    if pages is None or pages.is_expired():
+        pages = SearchPages()
+        _search_cache[key] = pages
+
+    _search_cache.move_to_end(key)
+    while len(_search_cache) > SEARCH_CACHE_SIZE:
+        _search_cache.popitem(last=False)
+    return pages
+
+
+class MucSearch:
+    """
+    Streams the result pages of a query to the group chat directory
+
+    Pages are taken from the cache if the same query was run before. The
+    page following the shown pages is always requested ahead, so it is
+    ready once more results are wanted.
+    """
+
+    def __init__(
+        self,
+        client: types.Client,
+        query: str,
+        callback: Callable[[MuclumbusResult], Any],
+        error_callback: Callable[[Exception], Any],
+    ) -> None:
+        """
+        :param callback:        Called with each page which should be shown
+
+        :param error_callback:  Called if a page could not be received
+        """
+
+        self._client = client
+        self._key = get_search_key(query)
+        self._pages = get_search_pages(self._key)
+        self._callback = callback
+        self._error_callback = error_callback
+
+        self._shown = 0
+        self._wanted = 1
+        self._fetching = False
+        self._cancelled = False
+
+    @property
+    def complete(self) -> bool:
+        return self._pages.complete and self._shown == len(self._pages.pages)
+
+    def start(self) -> None:
+        self._update()
+
+    def request_more(self) -> None:
+        """
+        Show the next page as soon as it is available
+        """
+
+        if self._cancelled or self.complete or self._wanted > self._shown:
+            return
+
+        self._wanted += 1
+        self._update()
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def _update(self) -> None:
+        pages = self._pages
+        while self._shown < min(self._wanted, len(pages.pages)):
+            page = pages.pages[self._shown]
+            self._shown += 1
+            self._callback(page)
+            if self._cancelled:
+                return
+
+        if pages.complete or self._fetching:
+            return
+
+        if len(pages.pages) <= self._shown:
+            self._fetch(pages.last)
+
+    def _fetch(self, after: str | None) -> None:
+        self._fetching = True
+        api, _service, query = self._key
+        log.info("Request page after %s for '%s'", after, query)
+
+        if api == "http":
+            self._client.get_module("HttpMucSearch").search(
+                query.split(" "),
+                after,
+                lambda result: self._on_page(after, result),
+            )
+            return
+
+        self._fetch_iq(after)
+
+    def _fetch_iq(self, after: str | None) -> None:
+        _api, service, query = self._key
+        muclumbus = self._client.connection.get_module("Muclumbus")
+
+        form = _parameter_forms.get(service)
+        if form is None:
+            muclumbus.request_parameters(
+                service, callback=self._on_parameters, user_data=after
+            )
+            return
+
+        form.vars["q"].value = query
+        muclumbus.set_search(
+            service,
+            form,
+            items_per_page=IQ_ITEMS_PER_PAGE,
+            after=after,
+            callback=self._on_iq_page,
+            user_data=after,
+        )
+
+    def _on_parameters(self, task: Task) -> None:
+        after = task.get_user_data()
+        try:
+            form = task.finish()
+        except BaseError as error:
+            self._on_page(after, error)
+            return
+
+        form.type_ = "submit"
+        _parameter_forms[self._key[1]] = form
+        if not self._cancelled:
+            self._fetch_iq(after)
+
+    def _on_iq_page(self, task: Task) -> None:
+        after = task.get_user_data()
+        try:
+            result = task.finish()
+        except BaseError as error:
+            self._on_page(after, error)
+            return
+
+        self._on_page(after, result)
+
+    def _on_page(self, after: str | None, result: MuclumbusResult | Exception) -> None:
+        self._fetching = False
+        if isinstance(result, Exception):
+            log.warning("Search failed: %s", result)
+            # A failed prefetch is retried once the page is wanted
+            if not self._cancelled and self._wanted > self._shown:
+                self._error_callback(result)
+            return
+
+        # Pages are cached even if the search was cancelled meanwhile
+        self._pages.add(after, result)
+        if not self._cancelled:
+            self._update()
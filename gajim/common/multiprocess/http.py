@@ -56,6 +56,9 @@ class HTTPResult:
     hash_algo: str
     req_hash_value: str
     resp_hash_value: str
+    # Hash of the content written to the output, it differs from the
+    # response hash if the response was decrypted
+    content_hash_value: str
     content_length: int | None
     content_type: str | None
     content: bytes
@@ -271,6 +274,7 @@ def _read_file_generator() -> Iterable[bytes]:
             hash_algo=hash_algo,
             req_hash_value=req_hash_obj.hexdigest(),
             resp_hash_value="",
+            content_hash_value="",
             content_length=content_length,
             content_type=content_type,
             content=b"",
@@ -303,6 +307,10 @@ def _read_file_generator() -> Iterable[bytes]:
         )
 
     resp_hash_obj = hashlib.new(hash_algo)
+    content_hash_obj = None
+    if decryption_data is not None:
+        content_hash_obj = hashlib.new(hash_algo)
+
     max_bytes_downloaded = content_length or NO_CONTENT_LENGTH_MAX_DOWNLOAD
 
     with file_method() as output_file:
@@ -320,7 +328,10 @@ def _read_file_generator() -> Iterable[bytes]:
                 )
 
             resp_hash_obj.update(data)
-            output_file.write(decryptor.decrypt(data))
+            data = decryptor.decrypt(data)
+            if content_hash_obj is not None:
+                content_hash_obj.update(data)
+            output_file.write(data)
             if with_resp_progress and queue is not None:
                 queue.put(
                     TransferState(
@@ -337,12 +348,18 @@ def _read_file_generator() -> Iterable[bytes]:
         data = decryptor.finalize()
         output_file.write(data)
         resp_hash_obj.update(data)
+        if content_hash_obj is not None:
+            content_hash_obj.update(data)
 
         content = b""
         if isinstance(output_file, BytesIO):
             content = output_file.getvalue()
 
     resp_digest = resp_hash_obj.hexdigest()
+    content_digest = resp_digest
+    if content_hash_obj is not None:
+        content_digest = content_hash_obj.hexdigest()
+
     if hash_value is not None and resp_digest != hash_value:
         raise InvalidHash(f"{resp_digest} != {hash_value}")
 
@@ -350,6 +367,7 @@ def _read_file_generator() -> Iterable[bytes]:
         hash_algo=hash_algo,
         req_hash_value=req_hash_obj.hexdigest(),
         resp_hash_value=resp_digest,
+        content_hash_value=content_digest,
         content_length=content_length,
         content_type=content_type,
         content=content,
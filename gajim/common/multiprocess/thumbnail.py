@@ -7,6 +7,7 @@
 from typing import Any
 
 import math
+from functools import cache
 from io import BytesIO
 from pathlib import Path
 
@@ -17,6 +18,9 @@
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
+# Quality used for lossy thumbnail encodings
+THUMBNAIL_QUALITY = 85
+
 
 def get_image_orientation(image: Image.Image) -> int:
     exif = image.getexif()
@@ -33,66 +37,131 @@ def create_thumbnail(
     size: int,
     mime_type: str,
 ) -> tuple[bytes, dict[str, Any]]:
+    thumbnails, metadata = create_thumbnails(input_, {size: output}, mime_type)
+    return thumbnails[size], metadata
+
+
+def create_thumbnails(
+    input_: bytes | Path,
+    outputs: dict[int, Path | None],
+    mime_type: str,
+) -> tuple[dict[int, bytes], dict[str, Any]]:
+    """
+    Create thumbnails for multiple sizes from a single decode of the image
+
+    :param input_:     The image data or path to the image
+
+    :param outputs:    A dict mapping each thumbnail size to the path the
+                       thumbnail is written to, or None
+
+    :param mime_type:  The mime type of the image
+
+    Returns a dict mapping each size to the thumbnail bytes
+    """
+
     if isinstance(input_, Path):
         data = input_.read_bytes()
     else:
         data = input_
 
+    sizes = sorted(outputs, reverse=True)
+
     try:
-        thumbnail_bytes, metadata = _create_thumbnail_with_pil(data, size)
+        thumbnails, metadata = _create_thumbnails_with_pil(data, sizes)
     except (Image.DecompressionBombError, Image.DecompressionBombWarning):
         # Don't try to process image further
         raise
 
     except Exception:
-        thumbnail_bytes, metadata = _create_thumbnail_with_pixbuf(data, size, mime_type)
+        thumbnails, metadata = _create_thumbnails_with_pixbuf(data, sizes, mime_type)
+
+    for size, output in outputs.items():
+        if output is not None:
+            output.write_bytes(thumbnails[size])
+    return thumbnails, metadata
+
+
+@cache
+def _supports_webp() -> bool:
+    # WebP can only be used if a GdkPixbuf loader is available to decode it
+    return any(
+        format_.get_name() == "webp" for format_ in GdkPixbuf.Pixbuf.get_formats()
+    )
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    if image.mode in ("RGBA", "LA", "PA"):
+        return True
+    return image.mode == "P" and "transparency" in image.info
+
+
+def _encode_image(image: Image.Image) -> bytes:
+    # Opaque images are stored as JPEG, which GTK decodes natively.
+    # Images with transparency are stored as WebP, or PNG as fallback.
+    output_file = BytesIO()
+
+    if not _has_alpha(image):
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.save(output_file, format="jpeg", quality=THUMBNAIL_QUALITY, optimize=True)
 
-    assert thumbnail_bytes is not None
-    if output is not None:
-        output.write_bytes(thumbnail_bytes)
-    return thumbnail_bytes, metadata
+    elif _supports_webp():
+        image.save(output_file, format="webp", quality=THUMBNAIL_QUALITY)
 
+    else:
+        image.save(output_file, format="png", optimize=True, save_all=False)
 
-def _create_thumbnail_with_pil(data: bytes, size: int) -> tuple[bytes, dict[str, Any]]:
-    # Reads data and returns thumbnail bytes in PNG format
+    bytes_ = output_file.getvalue()
+    output_file.close()
+    return bytes_
+
+
+def _create_thumbnails_with_pil(
+    data: bytes, sizes: list[int]
+) -> tuple[dict[int, bytes], dict[str, Any]]:
+    # Reads data and returns thumbnail bytes for each size, the sizes
+    # are expected in descending order
 
     metadata: dict[str, Any] = {}
     input_file = BytesIO(data)
     try:
         image = Image.open(input_file)
+        image.load()
     except Exception:
         input_file.close()
         raise
 
+    n_frames = getattr(image, "n_frames", 1)
+
     image_orientation = get_image_orientation(image)
     if image_orientation != 0:
         image = image.rotate(image_orientation, expand=True)
 
+    if image.mode == "P":
+        image = image.convert("RGBA" if _has_alpha(image) else "RGB")
+
     image_width, image_height = image.size
-    n_frames = getattr(image, "n_frames", 1)
-    if size > image_width and size > image_height and n_frames == 1:
-        image.close()
-        input_file.close()
-        return data, metadata
 
-    output_file = BytesIO()
+    thumbnails: dict[int, bytes] = {}
+    for size in sizes:
+        if size > image_width and size > image_height and n_frames == 1:
+            thumbnails[size] = data
+            continue
 
-    image.thumbnail((size, size))
-    image.save(output_file, format="png", optimize=True, save_all=False)
-
-    bytes_ = output_file.getvalue()
+        # Every rendition is scaled down from the previous, larger one
+        image.thumbnail((size, size))
+        thumbnails[size] = _encode_image(image)
 
     image.close()
     input_file.close()
-    output_file.close()
 
-    return bytes_, metadata
+    return thumbnails, metadata
 
 
-def _create_thumbnail_with_pixbuf(
-    data: bytes, size: int, mime_type: str
-) -> tuple[bytes, dict[str, Any]]:
-    # Reads data and returns thumbnail bytes in PNG format
+def _create_thumbnails_with_pixbuf(
+    data: bytes, sizes: list[int], mime_type: str
+) -> tuple[dict[int, bytes], dict[str, Any]]:
+    # Reads data and returns thumbnail bytes for each size
 
     metadata: dict[str, Any] = {}
 
@@ -110,17 +179,26 @@ def _create_thumbnail_with_pixbuf(
     if pixbuf is None:
         raise ValueError("Loading pixbuf failed")
 
-    if size > pixbuf.get_width() and size > pixbuf.get_height():
-        return data, metadata
+    format_ = "png" if pixbuf.get_has_alpha() else "jpeg"
+    options = [] if format_ == "png" else [("quality", str(THUMBNAIL_QUALITY))]
+
+    thumbnails: dict[int, bytes] = {}
+    for size in sizes:
+        if size > pixbuf.get_width() and size > pixbuf.get_height():
+            thumbnails[size] = data
+            continue
 
-    width, height = get_thumbnail_size(pixbuf, size)
-    thumbnail = pixbuf.scale_simple(width, height, GdkPixbuf.InterpType.BILINEAR)
-    if thumbnail is None:
-        raise ValueError("scale_simple() failed")
+        width, height = get_thumbnail_size(pixbuf, size)
+        thumbnail = pixbuf.scale_simple(width, height, GdkPixbuf.InterpType.BILINEAR)
+        if thumbnail is None:
+            raise ValueError("scale_simple() failed")
 
-    _error, bytes_ = thumbnail.save_to_bufferv("png", [], [])
+        _error, bytes_ = thumbnail.save_to_bufferv(
+            format_, [key for key, _ in options], [value for _, value in options]
+        )
+        thumbnails[size] = bytes_
 
-    return bytes_, metadata
+    return thumbnails, metadata
 
 
 def get_thumbnail_size(pixbuf: GdkPixbuf.Pixbuf, size: int) -> tuple[int, int]:
@@ -0,0 +1,275 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-only
+
+from __future__ import annotations
+
+from typing import Any
+
+import itertools
+import logging
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import Future
+from enum import IntEnum
+from functools import partial
+
+from gi.repository import GLib
+
+from gajim.common.file_transfer_manager import FileTransfer
+
+log = logging.getLogger("gajim.c.preview_scheduler")
+
+JobObjectT = FileTransfer | Future[Any]
+
+
+class PreviewJobType(IntEnum):
+    DOWNLOAD = 0
+    THUMBNAIL = 1
+
+
+MAX_RUNNING_JOBS = {
+    PreviewJobType.DOWNLOAD: 4,
+    PreviewJobType.THUMBNAIL: 2,
+}
+
+MAX_DOWNLOADS_PER_HOST = 2
+
+
+class PreviewRequest:
+    def __init__(
+        self,
+        scheduler: PreviewScheduler,
+        job: PreviewJob,
+        callback: Callable[[JobObjectT | None], Any],
+        is_visible: Callable[[], bool] | None,
+    ) -> None:
+        self._scheduler = scheduler
+        self.job = job
+        self.callback = callback
+        self.cancelled = False
+        self._is_visible = is_visible
+
+    def is_visible(self) -> bool:
+        if self._is_visible is None:
+            return True
+        return self._is_visible()
+
+    def cancel(self) -> None:
+        self._scheduler.cancel_request(self)
+
+
+class PreviewJob:
+    def __init__(
+        self,
+        id_: str,
+        type_: PreviewJobType,
+        func: Callable[[], JobObjectT | None],
+        host: str | None,
+        seq: int,
+    ) -> None:
+        self.id = id_
+        self.type = type_
+        self.func = func
+        self.host = host
+        self.seq = seq
+        self.requests: list[PreviewRequest] = []
+        self.obj: JobObjectT | None = None
+
+    def is_visible(self) -> bool:
+        return any(request.is_visible() for request in self.requests)
+
+    def __repr__(self) -> str:
+        return f"PreviewJob({self.type.name}, {self.id[:10]}, {self.host})"
+
+
+class PreviewScheduler:
+    """
+    Schedules preview downloads and thumbnail jobs
+
+    Identical jobs requested by multiple widgets are only executed once.
+    Jobs of visible widgets are started first, the number of running jobs
+    is limited globally and per host. Jobs are cancelled if all widgets
+    which requested them are gone. While paused, no new jobs are started.
+    """
+
+    def __init__(self) -> None:
+        self._queued: dict[str, PreviewJob] = {}
+        self._running: dict[str, PreviewJob] = {}
+        self._seq = itertools.count()
+        self._dispatch_source_id: int | None = None
+        self._paused = False
+
+    def request(
+        self,
+        job_id: str,
+        type_: PreviewJobType,
+        func: Callable[[], JobObjectT | None],
+        callback: Callable[[JobObjectT | None], Any],
+        host: str | None = None,
+        is_visible: Callable[[], bool] | None = None,
+    ) -> PreviewRequest:
+        """
+        Request a job to be executed
+
+        :param job_id:      Identifies the job, requests with the same id are
+                            served by a single job
+
+        :param type_:       The type of the job
+
+        :param func:        Starts the job, returns a FileTransfer or Future
+
+        :param callback:    Called with the object returned by func once
+                            the job is started. It is never called before this
+                            method returned, also if the job is already running.
+
+        :param host:        The host a download is made from
+
+        :param is_visible:  Returns if the requesting widget is visible
+
+        """
+
+        job = self._running.get(job_id)
+        if job is not None:
+            request = PreviewRequest(self, job, callback, is_visible)
+            job.requests.append(request)
+            GLib.idle_add(self._call_request, request)
+            return request
+
+        job = self._queued.get(job_id)
+        if job is None:
+            job = PreviewJob(job_id, type_, func, host, next(self._seq))
+            self._queued[job_id] = job
+            log.debug("Queue %r", job)
+
+        request = PreviewRequest(self, job, callback, is_visible)
+        job.requests.append(request)
+
+        self._schedule_dispatch()
+        return request
+
+    @staticmethod
+    def _call_request(request: PreviewRequest) -> bool:
+        if not request.cancelled:
+            request.callback(request.job.obj)
+        return GLib.SOURCE_REMOVE
+
+    def cancel_request(self, request: PreviewRequest) -> None:
+        request.cancelled = True
+        job = request.job
+        if request not in job.requests:
+            return
+
+        job.requests.remove(request)
+        if job.requests:
+            return
+
+        if self._queued.get(job.id) is job:
+            log.debug("Drop %r", job)
+            del self._queued[job.id]
+            return
+
+        if self._running.get(job.id) is job:
+            log.info("Cancel %r", job)
+            match job.obj:
+                case FileTransfer():
+                    job.obj.cancel()
+                case Future():
+                    job.obj.cancel()
+                case _:
+                    pass
+
+    def set_paused(self, paused: bool) -> None:
+        if self._paused == paused:
+            return
+
+        log.info(
+            "%s, %s jobs queued", "Paused" if paused else "Resumed", len(self._queued)
+        )
+        self._paused = paused
+        if not paused and self._queued:
+            self._schedule_dispatch()
+
+    def _schedule_dispatch(self) -> None:
+        if self._dispatch_source_id is not None:
+            return
+
+        # Dispatch from idle, so widgets created in one go are allocated
+        # and their visibility is known before jobs are started
+        self._dispatch_source_id = GLib.idle_add(self._dispatch)
+
+    def _dispatch(self) -> bool:
+        self._dispatch_source_id = None
+        if self._paused:
+            return GLib.SOURCE_REMOVE
+
+        running = Counter(job.type for job in self._running.values())
+        hosts = Counter(
+            job.host
+            for job in self._running.values()
+            if job.type == PreviewJobType.DOWNLOAD
+        )
+
+        visible: dict[str, bool] = {}
+        for job in self._queued.values():
+            visible[job.id] = job.is_visible()
+
+        jobs = sorted(
+            self._queued.values(), key=lambda job: (not visible[job.id], job.seq)
+        )
+
+        for job in jobs:
+            if running[job.type] >= MAX_RUNNING_JOBS[job.type]:
+                continue
+
+            if job.type == PreviewJobType.DOWNLOAD and job.host is not None:
+                if hosts[job.host] >= MAX_DOWNLOADS_PER_HOST:
+                    continue
+                hosts[job.host] += 1
+
+            running[job.type] += 1
+            self._start_job(job)
+
+        return GLib.SOURCE_REMOVE
+
+    def _start_job(self, job: PreviewJob) -> None:
+        log.info("Start %r", job)
+        del self._queued[job.id]
+        self._running[job.id] = job
+
+        try:
+            job.obj = job.func()
+        except Exception:
+            log.exception("Failed to start %r", job)
+            job.obj = None
+
+        match job.obj:
+            case FileTransfer():
+                job.obj.connect("finished", self._on_transfer_finished, job)
+            case Future():
+                job.obj.add_done_callback(
+                    partial(GLib.idle_add, self._on_future_done, job)
+                )
+            case _:
+                pass
+
+        for request in list(job.requests):
+            request.callback(job.obj)
+
+        if job.obj is None:
+            self._finish_job(job)
+
+    def _on_transfer_finished(self, _obj: FileTransfer, job: PreviewJob) -> None:
+        self._finish_job(job)
+
+    def _on_future_done(self, job: PreviewJob, _future: Future[Any]) -> bool:
+        self._finish_job(job)
+        return GLib.SOURCE_REMOVE
+
+    def _finish_job(self, job: PreviewJob) -> None:
+        if self._running.get(job.id) is job:
+            del self._running[job.id]
+
+        job.requests.clear()
+        if self._queued:
+            self._schedule_dispatch()
@@ -102,6 +102,8 @@ class _ACCOUNTDEFAULT:
     "groupchat_roster_width",
     "mainwin_height",
     "mainwin_width",
+    "preview_cache_max_age",
+    "preview_cache_max_size",
     "preview_max_file_size",
     "preview_size",
 ]
@@ -217,6 +219,8 @@ class _ACCOUNTDEFAULT:
     "positive_184_ack": False,
     "preview_allow_all_images": False,
     "preview_anonymous_muc": False,
+    "preview_cache_max_age": 180,
+    "preview_cache_max_size": 1024,
     "preview_max_file_size": 10485760,
     "preview_size": 400,
     "preview_verify_https": True,
@@ -582,6 +586,14 @@ class WorkspaceSettings(TypedDict):
         "plugins_repository_enabled": _(
             "If enabled, Gajim offers to download plugins hosted on gajim.org"
         ),
+        "preview_cache_max_age": _(
+            "Downloaded previews not viewed for this many days are removed. "
+            "0 means no limit."
+        ),
+        "preview_cache_max_size": _(
+            "Maximum size in MiB of downloaded previews. The least recently "
+            "viewed previews are removed first. 0 means no limit."
+        ),
         "providers_list_url": _(
             "Endpoint for retrieving a list of providers for sign up"
         ),
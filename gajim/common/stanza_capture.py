@@ -0,0 +1,165 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-only
+
+from __future__ import annotations
+
+from typing import Any
+from typing import NamedTuple
+
+import logging
+import queue
+import time
+from logging.handlers import QueueListener
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+log = logging.getLogger("gajim.c.stanza_capture")
+
+STREAM_MANAGEMENT_ELEMENTS = ("r", "a")
+
+CAPTURE_FILE_MAX_BYTES = 10 * 1024 * 1024
+CAPTURE_FILE_BACKUP_COUNT = 3
+
+
+def get_stanza_type(stanza: Any) -> str | None:
+    """
+    Return presence, message, iq or stream, None for other elements
+    """
+
+    if isinstance(stanza, str):
+        name = stanza[1:].split(maxsplit=1)[0].rstrip("/>") if stanza else ""
+    else:
+        name = stanza.getName()
+
+    if name in ("presence", "message", "iq"):
+        return name
+    if name in STREAM_MANAGEMENT_ELEMENTS:
+        return "stream"
+    return None
+
+
+class CapturedStanza:
+    """
+    A stanza sent or received by an account
+
+    The metadata is collected on capture, the stanza is only serialized
+    once its text is needed.
+    """
+
+    __slots__ = ("_stanza", "_text", "account", "direction", "timestamp", "type")
+
+    def __init__(
+        self,
+        account: str,
+        direction: str,
+        stanza: Any,
+        timestamp: float | None = None,
+    ) -> None:
+        """
+        :param account:     The account which sent or received the stanza
+
+        :param direction:   incoming or outgoing
+
+        :param stanza:      A nbxmpp Node or a string
+
+        :param timestamp:   The time of capture, defaults to now
+        """
+
+        self.account = account
+        self.direction = direction
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.type = get_stanza_type(stanza)
+        self._stanza = stanza
+        self._text: str | None = None
+
+    @property
+    def text(self) -> str:
+        """
+        The pretty printed stanza
+        """
+
+        if self._text is None:
+            stanza = self._stanza
+            if not isinstance(stanza, str):
+                # pylint: disable=unnecessary-dunder-call
+                stanza = stanza.__str__(fancy=True)
+            self._text = stanza
+        return self._text
+
+    def get_header(self, account_label: str) -> str:
+        return "{direction} {time} ({account})".format(
+            direction=self.direction.capitalize(),
+            time=time.strftime("%c", time.localtime(self.timestamp)),
+            account=account_label,
+        )
+
+    def __str__(self) -> str:
+        return f"<!-- {self.get_header(self.account)} -->\n{self.text}\n"
+
+
+class StanzaFilter(NamedTuple):
+    account: str | None = None
+    types: frozenset[str] = frozenset(("presence", "message", "iq"))
+    incoming: bool = True
+    outgoing: bool = True
+
+    def matches(self, stanza: CapturedStanza) -> bool:
+        if self.account is not None and stanza.account != self.account:
+            return False
+
+        if stanza.direction == "incoming" and not self.incoming:
+            return False
+
+        if stanza.direction == "outgoing" and not self.outgoing:
+            return False
+
+        return stanza.type is None or stanza.type in self.types
+
+
+class StanzaFileWriter:
+    """
+    Writes captured stanzas to a rotating file
+
+    Stanzas are serialized and written by a background thread.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = CAPTURE_FILE_MAX_BYTES,
+        backup_count: int = CAPTURE_FILE_BACKUP_COUNT,
+    ) -> None:
+        self._path = path
+
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf8",
+            delay=True,
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+
+        self._queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        self._listener = QueueListener(self._queue, handler)
+        self._listener.start()
+        log.info("Writing stanzas to %s", path)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def write(self, stanza: CapturedStanza) -> None:
+        # The message is turned into a string when the record is handled
+        self._queue.put(logging.makeLogRecord({"msg": stanza}))
+
+    def close(self) -> None:
+        """
+        Write all queued stanzas and close the file
+        """
+
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        log.info("Stopped writing stanzas to %s", self._path)
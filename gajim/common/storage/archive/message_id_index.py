@@ -0,0 +1,299 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-only
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+import math
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import datetime
+from datetime import timedelta
+from enum import IntEnum
+
+# Max number of conversations for which ids are held in memory
+MAX_CONVERSATIONS = 100
+
+# Max number of ids known to exist, which are answered without
+# asking the database
+MAX_RECENT_IDS = 2000
+
+# Only the ids of messages within this window are loaded into the
+# bloom filters, older ids are looked up in the database
+RECENT_WINDOW = timedelta(days=30)
+
+# Timestamps of received messages may differ from the stored ones, a
+# negative answer is only given for messages this much inside the window
+WINDOW_MARGIN = timedelta(days=1)
+
+MIN_CAPACITY = 1024
+ERROR_RATE = 0.01
+
+ConversationKeyT = tuple[int, int]
+
+
+class IdType(IntEnum):
+    MESSAGE_ID = 0
+    STANZA_ID = 1
+
+
+class BloomFilter:
+    """
+    Set of strings which may answer membership tests with false positives,
+    but never with false negatives
+    """
+
+    def __init__(self, capacity: int, error_rate: float = ERROR_RATE) -> None:
+        self.capacity = capacity
+        self.count = 0
+
+        size = -capacity * math.log(error_rate) / (math.log(2) ** 2)
+        self._size = max(8, int(size))
+        self._hash_count = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def _positions(self, value: str) -> Iterable[int]:
+        # Double hashing, both hashes are derived from one 64 bit hash
+        hash_ = hash(value) & 0xFFFFFFFFFFFFFFFF
+        hash1 = hash_ & 0xFFFFFFFF
+        hash2 = (hash_ >> 32) | 1
+        for i in range(self._hash_count):
+            yield (hash1 + i * hash2) % self._size
+
+    def add(self, value: str) -> None:
+        for pos in self._positions(value):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value)
+        )
+
+    def is_full(self) -> bool:
+        return self.count > self.capacity
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter which grows by adding a filter with twice the capacity
+    once the last one is full
+
+    The error rate of each added filter is halved, so the error rate of
+    all filters together stays below error_rate.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = ERROR_RATE) -> None:
+        self._error_rate = error_rate
+        self._filters = [BloomFilter(capacity, error_rate / 2)]
+
+    def add(self, value: str) -> None:
+        bloom = self._filters[-1]
+        if bloom.is_full():
+            error_rate = self._error_rate / 2 ** (len(self._filters) + 1)
+            bloom = BloomFilter(bloom.capacity * 2, error_rate)
+            self._filters.append(bloom)
+        bloom.add(value)
+
+    def __contains__(self, value: str) -> bool:
+        return any(value in bloom for bloom in self._filters)
+
+
+class ConversationIds(NamedTuple):
+    since: datetime
+    message_ids: ScalableBloomFilter
+    stanza_ids: ScalableBloomFilter
+
+    def get_filter(self, type_: IdType) -> ScalableBloomFilter:
+        if type_ == IdType.MESSAGE_ID:
+            return self.message_ids
+        return self.stanza_ids
+
+
+class MessageIdIndexStats(NamedTuple):
+    lookups: int
+    negative: int
+    recent: int
+    maybe: int
+    false_positives: int
+    not_loaded: int
+
+    @property
+    def hit_rate(self) -> float:
+        if not self.lookups:
+            return 0.0
+        return (self.negative + self.recent) / self.lookups
+
+
+class MessageIdIndex:
+    """
+    In-memory index of the message ids and stanza ids of conversations
+
+    For each loaded conversation a bloom filter over the ids of the
+    messages within RECENT_WINDOW answers most lookups for unknown ids
+    without asking the database. Ids which were recently found or stored
+    are answered from a LRU cache. Possible matches of the bloom filter and
+    ids of older messages need to be checked against the database.
+
+    Conversations are identified by (account pk, remote pk).
+    """
+
+    def __init__(
+        self,
+        max_conversations: int = MAX_CONVERSATIONS,
+        max_recent_ids: int = MAX_RECENT_IDS,
+    ) -> None:
+        self._max_conversations = max_conversations
+        self._max_recent_ids = max_recent_ids
+
+        self._filters: OrderedDict[ConversationKeyT, ConversationIds] = OrderedDict()
+        self._recent: OrderedDict[tuple[ConversationKeyT, IdType, str], None] = (
+            OrderedDict()
+        )
+
+        self._lookups = 0
+        self._negative = 0
+        self._recent_hits = 0
+        self._maybe = 0
+        self._false_positives = 0
+        self._not_loaded = 0
+
+    def is_loaded(self, key: ConversationKeyT) -> bool:
+        return key in self._filters
+
+    def load(
+        self,
+        key: ConversationKeyT,
+        ids: Iterable[tuple[str | None, str | None]],
+        since: datetime,
+    ) -> None:
+        """
+        Load the recent ids of a conversation
+
+        :param key:     The conversation
+        :param ids:     (message id, stanza id) tuples of all messages
+                        since the given time
+        :param since:   The start of the loaded window
+        """
+
+        ids = list(ids)
+        capacity = max(MIN_CAPACITY, len(ids) * 2)
+        filters = ConversationIds(
+            since, ScalableBloomFilter(capacity), ScalableBloomFilter(capacity)
+        )
+        for message_id, stanza_id in ids:
+            if message_id is not None:
+                filters.message_ids.add(message_id)
+            if stanza_id is not None:
+                filters.stanza_ids.add(stanza_id)
+
+        self._filters[key] = filters
+        self._filters.move_to_end(key)
+        while len(self._filters) > self._max_conversations:
+            self._filters.popitem(last=False)
+
+    def lookup(
+        self,
+        key: ConversationKeyT,
+        type_: IdType,
+        id_: str,
+        timestamp: datetime | None = None,
+    ) -> bool | None:
+        """
+        Return True if the id exists, False if it does not exist and None
+        if the database needs to be asked
+
+        :param timestamp:   The time of the message with the id, False is
+                            only returned for messages within the loaded
+                            window
+        """
+
+        self._lookups += 1
+
+        if (key, type_, id_) in self._recent:
+            self._recent.move_to_end((key, type_, id_))
+            self._recent_hits += 1
+            return True
+
+        filters = self._filters.get(key)
+        if filters is None:
+            self._not_loaded += 1
+            return None
+
+        self._filters.move_to_end(key)
+        in_window = timestamp is not None and timestamp >= filters.since + WINDOW_MARGIN
+        if in_window and id_ not in filters.get_filter(type_):
+            self._negative += 1
+            return False
+
+        self._maybe += 1
+        return None
+
+    def set_exists(
+        self, key: ConversationKeyT, type_: IdType, id_: str, exists: bool
+    ) -> None:
+        """
+        Store the database result for a lookup which returned None
+        """
+
+        if exists:
+            self._add_recent(key, type_, id_)
+            return
+
+        filters = self._filters.get(key)
+        if filters is not None and id_ in filters.get_filter(type_):
+            self._false_positives += 1
+
+    def add(
+        self,
+        key: ConversationKeyT,
+        message_id: str | None,
+        stanza_id: str | None,
+    ) -> None:
+        """
+        Add the ids of a stored message
+        """
+
+        filters = self._filters.get(key)
+        for type_, id_ in (
+            (IdType.MESSAGE_ID, message_id),
+            (IdType.STANZA_ID, stanza_id),
+        ):
+            if id_ is None:
+                continue
+
+            self._add_recent(key, type_, id_)
+            if filters is not None:
+                filters.get_filter(type_).add(id_)
+
+    def _add_recent(self, key: ConversationKeyT, type_: IdType, id_: str) -> None:
+        self._recent[(key, type_, id_)] = None
+        self._recent.move_to_end((key, type_, id_))
+        while len(self._recent) > self._max_recent_ids:
+            self._recent.popitem(last=False)
+
+    def invalidate(self, key: ConversationKeyT) -> None:
+        """
+        Forget a conversation, e.g. because messages were deleted
+        """
+
+        self._filters.pop(key, None)
+        recent = [recent_key for recent_key in self._recent if recent_key[0] == key]
+        for recent_key in recent:
+            del self._recent[recent_key]
+
+    def clear(self) -> None:
+        self._filters.clear()
+        self._recent.clear()
+
+    def get_stats(self) -> MessageIdIndexStats:
+        return MessageIdIndexStats(
+            lookups=self._lookups,
+            negative=self._negative,
+            recent=self._recent_hits,
+            maybe=self._maybe,
+            false_positives=self._false_positives,
+            not_loaded=self._not_loaded,
+        )
@@ -137,6 +137,8 @@ def __init__(self, archive: AlchemyStorage, user_version: int) -> None:
             self._v19()
         if user_version < 20:
             self._v20()
+        if user_version < 21:
+            self._v21()
 
         app.ged.raise_event(DBMigrationFinished())
 
@@ -416,6 +418,32 @@ def _v20(self) -> None:
         self._archive.run_analyze()
         self._archive.set_user_version(20)
 
+    def _v21(self) -> None:
+        app.ged.raise_event(DBMigrationStart(version=21))
+        table = mod.Base.metadata.tables["latest_displayed_marker"]
+        table.create(self._engine, checkfirst=True)
+
+        self._execute_multiple(
+            [
+                """
+                INSERT OR IGNORE INTO latest_displayed_marker
+                    (fk_account_pk, fk_remote_pk, fk_occupant_pk,
+                     fk_displayed_marker_pk, timestamp)
+                SELECT fk_account_pk, fk_remote_pk, fk_occupant_pk, pk, timestamp
+                FROM (
+                    SELECT *, row_number() OVER (
+                        PARTITION BY fk_account_pk, fk_remote_pk, fk_occupant_pk
+                        ORDER BY timestamp DESC
+                    ) AS rn
+                    FROM displayed_marker
+                    WHERE fk_occupant_pk IS NOT NULL
+                )
+                WHERE rn = 1
+                """
+            ]
+        )
+        self._archive.set_user_version(21)
+
     def _get_account_pks(self, conn: sa.Connection) -> list[int]:
         account_pks: list[int] = []
         for account in app.settings.get_accounts():
@@ -428,6 +428,36 @@ class DisplayedMarker(MappedAsDataclass, Base, UtilMixin, kw_only=True):
     )
 
 
+class LatestDisplayedMarker(MappedAsDataclass, Base, kw_only=True):
+    """
+    The newest displayed marker of each occupant in a group chat,
+    maintained when markers are inserted
+    """
+
+    __tablename__ = "latest_displayed_marker"
+    __table_args__ = (
+        Index(
+            "idx_latest_displayed_marker",
+            "fk_remote_pk",
+            "fk_account_pk",
+            "fk_occupant_pk",
+            unique=True,
+        ),
+    )
+
+    pk: Mapped[int] = mapped_column(primary_key=True, init=False)
+
+    fk_account_pk: Mapped[int] = mapped_column(
+        ForeignKey("account.pk", ondelete="CASCADE")
+    )
+    fk_remote_pk: Mapped[int] = mapped_column(ForeignKey("remote.pk"))
+    fk_occupant_pk: Mapped[int] = mapped_column(ForeignKey("occupant.pk"))
+    fk_displayed_marker_pk: Mapped[int] = mapped_column(
+        ForeignKey("displayed_marker.pk", ondelete="CASCADE")
+    )
+    timestamp: Mapped[datetime.datetime] = mapped_column(EpochTimestampType)
+
+
 class Receipt(MappedAsDataclass, Base, UtilMixin, kw_only=True):
     __tablename__ = "receipt"
     __no_table_cols__ = ["account_", "remote_jid_"]
@@ -26,7 +26,7 @@
 import sqlalchemy as sa
 from nbxmpp import JID
 from sqlalchemy import delete
-from sqlalchemy import func
+from sqlalchemy import event
 from sqlalchemy import Insert
 from sqlalchemy import Row
 from sqlalchemy import select
@@ -35,7 +35,6 @@
 from sqlalchemy.engine import CursorResult
 from sqlalchemy.engine import Engine
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import aliased
 from sqlalchemy.orm import contains_eager
 from sqlalchemy.orm import joinedload
 from sqlalchemy.orm import selectinload
@@ -50,11 +49,16 @@
 from gajim.common.storage.archive.const import ChatDirection
 from gajim.common.storage.archive.const import MessageState
 from gajim.common.storage.archive.const import MessageType
+from gajim.common.storage.archive.message_id_index import IdType
+from gajim.common.storage.archive.message_id_index import MessageIdIndex
+from gajim.common.storage.archive.message_id_index import MessageIdIndexStats
+from gajim.common.storage.archive.message_id_index import RECENT_WINDOW
 from gajim.common.storage.archive.models import Account
 from gajim.common.storage.archive.models import Base
 from gajim.common.storage.archive.models import Contact
 from gajim.common.storage.archive.models import DisplayedMarker
 from gajim.common.storage.archive.models import Encryption
+from gajim.common.storage.archive.models import LatestDisplayedMarker
 from gajim.common.storage.archive.models import MAMArchiveState
 from gajim.common.storage.archive.models import Message
 from gajim.common.storage.archive.models import MessageError
@@ -75,7 +79,7 @@
 from gajim.common.util.datetime import utc_now
 from gajim.common.util.text import get_random_string
 
-CURRENT_USER_VERSION = 20
+CURRENT_USER_VERSION = 21
 
 _T = TypeVar("_T")
 
@@ -99,6 +103,29 @@
     selectinload(Message.reactions),
 )
 
+last_row_relations = (
+    selectinload(Message.corrections).options(
+        joinedload(Message.retraction),
+        joinedload(Message.moderation),
+    ),
+    joinedload(Message.call),
+    joinedload(Message.moderation),
+    joinedload(Message.retraction),
+    selectinload(Message.filetransfers),
+    selectinload(Message.oob),
+)
+
+# Max number of conversations for which the last line is loaded
+# with one statement
+LAST_ROWS_CHUNK_SIZE = 200
+
+# Occupants are updated with every message, if only the timestamp of
+# the occupant changes it is written at most once per interval
+OCCUPANT_UPDATE_INTERVAL = timedelta(minutes=10)
+
+OccupantMemoKeyT = tuple[int, int, str]
+OccupantMemoValuesT = tuple[Any, Any, Any]
+
 
 class MessageArchiveStorage(AlchemyStorage):
     def __init__(self, in_memory: bool = False, path: Path | None = None) -> None:
@@ -119,12 +146,36 @@ def __init__(self, in_memory: bool = False, path: Path | None = None) -> None:
         self._jid_pks: dict[JID, int] = {}
         self._occupant_cache: dict[tuple[str, JID, JID], tuple[Occupant, datetime]] = {}
         self._contact_cache: dict[tuple[str, JID], Contact | None] = {}
+        # Accounts for which all contacts are in the contact cache
+        self._contact_cache_complete: set[str] = set()
+        self._last_conversation_rows: dict[tuple[str, JID], Message | None] = {}
+        self._message_ids = MessageIdIndex()
+
+        # Foreign keys of rows written on insert, with the state last
+        # written for occupants
+        self._occupant_pks: dict[
+            OccupantMemoKeyT, tuple[int, OccupantMemoValuesT, datetime]
+        ] = {}
+        self._encryption_pks: dict[tuple[str, str, int], int] = {}
+        self._thread_pks: dict[tuple[int, int, str], int] = {}
 
     def init(self) -> None:
         super().init()
         with self._create_session() as s:
             self._load_jids(s)
 
+    def shutdown(self) -> None:
+        stats = self._message_ids.get_stats()
+        self._log.info(
+            "Message id index: %s lookups, hit rate %.1f%%, "
+            "%s false positives, %s conversation loads",
+            stats.lookups,
+            stats.hit_rate * 100,
+            stats.false_positives,
+            stats.not_loaded,
+        )
+        super().shutdown()
+
     def _log_row(self, row: Any) -> None:
         if self._log.getEffectiveLevel() != logging.DEBUG:
             return
@@ -216,6 +267,10 @@ def _set_foreign_keys(self, session: Session, row: Any) -> None:
             fk_remote_pk = self._get_jid_pk(session, remote_jid)
             row.fk_remote_pk = fk_remote_pk
 
+            if account is not None:
+                # The conversation changes, a preloaded last line is outdated
+                self._last_conversation_rows.pop((account, remote_jid), None)
+
         if hasattr(row, "real_remote_jid_"):
             real_remote_jid = row.real_remote_jid_
             if real_remote_jid is not VALUE_MISSING:
@@ -233,7 +288,11 @@ def _set_foreign_keys(self, session: Session, row: Any) -> None:
 
         encryption = getattr(row, "encryption_", None)
         if encryption is not None:
-            pk = self._insert_row(session, encryption, return_pk_on_conflict=True)
+            key = (encryption.protocol, encryption.key, encryption.trust)
+            pk = self._encryption_pks.get(key)
+            if pk is None:
+                pk = self._insert_row(session, encryption, return_pk_on_conflict=True)
+                self._memoize_fk(session, self._encryption_pks, key, pk)
             row.encryption_ = None
             row.fk_encryption_pk = pk
 
@@ -241,21 +300,79 @@ def _set_foreign_keys(self, session: Session, row: Any) -> None:
         if thread_id is not None:
             assert fk_account_pk is not None
             assert fk_remote_pk is not None
-            thread = Thread(
-                fk_account_pk=fk_account_pk,
-                fk_remote_pk=fk_remote_pk,
-                id=thread_id,
-            )
-            pk = self._insert_row(session, thread, return_pk_on_conflict=True)
+            key = (fk_account_pk, fk_remote_pk, thread_id)
+            pk = self._thread_pks.get(key)
+            if pk is None:
+                thread = Thread(
+                    fk_account_pk=fk_account_pk,
+                    fk_remote_pk=fk_remote_pk,
+                    id=thread_id,
+                )
+                pk = self._insert_row(session, thread, return_pk_on_conflict=True)
+                self._memoize_fk(session, self._thread_pks, key, pk)
             row.thread_ = None
             row.fk_thread_pk = pk
 
         occupant = getattr(row, "occupant_", None)
         if occupant is not None:
-            pk = self._upsert_row(session, occupant)
+            pk = self._upsert_occupant(session, occupant)
             row.occupant_ = None
             row.fk_occupant_pk = pk
 
+    def _memoize_fk(
+        self, session: Session, memo: dict[Any, Any], key: Any, value: Any
+    ) -> None:
+        memo[key] = value
+
+        # The written rows are gone if the transaction is rolled back
+        if "fk_memo_keys" not in session.info:
+            event.listen(session, "after_commit", self._on_fk_memo_commit)
+            event.listen(session, "after_rollback", self._on_fk_memo_rollback)
+            session.info["fk_memo_keys"] = []
+        session.info["fk_memo_keys"].append((memo, key))
+
+    @staticmethod
+    def _on_fk_memo_commit(session: Session) -> None:
+        session.info["fk_memo_keys"].clear()
+
+    @staticmethod
+    def _on_fk_memo_rollback(session: Session) -> None:
+        for memo, key in session.info["fk_memo_keys"]:
+            memo.pop(key, None)
+        session.info["fk_memo_keys"].clear()
+
+    def _clear_fk_memo(self) -> None:
+        self._occupant_pks.clear()
+        self._encryption_pks.clear()
+        self._thread_pks.clear()
+
+    def _upsert_occupant(self, session: Session, occupant: Occupant) -> int:
+        key = (
+            self._get_account_pk(session, occupant.account_),
+            self._get_jid_pk(session, occupant.remote_jid_),
+            occupant.id,
+        )
+        values = (occupant.real_remote_jid_, occupant.nickname, occupant.avatar_sha)
+
+        memo = self._occupant_pks.get(key)
+        if memo is not None:
+            pk, memo_values, updated_at = memo
+            if (
+                values == memo_values
+                and occupant.updated_at - updated_at < OCCUPANT_UPDATE_INTERVAL
+            ):
+                return pk
+
+        pk, written = self._upsert_row_get_state(session, occupant)
+        if written:
+            self._memoize_fk(
+                session, self._occupant_pks, key, (pk, values, occupant.updated_at)
+            )
+        else:
+            # The stored occupant is newer, its state is unknown
+            self._occupant_pks.pop(key, None)
+        return pk
+
     @with_session
     @timeit
     def insert_object(
@@ -267,14 +384,65 @@ def insert_object(
         session.add(obj)
 
         try:
+            if isinstance(obj, DisplayedMarker) and obj.fk_occupant_pk is not None:
+                session.flush()
+                self._update_latest_displayed_marker(session, obj)
+
             session.commit()
         except Exception:
             if not ignore_on_conflict:
                 raise
             return -1
 
+        if isinstance(obj, Message):
+            self._message_ids.add(
+                (obj.fk_account_pk, obj.fk_remote_pk), obj.id, obj.stanza_id
+            )
+
         return obj.pk
 
+    def _update_latest_displayed_marker(
+        self, session: Session, marker: DisplayedMarker
+    ) -> None:
+        assert marker.fk_occupant_pk is not None
+
+        stmt = insert(LatestDisplayedMarker).values(
+            fk_account_pk=marker.fk_account_pk,
+            fk_remote_pk=marker.fk_remote_pk,
+            fk_occupant_pk=marker.fk_occupant_pk,
+            fk_displayed_marker_pk=marker.pk,
+            timestamp=marker.timestamp,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["fk_remote_pk", "fk_account_pk", "fk_occupant_pk"],
+            set_={
+                "fk_displayed_marker_pk": stmt.excluded.fk_displayed_marker_pk,
+                "timestamp": stmt.excluded.timestamp,
+            },
+            where=stmt.excluded.timestamp > LatestDisplayedMarker.timestamp,
+        )
+        session.execute(stmt)
+
+    def _restore_latest_displayed_marker(
+        self, session: Session, marker: DisplayedMarker
+    ) -> None:
+        # Fall back to the newest remaining marker of the occupant after
+        # the latest one was deleted
+        stmt = (
+            select(DisplayedMarker)
+            .where(
+                DisplayedMarker.fk_account_pk == marker.fk_account_pk,
+                DisplayedMarker.fk_remote_pk == marker.fk_remote_pk,
+                DisplayedMarker.fk_occupant_pk == marker.fk_occupant_pk,
+            )
+            .order_by(DisplayedMarker.timestamp.desc())
+            .limit(1)
+        )
+
+        previous = session.scalar(stmt)
+        if previous is not None:
+            self._update_latest_displayed_marker(session, previous)
+
     @with_session
     @timeit
     def insert_row(
@@ -324,6 +492,8 @@ def _insert_row(
     @with_session
     @timeit
     def upsert_row(self, session: Session, row: Any) -> int:
+        if isinstance(row, Occupant):
+            return self._upsert_occupant(session, row)
         return self._upsert_row(session, row)
 
     def _upsert_row(
@@ -331,6 +501,18 @@ def _upsert_row(
         session: Session,
         row: Any,
     ) -> int:
+        pk, _written = self._upsert_row_get_state(session, row)
+        return pk
+
+    def _upsert_row_get_state(
+        self,
+        session: Session,
+        row: Any,
+    ) -> tuple[int, bool]:
+        """
+        Returns the pk of the row and if the row was inserted or updated
+        """
+
         row.validate()
         self._set_foreign_keys(session, row)
         self._log_row(row)
@@ -343,10 +525,10 @@ def _upsert_row(
             stmt = insert(table).values(**row.get_insert_values()).returning(table.pk)
             pk = session.scalar(stmt)
             assert pk is not None
-            return pk
+            return pk, True
 
         if not row.needs_update(existing):
-            return existing.pk
+            return existing.pk, False
 
         stmt = (
             update(table)
@@ -355,7 +537,7 @@ def _upsert_row(
         )
 
         session.execute(stmt)
-        return existing.pk
+        return existing.pk, True
 
     @overload
     @with_session
@@ -517,6 +699,9 @@ def delete_message(self, session: Session, pk: int) -> None:
         self._delete_message(session, message)
 
     def _delete_message(self, session: Session, message: Message) -> None:
+        self._last_conversation_rows.clear()
+        self._message_ids.invalidate((message.fk_account_pk, message.fk_remote_pk))
+
         # SecurityLabels, Encryption, Threads cannot be deleted because
         # there exists a Many-to-One relationship to these tables
 
@@ -533,8 +718,19 @@ def _delete_message(self, session: Session, message: Message) -> None:
             session.delete(message.receipt)
 
         for marker in message.markers:
+            session.execute(
+                delete(LatestDisplayedMarker).where(
+                    LatestDisplayedMarker.fk_displayed_marker_pk == marker.pk
+                )
+            )
             session.delete(marker)
 
+        if message.markers:
+            session.flush()
+            for marker in message.markers:
+                if marker.fk_occupant_pk is not None:
+                    self._restore_latest_displayed_marker(session, marker)
+
         for reaction in message.reactions:
             session.delete(reaction)
 
@@ -589,47 +785,107 @@ def delete_reaction(
 
         session.execute(stmt)
 
-    @with_session
-    @timeit
     def check_if_message_id_exists(
-        self, session: Session, account: str, jid: JID, message_id: str
+        self,
+        account: str,
+        jid: JID,
+        message_id: str,
+        timestamp: datetime | None = None,
     ) -> bool:
-        fk_account_pk = self._get_account_pk(session, account)
-        fk_remote_pk = self._get_jid_pk(session, jid)
+        """
+        :param timestamp:   The time of the message, if given lookups for
+                            recent messages are mostly answered from memory
+        """
 
-        exists_criteria = (
-            select(Message.id)
-            .where(
-                Message.id == message_id,
-                Message.fk_remote_pk == fk_remote_pk,
-                Message.fk_account_pk == fk_account_pk,
-            )
-            .exists()
+        return self._check_if_id_exists(
+            account, jid, IdType.MESSAGE_ID, message_id, timestamp
         )
 
-        res = session.scalar(select(1).where(exists_criteria))
-        return bool(res)
+    def check_if_stanza_id_exists(
+        self,
+        account: str,
+        jid: JID,
+        stanza_id: str,
+        timestamp: datetime | None = None,
+    ) -> bool:
+        """
+        :param timestamp:   The time of the message, if given lookups for
+                            recent messages are mostly answered from memory
+        """
+
+        return self._check_if_id_exists(
+            account, jid, IdType.STANZA_ID, stanza_id, timestamp
+        )
+
+    def _check_if_id_exists(
+        self,
+        account: str,
+        jid: JID,
+        type_: IdType,
+        id_: str,
+        timestamp: datetime | None,
+    ) -> bool:
+        fk_remote_pk = self._jid_pks.get(jid)
+        if fk_remote_pk is None:
+            # No messages were ever stored for this jid
+            return False
+
+        fk_account_pk = self._account_pks.get(account)
+        if fk_account_pk is not None:
+            exists = self._message_ids.lookup(
+                (fk_account_pk, fk_remote_pk), type_, id_, timestamp
+            )
+            if exists is not None:
+                return exists
+
+        return self._query_id_exists(account, fk_remote_pk, type_, id_, timestamp)
 
     @with_session
     @timeit
-    def check_if_stanza_id_exists(
-        self, session: Session, account: str, jid: JID, stanza_id: str
+    def _query_id_exists(
+        self,
+        session: Session,
+        account: str,
+        fk_remote_pk: int,
+        type_: IdType,
+        id_: str,
+        timestamp: datetime | None,
     ) -> bool:
         fk_account_pk = self._get_account_pk(session, account)
-        fk_remote_pk = self._get_jid_pk(session, jid)
+        key = (fk_account_pk, fk_remote_pk)
+
+        if not self._message_ids.is_loaded(key):
+            # Only the ids of recent messages are held in memory
+            since = datetime.now(dt.UTC) - RECENT_WINDOW
+            stmt = select(Message.id, Message.stanza_id).where(
+                Message.fk_remote_pk == fk_remote_pk,
+                Message.fk_account_pk == fk_account_pk,
+                Message.timestamp >= since,
+            )
+            ids = session.execute(stmt).tuples().all()
+            self._message_ids.load(key, ids, since)
 
+            exists = self._message_ids.lookup(key, type_, id_, timestamp)
+            if exists is not None:
+                return exists
+
+        column = Message.id if type_ == IdType.MESSAGE_ID else Message.stanza_id
         exists_criteria = (
-            select(Message.id)
+            select(Message.pk)
             .where(
-                Message.stanza_id == stanza_id,
+                column == id_,
                 Message.fk_remote_pk == fk_remote_pk,
                 Message.fk_account_pk == fk_account_pk,
             )
             .exists()
         )
 
-        res = session.scalar(select(1).where(exists_criteria))
-        return bool(res)
+        exists = bool(session.scalar(select(1).where(exists_criteria)))
+        self._message_ids.set_exists(key, type_, id_, exists)
+        return exists
+
+    def get_message_id_index_stats(self) -> MessageIdIndexStats:
+        return self._message_ids.get_stats()
 
     @with_session
     @timeit
@@ -754,6 +1010,22 @@ def get_conversation_around_timestamp(
             after_complete,
         )
 
+    def _get_last_conversation_row_stmt(
+        self, fk_account_pk: int, fk_remote_pk: int, column: Any = Message
+    ) -> sa.Select[Any]:
+        return (
+            select(column)
+            .outerjoin(Occupant, Message.fk_occupant_pk == Occupant.pk)
+            .where(
+                Message.fk_remote_pk == fk_remote_pk,
+                Message.fk_account_pk == fk_account_pk,
+                Message.correction_id.is_(None),
+                sa.or_(Occupant.blocked == sa.false(), Occupant.blocked.is_(None)),
+            )
+            .order_by(sa.desc(Message.timestamp), sa.desc(Message.pk))
+            .limit(1)
+        )
+
     @with_session
     @timeit
     def get_last_conversation_row(
@@ -774,39 +1046,82 @@ def get_last_conversation_row(
         returns a namedtuple or None
         """
 
+        key = (account, jid)
+        if incl_related_data and key in self._last_conversation_rows:
+            return self._last_conversation_rows.pop(key)
+
         fk_account_pk = self._get_account_pk(session, account)
         fk_remote_pk = self._get_jid_pk(session, jid)
 
-        stmt = (
-            select(Message)
-            .outerjoin(Occupant)
-            .where(
-                Message.fk_remote_pk == fk_remote_pk,
-                Message.fk_account_pk == fk_account_pk,
-                Message.correction_id.is_(None),
-                sa.or_(Occupant.blocked == sa.false(), Occupant.blocked.is_(None)),
-            )
-            .options(
-                contains_eager(Message.occupant),
-            )
-        )
+        stmt = self._get_last_conversation_row_stmt(
+            fk_account_pk, fk_remote_pk
+        ).options(contains_eager(Message.occupant))
 
         if incl_related_data:
-            stmt = stmt.options(
-                selectinload(Message.corrections).options(
-                    joinedload(Message.retraction),
-                    joinedload(Message.moderation),
-                ),
-                joinedload(Message.call),
-                joinedload(Message.moderation),
-                joinedload(Message.retraction),
-                selectinload(Message.filetransfers),
-                selectinload(Message.oob),
+            stmt = stmt.options(*last_row_relations)
+
+        return session.scalar(stmt)
+
+    @with_session
+    @timeit
+    def preload_last_conversation_rows(
+        self, session: Session, chats: Iterable[tuple[str, JID]]
+    ) -> None:
+        """
+        Load the last lines of many conversations at once, e.g. on startup
+        when the chat list is created. Instead of one query per conversation,
+        the last line of up to LAST_ROWS_CHUNK_SIZE conversations is loaded
+        with one statement.
+
+        The following get_last_conversation_row() call with incl_related_data
+        for a conversation returns the preloaded line, as long as the
+        conversation did not change in between.
+
+        :param chats:           (account, jid) tuples of the conversations
+        """
+
+        self._last_conversation_rows.clear()
+
+        keys: dict[tuple[int, int], tuple[str, JID]] = {}
+        for account, jid in chats:
+            # No messages were ever stored for unknown jids
+            self._last_conversation_rows[(account, jid)] = None
+
+            fk_remote_pk = self._jid_pks.get(jid)
+            if fk_remote_pk is None:
+                continue
+
+            fk_account_pk = self._get_account_pk(session, account)
+            keys[(fk_account_pk, fk_remote_pk)] = (account, jid)
+
+        fk_pks = list(keys)
+        for i in range(0, len(fk_pks), LAST_ROWS_CHUNK_SIZE):
+            subqueries = [
+                self._get_last_conversation_row_stmt(
+                    fk_account_pk, fk_remote_pk, Message.pk
+                )
+                .correlate(None)
+                .scalar_subquery()
+                for fk_account_pk, fk_remote_pk in fk_pks[i : i + LAST_ROWS_CHUNK_SIZE]
+            ]
+
+            stmt = (
+                select(Message)
+                .where(Message.pk.in_(subqueries))
+                .options(joinedload(Message.occupant), *last_row_relations)
             )
 
-        stmt = stmt.order_by(sa.desc(Message.timestamp), sa.desc(Message.pk)).limit(1)
+            for message in session.scalars(stmt):
+                key = keys[(message.fk_account_pk, message.fk_remote_pk)]
+                self._last_conversation_rows[key] = message
 
-        return session.scalar(stmt)
+        self._log.info(
+            "Preloaded last lines of %s conversations",
+            len(self._last_conversation_rows),
+        )
+
+    def discard_preloaded_conversation_rows(self) -> None:
+        self._last_conversation_rows.clear()
 
     @with_session
     @timeit
@@ -883,30 +1198,28 @@ def get_last_display_marker(
     def get_last_display_markers(
         self, session: Session, account: str, jid: JID
     ) -> list[DisplayedMarker]:
+        """
+        Load the newest displayed marker of each occupant of a group chat,
+        markers older than 90 days are ignored
+        """
+
         fk_account_pk = self._get_account_pk(session, account)
         fk_remote_pk = self._get_jid_pk(session, jid)
 
-        cte = (
-            select(
-                DisplayedMarker,
-                func.row_number()
-                .over(
-                    partition_by=DisplayedMarker.fk_occupant_pk,
-                    order_by=sa.desc(DisplayedMarker.timestamp),
-                )
-                .label("rn"),
+        stmt = (
+            select(DisplayedMarker)
+            .join(
+                LatestDisplayedMarker,
+                LatestDisplayedMarker.fk_displayed_marker_pk == DisplayedMarker.pk,
             )
             .where(
-                DisplayedMarker.fk_remote_pk == fk_remote_pk,
-                DisplayedMarker.fk_account_pk == fk_account_pk,
-                DisplayedMarker.timestamp > utc_now() - timedelta(days=90),
+                LatestDisplayedMarker.fk_remote_pk == fk_remote_pk,
+                LatestDisplayedMarker.fk_account_pk == fk_account_pk,
+                LatestDisplayedMarker.timestamp > utc_now() - timedelta(days=90),
             )
-            .cte()
+            .options(joinedload(DisplayedMarker.remote))
         )
 
-        dm = aliased(DisplayedMarker, cte)
-        stmt = select(dm).where(cte.c.rn == 1).options(joinedload(dm.remote))
-
         return list(session.scalars(stmt).all())
 
     @with_session
@@ -1244,7 +1557,10 @@ def update_pending_message(
             .returning(Message.pk)
         )
 
-        return session.scalar(stmt)
+        pk = session.scalar(stmt)
+        if pk is not None:
+            self._message_ids.add((fk_account_pk, fk_remote_pk), None, stanza_id)
+        return pk
 
     @with_session
     @timeit
@@ -1253,8 +1569,11 @@ def remove_history_for_jid(self, session: Session, account: str, jid: JID) -> No
         Remove messages and metadata for a specific jid.
         """
 
+        self._last_conversation_rows.clear()
+
         fk_account_pk = self._get_account_pk(session, account)
         fk_remote_pk = self._get_jid_pk(session, jid)
+        self._message_ids.invalidate((fk_account_pk, fk_remote_pk))
 
         # It is intended that the Encryption table is missing
         # as it contains no JID or Message related fields
@@ -1263,6 +1582,7 @@ def remove_history_for_jid(self, session: Session, account: str, jid: JID) -> No
             Moderation,
             Retraction,
             Receipt,
+            LatestDisplayedMarker,
             DisplayedMarker,
             Reaction,
             Message,
@@ -1279,6 +1599,10 @@ def remove_history_for_jid(self, session: Session, account: str, jid: JID) -> No
 
             session.execute(stmt)
 
+        for key in list(self._thread_pks):
+            if key[:2] == (fk_account_pk, fk_remote_pk):
+                del self._thread_pks[key]
+
         log.info("Removed history for: %s", jid)
 
     @with_session
@@ -1288,10 +1612,14 @@ def remove_all_history(self, session: Session) -> None:
         Remove all message related data for all accounts
         """
 
+        self._last_conversation_rows.clear()
+        self._message_ids.clear()
+
         session.execute(delete(MessageError))
         session.execute(delete(Moderation))
         session.execute(delete(Retraction))
         session.execute(delete(Receipt))
+        session.execute(delete(LatestDisplayedMarker))
         session.execute(delete(DisplayedMarker))
         session.execute(delete(Reaction))
         session.execute(delete(Message))
@@ -1300,6 +1628,7 @@ def remove_all_history(self, session: Session) -> None:
         session.execute(delete(SecurityLabel))
         session.execute(delete(Thread))
         session.execute(delete(Encryption))
+        self._clear_fk_memo()
 
         log.info("Removed all chat history")
 
@@ -1311,6 +1640,13 @@ def remove_account(self, session: Session, account: str) -> None:
         session.execute(delete(Account).where(Account.pk == fk_account_pk))
 
         self._account_pks.pop(account)
+        self._message_ids.clear()
+        self._clear_fk_memo()
+
+        self._contact_cache_complete.discard(account)
+        for cache_key in list(self._contact_cache):
+            if cache_key[0] == account:
+                del self._contact_cache[cache_key]
 
     @with_session
     def remove_og(self, session: Session, pk: int) -> None:
@@ -1343,13 +1679,37 @@ def cleanup_chat_history(self, session: Session) -> None:
 
             log.info("Removed messages older then %s", threshold.isoformat())
 
+    @with_session
+    @timeit
+    def get_conversation_pks(
+        self, session: Session, account: str, jids: Iterable[JID]
+    ) -> dict[JID, tuple[int, int]]:
+        """
+        Return the account and remote pk of each chat which has a history,
+        chats without history are left out
+        """
+
+        fk_account_pk = self._get_account_pk(session, account)
+        pks: dict[JID, tuple[int, int]] = {}
+        for jid in jids:
+            fk_remote_pk = self._jid_pks.get(jid)
+            if fk_remote_pk is not None:
+                pks[jid] = (fk_account_pk, fk_remote_pk)
+        return pks
+
     @with_session_yield_from
     @timeit
     def get_messages_for_export(
-        self, session: Session, account: str, jid: JID
+        self,
+        session: Session,
+        fk_account_pk: int,
+        fk_remote_pk: int,
+        batch_size: int = 25,
     ) -> Iterator[Message]:
-        fk_account_pk = self._get_account_pk(session, account)
-        fk_remote_pk = self._get_jid_pk(session, jid)
+        """
+        Only reads from the database, so it can be used from another thread.
+        The pks are returned by get_conversation_pks().
+        """
 
         stmt = (
             select(Message)
@@ -1369,7 +1729,7 @@ def get_messages_for_export(
                     joinedload(Message.moderation),
                 ),
             )
-            .execution_options(yield_per=25)
+            .execution_options(yield_per=batch_size)
         )
 
         yield from session.scalars(stmt)
@@ -1408,6 +1768,7 @@ def set_block_occupant(
         value: bool,
     ) -> int:
         fk_account_pk = self._get_account_pk(session, account)
+        self._last_conversation_rows.clear()
 
         stmt = update(Occupant)
         if occupant_ids:
@@ -1524,7 +1885,9 @@ def set_contact_value(
             return_full=True,
         )
         if contact is None:
-            # Upsert did not insert or update any data
+            # Upsert did not insert or update any data, make sure the
+            # cache holds the stored row
+            self._contact_cache[cache_key] = self._load_contact(account, jid)
             return None
 
         self._contact_cache[cache_key] = contact
@@ -1560,21 +1923,29 @@ def get_contact_value(
             return None
         return getattr(contact, attr)
 
+    def get_contact(self, account: str, jid: JID) -> Contact | None:
+        cache_key = (account, jid)
+        try:
+            return self._contact_cache[cache_key]
+        except KeyError:
+            pass
+
+        if account in self._contact_cache_complete:
+            return None
+
+        contact = self._load_contact(account, jid)
+        self._contact_cache[cache_key] = contact
+        return contact
+
     @with_session
     @timeit
-    def get_contact(
+    def _load_contact(
         self,
         session: Session,
         account: str,
         jid: JID,
     ) -> Contact | None:
 
-        cache_key = (account, jid)
-        try:
-            return self._contact_cache[cache_key]
-        except KeyError:
-            pass
-
         fk_account_pk = self._get_account_pk(session, account)
         fk_remote_pk = self._get_jid_pk(session, jid)
 
@@ -1583,9 +1954,32 @@ def get_contact(
             Contact.fk_account_pk == fk_account_pk,
         )
 
-        contact = session.scalar(stmt)
-        self._contact_cache[cache_key] = contact
-        return contact
+        return session.scalar(stmt)
+
+    @with_session
+    @timeit
+    def preload_contacts(self, session: Session, account: str) -> None:
+        """
+        Load all contacts of the account into the contact cache with one
+        query. Afterwards lookups of the account are answered from the
+        cache only.
+        """
+
+        if account in self._contact_cache_complete:
+            return
+
+        fk_account_pk = self._get_account_pk(session, account)
+
+        stmt = (
+            select(Remote.jid, Contact)
+            .join(Remote, Remote.pk == Contact.fk_remote_pk)
+            .where(Contact.fk_account_pk == fk_account_pk)
+        )
+
+        for jid, contact in session.execute(stmt):
+            self._contact_cache[(account, jid)] = contact
+
+        self._contact_cache_complete.add(account)
 
     @with_session
     @timeit
@@ -1597,22 +1991,18 @@ def bulk_update_custom_names(
     ) -> None:
 
         values: list[dict[str, int | str | dt.datetime | None]] = []
+        jids: dict[int, JID] = {}
         for jid, name in items:
-            try:
-                contact = self._contact_cache[(account, jid)]
-            except KeyError:
-                pass
-
-            else:
-                if contact is not None and contact.custom_name == name:
-                    # No need to update, skip record
-                    continue
-
-                self._contact_cache.pop((account, jid), None)
+            contact = self._contact_cache.get((account, jid))
+            if contact is not None and contact.custom_name == name:
+                # No need to update, skip record
+                continue
 
+            fk_remote_pk = self._get_jid_pk(session, jid)
+            jids[fk_remote_pk] = jid
             values.append(
                 {
-                    "fk_remote_pk": self._get_jid_pk(session, jid),
+                    "fk_remote_pk": fk_remote_pk,
                     "fk_account_pk": self._get_account_pk(session, account),
                     "timestamp": utc_now(),
                     "custom_name": name,
@@ -1627,4 +2017,7 @@ def bulk_update_custom_names(
         stmt = stmt.on_conflict_do_update(
             set_={"custom_name": stmt.excluded.custom_name}
         )
-        session.execute(stmt)
+
+        # Update the cache with the stored rows
+        for contact in session.scalars(stmt.returning(Contact)):
+            self._contact_cache[(account, jids[contact.fk_remote_pk])] = contact
@@ -55,6 +55,9 @@
 
 log = logging.getLogger("gajim.c.storage")
 
+# Delay of commits while Gajim runs in the background (ms)
+BACKGROUND_COMMIT_DELAY = 30000
+
 P = ParamSpec("P")
 R = TypeVar("R")
 
@@ -247,6 +250,7 @@ def __init__(
         self._path = path
         self._create_statement = create_statement
         self._commit_delay = commit_delay
+        self._background = False
         self._con = cast(sqlite3.Connection, None)
         self._commit_source_id = None
 
@@ -352,7 +356,21 @@ def _delayed_commit(self) -> None:
         if self._commit_source_id is not None:
             return
 
-        self._commit_source_id = GLib.timeout_add(self._commit_delay, self._commit)
+        delay = BACKGROUND_COMMIT_DELAY if self._background else self._commit_delay
+        self._commit_source_id = GLib.timeout_add(delay, self._commit)
+
+    def set_background(self, active: bool) -> None:
+        """
+        Batch more changes per commit while in the background, and commit
+        pending changes once the background mode ends
+        """
+
+        self._background = active
+        if active or self._commit_source_id is None:
+            return
+
+        GLib.source_remove(self._commit_source_id)
+        self._commit()
 
     def shutdown(self) -> None:
         if self._commit_source_id is not None:
@@ -15,6 +15,7 @@
 
 from nbxmpp.protocol import JID
 from nbxmpp.structs import DiscoInfo
+from nbxmpp.structs import DiscoItem
 from nbxmpp.structs import RosterItem
 
 from gajim.common import configpaths
@@ -25,7 +26,10 @@
 
 ContactCacheDictT = dict[tuple[str, JID], dict[str, Any]]
 
-CURRENT_USER_VERSION = 10
+CURRENT_USER_VERSION = 11
+
+# Remove browsed services which were not refreshed for a week
+DISCO_CACHE_MAX_AGE = 7 * 24 * 3600
 
 CACHE_SQL_STATEMENT = (
     """
@@ -53,6 +57,23 @@
             PRIMARY KEY (account, jid)
     );
 
+    CREATE TABLE disco_info_cache(
+            account TEXT,
+            jid TEXT,
+            node TEXT,
+            disco_info TEXT,
+            last_seen INTEGER,
+            PRIMARY KEY (account, jid, node)
+    );
+    CREATE TABLE disco_items_cache(
+            account TEXT,
+            jid TEXT,
+            node TEXT,
+            items TEXT,
+            last_seen INTEGER,
+            PRIMARY KEY (account, jid, node)
+    );
+
     CREATE INDEX idx_unread ON unread(account, jid);
 
     PRAGMA user_version=%s;
@@ -86,6 +107,7 @@ def init(self, **kwargs: Any) -> None:
 
         self._fill_disco_info_cache()
         self._clean_caps_table()
+        self._clean_disco_cache()
         self._load_caps_data()
 
     @staticmethod
@@ -112,6 +134,29 @@ def _migrate(self) -> None:
             self._reinit_storage()
             return
 
+        if user_version < 11:
+            self._v11()
+
+    def _v11(self) -> None:
+        statements = [
+            """CREATE TABLE IF NOT EXISTS disco_info_cache(
+               account TEXT,
+               jid TEXT,
+               node TEXT,
+               disco_info TEXT,
+               last_seen INTEGER,
+               PRIMARY KEY (account, jid, node))""",
+            """CREATE TABLE IF NOT EXISTS disco_items_cache(
+               account TEXT,
+               jid TEXT,
+               node TEXT,
+               items TEXT,
+               last_seen INTEGER,
+               PRIMARY KEY (account, jid, node))""",
+            "PRAGMA user_version=11",
+        ]
+        self._execute_multiple(statements)
+
     @timeit
     def _load_caps_data(self) -> None:
         rows = self._con.execute(
@@ -222,6 +267,92 @@ def set_last_disco_info(
         self._disco_info_cache[jid] = disco_info
         self._delayed_commit()
 
+    @timeit
+    def _clean_disco_cache(self) -> None:
+        timestamp = int(time.time()) - DISCO_CACHE_MAX_AGE
+        self._con.execute(
+            "DELETE FROM disco_info_cache WHERE last_seen < ?", (timestamp,)
+        )
+        self._con.execute(
+            "DELETE FROM disco_items_cache WHERE last_seen < ?", (timestamp,)
+        )
+        self._delayed_commit()
+
+    @timeit
+    def get_disco_info(
+        self, account: str, jid: str, node: str, max_age: int
+    ) -> DiscoInfo | None:
+        """
+        Get the info of a browsed service
+
+        :param jid:         The jid of the service
+
+        :param node:        The node, an empty string for none
+
+        :param max_age:     max age in seconds of the record
+
+        """
+
+        sql = """SELECT disco_info as "disco_info [disco_info]", last_seen
+                 FROM disco_info_cache
+                 WHERE account = ? AND jid = ? AND node = ? AND last_seen >= ?"""
+        row = self._con.execute(
+            sql, (account, jid, node, int(time.time()) - max_age)
+        ).fetchone()
+        if row is None:
+            return None
+        return row.disco_info._replace(timestamp=row.last_seen)
+
+    @timeit
+    def set_disco_info(
+        self, account: str, jid: str, node: str, disco_info: DiscoInfo
+    ) -> None:
+        sql = """INSERT OR REPLACE INTO disco_info_cache
+                 (account, jid, node, disco_info, last_seen)
+                 VALUES (?, ?, ?, ?, ?)"""
+        self._con.execute(sql, (account, jid, node, disco_info, int(time.time())))
+        self._delayed_commit()
+
+    @timeit
+    def get_disco_items(
+        self, account: str, jid: str, node: str, max_age: int
+    ) -> list[DiscoItem] | None:
+        """
+        Get the items of a browsed service
+
+        :param jid:         The jid of the service
+
+        :param node:        The node, an empty string for none
+
+        :param max_age:     max age in seconds of the record
+
+        """
+
+        sql = """SELECT items FROM disco_items_cache
+                 WHERE account = ? AND jid = ? AND node = ? AND last_seen >= ?"""
+        row = self._con.execute(
+            sql, (account, jid, node, int(time.time()) - max_age)
+        ).fetchone()
+        if row is None:
+            return None
+        return [
+            DiscoItem(jid=JID.from_string(item_jid), name=name, node=item_node)
+            for item_jid, name, item_node in json.loads(row.items)
+        ]
+
+    @timeit
+    def set_disco_items(
+        self, account: str, jid: str, node: str, items: list[DiscoItem]
+    ) -> None:
+        serialized = json.dumps(
+            [(str(item.jid), item.name, item.node) for item in items]
+        )
+        sql = """INSERT OR REPLACE INTO disco_items_cache
+                 (account, jid, node, items, last_seen)
+                 VALUES (?, ?, ?, ?, ?)"""
+        self._con.execute(sql, (account, jid, node, serialized, int(time.time())))
+        self._delayed_commit()
+
     @timeit
     def store_roster(self, account: str, roster: dict[JID, RosterItem]) -> None:
         serialized = json.dumps(list(roster.values()), cls=Encoder)
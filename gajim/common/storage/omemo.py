@@ -11,8 +11,11 @@
 from typing import NamedTuple
 
 import sqlite3
+import threading
 import time
 from collections import namedtuple
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 from omemo_dr.const import OMEMOTrust
@@ -44,12 +47,37 @@ def _convert_record(record: bytes) -> SessionRecord:
 sqlite3.register_converter("pk", _convert_identity_key)
 sqlite3.register_converter("session_record", _convert_record)
 
+SessionKeyT = tuple[str, int]
+IdentityKeyT = tuple[str, bytes]
+
+
+class IdentityState(NamedTuple):
+    trust: OMEMOTrust | None
+    timestamp: int | None
+
 
 class OMEMOStorage(Store):
+    """
+    Sessions and identities are cached in memory, so encrypting for many
+    devices does not need to deserialize every session record again.
+
+    Writes made inside batch() are committed once at the end of the batch,
+    all other writes are committed immediately.
+
+    The storage is shared with the encryption worker thread of the OMEMO
+    module. A batch holds the storage lock, so the storage must only be used
+    inside a batch.
+    """
+
     def __init__(self, account: str, db_path: Path, log: LogAdapter) -> None:
         self._log = log
         self._account = account
-        self._con = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_COLNAMES)
+        # Messages are encrypted in a worker thread of the OMEMO module,
+        # the connection is guarded by the lock held in batch()
+        self._lock = threading.RLock()
+        self._con = sqlite3.connect(
+            db_path, detect_types=sqlite3.PARSE_COLNAMES, check_same_thread=False
+        )
         self._con.row_factory = self._namedtuple_factory
         self.create_db()
         self.migrate_db()
@@ -63,6 +91,56 @@ def __init__(self, account: str, db_path: Path, log: LogAdapter) -> None:
             self._con.execute("PRAGMA journal_mode=MEMORY;")
         self._con.commit()
 
+        self._sessions: dict[SessionKeyT, SessionRecord] = {}
+        self._identities: dict[IdentityKeyT, IdentityState] = {}
+        self._load_identities()
+
+        self._batch_depth = 0
+        self._batch_loaded: set[SessionKeyT] = set()
+        self._batch_stored: set[SessionKeyT] = set()
+
+    def _load_identities(self) -> None:
+        query = """SELECT recipient_id, public_key, trust, timestamp
+                   FROM identities"""
+        for row in self._con.execute(query):
+            if row.public_key is None:
+                continue
+            trust = OMEMOTrust(row.trust) if row.trust is not None else None
+            key = (row.recipient_id, bytes(row.public_key))
+            self._identities[key] = IdentityState(trust, row.timestamp)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Commit all writes made in this context at once
+
+        The storage lock is held until the context is left, so batches of
+        different threads never run at the same time.
+
+        If the context is left with an exception, session records which were
+        loaded but not stored again are dropped from the cache, because they
+        may have been modified without being written to the database.
+        """
+
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield
+            except BaseException:
+                for key in self._batch_loaded - self._batch_stored:
+                    self._sessions.pop(key, None)
+                raise
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._batch_loaded.clear()
+                    self._batch_stored.clear()
+                    self._con.commit()
+
+    def _commit(self) -> None:
+        if self._batch_depth == 0:
+            self._con.commit()
+
     def _is_blind_trust_enabled(self) -> bool:
         return app.settings.get_account_setting(self._account, "omemo_blind_trust")
 
@@ -116,12 +194,20 @@ def create_db(self) -> None:
                     record BLOB, timestamp INTEGER, active INTEGER DEFAULT 1,
                     UNIQUE(recipient_id, device_id));
 
+                CREATE TABLE IF NOT EXISTS devicelists (
+                    recipient_id TEXT PRIMARY KEY, devices TEXT,
+                    timestamp INTEGER);
+
+                CREATE TABLE IF NOT EXISTS bundle_requests (
+                    recipient_id TEXT, device_id INTEGER, timestamp INTEGER,
+                    PRIMARY KEY (recipient_id, device_id));
+
                 """
 
             create_db_sql = """
                 BEGIN TRANSACTION;
                 %s
-                PRAGMA user_version=12;
+                PRAGMA user_version=13;
                 END TRANSACTION;
                 """ % (create_tables)
             self._con.executescript(create_db_sql)
@@ -355,6 +441,27 @@ def migrate_db(self) -> None:
             self._con.execute("PRAGMA user_version=12")
             self._con.commit()
 
+        if self.user_version() < 13:
+            # Remember fetched devicelists and bundle requests across restarts
+            add_tables = """
+                CREATE TABLE IF NOT EXISTS devicelists (
+                    recipient_id TEXT PRIMARY KEY, devices TEXT,
+                    timestamp INTEGER);
+
+                CREATE TABLE IF NOT EXISTS bundle_requests (
+                    recipient_id TEXT, device_id INTEGER, timestamp INTEGER,
+                    PRIMARY KEY (recipient_id, device_id));
+            """
+
+            self._con.executescript(
+                """ BEGIN TRANSACTION;
+                    %s
+                    PRAGMA user_version=13;
+                    END TRANSACTION;
+                """
+                % add_tables
+            )
+
     def load_signed_pre_key(self, signed_pre_key_id: int) -> SignedPreKeyRecord:
         query = "SELECT record FROM signed_prekeys WHERE prekey_id = ?"
         result = self._con.execute(query, (signed_pre_key_id,)).fetchone()
@@ -415,10 +522,22 @@ def remove_old_signed_pre_keys(self, timestamp: int) -> None:
         self._con.commit()
 
     def load_session(self, recipient_id: str, device_id: int) -> SessionRecord:
+        key = (recipient_id, device_id)
+        if self._batch_depth:
+            self._batch_loaded.add(key)
+
+        record = self._sessions.get(key)
+        if record is not None:
+            return record
+
         query = """SELECT record as "record [session_record]"
                    FROM sessions WHERE recipient_id = ? AND device_id = ?"""
-        result = self._con.execute(query, (recipient_id, device_id)).fetchone()
-        return result.record if result is not None else SessionRecord()
+        result = self._con.execute(query, key).fetchone()
+        if result is None:
+            return SessionRecord()
+
+        self._sessions[key] = result.record
+        return result.record
 
     def get_jid_from_device(self, device_id: int) -> str | None:
         query = """SELECT recipient_id
@@ -447,9 +566,16 @@ def store_session(
                 query, (session_record.serialize(), recipient_id, device_id)
             )
 
-        self._con.commit()
+        key = (recipient_id, device_id)
+        self._sessions[key] = session_record
+        if self._batch_depth:
+            self._batch_stored.add(key)
+        self._commit()
 
     def contains_session(self, recipient_id: str, device_id: int) -> bool:
+        if (recipient_id, device_id) in self._sessions:
+            return True
+
         query = """SELECT record FROM sessions
                    WHERE recipient_id = ? AND device_id = ?"""
         result = self._con.execute(query, (recipient_id, device_id)).fetchone()
@@ -459,12 +585,16 @@ def delete_session(self, recipient_id: str, device_id: int) -> None:
         self._log.info("Delete session for %s %s", recipient_id, device_id)
         query = "DELETE FROM sessions WHERE recipient_id = ? AND device_id = ?"
         self._con.execute(query, (recipient_id, device_id))
-        self._con.commit()
+        self._sessions.pop((recipient_id, device_id), None)
+        self._commit()
 
     def delete_all_sessions(self, recipient_id: str) -> None:
         query = "DELETE FROM sessions WHERE recipient_id = ?"
         self._con.execute(query, (recipient_id,))
-        self._con.commit()
+        for key in list(self._sessions):
+            if key[0] == recipient_id:
+                del self._sessions[key]
+        self._commit()
 
     def get_identity_infos(self, recipient_ids: str | list[str]) -> list[IdentityInfo]:
         if isinstance(recipient_ids, str):
@@ -480,9 +610,7 @@ def get_identity_infos(self, recipient_ids: str | list[str]) -> list[IdentityInf
         )
         i_results = self._con.execute(query, recipient_ids).fetchall()
 
-        query = """SELECT device_id,
-                          record as "record [session_record]",
-                          active
+        query = """SELECT recipient_id, device_id, active
                    FROM sessions WHERE recipient_id IN ({})""".format(
             ", ".join(["?"] * len(recipient_ids))
         )
@@ -490,9 +618,10 @@ def get_identity_infos(self, recipient_ids: str | list[str]) -> list[IdentityInf
 
         sessions: dict[IdentityKey, Any] = {}
         for s_result in s_results:
-            if s_result.record.is_fresh():
+            record = self.load_session(s_result.recipient_id, s_result.device_id)
+            if record.is_fresh():
                 continue
-            ik = s_result.record.get_session_state().get_remote_identity_key()
+            ik = record.get_session_state().get_remote_identity_key()
             sessions[ik] = s_result
 
         identity_infos: list[IdentityInfo] = []
@@ -528,13 +657,13 @@ def set_active_state(self, address: str, devicelist: list[int]) -> None:
             ", ".join(["?"] * len(devicelist))
         )
         self._con.execute(query, (address,) + tuple(devicelist))
-        self._con.commit()
+        self._commit()
 
     def set_inactive(self, address: str, device_id: int) -> None:
         query = """UPDATE sessions SET active = 0
                    WHERE recipient_id = ? AND device_id = ?"""
         self._con.execute(query, (address, device_id))
-        self._con.commit()
+        self._commit()
 
     def get_inactive_sessions_keys(self, recipient_id: str) -> list[IdentityKey]:
         query = """SELECT record as "record [session_record]" FROM sessions
@@ -573,7 +702,7 @@ def contains_pre_key(self, pre_key_id: int) -> bool:
     def remove_pre_key(self, pre_key_id: int) -> None:
         query = "DELETE FROM prekeys WHERE prekey_id = ?"
         self._con.execute(query, (pre_key_id,))
-        self._con.commit()
+        self._commit()
 
     def get_current_pre_key_id(self) -> int | None:
         query = "SELECT MAX(prekey_id) FROM prekeys"
@@ -622,32 +751,30 @@ def save_identity(self, recipient_id: str, identity_key: IdentityKey) -> None:
                    VALUES(?, ?, ?, ?)"""
         if not self.contains_identity(recipient_id, identity_key):
             trust = self.get_default_trust(recipient_id)
+            public_key = identity_key.get_public_key().serialize()
             self._con.execute(
                 query,
                 (
                     recipient_id,
-                    identity_key.get_public_key().serialize(),
+                    public_key,
                     trust,
                     1 if trust == OMEMOTrust.BLIND else 0,
                 ),
             )
-            self._con.commit()
+            self._identities[(recipient_id, public_key)] = IdentityState(trust, None)
+            self._commit()
 
     def contains_identity(self, recipient_id: str, identity_key: IdentityKey) -> bool:
-        query = """SELECT * FROM identities WHERE recipient_id = ?
-                   AND public_key = ?"""
-
         public_key = identity_key.get_public_key().serialize()
-        result = self._con.execute(query, (recipient_id, public_key)).fetchone()
-
-        return result is not None
+        return (recipient_id, public_key) in self._identities
 
     def delete_identity(self, recipient_id: str, identity_key: IdentityKey) -> None:
         query = """DELETE FROM identities
                    WHERE recipient_id = ? AND public_key = ?"""
         public_key = identity_key.get_public_key().serialize()
         self._con.execute(query, (recipient_id, public_key))
-        self._con.commit()
+        self._identities.pop((recipient_id, public_key), None)
+        self._commit()
 
     def is_trusted_identity(self, recipient_id: str, identity_key: IdentityKey) -> bool:
         return True
@@ -655,11 +782,9 @@ def is_trusted_identity(self, recipient_id: str, identity_key: IdentityKey) -> b
     def get_trust_for_identity(
         self, recipient_id: str, identity_key: IdentityKey
     ) -> OMEMOTrust | None:
-        query = """SELECT trust FROM identities WHERE recipient_id = ?
-                   AND public_key = ?"""
         public_key = identity_key.get_public_key().serialize()
-        result = self._con.execute(query, (recipient_id, public_key)).fetchone()
-        return result.trust if result is not None else None
+        state = self._identities.get((recipient_id, public_key))
+        return state.trust if state is not None else None
 
     def get_fingerprints(self, jid: str):
         query = """SELECT recipient_id,
@@ -700,7 +825,12 @@ def set_trust(
                    AND recipient_id = ?"""
         public_key = identity_key.get_public_key().serialize()
         self._con.execute(query, (trust, public_key, recipient_id))
-        self._con.commit()
+
+        key = (recipient_id, public_key)
+        state = self._identities.get(key)
+        if state is not None:
+            self._identities[key] = state._replace(trust=trust)
+        self._commit()
 
     def is_trusted(self, recipient_id: str, device_id: int) -> bool:
         record = self.load_session(recipient_id, device_id)
@@ -716,10 +846,8 @@ def get_identity_last_seen(
         self, recipient_id: str, identity_key: IdentityKey
     ) -> int | None:
         serialized = identity_key.get_public_key().serialize()
-        query = """SELECT timestamp FROM identities
-                   WHERE recipient_id = ? AND public_key = ?"""
-        result = self._con.execute(query, (recipient_id, serialized)).fetchone()
-        return result.timestamp if result is not None else None
+        state = self._identities.get((recipient_id, serialized))
+        return state.timestamp if state is not None else None
 
     def set_identity_last_seen(
         self, recipient_id: str, identity_key: IdentityKey
@@ -730,7 +858,48 @@ def set_identity_last_seen(
         query = """UPDATE identities SET timestamp = ?
                    WHERE recipient_id = ? AND public_key = ?"""
         self._con.execute(query, (timestamp, recipient_id, serialized))
-        self._con.commit()
+
+        key = (recipient_id, serialized)
+        state = self._identities.get(key)
+        if state is not None:
+            self._identities[key] = state._replace(timestamp=timestamp)
+        self._commit()
+
+    def get_devicelist(self, recipient_id: str) -> tuple[list[int], int] | None:
+        """
+        Return the last fetched devicelist of recipient_id and the time
+        it was fetched
+        """
+
+        query = """SELECT devices, timestamp FROM devicelists
+                   WHERE recipient_id = ?"""
+        result = self._con.execute(query, (recipient_id,)).fetchone()
+        if result is None:
+            return None
+
+        devices = [int(device) for device in result.devices.split(",") if device]
+        return devices, result.timestamp
+
+    def store_devicelist(self, recipient_id: str, devicelist: list[int]) -> None:
+        query = """INSERT OR REPLACE INTO devicelists
+                   (recipient_id, devices, timestamp) VALUES (?, ?, ?)"""
+        devices = ",".join(map(str, devicelist))
+        self._con.execute(query, (recipient_id, devices, int(time.time())))
+        self._commit()
+
+    def get_bundle_request_timestamp(
+        self, recipient_id: str, device_id: int
+    ) -> int | None:
+        query = """SELECT timestamp FROM bundle_requests
+                   WHERE recipient_id = ? AND device_id = ?"""
+        result = self._con.execute(query, (recipient_id, device_id)).fetchone()
+        return result.timestamp if result is not None else None
+
+    def set_bundle_request_timestamp(self, recipient_id: str, device_id: int) -> None:
+        query = """INSERT OR REPLACE INTO bundle_requests
+                   (recipient_id, device_id, timestamp) VALUES (?, ?, ?)"""
+        self._con.execute(query, (recipient_id, device_id, int(time.time())))
+        self._commit()
 
     def get_unacknowledged_count(self, recipient_id: str, device_id: int) -> int:
         record = self.load_session(recipient_id, device_id)
@@ -0,0 +1,424 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-only
+
+from __future__ import annotations
+
+from typing import Any
+from typing import NamedTuple
+
+import glob
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from gi.repository import GLib
+
+from gajim.common import app
+from gajim.common import configpaths
+from gajim.common.storage.base import SqliteStorage
+from gajim.common.storage.base import timeit
+
+CURRENT_USER_VERSION = 1
+
+PREVIEW_CACHE_SQL_STATEMENT = (
+    """
+    CREATE TABLE files (
+            content_hash TEXT PRIMARY KEY,
+            filename TEXT,
+            size INTEGER,
+            last_access INTEGER
+    );
+    CREATE TABLE uris (
+            uri TEXT PRIMARY KEY,
+            content_hash TEXT
+    );
+
+    CREATE INDEX idx_uris_content_hash ON uris(content_hash);
+
+    PRAGMA user_version=%s;
+    """
+    % CURRENT_USER_VERSION
+)
+
+# Last access times are only written to the database if they are at least
+# this old, looking at the same preview repeatedly does not cause writes
+ACCESS_UPDATE_THRESHOLD = 3600
+
+EVICTION_INTERVAL = 3600
+
+MIB = 1024 * 1024
+DAY = 24 * 3600
+
+log = logging.getLogger("gajim.c.storage.preview_cache")
+
+
+class CachedFile(NamedTuple):
+    content_hash: str
+    filename: str
+    size: int
+    last_access: int
+
+
+class PreviewCacheStorage(SqliteStorage):
+    """
+    Index of downloaded preview files and their thumbnails
+
+    Files are deduplicated by content hash, multiple URIs can point to
+    the same file. The whole index is held in memory, so lookups don't
+    need to touch the database or the filesystem.
+    """
+
+    def __init__(self, in_memory: bool = False) -> None:
+        path = None if in_memory else configpaths.get("PREVIEW_CACHE_DB")
+        SqliteStorage.__init__(self, log, path, PREVIEW_CACHE_SQL_STATEMENT)
+
+        self._orig_dir = configpaths.get("DOWNLOADS")
+        self._thumb_dir = configpaths.get("DOWNLOADS_THUMB")
+
+        self._files: dict[str, CachedFile] = {}
+        self._uris: dict[str, str] = {}
+        # Reverse indexes, the uris of each content hash and the content
+        # hashes stored under each filename
+        self._hash_uris: dict[str, set[str]] = {}
+        self._filename_hashes: dict[str, set[str]] = {}
+        self._total_size = 0
+
+        # Files of import_file() are hashed one after another in the
+        # background, uris which are currently imported
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="PreviewCache"
+        )
+        self._importing: set[str] = set()
+
+        self._eviction_source_id: int | None = None
+        self._timer_source_id: int | None = None
+
+    def init(self, **kwargs: Any) -> None:
+        SqliteStorage.init(self)
+        self._set_journal_mode("WAL")
+
+        self._load_index()
+
+        self._timer_source_id = GLib.timeout_add_seconds(
+            EVICTION_INTERVAL, self._on_eviction_timer
+        )
+        self._schedule_eviction()
+
+    def _migrate(self) -> None:
+        try:
+            user_version = self.user_version
+        except sqlite3.DatabaseError as error:
+            log.error("Database error: %s", error)
+            self._reinit_storage()
+            return
+
+        if user_version > CURRENT_USER_VERSION:
+            # Gajim was downgraded, reinit the storage
+            self._reinit_storage()
+            return
+
+    @timeit
+    def _load_index(self) -> None:
+        self._files.clear()
+        self._uris.clear()
+        self._hash_uris.clear()
+        self._filename_hashes.clear()
+        self._total_size = 0
+
+        rows = self._con.execute(
+            "SELECT content_hash, filename, size, last_access FROM files"
+        )
+        for row in rows:
+            self._add_file_entry(CachedFile(*row))
+
+        rows = self._con.execute("SELECT uri, content_hash FROM uris")
+        for uri, content_hash in rows:
+            self._set_uri(uri, content_hash)
+
+        log.info("%d files (%d MiB) loaded", len(self._files), self._total_size // MIB)
+
+    def get_orig_path(self, uri: str) -> Path | None:
+        """
+        Return the path of the downloaded file for uri, or None if the uri
+        is not known. Marks the file as recently used.
+        """
+
+        content_hash = self._uris.get(uri)
+        if content_hash is None:
+            return None
+
+        file = self._files.get(content_hash)
+        if file is None:
+            return None
+
+        self._touch(file)
+        return self._orig_dir / file.filename
+
+    def _touch(self, file: CachedFile) -> None:
+        now = int(time.time())
+        if now - file.last_access < ACCESS_UPDATE_THRESHOLD:
+            return
+
+        self._files[file.content_hash] = file._replace(last_access=now)
+        self._con.execute(
+            "UPDATE files SET last_access = ? WHERE content_hash = ?",
+            (now, file.content_hash),
+        )
+        self._delayed_commit()
+
+    @timeit
+    def add_file(self, uri: str, path: Path, content_hash: str) -> Path:
+        """
+        Register a downloaded file for uri
+
+        :param uri:           The uri the file was downloaded from
+
+        :param path:          The path of the downloaded file
+
+        :param content_hash:  The sha256 hex digest of the file content
+
+        Returns the path under which the content is stored. If the content is
+        already known, the new file is removed and the existing path returned.
+        """
+
+        # Entries stored under the same filename with other content are
+        # outdated, e.g. because the uri was downloaded again
+        for stale_hash in list(self._filename_hashes.get(path.name, ())):
+            if stale_hash != content_hash:
+                self._remove_file_entry(self._files[stale_hash])
+
+        now = int(time.time())
+        file = self._files.get(content_hash)
+        if file is not None and file.filename != path.name:
+            existing_path = self._orig_dir / file.filename
+            if existing_path.exists():
+                log.info("Deduplicate %s, same as %s", path.name, file.filename)
+                path.unlink(missing_ok=True)
+                path = existing_path
+            else:
+                self._remove_file_entry(file)
+                file = None
+
+        if file is None:
+            file = CachedFile(content_hash, path.name, path.stat().st_size, now)
+            self._add_file_entry(file)
+            self._con.execute(
+                """INSERT OR REPLACE INTO files
+                   (content_hash, filename, size, last_access)
+                   VALUES (?, ?, ?, ?)""",
+                file,
+            )
+        else:
+            self._touch(file)
+
+        self._set_uri(uri, content_hash)
+        self._con.execute(
+            "INSERT OR REPLACE INTO uris (uri, content_hash) VALUES (?, ?)",
+            (uri, content_hash),
+        )
+        self._delayed_commit()
+
+        if self._is_over_budget():
+            self._schedule_eviction()
+
+        return path
+
+    def import_file(
+        self, uri: str, path: Path, callback: Callable[[Path], Any] | None = None
+    ) -> None:
+        """
+        Register a file whose content hash is not known, e.g. because it was
+        downloaded before the preview cache existed
+
+        The file is hashed in a thread and added with add_file() afterwards,
+        callback is then called with the path under which it is stored.
+        """
+
+        if uri in self._importing:
+            return
+
+        self._importing.add(uri)
+        future = self._executor.submit(_hash_file, path)
+        future.add_done_callback(
+            partial(GLib.idle_add, self._on_file_hashed, uri, path, callback)
+        )
+
+    def _on_file_hashed(
+        self,
+        uri: str,
+        path: Path,
+        callback: Callable[[Path], Any] | None,
+        future: Future[str],
+    ) -> bool:
+        if uri not in self._importing:
+            # The storage was shut down
+            return GLib.SOURCE_REMOVE
+
+        self._importing.discard(uri)
+        try:
+            path = self.add_file(uri, path, future.result())
+        except OSError as error:
+            log.warning("Unable to import %s: %s", path, error)
+            return GLib.SOURCE_REMOVE
+
+        if callback is not None:
+            callback(path)
+        return GLib.SOURCE_REMOVE
+
+    def remove_uri(self, uri: str) -> None:
+        """
+        Remove the file of uri from the index, e.g. because it was deleted
+        """
+
+        content_hash = self._uris.get(uri)
+        if content_hash is None:
+            return
+
+        file = self._files.get(content_hash)
+        if file is not None:
+            self._remove_file_entry(file)
+        self._delayed_commit()
+
+    def _add_file_entry(self, file: CachedFile) -> None:
+        self._files[file.content_hash] = file
+        self._filename_hashes.setdefault(file.filename, set()).add(file.content_hash)
+        self._total_size += file.size
+
+    def _set_uri(self, uri: str, content_hash: str) -> None:
+        old_hash = self._uris.get(uri)
+        if old_hash is not None:
+            uris = self._hash_uris[old_hash]
+            uris.discard(uri)
+            if not uris:
+                del self._hash_uris[old_hash]
+
+        self._uris[uri] = content_hash
+        self._hash_uris.setdefault(content_hash, set()).add(uri)
+
+    def _remove_file_entry(self, file: CachedFile) -> bool:
+        """
+        Remove a file and its uris from the index
+
+        Returns True if no other entry is stored under the filename, only
+        then the file may be removed from disk.
+        """
+
+        del self._files[file.content_hash]
+        self._total_size -= file.size
+
+        for uri in self._hash_uris.pop(file.content_hash, ()):
+            del self._uris[uri]
+
+        self._con.execute(
+            "DELETE FROM files WHERE content_hash = ?", (file.content_hash,)
+        )
+        self._con.execute(
+            "DELETE FROM uris WHERE content_hash = ?", (file.content_hash,)
+        )
+
+        hashes = self._filename_hashes[file.filename]
+        hashes.discard(file.content_hash)
+        if hashes:
+            return False
+
+        del self._filename_hashes[file.filename]
+        return True
+
+    @staticmethod
+    def _get_max_size() -> int:
+        return app.settings.get("preview_cache_max_size") * MIB
+
+    @staticmethod
+    def _get_max_age() -> int:
+        return app.settings.get("preview_cache_max_age") * DAY
+
+    def _is_over_budget(self) -> bool:
+        max_size = self._get_max_size()
+        return max_size > 0 and self._total_size > max_size
+
+    def _on_eviction_timer(self) -> bool:
+        self._schedule_eviction()
+        return GLib.SOURCE_CONTINUE
+
+    def _schedule_eviction(self) -> None:
+        if self._eviction_source_id is not None:
+            return
+
+        self._eviction_source_id = GLib.idle_add(
+            self._evict, priority=GLib.PRIORITY_LOW
+        )
+
+    @timeit
+    def _evict(self) -> bool:
+        self._eviction_source_id = None
+
+        max_size = self._get_max_size()
+        max_age = self._get_max_age()
+        min_last_access = int(time.time()) - max_age
+
+        evicted: list[CachedFile] = []
+        filenames: list[str] = []
+        for file in sorted(self._files.values(), key=lambda f: f.last_access):
+            too_old = max_age > 0 and file.last_access < min_last_access
+            too_big = max_size > 0 and self._total_size > max_size
+            if not too_old and not too_big:
+                break
+
+            if self._remove_file_entry(file):
+                filenames.append(file.filename)
+            evicted.append(file)
+
+        if not evicted:
+            return GLib.SOURCE_REMOVE
+
+        self._commit()
+        log.info(
+            "Evicted %d files, cache size is now %d MiB",
+            len(evicted),
+            self._total_size // MIB,
+        )
+
+        thread = threading.Thread(
+            target=_remove_files,
+            args=(filenames, self._orig_dir, self._thumb_dir),
+            daemon=True,
+        )
+        thread.start()
+        return GLib.SOURCE_REMOVE
+
+    def shutdown(self) -> None:
+        if self._eviction_source_id is not None:
+            GLib.source_remove(self._eviction_source_id)
+
+        if self._timer_source_id is not None:
+            GLib.source_remove(self._timer_source_id)
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._importing.clear()
+
+        SqliteStorage.shutdown(self)
+
+
+def _hash_file(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _remove_files(filenames: list[str], orig_dir: Path, thumb_dir: Path) -> None:
+    for filename in filenames:
+        orig_path = orig_dir / filename
+        pattern = f"{glob.escape(orig_path.stem)}_thumb_*"
+        try:
+            orig_path.unlink(missing_ok=True)
+            for thumb_path in thumb_dir.glob(pattern):
+                thumb_path.unlink(missing_ok=True)
+        except Exception as error:
+            log.warning("Unable to remove %s: %s", filename, error)
@@ -6,8 +6,11 @@
 
 from typing import Any
 
+import functools
+import itertools
 import re
 import string
+from collections.abc import Iterator
 from dataclasses import dataclass
 from dataclasses import field
 from re import Match
@@ -43,10 +46,19 @@
     rf"(?P<uri>(?<![\w+.-]){regex.IRI})|(?P<jid>{regex.XMPP.jid})"
 )
 
+# Characters which are never part of a match of URI_OR_JID_RX. Other
+# whitespace like NBSP is allowed in IRIs and is therefore not included.
+URI_SEPARATOR_RX = re.compile(r"[\t-\r\x1c-\x20\x85]")
+URI_SEPARATORS = frozenset("\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85")
+SCHEME_ONLY_RX = re.compile(r"[^:]+:")
+
 SD = 0
 SD_POS = 1
 MAX_QUOTE_LEVEL = 20
 
+# Number of parsing results kept by process_cached()
+PARSING_CACHE_SIZE = 1000
+
 
 @dataclass
 class StyleObject:
@@ -166,14 +178,57 @@ class ParsingResult:
     blocks: list[Block]
 
 
-def find_byte_index(text: str, index: int):
-    byte_index = -1
-    for index_, c in enumerate(text):
-        byte_index += len(c.encode())
-        if index == index_:
-            return byte_index
+ByteOffsetsT = list[int] | None
+
+
+def _utf8_length(char: str) -> int:
+    code_point = ord(char)
+    if code_point < 0x80:
+        return 1
+    if code_point < 0x800:
+        return 2
+    if code_point < 0x10000:
+        return 3
+    return 4
+
+
+def get_byte_offsets(line: str) -> ByteOffsetsT:
+    """
+    Return the utf8 byte offset of every character of line, followed by the
+    byte length of line. Returns None if line is ascii, because character
+    and byte offsets are the same then.
+    """
+
+    if line.isascii():
+        return None
+    return list(itertools.accumulate(map(_utf8_length, line), initial=0))
+
 
-    raise ValueError(f"index not in string: {text}, {index}")
+def _get_byte_length(line: str, byte_offsets: ByteOffsetsT) -> int:
+    if byte_offsets is None:
+        return len(line)
+    return byte_offsets[-1]
+
+
+def _get_byte_index(byte_offsets: ByteOffsetsT, index: int) -> int:
+    """
+    Return the index of the last utf8 byte of the character at index
+    """
+
+    if byte_offsets is None:
+        return index
+    return byte_offsets[index + 1] - 1
+
+
+@functools.lru_cache(maxsize=PARSING_CACHE_SIZE)
+def process_cached(text: str) -> ParsingResult:
+    """
+    Same as process(), but results are cached by text, so displaying the
+    same message again needs no parsing. The returned result is shared
+    and must not be modified.
+    """
+
+    return process(text)
 
 
 def process(text: str | bytes, level: int = 0) -> ParsingResult:
@@ -186,11 +241,12 @@ def process(text: str | bytes, level: int = 0) -> ParsingResult:
             offset = 0
             offset_bytes = 0
             for line in block.text.splitlines(keepends=True):
-                block.spans += _parse_line(line, offset, offset_bytes)
-                block.uris += _parse_uris(line, offset, offset_bytes)
+                byte_offsets = get_byte_offsets(line)
+                block.spans += _parse_line(line, offset, offset_bytes, byte_offsets)
+                block.uris += _parse_uris(line, offset, offset_bytes, byte_offsets)
 
                 offset += len(line)
-                offset_bytes += len(line.encode())
+                offset_bytes += _get_byte_length(line, byte_offsets)
 
         if isinstance(block, QuoteBlock):
             result = process(block.unquote(), level=level + 1)
@@ -207,9 +263,10 @@ def process_uris(text: str | bytes) -> list[BaseHyperlink]:
     offset = 0
     offset_bytes = 0
     for line in text.splitlines(keepends=True):
-        uris += _parse_uris(line, offset, offset_bytes)
+        byte_offsets = get_byte_offsets(line)
+        uris += _parse_uris(line, offset, offset_bytes, byte_offsets)
         offset += len(line)
-        offset_bytes += len(line.encode())
+        offset_bytes += _get_byte_length(line, byte_offsets)
 
     return uris
 
@@ -251,7 +308,9 @@ def _parse_blocks(text: str, level: int) -> list[Block]:
     return blocks
 
 
-def _parse_line(line: str, offset: int, offset_bytes: int) -> list[Span]:
+def _parse_line(
+    line: str, offset: int, offset_bytes: int, byte_offsets: ByteOffsetsT
+) -> list[Span]:
     index: int = 0
     length = len(line)
     stack: list[tuple[str, int]] = []
@@ -273,7 +332,9 @@ def _parse_line(line: str, offset: int, offset_bytes: int) -> list[Span]:
 
         if is_valid_start:
             if sd == PRE:
-                index = _handle_pre_span(line, index, offset, offset_bytes, spans)
+                index = _handle_pre_span(
+                    line, index, offset, offset_bytes, byte_offsets, spans
+                )
                 continue
 
             stack.append((sd, index))
@@ -291,14 +352,20 @@ def _parse_line(line: str, offset: int, offset_bytes: int) -> list[Span]:
                 continue
 
             start_pos = _find_span_start_position(sd, stack)
-            spans.append(_make_span(line, sd, start_pos, index, offset, offset_bytes))
+            spans.append(
+                _make_span(
+                    line, sd, start_pos, index, offset, offset_bytes, byte_offsets
+                )
+            )
 
         index += 1
 
     return spans
 
 
-def _parse_uris(line: str, offset: int, offset_bytes: int) -> list[BaseHyperlink]:
+def _parse_uris(
+    line: str, offset: int, offset_bytes: int, byte_offsets: ByteOffsetsT
+) -> list[BaseHyperlink]:
     uris: list[BaseHyperlink] = []
 
     def make(start: int, end: int, is_jid: bool) -> BaseHyperlink | None:
@@ -309,12 +376,14 @@ def make(start: int, end: int, is_jid: bool) -> BaseHyperlink | None:
             # Trim one trailing closing parenthesis if the match is preceded
             # by an opening one somewhere on the line
             end -= 1
-        if re.fullmatch("[^:]+:", line[start:end]):
+        if SCHEME_ONLY_RX.fullmatch(line, start, end):
             # URIs that consist only of a scheme are thusly excluded
             return None
-        return _make_hyperlink(line, start, end - 1, offset, offset_bytes, is_jid)
+        return _make_hyperlink(
+            line, start, end - 1, offset, offset_bytes, byte_offsets, is_jid
+        )
 
-    for match in URI_OR_JID_RX.finditer(line):
+    for match in find_uri_matches(line):
         start, end = match.span()
         hyperlink = make(start, end, bool(match.group("jid")))
         if hyperlink:
@@ -323,8 +392,53 @@ def make(start: int, end: int, is_jid: bool) -> BaseHyperlink | None:
     return uris
 
 
+def find_uri_matches(line: str) -> Iterator[Match[str]]:
+    """
+    Yield the same matches as URI_OR_JID_RX.finditer(line)
+
+    Every URI contains a colon and every JID an at sign, and no match
+    contains a separator. URI_OR_JID_RX is therefore only run on the
+    separator delimited words which contain one of these characters,
+    lines without them are skipped without running it at all.
+    """
+
+    pos = 0
+    colon = line.find(":")
+    at = line.find("@")
+    while True:
+        if -1 < colon < pos:
+            colon = line.find(":", pos)
+        if -1 < at < pos:
+            at = line.find("@", pos)
+
+        if colon == -1 and at == -1:
+            return
+
+        candidate = max(colon, at) if -1 in (colon, at) else min(colon, at)
+
+        start = candidate
+        while start > pos and line[start - 1] not in URI_SEPARATORS:
+            start -= 1
+
+        separator = URI_SEPARATOR_RX.search(line, candidate)
+        end = len(line) if separator is None else separator.start()
+
+        match = URI_OR_JID_RX.search(line, start, end)
+        if match is None:
+            pos = end
+            continue
+
+        yield match
+        pos = match.end()
+
+
 def _handle_pre_span(
-    line: str, index: int, offset: int, offset_bytes: int, spans: list[Span]
+    line: str,
+    index: int,
+    offset: int,
+    offset_bytes: int,
+    byte_offsets: ByteOffsetsT,
+    spans: list[Span],
 ) -> int:
 
     # Scan ahead for the end
@@ -336,18 +450,24 @@ def _handle_pre_span(
         # empty span
         return index + 1
 
-    spans.append(_make_span(line, PRE, index, end, offset, offset_bytes))
+    spans.append(_make_span(line, PRE, index, end, offset, offset_bytes, byte_offsets))
     return end + 1
 
 
 def _make_span(
-    line: str, sd: str, start: int, end: int, offset: int, offset_bytes: int
+    line: str,
+    sd: str,
+    start: int,
+    end: int,
+    offset: int,
+    offset_bytes: int,
+    byte_offsets: ByteOffsetsT,
 ) -> Span:
 
     text = line[start : end + 1]
 
-    start_byte = find_byte_index(line, start) + offset_bytes
-    end_byte = find_byte_index(line, end) + offset_bytes + 1
+    start_byte = _get_byte_index(byte_offsets, start) + offset_bytes
+    end_byte = _get_byte_index(byte_offsets, end) + offset_bytes + 1
 
     start += offset
     end += offset + 1
@@ -360,13 +480,19 @@ def _make_span(
 
 
 def _make_hyperlink(
-    line: str, start: int, end: int, offset: int, offset_bytes: int, is_jid: bool
+    line: str,
+    start: int,
+    end: int,
+    offset: int,
+    offset_bytes: int,
+    byte_offsets: ByteOffsetsT,
+    is_jid: bool,
 ) -> BaseHyperlink | None:
 
     text = line[start : end + 1]
 
-    start_byte = find_byte_index(line, start) + offset_bytes
-    end_byte = find_byte_index(line, end) + offset_bytes + 1
+    start_byte = _get_byte_index(byte_offsets, start) + offset_bytes
+    end_byte = _get_byte_index(byte_offsets, end) + offset_bytes + 1
 
     start += offset
     end += offset + 1
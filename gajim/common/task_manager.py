@@ -5,84 +5,254 @@
 from __future__ import annotations
 
 from typing import Any
+from typing import NamedTuple
 
 import functools
+import heapq
+import itertools
 import logging
-import queue
+import time
+from collections import defaultdict
 from collections.abc import Callable
+from collections.abc import Hashable
 
 from gi.repository import GLib
 
+from gajim.common import ged
+from gajim.common.ged import EventHelper
+
 log = logging.getLogger("gajim.c.m.task_manager")
 
+PULSE_INTERVAL = 60
+BACKGROUND_PULSE_INTERVAL = 300
+
+# Number of tasks which run at the same time
+MAX_RUNNING_TASKS = 10
+
+# Asynchronous tasks which did not finish within this many seconds no
+# longer count as running
+RUNNING_TASK_TIMEOUT = 60
+
+# Waiting tasks are checked again at least this often, for preconditions
+# which change without an event
+WAITING_RETRY_INTERVAL = 30
+
+
+class TaskManagerStats(NamedTuple):
+    queued: int
+    waiting: int
+    running: int
+    executed: int
+    average_latency: float
+    max_latency: float
+
+
+class TaskManager(EventHelper):
+    """
+    Executes tasks in the order of their priority
+
+    Ready tasks are executed right away, as long as less than
+    MAX_RUNNING_TASKS are running. Tasks whose preconditions are not met
+    wait until the state of an account changes. Tasks with the same key
+    never run at the same time, so a task which is made obsolete by the
+    result of a similar task is dropped without being executed.
+    """
 
-class TaskManager:
     def __init__(self) -> None:
-        self._timeout: int | None = None
-        self._queue: queue.PriorityQueue[Task] = queue.PriorityQueue()
+        EventHelper.__init__(self)
+        self._queue: list[tuple[int, int, Task]] = []
+        self._seq = itertools.count()
+        self._waiting: list[Task] = []
+        self._blocked: defaultdict[Hashable, list[Task]] = defaultdict(list)
+        self._running: dict[int, tuple[Task, int | None]] = {}
+        self._running_keys: set[Hashable] = set()
+
+        self._dispatch_id: int | None = None
+        self._retry_id: int | None = None
+
+        self._executed = 0
+        self._latency_sum = 0.0
+        self._max_latency = 0.0
+
+        self.register_events(
+            [
+                ("signed-in", ged.CORE, self._on_account_state_changed),
+                ("our-show", ged.CORE, self._on_account_state_changed),
+            ]
+        )
+
+    def add_task(self, task: Task) -> None:
+        log.info("Adding task: %r", task)
+        task.set_queued(self)
+        self._push(task)
+        self._schedule_dispatch()
+
+    def finish_task(self, task: Task) -> None:
+        """
+        Called once a running task is finished or obsolete
+        """
+
+        entry = self._running.pop(id(task), None)
+        if entry is None:
+            return
+
+        _task, timeout_id = entry
+        if timeout_id is not None:
+            GLib.source_remove(timeout_id)
+
+        key = task.get_key()
+        if key is not None:
+            self._running_keys.discard(key)
+            for blocked_task in self._blocked.pop(key, []):
+                self._push(blocked_task)
+
+        self._schedule_dispatch()
+
+    def retry_waiting(self) -> None:
+        """
+        Check the preconditions of all waiting tasks again
+        """
+
+        if not self._waiting:
+            return
+
+        log.info("Retry %s waiting tasks", len(self._waiting))
+        for task in self._waiting:
+            self._push(task)
+        self._waiting.clear()
+        self._schedule_dispatch()
 
-    def _start_worker(self) -> None:
-        self._timeout = GLib.timeout_add_seconds(2, self._process_queue)
+    def get_stats(self) -> TaskManagerStats:
+        blocked = sum(len(tasks) for tasks in self._blocked.values())
+        average = self._latency_sum / self._executed if self._executed else 0.0
+        return TaskManagerStats(
+            queued=len(self._queue) + blocked,
+            waiting=len(self._waiting),
+            running=len(self._running),
+            executed=self._executed,
+            average_latency=average,
+            max_latency=self._max_latency,
+        )
 
-    def _process_queue(self) -> bool:
-        log.info("%s tasks queued", self._queue.qsize())
-        requeue: list[Task] = []
-        while not self._queue.empty():
-            task = self._queue.get_nowait()
+    def _on_account_state_changed(self, _event: Any) -> None:
+        self.retry_waiting()
+
+    def _push(self, task: Task) -> None:
+        heapq.heappush(self._queue, (task.priority, next(self._seq), task))
+
+    def _schedule_dispatch(self) -> None:
+        if self._dispatch_id is None:
+            self._dispatch_id = GLib.idle_add(self._dispatch)
+
+    def _dispatch(self) -> bool:
+        self._dispatch_id = None
+
+        while self._queue and len(self._running) < MAX_RUNNING_TASKS:
+            _priority, _seq, task = heapq.heappop(self._queue)
             if task.is_obsolete():
                 log.info("Task obsolete: %r", task)
                 continue
 
+            key = task.get_key()
+            if key is not None and key in self._running_keys:
+                # Execute after the similar task, which may make it obsolete
+                self._blocked[key].append(task)
+                continue
+
             if not task.preconditions_met():
                 # precondition_met() can change the obsolete flag, so we need
                 # to check again here
                 if task.is_obsolete():
                     log.info("Task obsolete: %r", task)
                 else:
-                    requeue.append(task)
+                    log.info("Preconditions not met: %r", task)
+                    self._waiting.append(task)
                 continue
 
-            log.info("Execute task %r", task)
-            task.execute()
-            self._requeue_tasks(requeue)
-            return True
+            self._execute(task)
 
-        if self._requeue_tasks(requeue):
-            # Queue is empty, but there are tasks to requeue
-            # don't stop worker
-            return True
+        if self._waiting and self._retry_id is None:
+            self._retry_id = GLib.timeout_add_seconds(
+                WAITING_RETRY_INTERVAL, self._on_retry_timeout
+            )
 
-        # Queue is empty, stop worker
-        self._timeout = None
-        return False
+        log.debug("%s", self.get_stats())
+        return GLib.SOURCE_REMOVE
 
-    def _requeue_tasks(self, tasks: list[Task]) -> bool:
-        if not tasks:
-            return False
+    def _execute(self, task: Task) -> None:
+        latency = time.monotonic() - task.queued_at
+        self._executed += 1
+        self._latency_sum += latency
+        self._max_latency = max(self._max_latency, latency)
+        log.info("Execute task %r (queued %.1fs)", task, latency)
 
-        for task in tasks:
-            log.info("Requeue task (preconditions not met): %r", task)
-            self._queue.put_nowait(task)
-        return True
+        key = task.get_key()
+        if key is not None:
+            self._running_keys.add(key)
+        self._running[id(task)] = (task, None)
 
-    def add_task(self, task: Task) -> None:
-        log.info("Adding task: %r", task)
-        self._queue.put_nowait(task)
-        if self._timeout is None:
-            self._start_worker()
+        try:
+            task.execute()
+        except Exception:
+            log.exception("Failed to execute task %r", task)
+            self.finish_task(task)
+            return
+
+        if not task.asynchronous:
+            self.finish_task(task)
+            return
+
+        if id(task) in self._running:
+            timeout_id = GLib.timeout_add_seconds(
+                RUNNING_TASK_TIMEOUT, self._on_running_timeout, task
+            )
+            self._running[id(task)] = (task, timeout_id)
+
+    def _on_running_timeout(self, task: Task) -> bool:
+        log.warning("Task did not finish: %r", task)
+        self._running[id(task)] = (task, None)
+        self.finish_task(task)
+        return GLib.SOURCE_REMOVE
+
+    def _on_retry_timeout(self) -> bool:
+        self._retry_id = None
+        self.retry_waiting()
+        return GLib.SOURCE_REMOVE
 
 
 @functools.total_ordering
 class Task:  # noqa: PLW1641
+    # Tasks whose execute() only starts the work set this. They are
+    # running until set_finished() or set_obsolete() is called.
+    asynchronous = False
+
     def __init__(self, priority: int = 0) -> None:
         self.priority = priority
+        self.queued_at = 0.0
         self._obsolete = False
+        self._manager: TaskManager | None = None
+
+    def set_queued(self, manager: TaskManager) -> None:
+        self._manager = manager
+        self.queued_at = time.monotonic()
 
     def is_obsolete(self) -> bool:
         return self._obsolete
 
     def set_obsolete(self) -> None:
         self._obsolete = True
+        self.set_finished()
+
+    def set_finished(self) -> None:
+        if self._manager is not None:
+            self._manager.finish_task(self)
+
+    def get_key(self) -> Hashable | None:
+        """
+        Tasks with the same key are not executed at the same time
+        """
+
+        return None
 
     def __lt__(self, other: object) -> bool:
         if not isinstance(other, Task):
@@ -104,7 +274,7 @@ def preconditions_met(self) -> bool:
 class PulseManager:
     def __init__(self) -> None:
         self._callbacks: list[Callable[[], Any]] = []
-        self._timeout_id = GLib.timeout_add_seconds(60, self._execute_pulse)
+        self._timeout_id = GLib.timeout_add_seconds(PULSE_INTERVAL, self._execute_pulse)
 
     def add_callback(self, callback: Callable[[], Any]) -> None:
         self._callbacks.append(callback)
@@ -112,6 +282,21 @@ def add_callback(self, callback: Callable[[], Any]) -> None:
     def remove_callback(self, callback: Callable[[], Any]) -> None:
         self._callbacks.remove(callback)
 
+    def set_background(self, active: bool) -> None:
+        """
+        Pulse less often while in the background, and pulse right away
+        once the background mode ends
+        """
+
+        GLib.source_remove(self._timeout_id)
+        if active:
+            interval = BACKGROUND_PULSE_INTERVAL
+        else:
+            interval = PULSE_INTERVAL
+            self._execute_pulse()
+
+        self._timeout_id = GLib.timeout_add_seconds(interval, self._execute_pulse)
+
     def _execute_pulse(self) -> bool:
         log.info("Execute pulse for %s callbacks", len(self._callbacks))
         for callback in self._callbacks:
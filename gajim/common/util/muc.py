@@ -6,7 +6,9 @@
 
 import typing
 
+import functools
 import random
+import re
 
 from nbxmpp.const import Affiliation
 from nbxmpp.const import Role
@@ -99,56 +101,78 @@ def get_random_muc_localpart() -> str:
     return result
 
 
-def message_needs_highlight(text: str, nickname: str, own_jid: str) -> bool:
+class HighlightMatcher:
     """
-    Check whether 'text' contains 'nickname', 'own_jid', or any string of the
-    'muc_highlight_words' setting.
-    """
-
-    search_strings = app.settings.get("muc_highlight_words").split(";")
-    search_strings.append(nickname)
-    search_strings.append(own_jid)
-
-    search_strings = [word.lower() for word in search_strings if word]
-    text = text.lower()
-
-    for search_string in search_strings:
-        match = text.find(search_string)
+    Finds highlight words in message texts
 
-        while match > -1:
-            search_end = match + len(search_string)
+    All search strings are compiled into a single regex, which is used to
+    find candidate positions. The boundary checks are only done for those.
+    """
 
-            if match == 0 and search_end == len(text):
-                # Text contains search_string only (exact match)
-                return True
+    # Characters which are not allowed to precede a match:
+    # - / which may be commands
+    # - - which may connect multiple words
+    # - ' which may be part of a contraction, such as o'clock, 'tis
+    EXCLUDED_CHARS = ("/", "-", "'")
+
+    def __init__(self, search_strings: list[str]) -> None:
+        self._search_strings = sorted(
+            {string.lower() for string in search_strings if string},
+            key=len,
+            reverse=True,
+        )
+
+        self._regex = None
+        if self._search_strings:
+            pattern = "|".join(map(re.escape, self._search_strings))
+            # Zero width lookahead, so overlapping candidates are found too
+            self._regex = re.compile(f"(?=(?:{pattern}))")
+
+    def matches(self, text: str) -> bool:
+        if self._regex is None:
+            return False
+
+        text = text.lower()
+        for match in self._regex.finditer(text):
+            start = match.start()
+            if start > 0:
+                char_before = text[start - 1]
+                if char_before.isalpha() or char_before in self.EXCLUDED_CHARS:
+                    continue
+
+            for search_string in self._search_strings:
+                if not text.startswith(search_string, start):
+                    continue
+
+                search_end = start + len(search_string)
+                if search_end == len(text) or not text[search_end].isalpha():
+                    return True
 
-            # Exclude some characters preceding the match:
-            # - any alpha chars
-            # - / which may be commands
-            # - - which may connect multiple words
-            # - ' which may be part of a contraction, such as o'clock, 'tis
-            excluded_chars = ("/", "-", "'")
+        return False
 
-            char_before = text[match - 1]
-            char_before_allowed = bool(
-                match == 0
-                or (not char_before.isalpha() and char_before not in excluded_chars)
-            )
 
-            if char_before_allowed and search_end == len(text):
-                # search_string found at the end of text and
-                # char before search_string is allowed.
-                return True
+@functools.lru_cache(maxsize=128)
+def get_highlight_matcher(
+    highlight_words: str, nickname: str, own_jid: str
+) -> HighlightMatcher:
+    search_strings = highlight_words.split(";")
+    search_strings.append(nickname)
+    search_strings.append(own_jid)
+    return HighlightMatcher(search_strings)
 
-            if char_before_allowed and not text[search_end].isalpha():
-                # char_before search_string is allowed and
-                # char_after search_string is not alpha.
-                return True
 
-            start = match + 1
-            match = text.find(search_string, start)
+def message_needs_highlight(text: str, nickname: str, own_jid: str) -> bool:
+    """
+    Check whether 'text' contains 'nickname', 'own_jid', or any string of the
+    'muc_highlight_words' setting.
+    """
 
-    return False
+    # Matchers are cached, they are only rebuilt if the nickname or the
+    # highlight words change
+    matcher = get_highlight_matcher(
+        app.settings.get("muc_highlight_words"), nickname, own_jid
+    )
+    return matcher.matches(text)
 
 
 def get_groupchat_name(client: types.Client, jid: JID) -> str:
@@ -8,6 +8,7 @@
 import logging
 import mimetypes
 import os
+from collections.abc import Collection
 from dataclasses import dataclass
 from pathlib import Path
 from urllib.parse import ParseResult
@@ -35,9 +36,13 @@
 MIME_TYPE_MAP = {"application/x-ext-webp": "image/webp"}
 
 
+# Scale factors for which thumbnail renditions are created
+THUMBNAIL_SCALES = (1, 2)
+
+
 def get_image_paths(
     uri: str, urlparts: ParseResult, size: int, orig_dir: Path, thumb_dir: Path
-) -> tuple[Path, Path]:
+) -> tuple[Path, dict[int, Path]]:
     path = Path(unquote(urlparts.path))
     web_stem = path.stem
     extension = path.suffix
@@ -48,11 +53,27 @@ def get_image_paths(
 
     orig_filename = f"{web_stem}_{name_hash}{extension}"
 
-    thumb_filename = f"{web_stem}_{name_hash}_thumb_{size}.png"
-
     orig_path = orig_dir / orig_filename
-    thumb_path = thumb_dir / thumb_filename
-    return orig_path, thumb_path
+    thumb_paths = get_thumb_paths(orig_path, size, thumb_dir)
+    return orig_path, thumb_paths
+
+
+def get_thumb_paths(orig_path: Path, size: int, thumb_dir: Path) -> dict[int, Path]:
+    # Thumbnails are named after the original file, so URIs which share the
+    # same (deduplicated) original also share the thumbnails. The format
+    # (JPEG, WebP or PNG) is detected from the content when loading.
+    return {
+        size * scale: thumb_dir / f"{orig_path.stem}_thumb_{size * scale}"
+        for scale in THUMBNAIL_SCALES
+    }
+
+
+def get_closest_thumb_size(sizes: Collection[int], size: int) -> int:
+    # Prefer the smallest rendition which is at least as big as requested
+    larger = [s for s in sizes if s >= size]
+    if larger:
+        return min(larger)
+    return max(sizes)
 
 
 def format_geo_coords(coords: Coords) -> str:
@@ -180,6 +180,44 @@ def get_uf_relative_time(date_time: dt.datetime, now: dt.datetime | None = None)
     return str(date_time.year)
 
 
+def get_uf_relative_time_expiry(
+    date_time: dt.datetime, now: dt.datetime | None = None
+) -> dt.datetime | None:
+    # Returns the time until which get_uf_relative_time() returns the same
+    # string for `date_time`, or None if the string does not change anymore.
+    # The parameter `now` is only used by unittests
+
+    if date_time.tzinfo != dt.UTC:
+        raise ValueError("param 'date_time' with timezone =! UTC")
+
+    if now is None:
+        now = dt.datetime.now(dt.UTC).astimezone()
+    else:
+        if now.tzinfo != dt.UTC:
+            raise ValueError("param 'now' with timezone =! UTC")
+
+    date_time = date_time.astimezone()
+    timespan = now - date_time
+
+    if timespan < dt.timedelta(minutes=1):
+        return date_time + dt.timedelta(minutes=1)
+    if timespan < dt.timedelta(minutes=15):
+        minutes = int(timespan.seconds / 60)
+        return date_time + dt.timedelta(minutes=minutes + 1)
+
+    today = now.date()
+    yesterday = today - dt.timedelta(days=1)
+    if date_time.date() in (today, yesterday):
+        # The string changes at midnight
+        tomorrow = today + dt.timedelta(days=1)
+        return dt.datetime.combine(tomorrow, dt.time(), tzinfo=now.tzinfo)
+    if timespan < dt.timedelta(days=7):
+        return date_time + dt.timedelta(days=7)
+    if timespan < dt.timedelta(days=365):
+        return date_time + dt.timedelta(days=365)
+    return None
+
+
 def get_time_zone_string(prop: TzProperty) -> str:
     try:
         tzinfo = ZoneInfo(prop.value)
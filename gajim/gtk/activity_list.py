@@ -34,6 +34,7 @@
 from gajim.common.util.datetime import utc_now
 from gajim.common.util.muc import get_groupchat_name
 from gajim.common.util.user_strings import get_uf_relative_time
+from gajim.common.util.user_strings import get_uf_relative_time_expiry
 from gajim.plugins.manifest import PluginManifest
 from gajim.plugins.repository import PluginRepository
 
@@ -91,7 +92,9 @@ def __init__(self) -> None:
         self._search_entry: Gtk.SearchEntry | None = None
         self._current_filter_text = ""
 
-        self._timer_id = GLib.timeout_add_seconds(60, self._update_time)
+        self._time_outdated = False
+        self._connect(self, "map", self._on_map)
+        app.pulse_manager.add_callback(self._update_time)
 
         self._custom_filter = Gtk.CustomFilter.new(self._filter_func)
 
@@ -151,7 +154,7 @@ def do_unroot(self) -> None:
         self._disconnect_all()
         app.plugin_repository.disconnect_all_from_obj(self)
 
-        GLib.source_remove(self._timer_id)
+        app.pulse_manager.remove_callback(self._update_time)
         app.check_finalize(self._model)
         app.check_finalize(self._filter_model)
         app.check_finalize(self._selection_model)
@@ -262,7 +265,17 @@ def _remove(self, item: ActivityListItemT) -> None:
         if not item.read:
             self._decrease_unread_count()
 
+    def _on_map(self, _widget: ActivityListView) -> None:
+        if self._time_outdated:
+            self._update_time()
+
     def _update_time(self) -> bool:
+        if not self.get_mapped():
+            # Update items when the list is shown again
+            self._time_outdated = True
+            return GLib.SOURCE_CONTINUE
+
+        self._time_outdated = False
         now = utc_now()
         for item in self._model:
             delta = now - item.timestamp
@@ -271,7 +284,7 @@ def _update_time(self) -> bool:
                 # so updating makes no sense anymore
                 break
 
-            item.update_time()
+            item.update_time(now)
 
         return GLib.SOURCE_CONTINUE
 
@@ -434,6 +447,7 @@ def __init__(
         event: E,
         unique: bool = False,
     ) -> None:
+        self._time_expiry = get_uf_relative_time_expiry(timestamp)
         self._timestamp_string = get_uf_relative_time(timestamp)
 
         super().__init__(
@@ -458,7 +472,12 @@ def __init__(
     def timestamp_string(self) -> str:
         return self._timestamp_string
 
-    def update_time(self) -> None:
+    def update_time(self, now: dt.datetime) -> None:
+        # Only notify if the displayed string changes
+        if self._time_expiry is None or now < self._time_expiry:
+            return
+
+        self._time_expiry = get_uf_relative_time_expiry(self.timestamp)
         self._timestamp_string = get_uf_relative_time(self.timestamp)
         self.notify("timestamp-string")
 
@@ -228,7 +228,6 @@ class DebugConsoleBuilder(Builder):
     search_backward: Gtk.Button
     search_results_label: Gtk.Label
     scrolled: Gtk.ScrolledWindow
-    protocol_view: GtkSource.View
     jump_to_end_button: Gtk.Button
     scrolled_input: Gtk.ScrolledWindow
     input_entry: GtkSource.View
@@ -9,6 +9,7 @@
 from typing import Literal
 
 import logging
+import time
 from collections.abc import Iterator
 from datetime import datetime
 
@@ -21,6 +22,7 @@
 from gajim.common import app
 from gajim.common import events
 from gajim.common import ged
+from gajim.common.background_mode import BackgroundMode
 from gajim.common.const import Direction
 from gajim.common.const import RowHeaderType
 from gajim.common.ged import EventHelper
@@ -72,6 +74,7 @@ def __init__(self, workspace_id: str) -> None:
         self._context_menu_visible = False
         self._mouseover = False
         self._scheduled_sort_id = None
+        self._row_state_outdated = False
 
         hover_controller = Gtk.EventControllerMotion()
         self._connect(hover_controller, "enter", self._on_cursor_enter)
@@ -102,6 +105,8 @@ def __init__(self, workspace_id: str) -> None:
             ]
         )
 
+        self._connect(self, "map", self._on_map)
+        self._connect(app.background_mode, "changed", self._on_background_mode_changed)
         app.pulse_manager.add_callback(self._update_row_state)
 
     def do_unroot(self) -> None:
@@ -443,9 +448,28 @@ def _change_pinned_order(
         self.emit("chat-order-changed")
         self.invalidate_sort(force=True)
 
+    def _on_map(self, _widget: ChatList) -> None:
+        if self._row_state_outdated:
+            self._update_row_state()
+
+    def _on_background_mode_changed(
+        self, _background_mode: BackgroundMode, active: bool
+    ) -> None:
+        if not active:
+            # Sort rows which changed while in the background
+            self._schedule_sort()
+
     def _update_row_state(self) -> bool:
+        if not self.get_mapped():
+            # The workspace or the window is hidden, update rows
+            # when the list is shown again
+            self._row_state_outdated = True
+            return True
+
+        self._row_state_outdated = False
+        now = time.time()
         for row in self._chats.values():
-            row.update_row_state()
+            row.update_row_state(now)
         return True
 
     def _filter_func(self, row: ChatListRow) -> bool:
@@ -519,6 +543,7 @@ def invalidate_sort(self, *, force: bool = False) -> bool:  # type: ignore
         log.debug("Try sorting chatlist")
         if not force and self._is_sort_inhibited():
             log.debug("Abort sorting because it is inhibited")
+            self._rows_need_sort = True
             return False
 
         self._rows_need_sort = False
@@ -529,7 +554,9 @@ def invalidate_sort(self, *, force: bool = False) -> bool:  # type: ignore
         return True
 
     def _is_sort_inhibited(self) -> bool:
-        return self._mouseover or self._context_menu_visible
+        return (
+            self._mouseover or self._context_menu_visible or app.background_mode.active
+        )
 
     def _schedule_sort(self) -> None:
         self._abort_scheduled_sort("schedule is renewed")
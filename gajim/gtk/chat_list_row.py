@@ -34,6 +34,7 @@
 from gajim.common.util.user_strings import get_moderation_text
 from gajim.common.util.user_strings import get_retraction_text
 from gajim.common.util.user_strings import get_uf_relative_time
+from gajim.common.util.user_strings import get_uf_relative_time_expiry
 
 from gajim.gtk.builder import get_builder
 from gajim.gtk.menus import get_chat_list_row_menu
@@ -79,6 +80,7 @@ def __init__(
 
         self.contact_name: str = self.contact.name
         self.timestamp: float = 0
+        self._time_expiry: float | None = None
         self.stanza_id: str | None = None
         self.message_id: str | None = None
 
@@ -328,10 +330,14 @@ def update_time(self) -> None:
         if self.timestamp == 0:
             return
         utc_timestamp = dt.datetime.fromtimestamp(self.timestamp, dt.UTC)
+        expiry = get_uf_relative_time_expiry(utc_timestamp)
+        self._time_expiry = None if expiry is None else expiry.timestamp()
         self._ui.timestamp_label.set_text(get_uf_relative_time(utc_timestamp))
 
-    def update_row_state(self) -> None:
-        self.update_time()
+    def update_row_state(self, now: float) -> None:
+        # Only update the time if the displayed string changes
+        if self._time_expiry is not None and now >= self._time_expiry:
+            self.update_time()
         self._ui.mute_image.set_visible(self.contact.is_muted)
 
     def add_unread(self, text: str) -> None:
@@ -10,6 +10,7 @@
 
 import locale
 import logging
+import zlib
 
 from gi.repository import Gdk
 from gi.repository import Gio
@@ -18,6 +19,9 @@
 from gi.repository import Gtk
 
 from gajim.common import app
+from gajim.common import configpaths
+from gajim.common.emoji_index import EmojiIndex
+from gajim.common.emoji_index import EmojiIndexEntry
 from gajim.common.i18n import _
 from gajim.common.i18n import get_default_lang
 from gajim.common.i18n import get_short_lang_code
@@ -107,9 +111,7 @@ def try_load_raw_emoji_data(locale: str) -> GLib.Bytes | None:
         return None
 
 
-def parse_emoji_data(
-    bytes_data: GLib.Bytes, loc: str
-) -> Gio.ListStore[EmojiCompletionListItem]:
+def parse_emoji_data(bytes_data: GLib.Bytes) -> list[EmojiIndexEntry]:
     variant = GLib.Variant.new_from_bytes(
         # Reference for the data format:
         # https://gitlab.gnome.org/GNOME/gtk/-/blob/main/gtk/emoji/convert-emoji.c#L25
@@ -120,7 +122,7 @@ def parse_emoji_data(
 
     iterable: list[EMOJI_DATA_ENTRY_T] = variant.unpack()
 
-    store = Gio.ListStore(item_type=EmojiCompletionListItem)
+    entries: list[EmojiIndexEntry] = []
     for (
         c_sequence,
         _short_name,
@@ -141,34 +143,56 @@ def parse_emoji_data(
         # If '0' is in c_sequence its a placeholder for skin tone modifiers
 
         has_skin_variation, u_sequence = generate_unicode_sequence(c_sequence)
-        keywords_string = ", ".join(trans_keywords)
 
-        u_mod_sequences: dict[str, str] = {}
+        variations: list[str] = []
         if has_skin_variation:
-            for index, modifier in enumerate(SKIN_TONE_MODIFIERS, start=1):
-                u_mod_sequences[f"var{index}"] = generate_skin_tone_sequence(
-                    c_sequence, modifier
-                )
-
-        item = EmojiCompletionListItem(
-            emoji=u_sequence,
-            short_name=trans_short_name,
-            keywords=f"[ {keywords_string} ]",
-            search=f"{trans_short_name}|{'|'.join(trans_keywords)}",
-            has_skin_variation=has_skin_variation,
-            **u_mod_sequences,
+            variations = [
+                generate_skin_tone_sequence(c_sequence, modifier)
+                for modifier in SKIN_TONE_MODIFIERS
+            ]
+
+        entries.append(
+            EmojiIndexEntry(u_sequence, trans_short_name, trans_keywords, variations)
         )
-        store.append(item)
 
-    store.sort(_sort_short_name)
-    return store
+    entries.sort(key=lambda entry: locale.strxfrm(entry.short_name))
+    return entries
+
+
+def load_emoji_index() -> EmojiIndex | None:
+    app_locale = get_default_lang()
+    log.info("Loading emoji data; application locale is %s", app_locale)
+    short_locale = get_short_lang_code(app_locale)
+    locales = get_locale_fallbacks(short_locale)
+
+    log.debug("Trying locales %s", locales)
+    raw_emoji_data: GLib.Bytes | None = None
+    for loc in locales:
+        raw_emoji_data = try_load_raw_emoji_data(loc)
+        if raw_emoji_data:
+            break
+    else:
+        log.warning("Unable to load emoji data; tried %s", locales)
+        return None
+
+    # The index is cached on disk, it is rebuilt if the emoji data changes
+    data = raw_emoji_data.get_data() or b""
+    key = f"{zlib.crc32(data)}-{len(data)}-{locale.setlocale(locale.LC_COLLATE)}"
+    path = configpaths.get("MY_CACHE") / f"emoji_index_{loc}.json"
 
+    index = EmojiIndex.load(path, key)
+    if index is not None:
+        log.info("Loaded emoji index from %s", path)
+        return index
 
-@staticmethod
-def _sort_short_name(
-    item1: EmojiCompletionListItem, item2: EmojiCompletionListItem
-) -> int:
-    return locale.strcoll(item1.short_name, item2.short_name)
+    try:
+        index = EmojiIndex(parse_emoji_data(raw_emoji_data))
+    except Exception as err:
+        log.warning("Unable to parse emoji data: %s", err)
+        return None
+
+    index.save(path, key)
+    return index
 
 
 class EmojiCompletionListItem(BaseCompletionListItem, GObject.Object):
@@ -177,7 +201,6 @@ class EmojiCompletionListItem(BaseCompletionListItem, GObject.Object):
     emoji = GObject.Property(type=str)
     short_name = GObject.Property(type=str)
     keywords = GObject.Property(type=str)
-    search = GObject.Property(type=str)
     has_skin_variation = GObject.Property(type=bool, default=False)
     var1 = GObject.Property(type=str, default="")
     var2 = GObject.Property(type=str, default="")
@@ -185,6 +208,20 @@ class EmojiCompletionListItem(BaseCompletionListItem, GObject.Object):
     var4 = GObject.Property(type=str, default="")
     var5 = GObject.Property(type=str, default="")
 
+    @classmethod
+    def from_entry(cls, entry: EmojiIndexEntry) -> EmojiCompletionListItem:
+        u_mod_sequences = {
+            f"var{index}": variation
+            for index, variation in enumerate(entry.variations, start=1)
+        }
+        return cls(
+            emoji=entry.emoji,
+            short_name=entry.short_name,
+            keywords=f"[ {', '.join(entry.keywords)} ]",
+            has_skin_variation=bool(entry.variations),
+            **u_mod_sequences,
+        )
+
     def get_text(self) -> str:
         return self.emoji
 
@@ -278,42 +315,17 @@ class EmojiCompletionProvider(BaseCompletionProvider):
     name = _("Emojis")
 
     def __init__(self) -> None:
+        self._index: EmojiIndex | None = None
         self._load_complete = False
 
-        expression = Gtk.PropertyExpression.new(EmojiCompletionListItem, None, "search")
-        self._string_filter = Gtk.StringFilter(expression=expression)
-
-        self._filter_model = Gtk.FilterListModel(filter=self._string_filter)
-        self._model = Gtk.SliceListModel(
-            model=self._filter_model, size=MAX_COMPLETION_ENTRIES
-        )
+        # Only holds the items of the best matches
+        self._model = Gio.ListStore(item_type=EmojiCompletionListItem)
 
     def get_model(
         self,
     ) -> tuple[Gio.ListModel[EmojiCompletionListItem], type[EmojiCompletionViewItem]]:
         return self._model, EmojiCompletionViewItem
 
-    @staticmethod
-    def _load_emoji_data() -> Gio.ListStore[EmojiCompletionListItem]:
-        app_locale = get_default_lang()
-        log.info("Loading emoji data; application locale is %s", app_locale)
-        short_locale = get_short_lang_code(app_locale)
-        locales = get_locale_fallbacks(short_locale)
-        try:
-            log.debug("Trying locales %s", locales)
-            raw_emoji_data: GLib.Bytes | None = None
-            for loc in locales:
-                raw_emoji_data = try_load_raw_emoji_data(loc)
-                if raw_emoji_data:
-                    break
-            else:
-                raise RuntimeError(f"No resource could be loaded; tried {locales}")
-
-            return parse_emoji_data(raw_emoji_data, loc)
-        except Exception as err:
-            log.warning("Unable to load emoji data: %s", err)
-            return Gio.ListStore(item_type=EmojiCompletionListItem)
-
     def check(self, candidate: str, start_iter: Gtk.TextIter) -> bool:
         return candidate.startswith(self.trigger_char)
 
@@ -329,9 +341,13 @@ def populate(self, candidate: str, contact: Any) -> bool:
             return False
 
         if not self._load_complete:
-            model = self._load_emoji_data()
-            self._filter_model.set_model(model)
+            self._index = load_emoji_index()
             self._load_complete = True
 
-        self._string_filter.set_search(candidate)
-        return self._model.get_n_items() > 0
+        if self._index is None:
+            return False
+
+        entries = self._index.search(candidate, MAX_COMPLETION_ENTRIES)
+        items = [EmojiCompletionListItem.from_entry(entry) for entry in entries]
+        self._model.splice(0, self._model.get_n_items(), items)
+        return bool(items)
@@ -12,7 +12,7 @@
 from gajim.common.styling import ParsingResult
 from gajim.common.styling import PlainBlock
 from gajim.common.styling import PreBlock
-from gajim.common.styling import process
+from gajim.common.styling import process_cached
 from gajim.common.styling import QuoteBlock
 
 from gajim.gtk.const import MAX_MESSAGE_LENGTH
@@ -70,7 +70,7 @@ def add_with_styling(
         if text.startswith("/me ") and nickname is not None:
             self._add_action_phrase(text, nickname)
         else:
-            result = process(text)
+            result = process_cached(text)
             self.add_content(result)
 
         if text_over_max:
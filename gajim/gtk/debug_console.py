@@ -3,7 +3,9 @@
 # SPDX-License-Identifier: GPL-3.0-only
 
 from typing import Any
+from typing import cast
 
+import bisect
 import time
 
 import nbxmpp
@@ -13,18 +15,21 @@
 from gi.repository import GObject
 from gi.repository import Gtk
 from gi.repository import GtkSource
+from gi.repository import Pango
 from nbxmpp.namespaces import Namespace
 
 from gajim.common import app
+from gajim.common import configpaths
 from gajim.common import ged
 from gajim.common.const import Direction
-from gajim.common.events import AccountDisabled
-from gajim.common.events import AccountEnabled
 from gajim.common.events import StanzaReceived
 from gajim.common.events import StanzaSent
 from gajim.common.ged import EventHelper
 from gajim.common.i18n import _
 from gajim.common.logging_helpers import get_log_console_handler
+from gajim.common.stanza_capture import CapturedStanza
+from gajim.common.stanza_capture import StanzaFileWriter
+from gajim.common.stanza_capture import StanzaFilter
 
 from gajim.gtk.alert import InformationAlertDialog
 from gajim.gtk.builder import get_builder
@@ -33,11 +38,17 @@
 from gajim.gtk.const import SettingType
 from gajim.gtk.dropdown import GajimDropDown
 from gajim.gtk.settings import SettingsDialog
+from gajim.gtk.util.classes import SignalManager
 from gajim.gtk.util.misc import at_the_end
 from gajim.gtk.util.misc import scroll_to
 from gajim.gtk.util.styling import get_source_view_style_scheme
 from gajim.gtk.window import GajimAppWindow
 
+# Number of stanzas kept in the protocol view, older stanzas are dropped
+MAX_CAPTURED_STANZAS = 2000
+
+CAPTURE_FILE_NAME = "stanzas.log"
+
 STANZA_PRESETS = {
     "Presence": (
         '<presence xmlns="jabber:client">\n'
@@ -79,6 +90,7 @@ def __init__(self) -> None:
         self._filter_dialog: SettingsDialog | None = None
         self._sent_stanzas = SentSzanzas()
         self._last_selected_ts = 0
+        self._file_writer: StanzaFileWriter | None = None
 
         self._presence = True
         self._message = True
@@ -122,7 +134,9 @@ def __init__(self) -> None:
             self._account_dropdown, self._ui.account_label
         )
 
-        self._create_tags()
+        self._protocol_view = StanzaListView(MAX_CAPTURED_STANZAS)
+        self._ui.scrolled.set_child(self._protocol_view)
+
         self._add_stanza_presets()
 
         self._connect(
@@ -144,20 +158,13 @@ def __init__(self) -> None:
 
         source_manager = GtkSource.LanguageManager.get_default()
         lang = source_manager.get_language("xml")
-        self._ui.protocol_view.get_buffer().set_language(lang)
         self._ui.input_entry.get_buffer().set_language(lang)
 
         style_scheme = get_source_view_style_scheme()
         if style_scheme is not None:
-            self._ui.protocol_view.get_buffer().set_style_scheme(style_scheme)
             self._ui.input_entry.get_buffer().set_style_scheme(style_scheme)
             self._ui.log_view.get_buffer().set_style_scheme(style_scheme)
 
-        self._search_settings = GtkSource.SearchSettings(wrap_around=True)
-        self._search_context = GtkSource.SearchContext.new(
-            self._ui.protocol_view.get_buffer(), self._search_settings
-        )
-
         for record in app.logging_records:
             self._add_log_record(record)
 
@@ -179,8 +186,6 @@ def __init__(self) -> None:
             [
                 ("stanza-received", ged.GUI1, self._on_stanza_received),
                 ("stanza-sent", ged.GUI1, self._on_stanza_sent),
-                ("account-enabled", ged.GUI1, self._on_account_changed),
-                ("account-disabled", ged.GUI1, self._on_account_changed),
             ]
         )
         self._set_account("AllAccounts", "")
@@ -189,6 +194,7 @@ def _cleanup(self) -> None:
         self._shortcut.set_action(None)
         self.unregister_events()
         get_log_console_handler().set_callback(None)
+        self._set_capture_to_file(False, None)
 
     def _on_adj_upper_changed(
         self, adj: Gtk.Adjustment, _pspec: GObject.ParamSpec
@@ -221,32 +227,12 @@ def _set_title(self) -> None:
             title = app.get_jid_from_account(self._selected_account)
         self.set_title(title)
 
-    def _on_account_changed(self, event: AccountEnabled | AccountDisabled) -> None:
-        buf = self._ui.protocol_view.get_buffer()
-
-        if isinstance(event, AccountEnabled):
-            buf.create_tag(event.account)
-        else:
-            start, end = buf.get_bounds()
-            buf.remove_tag_by_name(event.account, start, end)
-
     def _on_stack_child_changed(
         self, _widget: Gtk.Stack, _pspec: GObject.ParamSpec
     ) -> None:
         name = self._ui.stack.get_visible_child_name()
         self._ui.search_toggle.set_sensitive(name == "protocol")
 
-    def _create_tags(self) -> None:
-        tags = ["incoming", "outgoing", "presence", "message", "stream", "iq"]
-
-        accounts = app.settings.get_active_accounts()
-        tags.extend(accounts)
-
-        tags.append("AccountWizard")
-
-        for tag_name in tags:
-            self._ui.protocol_view.get_buffer().create_tag(tag_name)
-
     def _add_stanza_presets(self) -> None:
         for stanza_type in STANZA_PRESETS:
             row = Gtk.ListBoxRow()
@@ -396,63 +382,21 @@ def _on_search_clicked(self, button: Any) -> None:
         self._find(direction)
 
     def _find(self, direction: Direction) -> None:
-        self._search_settings.set_search_text(self._ui.search_entry.get_text())
-        textbuffer = self._ui.protocol_view.get_buffer()
-
-        last_pos_mark = textbuffer.get_mark("last_pos")
-        if last_pos_mark is not None:
-            current_pos = textbuffer.get_iter_at_mark(last_pos_mark)
-        else:
-            current_pos = textbuffer.get_start_iter()
-
-        if direction == Direction.NEXT:
-            self._search_context.forward_async(
-                current_pos, None, self._on_search_finished, direction
-            )
-        else:
-            self._search_context.backward_async(
-                current_pos, None, self._on_search_finished, direction
-            )
-
-    def _on_search_finished(
-        self,
-        _context: GtkSource.SearchContext,
-        result: Gio.AsyncResult,
-        direction: Direction,
-    ) -> None:
-        if direction == Direction.NEXT:
-            match = self._search_context.forward_finish(result)
-        else:
-            match = self._search_context.backward_finish(result)
-
-        match_found, match_start, match_end, _has_wrapped_around = match
+        text = self._ui.search_entry.get_text()
+        if not text:
+            self._ui.search_results_label.set_text("")
+            return
 
-        if not match_found:
+        result = self._protocol_view.find(text, direction)
+        if result is None:
             self._ui.search_results_label.set_text(_("No results"))
             return
 
-        occurrences_count = self._search_context.get_occurrences_count()
-        if occurrences_count == -1:
-            # Text scan may not be complete yet
-            occurrences_count = "?"
-
-        occurrence_positon = self._search_context.get_occurrence_position(
-            match_start, match_end
-        )
-        if occurrence_positon == -1:
-            occurrence_positon = 1
+        occurrence_position, occurrences_count = result
         self._ui.search_results_label.set_text(
-            _("%s of %s") % (occurrence_positon, occurrences_count)
+            _("%s of %s") % (occurrence_position, occurrences_count)
         )
 
-        textbuffer = self._ui.protocol_view.get_buffer()
-
-        if direction == Direction.NEXT:
-            mark = textbuffer.create_mark("last_pos", match_end, True)
-        else:
-            mark = textbuffer.create_mark("last_pos", match_start, True)
-        self._ui.protocol_view.scroll_to_mark(mark, 0, True, 0.5, 0.5)
-
     @staticmethod
     def _get_accounts() -> dict[str, str]:
         """Gets a dictionary of accounts ready to use with GajimDropdown.
@@ -540,6 +484,14 @@ def _on_filter_options(self, _button: Gtk.Button) -> None:
                 callback=self._on_setting,
                 data="outgoing",
             ),
+            Setting(
+                SettingKind.SWITCH,
+                _("Write to File"),
+                SettingType.VALUE,
+                self._file_writer is not None,
+                desc=str(configpaths.get("DEBUG") / CAPTURE_FILE_NAME),
+                callback=self._set_capture_to_file,
+            ),
         ]
 
         self._filter_dialog = SettingsDialog(
@@ -556,44 +508,36 @@ def _on_filter_destroyed(self, window: Gtk.Window) -> None:
         self._filter_dialog = None
 
     def _on_clear_window(self, *args: Any) -> None:
-        self._ui.protocol_view.get_buffer().set_text("")
+        self._protocol_view.clear()
 
     def _apply_filters(self) -> None:
-        table = self._ui.protocol_view.get_buffer().get_tag_table()
-
-        active_accounts = app.settings.get_active_accounts()
-        active_accounts.append("AccountWizard")
-        for account in active_accounts:
-            tag = table.lookup(account)
-            if tag is None:
-                continue
-
-            if self._selected_account == "AllAccounts":
-                visible = True
-            else:
-                visible = account == self._selected_account
-
-            if visible:
-                tag.set_priority(0)
-            else:
-                tag.set_priority(table.get_size() - 1)
-
-            tag.set_property("invisible", not visible)
-
-        for data in ["presence", "message", "iq", "stream", "incoming", "outgoing"]:
-            visible = getattr(self, f"_{data}")
-
-            tag = table.lookup(data)
-            if tag is None:
-                continue
+        account = None
+        if self._selected_account != "AllAccounts":
+            account = self._selected_account
+
+        types = {
+            type_
+            for type_ in ("presence", "message", "iq", "stream")
+            if getattr(self, f"_{type_}")
+        }
+
+        self._protocol_view.set_filter(
+            StanzaFilter(
+                account=account,
+                types=frozenset(types),
+                incoming=self._incoming,
+                outgoing=self._outgoing,
+            )
+        )
 
-            if data in ("incoming", "outgoing"):
-                if visible:
-                    tag.set_priority(0)
-                else:
-                    tag.set_priority(table.get_size() - 1)
+    def _set_capture_to_file(self, value: bool, _data: Any) -> None:
+        if value and self._file_writer is None:
+            path = configpaths.get("DEBUG") / CAPTURE_FILE_NAME
+            self._file_writer = StanzaFileWriter(path)
 
-            tag.set_property("invisible", not visible)
+        elif not value and self._file_writer is not None:
+            self._file_writer.close()
+            self._file_writer = None
 
     def _set_account(self, value: str, _data: Any) -> None:
         self._selected_account = value
@@ -605,52 +549,168 @@ def _on_setting(self, value: bool, data: str) -> None:
         self._apply_filters()
 
     def _on_stanza_received(self, event: StanzaReceived):
-        self._print_stanza(event, "incoming")
+        self._capture_stanza(event, "incoming")
 
     def _on_stanza_sent(self, event: StanzaSent):
-        self._print_stanza(event, "outgoing")
-
-    def _print_stanza(self, event: StanzaReceived | StanzaSent, kind: str) -> None:
-        if event.account == "AccountWizard":
-            account_label = _("Account Wizard")
-        else:
-            account_label = app.get_account_label(event.account)
-
-        stanza = event.stanza
-        if not isinstance(stanza, str):
-            # pylint: disable=unnecessary-dunder-call
-            stanza = stanza.__str__(fancy=True)
+        self._capture_stanza(event, "outgoing")
 
-        if not stanza:
+    def _capture_stanza(self, event: StanzaReceived | StanzaSent, kind: str) -> None:
+        if not event.stanza:
             return
 
+        stanza = CapturedStanza(event.account, kind, event.stanza)
+        if self._file_writer is not None:
+            self._file_writer.write(stanza)
+
         is_at_the_end = at_the_end(self._ui.scrolled)
 
-        buffer_ = self._ui.protocol_view.get_buffer()
-        end_iter = buffer_.get_end_iter()
-
-        type_ = kind
-        if stanza.startswith("<presence"):
-            type_ = "presence"
-        elif stanza.startswith("<message"):
-            type_ = "message"
-        elif stanza.startswith("<iq"):
-            type_ = "iq"
-        elif stanza.startswith(("<r", "<a")):
-            type_ = "stream"
-
-        text = "<!-- {kind} {time} ({account}) -->\n{stanza}\n\n".format(
-            kind=kind.capitalize(),
-            time=time.strftime("%c"),
-            account=account_label,
-            stanza=stanza,
-        )
-        buffer_.insert_with_tags_by_name(end_iter, text, type_, kind, event.account)
+        self._protocol_view.append(stanza)
 
         if is_at_the_end:
             GLib.idle_add(scroll_to, self._ui.scrolled, "bottom")
 
 
+def get_account_label(account: str) -> str:
+    if account == "AccountWizard":
+        return _("Account Wizard")
+    return app.get_account_label(account)
+
+
+class StanzaListItem(GObject.Object):
+    __gtype_name__ = "StanzaListItem"
+
+    def __init__(self, stanza: CapturedStanza) -> None:
+        super().__init__()
+        self.stanza = stanza
+        self.account_label = get_account_label(stanza.account)
+
+
+class StanzaViewItem(Gtk.Box):
+    def __init__(self) -> None:
+        Gtk.Box.__init__(
+            self, orientation=Gtk.Orientation.VERTICAL, spacing=3, margin_bottom=12
+        )
+
+        self._header_label = Gtk.Label(xalign=0)
+        self._header_label.add_css_class("dimmed")
+        self._header_label.add_css_class("monospace")
+        self.append(self._header_label)
+
+        self._stanza_label = Gtk.Label(
+            xalign=0,
+            selectable=True,
+            wrap=True,
+            wrap_mode=Pango.WrapMode.WORD_CHAR,
+        )
+        self._stanza_label.add_css_class("monospace")
+        self.append(self._stanza_label)
+
+    def bind(self, item: StanzaListItem) -> None:
+        stanza = item.stanza
+        header = stanza.get_header(item.account_label)
+        self._header_label.set_text(f"<!-- {header} -->")
+        self._stanza_label.set_text(stanza.text)
+
+
+class StanzaListView(Gtk.ListView, SignalManager):
+    """
+    Shows the last captured stanzas
+
+    Rows are only created for visible stanzas, so stanzas are only
+    pretty printed once they are scrolled into view.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        Gtk.ListView.__init__(self)
+        SignalManager.__init__(self)
+
+        self._max_size = max_size
+        self._filter = StanzaFilter()
+
+        self._model = Gio.ListStore(item_type=StanzaListItem)
+
+        self._custom_filter = Gtk.CustomFilter.new(self._filter_func)
+        self._filter_model = Gtk.FilterListModel(
+            model=self._model, filter=self._custom_filter
+        )
+        self._selection_model = Gtk.SingleSelection(
+            model=self._filter_model, autoselect=False, can_unselect=True
+        )
+        self.set_model(self._selection_model)
+
+        factory = Gtk.SignalListItemFactory()
+        self._connect(factory, "setup", self._on_factory_setup)
+        self._connect(factory, "bind", self._on_factory_bind)
+        self.set_factory(factory)
+
+    def do_unroot(self) -> None:
+        # The filter func needs to be unset before calling do_unroot (see #12213)
+        self._custom_filter.set_filter_func(None)
+        Gtk.ListView.do_unroot(self)
+        self._disconnect_all()
+        del self._model
+        del self._filter_model
+        del self._selection_model
+        del self._custom_filter
+        app.check_finalize(self)
+
+    @staticmethod
+    def _on_factory_setup(
+        _factory: Gtk.SignalListItemFactory, list_item: Gtk.ListItem
+    ) -> None:
+        list_item.set_child(StanzaViewItem())
+
+    @staticmethod
+    def _on_factory_bind(
+        _factory: Gtk.SignalListItemFactory, list_item: Gtk.ListItem
+    ) -> None:
+        view_item = cast(StanzaViewItem, list_item.get_child())
+        view_item.bind(cast(StanzaListItem, list_item.get_item()))
+
+    def _filter_func(self, item: StanzaListItem) -> bool:
+        return self._filter.matches(item.stanza)
+
+    def set_filter(self, filter_: StanzaFilter) -> None:
+        if filter_ == self._filter:
+            return
+        self._filter = filter_
+        self._custom_filter.changed(Gtk.FilterChange.DIFFERENT)
+
+    def append(self, stanza: CapturedStanza) -> None:
+        if self._model.get_n_items() >= self._max_size:
+            self._model.remove(0)
+        self._model.append(StanzaListItem(stanza))
+
+    def clear(self) -> None:
+        self._model.remove_all()
+
+    def find(self, text: str, direction: Direction) -> tuple[int, int] | None:
+        """
+        Select the next shown stanza containing text, returns the position
+        of the match and the number of matches
+        """
+
+        text = text.casefold()
+        matches = [
+            pos
+            for pos, item in enumerate(cast(list[StanzaListItem], self._filter_model))
+            if text in item.stanza.text.casefold()
+        ]
+        if not matches:
+            return None
+
+        selected = self._selection_model.get_selected()
+        if selected == Gtk.INVALID_LIST_POSITION:
+            index = 0 if direction == Direction.NEXT else len(matches) - 1
+        elif direction == Direction.NEXT:
+            index = bisect.bisect_right(matches, selected) % len(matches)
+        else:
+            index = (bisect.bisect_left(matches, selected) - 1) % len(matches)
+
+        self.scroll_to(matches[index], Gtk.ListScrollFlags.SELECT)
+        return index + 1, len(matches)
+
+
 class SentSzanzas:
     def __init__(self) -> None:
         self._sent_stanzas: dict[float, str] = {}
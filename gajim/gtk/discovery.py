@@ -34,9 +34,9 @@
 from typing import Any
 from typing import cast
 from typing import Concatenate
-from typing import Generic
-from typing import TypeVar
 
+import heapq
+import itertools
 import logging
 import types
 import weakref
@@ -45,18 +45,24 @@
 
 from gi.repository import GLib
 from gi.repository import Gtk
-from nbxmpp.errors import StanzaError
+from nbxmpp.errors import BaseError
 from nbxmpp.modules.pubsub import PubSubSubscription
 from nbxmpp.namespaces import Namespace
 from nbxmpp.protocol import JID
 from nbxmpp.structs import DiscoIdentity
 from nbxmpp.structs import DiscoInfo
 from nbxmpp.structs import DiscoItem
-from nbxmpp.structs import DiscoItems
 from nbxmpp.task import Task
 
 from gajim.common import app
+from gajim.common import ged
+from gajim.common.events import AccountDisconnected
+from gajim.common.ged import EventHelper
 from gajim.common.i18n import _
+from gajim.common.modules.discovery import DISCO_TIMEOUT
+from gajim.common.modules.discovery import DiscoItemsPage
+from gajim.common.util.classes import CacheResult
+from gajim.common.util.classes import TTLCache
 from gajim.common.util.jid import InvalidFormat
 from gajim.common.util.jid import parse_jid
 
@@ -67,11 +73,19 @@
 from gajim.gtk.util.window import open_window
 from gajim.gtk.window import GajimAppWindow
 
-_T = TypeVar("_T")
 _InfoCacheT = tuple[list[DiscoIdentity], list[str], list[Any]]
 
 log = logging.getLogger("gajim.gtk.discovery")
 
+# Results are kept in memory and in the cache storage for this long
+SERVICES_CACHE_TTL = 6 * 3600
+
+# Number of disco queries which are sent at the same time
+MAX_CONCURRENT_QUERIES = 5
+
+PRIORITY_VISIBLE = 0
+PRIORITY_DEFAULT = 1
+
 LABELS = {
     1: _("This service has not yet responded with detailed information"),
     2: _(
@@ -137,80 +151,6 @@ def _gen_agent_type_info():
 }
 
 
-class CacheItem(Generic[_T]):
-    """
-    An object to store cache items and their timeouts
-    """
-
-    def __init__(self, value: _T) -> None:
-        self.value = value
-        self.source: int | None = None
-
-    def __call__(self) -> _T:
-        return self.value
-
-
-class CacheDictionary(Generic[_T]):
-    """
-    A dictionary that keeps items around for only a specific time.  Lifetime is
-    in minutes. Getrefresh specifies whether to refresh when an item is merely
-    accessed instead of set as well
-    """
-
-    def __init__(self, lifetime: int, getrefresh: bool = True) -> None:
-        self.lifetime = lifetime * 1000 * 60
-        self.getrefresh = getrefresh
-        self.cache: dict[str, CacheItem[_T]] = {}
-
-    def cleanup(self) -> None:
-        for key in list(self.cache.keys()):
-            item = self.cache[key]
-            if item.source:
-                GLib.source_remove(item.source)
-            del self.cache[key]
-
-    def _expire_timeout(self, key: str) -> bool:
-        """
-        The timeout has expired, remove the object
-        """
-        if key in self.cache:
-            del self.cache[key]
-        return False
-
-    def _refresh_timeout(self, key: str) -> None:
-        """
-        The object was accessed, refresh the timeout
-        """
-        item = self.cache[key]
-        if item.source:
-            GLib.source_remove(item.source)
-        if self.lifetime:
-            source = GLib.timeout_add_seconds(
-                int(self.lifetime / 1000), self._expire_timeout, key
-            )
-            item.source = source
-
-    def __getitem__(self, key: str) -> _T:
-        item = self.cache[key]
-        if self.getrefresh:
-            self._refresh_timeout(key)
-        return item()
-
-    def __setitem__(self, key: str, value: _T) -> None:
-        item = CacheItem(value)
-        self.cache[key] = item
-        self._refresh_timeout(key)
-
-    def __delitem__(self, key: str) -> None:
-        item = self.cache[key]
-        if item.source:
-            GLib.source_remove(item.source)
-        del self.cache[key]
-
-    def __contains__(self, key: str) -> bool:
-        return key in self.cache
-
-
 def get_agent_address(jid: str | JID, node: str | None = None) -> str:
     """
     Get an agent's address for displaying in the GUI
@@ -269,23 +209,52 @@ def __call__(self, *args: Any, **kwargs: Any) -> Any:
         return cb(*args, **kwargs)
 
 
-class ServicesCache:
+class ServicesCache(EventHelper):
     """
     Class that caches our query results. Each connection will have it's own
     ServiceCache instance
+
+    Results are also kept in the cache storage, so browsing a service again
+    does not need any queries. Queries are sent from a priority queue, only
+    a few of them at the same time.
     """
 
     def __init__(self, account: str) -> None:
+        EventHelper.__init__(self)
         self.account = account
-        self._items: CacheDictionary[list[DiscoItem]] = CacheDictionary(
-            0, getrefresh=False
+        self._items: TTLCache[str, list[DiscoItem]] = TTLCache(
+            ttl_seconds=SERVICES_CACHE_TTL, extend_ttl_on_hit=False
+        )
+        self._info: TTLCache[str, _InfoCacheT] = TTLCache(
+            ttl_seconds=SERVICES_CACHE_TTL, extend_ttl_on_hit=False
         )
-        self._info: CacheDictionary[_InfoCacheT] = CacheDictionary(0, getrefresh=False)
         self._cbs: dict[tuple[str, str], list[Any]] = {}
 
-    def cleanup(self) -> None:
-        self._items.cleanup()
-        self._info.cleanup()
+        # Items of paged disco#items queries received so far
+        self._pages: dict[str, list[DiscoItem]] = {}
+
+        # Heap of (priority, counter, type, jid, node) waiting to be sent
+        self._queue: list[tuple[int, int, str, str, str]] = []
+        self._queued: dict[tuple[str, str], int] = {}
+        self._running: set[tuple[str, str]] = set()
+        self._counter = itertools.count()
+
+        self.register_events(
+            [
+                ("account-disconnected", ged.GUI1, self._on_account_disconnected),
+            ]
+        )
+
+    def _on_account_disconnected(self, event: AccountDisconnected) -> None:
+        if event.account != self.account:
+            return
+
+        # Answers of queries sent before are not received anymore
+        self._cbs.clear()
+        self._pages.clear()
+        self._queue.clear()
+        self._queued.clear()
+        self._running.clear()
 
     def _clean_closure(self, cb: Any, type_: str, addr: str):
         # A closure died, clean up
@@ -392,9 +361,12 @@ def get_info(
         force: bool = False,
         nofetch: bool = False,
         args: tuple[Any, ...] | None = None,
+        priority: int = PRIORITY_DEFAULT,
     ) -> None:
         """
         Get info for an agent
+
+        :param priority:    PRIORITY_VISIBLE for rows the user looks at
         """
 
         if args is None:
@@ -402,10 +374,11 @@ def get_info(
 
         addr = get_agent_address(jid, node)
         # Check the cache
-        if addr in self._info and not force:
-            info = self._info[addr]
-            cb(jid, node, *info, *args)
-            return
+        if not force:
+            info = self._get_cached_info(jid, node, addr)
+            if info is not None:
+                cb(jid, node, *info, *args)
+                return
 
         if nofetch:
             return
@@ -418,10 +391,7 @@ def get_info(
             self._cbs[cbkey].append(cb)
         else:
             self._cbs[cbkey] = [cb]
-            client = app.get_client(self.account)
-            client.get_module("Discovery").disco_info(
-                jid, node, callback=self._disco_info_received
-            )
+        self._enqueue("info", jid, node, priority)
 
     def get_items(
         self,
@@ -431,19 +401,26 @@ def get_items(
         force: bool = False,
         nofetch: bool = False,
         args: tuple[Any, ...] | None = None,
+        page_cb: Callable[Concatenate[str, str, list[DiscoItem], ...], None]
+        | None = None,
     ) -> None:
         """
         Get a list of items in an agent
+
+        :param page_cb:     Called with the items of each page while a long
+                            list is fetched, cb is called with all items
+                            afterwards
         """
         if args is None:
             args = ()
 
         addr = get_agent_address(jid, node)
         # Check the cache
-        if addr in self._items and not force:
-            items = self._items[addr]
-            cb(jid, node, items, *args)
-            return
+        if not force:
+            items = self._get_cached_items(jid, node, addr)
+            if items is not None:
+                cb(jid, node, items, *args)
+                return
 
         if nofetch:
             return
@@ -456,117 +433,189 @@ def get_items(
             self._cbs[cbkey].append(cb)
         else:
             self._cbs[cbkey] = [cb]
-            client = app.get_client(self.account)
-            client.get_module("Discovery").disco_items(
-                jid, node, callback=self._disco_items_received
+
+        if page_cb is not None:
+            pagekey = ("page", addr)
+            page_cb = Closure(
+                page_cb, userargs=args, remove=self._clean_closure, removeargs=pagekey
             )
+            self._cbs.setdefault(pagekey, []).append(page_cb)
 
-    def _disco_info_received(self, task: Any) -> None:
-        """
-        Callback for when we receive an agent's info
-        array is (agent, node, identities, features, data)
-        """
+        self._enqueue("items", jid, node, PRIORITY_DEFAULT)
 
-        try:
-            result = cast(DiscoInfo, task.finish())
-        except StanzaError as error:
-            self._disco_info_error(error)
-            return
+    def _get_cached_info(self, jid: str, node: str, addr: str) -> _InfoCacheT | None:
+        info, result = self._info.get(addr)
+        if result == CacheResult.HIT:
+            return info
 
-        identities = result.identities
+        disco_info = app.storage.cache.get_disco_info(
+            self.account, jid, node, SERVICES_CACHE_TTL
+        )
+        if disco_info is None:
+            return None
+
+        info = self._make_info(disco_info)
+        self._info.add(addr, info)
+        return info
+
+    def _get_cached_items(
+        self, jid: str, node: str, addr: str
+    ) -> list[DiscoItem] | None:
+        items, result = self._items.get(addr)
+        if result == CacheResult.HIT:
+            return items
+
+        items = app.storage.cache.get_disco_items(
+            self.account, jid, node, SERVICES_CACHE_TTL
+        )
+        if items is None:
+            return None
+
+        self._items.add(addr, items)
+        return items
+
+    @staticmethod
+    def _make_info(disco_info: DiscoInfo) -> _InfoCacheT:
+        identities = disco_info.identities
         if not identities:
             # Ejabberd doesn't send identities when using admin nodes
-            identities = [DiscoIdentity(category="server", type="im", name=result.node)]
-
-        self._on_agent_info(
-            str(result.jid),
-            result.node or "",
-            identities,
-            result.features,
-            result.dataforms,
-        )
+            identities = [
+                DiscoIdentity(category="server", type="im", name=disco_info.node)
+            ]
+        return identities, disco_info.features, disco_info.dataforms
+
+    def _enqueue(self, type_: str, jid: str, node: str, priority: int) -> None:
+        cbkey = (type_, get_agent_address(jid, node))
+        if cbkey in self._running:
+            return
 
-    def _disco_info_error(self, error: StanzaError) -> None:
-        """
-        Callback for when a query fails. Even after the browse and agents
-        namespaces
-        """
-        assert error.jid is not None
-        addr = get_agent_address(error.jid)
+        queued = self._queued.get(cbkey)
+        if queued is not None and queued <= priority:
+            return
 
-        # Call callbacks
-        cbkey = ("info", addr)
-        if cbkey in self._cbs:
-            for cb in self._cbs[cbkey]:
-                cb(str(error.jid), "", None, None, None)
-            # clean_closure may have beaten us to it
-            if cbkey in self._cbs:
-                del self._cbs[cbkey]
+        # A query which became more urgent is pushed again, the stale
+        # entry is skipped when it comes up
+        self._queued[cbkey] = priority
+        heapq.heappush(self._queue, (priority, next(self._counter), type_, jid, node))
+        self._process_queue()
+
+    def _process_queue(self) -> None:
+        while self._queue and len(self._running) < MAX_CONCURRENT_QUERIES:
+            priority, _count, type_, jid, node = heapq.heappop(self._queue)
+            cbkey = (type_, get_agent_address(jid, node))
+            if self._queued.get(cbkey) != priority:
+                continue
 
-    def _on_agent_info(
-        self,
-        fjid: str,
-        node: str,
-        identities: list[DiscoIdentity],
-        features: list[str],
-        dataforms: list[Any],
-    ) -> None:
-        addr = get_agent_address(fjid, node)
+            del self._queued[cbkey]
+            if cbkey not in self._cbs:
+                # Nobody is waiting for the result anymore
+                continue
 
-        # Store in cache
-        self._info[addr] = (identities, features, dataforms)
+            self._running.add(cbkey)
+            if type_ == "info":
+                client = app.get_client(self.account)
+                client.get_module("Discovery").disco_info(
+                    jid,
+                    node,
+                    callback=self._disco_info_received,
+                    user_data=(jid, node),
+                    timeout=DISCO_TIMEOUT,
+                )
+            else:
+                self._request_items_page(jid, node)
 
-        # Call callbacks
-        cbkey = ("info", addr)
-        if cbkey in self._cbs:
-            for cb in self._cbs[cbkey]:
-                cb(fjid, node, identities, features, dataforms)
-            # clean_closure may have beaten us to it
-            if cbkey in self._cbs:
-                del self._cbs[cbkey]
+    def _query_finished(self, cbkey: tuple[str, str]) -> None:
+        self._running.discard(cbkey)
+        self._process_queue()
+
+    def _call_callbacks(self, cbkey: tuple[str, str], *args: Any) -> None:
+        # clean_closure may remove callbacks while we call them
+        for cb in self._cbs.pop(cbkey, []):
+            cb(*args)
 
-    def _disco_items_received(self, task: Any) -> None:
+    def _disco_info_received(self, task: Task) -> None:
         """
-        Callback for when we receive an agent's items
-        array is (agent, node, items)
+        Callback for when we receive an agent's info
+        array is (agent, node, identities, features, data)
         """
 
+        jid, node = task.get_user_data()
+        cbkey = ("info", get_agent_address(jid, node))
+        self._query_finished(cbkey)
+
         try:
-            result = cast(DiscoItems, task.finish())
-        except StanzaError as error:
-            self._disco_items_error(error)
+            result = cast(DiscoInfo, task.finish())
+        except BaseError as error:
+            log.info("Disco info of %s failed: %s", cbkey[1], error)
+            self._call_callbacks(cbkey, jid, node, None, None, None)
             return
 
-        addr = get_agent_address(result.jid, result.node)
+        app.storage.cache.set_disco_info(self.account, jid, node, result)
 
-        # Store in cache
-        self._items[addr] = result.items
+        info = self._make_info(result)
+        self._info.add(cbkey[1], info)
+        self._call_callbacks(cbkey, jid, node, *info)
 
-        # Call callbacks
-        cbkey = ("items", addr)
-        if cbkey in self._cbs:
-            for cb in self._cbs[cbkey]:
-                cb(str(result.jid), result.node, result.items)
-            # clean_closure may have beaten us to it
-            if cbkey in self._cbs:
-                del self._cbs[cbkey]
+    def _request_items_page(
+        self, jid: str, node: str, after: str | None = None
+    ) -> None:
+        client = app.get_client(self.account)
+        client.get_module("Discovery").disco_items_page(
+            jid,
+            node,
+            lambda result: self._disco_items_page_received(jid, node, after, result),
+            after=after,
+        )
 
-    def _disco_items_error(self, error: StanzaError) -> None:
+    def _disco_items_page_received(
+        self,
+        jid: str,
+        node: str,
+        after: str | None,
+        result: DiscoItemsPage | BaseError,
+    ) -> None:
         """
-        Callback for when a query fails. Even after the browse and agents
-        namespaces
+        Callback for when we receive a page of an agent's items
         """
-        assert error.jid is not None
-        addr = get_agent_address(error.jid)
 
-        # Call callbacks
+        addr = get_agent_address(jid, node)
         cbkey = ("items", addr)
-        if cbkey in self._cbs:
-            for cb in self._cbs[cbkey]:
-                cb(str(error.jid), "", None)
-            # clean_closure may have beaten us to it
+        pagekey = ("page", addr)
+
+        if isinstance(result, BaseError):
+            log.info("Disco items of %s failed: %s", addr, result)
+            self._pages.pop(addr, None)
+            self._cbs.pop(pagekey, None)
+            self._query_finished(cbkey)
+            self._call_callbacks(cbkey, jid, node, None)
+            return
+
+        page = result.items.items
+        self._pages.setdefault(addr, []).extend(page)
+        for cb in list(self._cbs.get(pagekey, [])):
+            cb(jid, node, page)
+
+        next_after = result.next_after
+        # Some services answer with the same page again instead of an
+        # empty one once all items were sent
+        if next_after is not None and next_after != after:
             if cbkey in self._cbs:
-                del self._cbs[cbkey]
+                self._request_items_page(jid, node, next_after)
+                return
+
+            # Nobody is waiting for the rest of the list anymore
+            self._pages.pop(addr, None)
+            self._cbs.pop(pagekey, None)
+            self._query_finished(cbkey)
+            return
+
+        items = self._pages.pop(addr)
+        self._cbs.pop(pagekey, None)
+        self._query_finished(cbkey)
+
+        app.storage.cache.set_disco_items(self.account, jid, node, items)
+        self._items.add(addr, items)
+        self._call_callbacks(cbkey, jid, node, items)
 
 
 class ServiceDiscoveryWindow(GajimAppWindow):
@@ -940,6 +989,9 @@ def _clean_treemodel(self):
             self.window.services_treeview.remove_column(col)
         self.window.services_treeview.set_headers_visible(False)
 
+    def _clear_model(self) -> None:
+        self.model.clear()
+
     def _add_actions(self):
         """
         Add the action buttons to the buttonbox for actions the browser can
@@ -1016,7 +1068,9 @@ def prepare_window(self, window: ServiceDiscoveryWindow) -> None:
         self.update_actions()
 
         self.active = True
-        self.cache.get_info(self.jid, self.node, self._set_title)
+        self.cache.get_info(
+            self.jid, self.node, self._set_title, priority=PRIORITY_VISIBLE
+        )
 
     def cleanup(self):
         """
@@ -1118,12 +1172,18 @@ def browse(self, force: bool = False) -> None:
         """
         Fill the treeview with agents, fetching the info if necessary
         """
-        self.model.clear()
+        self._clear_model()
         self._total_items = self._progress = 0
+        self._items_shown = False
         self.window.progressbar.set_visible(True)
         self._pulse_timeout = GLib.timeout_add(250, self._pulse_timeout_cb)
         self.cache.get_items(
-            self.jid, self.node, self._agent_items, force=force, args=(force,)
+            self.jid,
+            self.node,
+            self._agent_items,
+            force=force,
+            args=(force,),
+            page_cb=self._agent_items_page,
         )
 
     def _pulse_timeout_cb(self, *args: Any) -> bool:
@@ -1154,19 +1214,40 @@ def _find_item(self, jid: str, node: str) -> Gtk.TreeIter | None:
     def add_self_line(self) -> None:
         pass
 
+    def _show_items(self) -> None:
+        if self._items_shown:
+            return
+
+        self._items_shown = True
+        self._clear_model()
+        self.add_self_line()
+        self._total_items = 0
+
+    def _agent_items_page(
+        self, jid: str, node: str, items: list[DiscoItem], force: bool
+    ) -> None:
+        """
+        Callback for when we receive a page of a long list of agent items
+        """
+        if not items:
+            return
+        self._show_items()
+        self._fill_rows(node, items, force)
+
     def _agent_items(
         self, jid: str, node: str, items: list[DiscoItem] | None, force: bool
     ) -> None:
         """
         Callback for when we receive a list of agent items
         """
-        self.model.clear()
-        self.add_self_line()
-        self._total_items = 0
         GLib.source_remove(self._pulse_timeout)
         self.window.progressbar.set_visible(False)
         # The server returned an error
         if not items:
+            if self._items_shown:
+                return
+            self._clear_model()
+            self.add_self_line()
             if self.window.parent is not None:
                 InformationAlertDialog(
                     _("Service Not Browsable"),
@@ -1178,7 +1259,11 @@ def _agent_items(
                 self.window.close()
             return
 
-        # We got a list of items
+        # Items which were added page by page are skipped
+        self._show_items()
+        self._fill_rows(node, items, force)
+
+    def _fill_rows(self, node: str, items: list[DiscoItem], force: bool) -> None:
         def fill_partial_rows(items: list[DiscoItem]) -> Iterator[bool]:
             """Generator to fill the listmodel of a treeview progressively."""
             for item in items:
@@ -1825,7 +1910,10 @@ def _create_treemodel(self):
         self.window.services_treeview.set_headers_visible(True)
         self.window.services_treeview.set_headers_clickable(True)
         # Source id for idle callback used to start disco#info queries.
-        self._fetch_source = None
+        self._fetch_source: int | None = None
+        # Rows by jid and node, and the rows which were queried for info
+        self._rows: dict[tuple[str, str], Gtk.TreeIter] = {}
+        self._queried: set[tuple[str, str]] = set()
         # Query failure counter
         self._broken = 0
         # Connect to scrollwindow scrolling
@@ -1836,8 +1924,20 @@ def _clean_treemodel(self) -> None:
         if self.vadj_cbid:
             self.vadj.disconnect(self.vadj_cbid)
             self.vadj_cbid = None
+        if self._fetch_source is not None:
+            GLib.source_remove(self._fetch_source)
+            self._fetch_source = None
         AgentBrowser._clean_treemodel(self)
 
+    def _clear_model(self) -> None:
+        AgentBrowser._clear_model(self)
+        self._rows.clear()
+        self._queried.clear()
+
+    def _find_item(self, jid: str, node: str) -> Gtk.TreeIter | None:
+        # Rooms of large services are looked up for every row and result
+        return self._rows.get((jid, node))
+
     def _add_actions(self) -> None:
         self.join_button = Gtk.Button(label=_("_Join"), use_underline=True)
         self.join_button.connect("clicked", self._on_join_button_clicked)
@@ -1880,15 +1980,14 @@ def on_scroll(self, *args: Any) -> None:
         """
         Scrollwindow callback to trigger new queries on scrolling
         """
-        # This apparently happens when inactive sometimes
-        self._query_visible()
+        if self._fetch_source is None:
+            self._fetch_source = GLib.idle_add(self._start_info_query)
 
     def _query_visible(self) -> None:
         """
-        Query the next visible row for info
+        Query the visible rows for info, ahead of all other queries
         """
-        if self._fetch_source:
-            # We're already fetching
+        if self._broken >= 3:
             return
         view = self.window.services_treeview
         if not view.get_realized():
@@ -1901,16 +2000,16 @@ def _query_visible(self) -> None:
         start, end = range_
         iter_ = self.model.get_iter(start)
         while iter_:
-            if not self.model.get_value(iter_, 6):
-                jid = self.model.get_value(iter_, 0)
-                node = self.model.get_value(iter_, 1)
-                self.cache.get_info(jid, node, self._agent_info)
-                self._fetch_source = True
-                return
+            jid = self.model.get_value(iter_, 0)
+            node = self.model.get_value(iter_, 1)
+            if not self.model.get_value(iter_, 6) and (jid, node) not in self._queried:
+                self._queried.add((jid, node))
+                self.cache.get_info(
+                    jid, node, self._agent_info, priority=PRIORITY_VISIBLE
+                )
             if self.model.get_path(iter_) == end:
                 break
             iter_ = self.model.iter_next(iter_)
-        self._fetch_source = None
 
     def _channel_altinfo(
         self,
@@ -1932,7 +2031,6 @@ def _channel_altinfo(
                 if self.vadj_cbid:
                     self.vadj.disconnect(self.vadj_cbid)
                     self.vadj_cbid = None
-                self._fetch_source = None
                 return
         else:
             iter_ = self._find_item(jid, node)
@@ -1942,16 +2040,15 @@ def _channel_altinfo(
                 self.model[iter_][3] = len(items)  # The number of users
                 self.model[iter_][4] = str(len(items))  # The number of users
                 self.model[iter_][6] = True
-        self._fetch_source = None
-        self._query_visible()
 
     def _add_item(self, parent_node: str | None, item: DiscoItem, force: bool) -> None:
         node = item.node or ""
         name = item.name or ""
         jid = str(item.jid)
 
-        self.model.append((jid, node, name, -1, "", "", False))
-        if not self._fetch_source:
+        iter_ = self.model.append((jid, node, name, -1, "", "", False))
+        self._rows[(jid, node)] = iter_
+        if self._fetch_source is None:
             self._fetch_source = GLib.idle_add(self._start_info_query)
 
     def _update_info(
@@ -1987,10 +2084,6 @@ def _update_info(
         else:
             # We didn't find a form, switch to alternate query mode
             self.cache.get_items(jid, node, self._channel_altinfo, args=(name,))
-            return
-        # Continue with the next
-        self._fetch_source = None
-        self._query_visible()
 
     def _update_error(self, iter_: Gtk.TreeIter, jid: str, node: str) -> None:
         # Switch to alternate query mode
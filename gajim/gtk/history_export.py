@@ -17,16 +17,18 @@
 
 from gajim.common import app
 from gajim.common import configpaths
-from gajim.common.helpers import make_path_from_jid
+from gajim.common.history_export import ExportFormat
+from gajim.common.history_export import ExportProgress
+from gajim.common.history_export import ExportResult
+from gajim.common.history_export import HistoryExporter
 from gajim.common.i18n import _
 from gajim.common.modules.contacts import ResourceContact
-from gajim.common.storage.archive.const import ChatDirection
 from gajim.common.storage.archive.const import MessageType
-from gajim.common.storage.archive.models import Message
 
 from gajim.gtk.assistant import Assistant
 from gajim.gtk.assistant import AssistantErrorPage
 from gajim.gtk.assistant import AssistantPage
+from gajim.gtk.assistant import AssistantProgressPage
 from gajim.gtk.builder import get_builder
 from gajim.gtk.dropdown import GajimDropDown
 from gajim.gtk.filechoosers import FileChooserButton
@@ -41,8 +43,11 @@ def __init__(self, account: str | None = None, jid: JID | None = None) -> None:
         self.account = account
         self.jid = jid
 
+        self._exporter: HistoryExporter | None = None
+
         self.add_button("back", _("Back"))
         self.add_button("close", _("Close"))
+        self.add_button("cancel", _("Cancel"))
         self.add_button(
             "export", _("Export"), complete=True, css_class="suggested-action"
         )
@@ -68,6 +73,9 @@ def __init__(self, account: str | None = None, jid: JID | None = None) -> None:
     @overload
     def get_page(self, name: Literal["error"]) -> AssistantErrorPage: ...
 
+    @overload
+    def get_page(self, name: Literal["progress"]) -> AssistantProgressPage: ...
+
     @overload
     def get_page(self, name: Literal["start"]) -> ExportSettings: ...
 
@@ -80,7 +88,7 @@ def _visible_func(_assistant: Assistant, page_name: str) -> list[str]:
             return ["close", "export"]
 
         if page_name == "progress":
-            return []
+            return ["cancel"]
 
         if page_name == "success":
             return ["back", "close"]
@@ -97,12 +105,16 @@ def _on_button_clicked(self, _assistant: Assistant, button_name: str) -> None:
         elif button_name == "back":
             self.show_page("start", Gtk.StackTransitionType.SLIDE_RIGHT)
 
+        elif button_name == "cancel":
+            if self._exporter is not None:
+                self._exporter.cancel()
+
         elif button_name == "close":
             self.close()
 
     def _on_export(self) -> None:
         start_page = self.get_page("start")
-        account, jid, directory = start_page.get_export_settings()
+        account, jid, directory, format_ = start_page.get_export_settings()
 
         current_time = datetime.now()
         time_str = current_time.strftime("%Y-%m-%d-%H-%M-%S")
@@ -114,60 +126,59 @@ def _on_export(self) -> None:
         else:
             jids = [jid]
 
-        for jid in jids:
-            messages = app.storage.archive.get_messages_for_export(account, jid)
-            if not messages:
-                continue
-
-            file_path = make_path_from_jid(export_dir, jid)
-            try:
-                file_path.mkdir(parents=True, exist_ok=True)
-            except OSError as err:
-                self.get_page("error").set_text(
-                    _(
-                        "An error occurred while trying to create a "
-                        "file at %(path)s: %(error)s"
-                    )
-                    % {"path": file_path, "error": str(err)}
-                )
-                self.show_page("error", Gtk.StackTransitionType.SLIDE_LEFT)
-                return
-
-            with open(file_path / "history.txt", "w", encoding="utf-8") as file:
-                file.write(f"History for {jid}\n\n")
-                for message in messages:
-                    if message.call is not None:
-                        continue
-
-                    file.write(self._get_export_line(message))
+        self.get_page("progress").set_text(_("Exporting your messages..."))
 
-        self.show_page("success", Gtk.StackTransitionType.SLIDE_LEFT)
+        self._exporter = HistoryExporter(
+            account,
+            jids,
+            export_dir,
+            format_,
+            progress_callback=self._on_export_progress,
+            finished_callback=self._on_export_finished,
+        )
+        self._exporter.start()
 
-    def _get_nickname(self, message: Message) -> str:
-        if message.direction == ChatDirection.OUTGOING:
-            return _("You")
+    def _on_export_progress(self, progress: ExportProgress) -> None:
+        if self._exporter is None:
+            return
 
-        if message.type == MessageType.GROUPCHAT:
-            if message.occupant is not None:
-                if message.occupant.nickname is not None:
-                    return message.occupant.nickname
+        self.get_page("progress").set_text(
+            _(
+                "Exporting chat %(current)s of %(total)s\n"
+                "%(count)s messages exported (%(rate)s per second)"
+            )
+            % {
+                "current": min(progress.chats_done + 1, progress.chats_total),
+                "total": progress.chats_total,
+                "count": progress.messages,
+                "rate": round(progress.rate),
+            }
+        )
 
-            if message.resource is not None:
-                return message.resource
+    def _on_export_finished(self, result: ExportResult) -> None:
+        if self._exporter is None:
+            return
 
-            return _("Group Chat")
+        self._exporter = None
 
-        return str(message.remote.jid)
+        if result.cancelled:
+            self.show_page("start", Gtk.StackTransitionType.SLIDE_RIGHT)
+            return
 
-    def _get_export_line(self, message: Message) -> str:
-        name = self._get_nickname(message)
-        timestamp = message.timestamp.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+        if result.error is not None:
+            self.get_page("error").set_text(
+                _("An error occurred while exporting your messages: %s") % result.error
+            )
+            self.show_page("error", Gtk.StackTransitionType.SLIDE_LEFT)
+            return
 
-        text = message.text
-        if corrected_message := message.get_last_correction():
-            text = corrected_message.text
+        self.show_page("success", Gtk.StackTransitionType.SLIDE_LEFT)
 
-        return f"{timestamp} {name}: {text or ''}\n"
+    def _cleanup(self) -> None:
+        if self._exporter is not None:
+            self._exporter.cancel()
+            self._exporter = None
+        Assistant._cleanup(self)
 
 
 class ExportSettings(AssistantPage):
@@ -215,6 +226,16 @@ def __init__(self, account: str | None, jid: JID | None) -> None:
         self._connect(file_chooser_button, "path-picked", self._on_path_picked)
         self._ui.settings_grid.attach(file_chooser_button, 1, 2, 1, 1)
 
+        self._format_dropdown: GajimDropDown[str] = GajimDropDown(
+            data={
+                ExportFormat.TEXT.value: _("Plain Text"),
+                ExportFormat.JSONL.value: _("JSON Lines"),
+                ExportFormat.XML.value: _("XML (XEP-0227)"),
+            },
+            fixed_width=40,
+        )
+        self._ui.settings_grid.attach(self._format_dropdown, 1, 3, 1, 1)
+
         self._set_complete()
 
     def _on_account_changed(self, dropdown: GajimDropDown[str], *args: Any) -> None:
@@ -265,7 +286,11 @@ def _on_path_picked(
             return
         self._export_directory = paths[0]
 
-    def get_export_settings(self) -> tuple[str, JID | None, Path]:
+    def get_export_settings(self) -> tuple[str, JID | None, Path, ExportFormat]:
         assert self._account is not None
         assert self._export_directory is not None
-        return self._account, self._jid, self._export_directory
+
+        item = self._format_dropdown.get_selected_item()
+        assert item is not None
+        format_ = ExportFormat(item.key)
+        return self._account, self._jid, self._export_directory, format_
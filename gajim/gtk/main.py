@@ -128,6 +128,7 @@ def init(self) -> None:
         self._app_side_bar.set_chat_page(self._chat_page)
 
         self.connect("notify::is-active", self._on_window_active)
+        self.connect("notify::visible", self._on_window_visible)
         self.connect("close-request", self._on_close_request)
 
         controller = Gtk.EventControllerMotion(
@@ -1156,6 +1157,9 @@ def mark_as_read(
             by = contact.jid if isinstance(contact, GroupchatContact) else None
             client.get_module("MDS").set_mds(contact.jid, last_message.stanza_id, by)
 
+    def _on_window_visible(self, window: Gtk.ApplicationWindow, _param: Any) -> None:
+        app.background_mode.set_window_visible(window.get_visible())
+
     def _on_window_active(self, window: Gtk.ApplicationWindow, _param: Any) -> None:
         if not window.is_active():
             return
@@ -1290,15 +1294,35 @@ def _open_wizard():
             GLib.idle_add(_open_wizard)
 
     def _load_chats(self) -> None:
+        self._preload_last_conversation_rows()
+
         for workspace_id in app.settings.get_workspaces():
             self.add_workspace(workspace_id)
             self._chat_page.load_workspace_chats(workspace_id)
 
+        app.storage.archive.discard_preloaded_conversation_rows()
+
         workspace_id = self._app_side_bar.get_first_workspace()
         self.activate_workspace(workspace_id)
 
         self._set_startup_finished()
 
+    @staticmethod
+    def _preload_last_conversation_rows() -> None:
+        # Chat list rows display the last message of their chat, load
+        # them all at once instead of one query per row
+        active_accounts = app.settings.get_active_accounts()
+        chats: list[tuple[str, JID]] = []
+        for workspace_id in app.settings.get_workspaces():
+            open_chats = app.settings.get_workspace_setting(workspace_id, "chats")
+            chats.extend(
+                (open_chat["account"], open_chat["jid"])
+                for open_chat in open_chats
+                if open_chat["account"] in active_accounts
+            )
+
+        app.storage.archive.preload_last_conversation_rows(chats)
+
     def _is_history_sync(self, event: events.MessageReceived) -> bool:
         if event.mam is None:
             return False
@@ -105,6 +105,12 @@ def generate_url_previews(self, text: str) -> None:
     def _find_urls(self, text: str) -> None:
         self._preview_timeout_id = None
 
+        if "https://" not in text:
+            # Skip the expensive regex for texts which can't contain a match
+            self._dismissed_previews.clear()
+            self._update_preview_list([])
+            return
+
         # We use lists here to preserve a stable and consistent order
         matches = itertools.islice(re.finditer(HTTPS_URL_RX, text), MAX_URL_PREVIEWS)
         urls = [match.group() for match in matches]
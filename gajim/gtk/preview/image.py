@@ -7,6 +7,7 @@
 import typing
 
 import logging
+from collections.abc import Callable
 from concurrent.futures import Future
 from functools import partial
 from pathlib import Path
@@ -21,12 +22,15 @@
 from gajim.common.const import IMAGE_MIME_TYPES
 from gajim.common.const import VIDEO_MIME_TYPES
 from gajim.common.helpers import load_file_async
-from gajim.common.multiprocess.thumbnail import create_thumbnail
+from gajim.common.multiprocess.thumbnail import create_thumbnails
 from gajim.common.multiprocess.video_thumbnail import (
     extract_video_thumbnail_and_properties,
 )
+from gajim.common.preview_scheduler import PreviewJobType
+from gajim.common.preview_scheduler import PreviewRequest
 from gajim.common.util.image import image_size
 from gajim.common.util.image import is_image_animated
+from gajim.common.util.preview import get_closest_thumb_size
 
 from gajim.gtk.preview.animated_image import AnimatedImage
 from gajim.gtk.preview.animated_image_backend import AnimatedImageBackend
@@ -37,6 +41,7 @@
 from gajim.gtk.preview.misc import LoadingBox  # noqa: F401 # type: ignore
 from gajim.gtk.util.classes import SignalManager
 from gajim.gtk.util.misc import get_ui_string
+from gajim.gtk.util.misc import is_in_viewport
 
 log = logging.getLogger("gajim.gtk.preview.image")
 
@@ -66,13 +71,22 @@ def __init__(
         file_size: int,
         mime_type: str,
         orig_path: Path,
-        thumb_path: Path,
+        thumb_paths: dict[int, Path],
     ) -> None:
         Gtk.Box.__init__(self)
         SignalManager.__init__(self)
 
         self._orig_path = orig_path
-        self._thumb_path = thumb_path
+        self._thumb_paths = thumb_paths
+
+        # Pick the rendition which fits best for the current scale factor
+        self._thumb_size = get_closest_thumb_size(
+            list(thumb_paths),
+            app.settings.get("preview_size") * app.window.get_scale_factor(),
+        )
+        self._thumb_path = thumb_paths[self._thumb_size]
+        self._thumbnail_request: PreviewRequest | None = None
+
         self._filename = filename
         self._mime_type = mime_type
 
@@ -121,43 +135,77 @@ def _create_thumbnail(self, type_: typing.Literal["image", "video"]) -> None:
             self._create_video_thumbnail()
 
     def _create_image_thumbnail(self) -> None:
-        assert self._thumb_path is not None
-        assert self._orig_path is not None
-        try:
-            future = app.process_pool.submit(
-                create_thumbnail,
+        # All renditions are created at once, so the original has to be
+        # read and decoded only once
+        self._thumbnail_request = app.preview_scheduler.request(
+            f"thumbnail:{self._orig_path}",
+            PreviewJobType.THUMBNAIL,
+            partial(
+                app.process_pool.submit,
+                create_thumbnails,
                 self._orig_path,
-                self._thumb_path,
-                app.settings.get("preview_size") * app.window.get_scale_factor(),
+                dict(self._thumb_paths),
                 self._mime_type,
-            )
-            future.add_done_callback(
-                partial(GLib.idle_add, self._create_thumbnail_finished)
-            )
-        except Exception as error:
-            log.warning("Creating thumbnail failed for: %s %s", self._orig_path, error)
-            self.emit("display-error")
+            ),
+            partial(
+                self._on_thumbnail_job_started, self._create_image_thumbnails_finished
+            ),
+            is_visible=partial(is_in_viewport, self),
+        )
 
     def _create_video_thumbnail(self) -> None:
-        assert self._orig_path is not None
-
-        try:
-            future = app.process_pool.submit(
+        self._thumbnail_request = app.preview_scheduler.request(
+            f"video-thumbnail:{self._thumb_path}",
+            PreviewJobType.THUMBNAIL,
+            partial(
+                app.process_pool.submit,
                 extract_video_thumbnail_and_properties,
                 self._orig_path,
                 self._thumb_path,
-                app.settings.get("preview_size"),
-            )
-            future.add_done_callback(
-                partial(GLib.idle_add, self._create_thumbnail_finished)
-            )
+                # The thumbnail is stored under this size, on HiDPI screens
+                # it is larger than the shown preview
+                self._thumb_size,
+            ),
+            partial(self._on_thumbnail_job_started, self._create_thumbnail_finished),
+            is_visible=partial(is_in_viewport, self),
+        )
+
+    def _on_thumbnail_job_started(
+        self, finished_func: Callable[[Future[typing.Any]], bool], obj: typing.Any
+    ) -> None:
+        if not isinstance(obj, Future):
+            log.warning("Creating thumbnail failed for: %s", self._orig_path)
+            self.emit("display-error")
+            return
+
+        obj.add_done_callback(partial(GLib.idle_add, finished_func))
+
+    def _create_image_thumbnails_finished(
+        self, future: Future[tuple[dict[int, bytes], dict[str, typing.Any]]]
+    ) -> bool:
+        if future.cancelled():
+            return GLib.SOURCE_REMOVE
+
+        try:
+            thumbnails, _metadata = future.result()
         except Exception as error:
-            log.warning("Creating thumbnail failed for: %s %s", self._orig_path, error)
+            log.exception(
+                "Creating thumbnail failed for: %s %s", self._orig_path, error
+            )
             self.emit("display-error")
 
+        else:
+            self._thumbnail = thumbnails[self._thumb_size]
+            self._display_image_preview()
+
+        return GLib.SOURCE_REMOVE
+
     def _create_thumbnail_finished(
         self, future: Future[tuple[bytes, dict[str, typing.Any]]]
     ) -> bool:
+        if future.cancelled():
+            return GLib.SOURCE_REMOVE
+
         try:
             thumbnail_bytes, _metadata = future.result()
         except Exception as error:
@@ -268,5 +316,9 @@ def _on_content_cursor_leave(
         self._file_control_buttons.set_visible(False)
 
     def do_unroot(self) -> None:
+        if self._thumbnail_request is not None:
+            self._thumbnail_request.cancel()
+            self._thumbnail_request = None
+
         Gtk.Box.do_unroot(self)
         self._disconnect_all()
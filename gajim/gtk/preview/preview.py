@@ -8,6 +8,7 @@
 import hashlib
 import logging
 import sys
+from functools import partial
 from pathlib import Path
 from urllib.parse import urlparse
 
@@ -29,10 +30,14 @@
 from gajim.common.multiprocess.http import ContentTypeNotAllowed
 from gajim.common.multiprocess.http import HTTPStatusError
 from gajim.common.multiprocess.http import MaxContentLengthExceeded
+from gajim.common.preview_scheduler import JobObjectT
+from gajim.common.preview_scheduler import PreviewJobType
+from gajim.common.preview_scheduler import PreviewRequest
 from gajim.common.util.preview import contains_audio_streams
 from gajim.common.util.preview import get_icon_for_mime_type
 from gajim.common.util.preview import get_image_paths
 from gajim.common.util.preview import get_size_and_mime_type
+from gajim.common.util.preview import get_thumb_paths
 from gajim.common.util.preview import is_audio
 from gajim.common.util.preview import is_image
 from gajim.common.util.preview import is_video
@@ -44,6 +49,7 @@
 from gajim.gtk.preview.image import ImagePreviewWidget
 from gajim.gtk.util.classes import SignalManager
 from gajim.gtk.util.misc import get_ui_string
+from gajim.gtk.util.misc import is_in_viewport
 from gajim.gtk.widgets import GajimPopover
 
 log = logging.getLogger("gajim.gtk.preview")
@@ -119,6 +125,7 @@ def __init__(
         self._preview_id_short = self._preview_id[:10]
         self._info_message = None
         self._http_obj = None
+        self._download_request: PreviewRequest | None = None
         self._state = PreviewState.INIT
 
         drag_source = Gtk.DragSource(actions=Gdk.DragAction.COPY)
@@ -158,7 +165,7 @@ def __init__(
         self._urlparts = urlparse(self._uri)
         thumbnail_size = app.settings.get("preview_size")
 
-        self._orig_path, self._thumb_path = get_image_paths(
+        self._orig_path, self._thumb_paths = get_image_paths(
             self._uri, self._urlparts, thumbnail_size, self._orig_dir, self._thumb_dir
         )
 
@@ -169,18 +176,33 @@ def __init__(
         label.set_ellipsize(Pango.EllipsizeMode.END)
         label.set_max_width_chars(32)
 
-        if ftobj := app.ftm.get_transfer(self._preview_id):
+        if app.ftm.get_transfer(self._preview_id) is not None:
             log.info(
                 "Bind to existing transfer: %s %s", self._preview_id_short, self._uri
             )
-            self._connect_to_ftobj(ftobj)
+            self._download_content()
             return
 
-        if self._orig_path.exists():
-            self._mime_type, self._file_size = get_size_and_mime_type(self._orig_path)
-            self._set_widget_state(PreviewState.DOWNLOADED)
-            self._set_widget_state(PreviewState.DISPLAY)
-            return
+        cached_path = app.storage.preview_cache.get_orig_path(self._uri)
+        if cached_path is None and self._orig_path.exists():
+            # Downloaded before the preview cache existed, the file is
+            # hashed and added to the cache in the background
+            app.storage.preview_cache.import_file(
+                self._uri, self._orig_path, self._set_orig_path
+            )
+            cached_path = self._orig_path
+
+        if cached_path is not None:
+            try:
+                self._mime_type, self._file_size = get_size_and_mime_type(cached_path)
+            except FileNotFoundError:
+                log.info("Cached file was removed: %s", cached_path)
+                app.storage.preview_cache.remove_uri(self._uri)
+            else:
+                self._set_orig_path(cached_path)
+                self._set_widget_state(PreviewState.DOWNLOADED)
+                self._set_widget_state(PreviewState.DISPLAY)
+                return
 
         max_content_length = app.settings.get("preview_max_file_size")
         if max_content_length > 0 and self._should_auto_preview(context):
@@ -191,6 +213,11 @@ def __init__(
             self._set_widget_state(PreviewState.OFFER_DOWNLOAD)
 
     def do_unroot(self) -> None:
+        if self._download_request is not None:
+            # Cancels the download, if no other preview waits for it
+            self._download_request.cancel()
+            self._download_request = None
+
         self._disconnect_all()
         del self._menu_popover
         del self._http_obj
@@ -202,6 +229,12 @@ def get_text(self) -> str:
     def get_orig_path(self) -> Path:
         return self._orig_path
 
+    def _set_orig_path(self, path: Path) -> None:
+        self._orig_path = path
+        self._thumb_paths = get_thumb_paths(
+            path, app.settings.get("preview_size"), self._thumb_dir
+        )
+
     def _on_drag_prepare(
         self, _drag_source: Gtk.DragSource, x: float, y: float
     ) -> Gdk.ContentProvider | None:
@@ -262,7 +295,7 @@ def _set_widget_state(self, state: PreviewState) -> None:
                     self._file_size,
                     self._mime_type,
                     self._orig_path,
-                    self._thumb_path,
+                    self._thumb_paths,
                 )
 
             elif is_audio(self._mime_type):
@@ -323,7 +356,14 @@ def _on_icon_clicked(self, button: Gtk.Button) -> None:
 
     def _on_cancel_download_clicked(self, button: Gtk.Button) -> None:
         button.set_sensitive(False)
-        assert self._http_obj is not None
+        if self._http_obj is None:
+            # Download is still queued
+            assert self._download_request is not None
+            self._download_request.cancel()
+            self._download_request = None
+            self._set_widget_state(PreviewState.OFFER_DOWNLOAD)
+            return
+
         self._http_obj.cancel()
 
     def _on_preview_clicked(
@@ -345,22 +385,42 @@ def _download_content(
         max_content_length: int = -1,
         allowed_content_types: set[str] | None = None,
     ) -> None:
-        log.info("Start downloading: %s %s", self._preview_id_short, self._uri)
+        log.info("Queue download: %s %s", self._preview_id_short, self._uri)
 
-        obj = app.ftm.http_request(
-            "GET",
-            self._uri,
+        self._set_widget_state(PreviewState.DOWNLOADING)
+        self._download_request = app.preview_scheduler.request(
             self._preview_id,
-            output=self._orig_path,
-            with_progress=True,
-            max_content_length=max_content_length,
-            allowed_content_types=allowed_content_types,
-            proxy=determine_proxy(self._account),
+            PreviewJobType.DOWNLOAD,
+            partial(
+                app.ftm.http_request,
+                "GET",
+                self._uri,
+                self._preview_id,
+                output=self._orig_path,
+                with_progress=True,
+                max_content_length=max_content_length,
+                allowed_content_types=allowed_content_types,
+                proxy=determine_proxy(self._account),
+            ),
+            self._on_download_started,
+            host=self._urlparts.hostname,
+            is_visible=partial(is_in_viewport, self),
         )
 
-        if obj is None:
+    def _on_download_started(self, obj: JobObjectT | None) -> None:
+        if not isinstance(obj, FileTransfer):
+            self._download_request = None
+            self._info_message = _("Unknown Error")
+            self._set_widget_state(PreviewState.ERROR)
+            return
+
+        if obj.state > FTState.IN_PROGRESS:
+            # The download requested by another preview finished before
+            # the callback was called
+            self._on_download_finished(obj)
             return
 
+        log.info("Start downloading: %s %s", self._preview_id_short, self._uri)
         self._connect_to_ftobj(obj)
 
     def _connect_to_ftobj(self, obj: FileTransfer) -> None:
@@ -391,6 +451,7 @@ def _on_download_finished(
         ftobj: FileTransfer,
     ) -> None:
         self._disconnect_object(ftobj)
+        self._download_request = None
         assert self._orig_path is not None
         self._info_message = None
         next_state = PreviewState.DOWNLOADED
@@ -435,6 +496,9 @@ def _on_download_finished(
                     self._mime_type = metadata.content_type or ""
                     self._file_size = metadata.content_length or -1
 
+        if ftobj.state == FTState.FINISHED:
+            self._add_to_preview_cache(ftobj)
+
         self._set_widget_state(next_state)
 
         if ftobj.state != FTState.FINISHED:
@@ -443,3 +507,23 @@ def _on_download_finished(
         log.info("File stored: %s %s", self._preview_id_short, self._orig_path.name)
 
         self._set_widget_state(PreviewState.DISPLAY)
+
+    def _add_to_preview_cache(self, ftobj: FileTransfer) -> None:
+        # The content was hashed while downloading
+        result = ftobj.get_result(raise_if_empty=False)
+        content_hash = None if result is None else result.content_hash_value
+        if not content_hash:
+            app.storage.preview_cache.import_file(
+                self._uri, self._orig_path, self._set_orig_path
+            )
+            return
+
+        try:
+            path = app.storage.preview_cache.add_file(
+                self._uri, self._orig_path, content_hash
+            )
+        except OSError as error:
+            log.warning("Unable to add %s to preview cache: %s", self._uri, error)
+            return
+
+        self._set_orig_path(path)
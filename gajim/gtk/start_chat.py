@@ -9,7 +9,6 @@
 from typing import Generic
 from typing import TypeVar
 
-import locale
 import logging
 
 from gi.repository import Gdk
@@ -19,9 +18,6 @@
 from gi.repository import GObject
 from gi.repository import Gtk
 from nbxmpp import JID
-from nbxmpp.client import Client as NBXMPPClient
-from nbxmpp.errors import CancelledError
-from nbxmpp.errors import is_error
 from nbxmpp.errors import StanzaError
 from nbxmpp.errors import TimeoutStanzaError
 from nbxmpp.modules.muc.util import MucInfoResult
@@ -31,21 +27,21 @@
 from nbxmpp.task import Task
 
 from gajim.common import app
-from gajim.common.client import Client
 from gajim.common.const import AvatarSize
 from gajim.common.const import Direction
 from gajim.common.const import MUC_DISCO_ERRORS
 from gajim.common.const import PresenceShowExt
 from gajim.common.const import RFC5646_LANGUAGE_TAGS
+from gajim.common.contact_directory import DirectoryEntry
+from gajim.common.contact_directory import DirectorySearch
 from gajim.common.helpers import to_user_string
 from gajim.common.i18n import _
 from gajim.common.modules.contacts import BareContact
-from gajim.common.modules.contacts import GroupchatContact
-from gajim.common.modules.util import as_task
+from gajim.common.muc_search import MucSearch
 from gajim.common.util.jid import validate_jid
 from gajim.common.util.muc import get_group_chat_nick
 from gajim.common.util.standards import get_rfc5646_lang
-from gajim.common.util.status import compare_show
+from gajim.common.util.status import ShowSortOrder
 from gajim.common.util.text import to_one_line
 from gajim.common.util.uri import parse_uri
 from gajim.common.util.uri import XmppIri
@@ -67,7 +63,6 @@
 from gajim.gtk.widgets import IdleBadge
 from gajim.gtk.window import GajimAppWindow
 
-ContactT = BareContact | GroupchatContact
 L = TypeVar("L", bound=type[GObject.Object])
 V = TypeVar("V", bound=type[Gtk.Widget])
 
@@ -90,12 +85,9 @@ def __init__(
             header_bar=True,
         )
 
-        self._parameter_form: MuclumbusResult | None = None
-        self._keywords: list[str] = []
         self._destroyed = False
-        self._search_stopped = False
         self._search_is_changed = False
-        self._http_search_client: Client | None = None
+        self._muc_search: MucSearch | None = None
 
         self._ui = get_builder("start_chat_dialog.ui")
         self.set_child(self._ui.stack)
@@ -120,7 +112,6 @@ def __init__(
         scale = self.get_scale_factor()
         self._add_accounts()
         self._add_contacts(scale)
-        self._add_groupchats(scale)
         self._add_new_contact_items(scale)
 
         controller = Gtk.EventControllerKey(
@@ -175,6 +166,14 @@ def __init__(
             self._on_global_search_progress,
         )
         self._ui.global_scrolled.set_child(self._global_search_view)
+        self._connect(
+            self._ui.global_scrolled, "edge-reached", self._on_global_edge_reached
+        )
+        self._connect(
+            self._ui.global_scrolled.get_vadjustment(),
+            "changed",
+            self._on_global_adjustment_changed,
+        )
 
         self._muc_info_box = GroupChatInfoScrolled()
         self._ui.info_box.prepend(self._muc_info_box)
@@ -215,7 +214,7 @@ def _cleanup(self, *args: Any) -> None:
         del self._muc_info_box
         del self._chat_filter
         del self._accounts_store
-        del self._http_search_client
+        self._stop_search()
         self._new_contact_items.clear()
         self._destroyed = True
         app.cancel_tasks(self)
@@ -239,78 +238,22 @@ def _add_accounts(self) -> None:
     def _add_contacts(self, scale: int) -> None:
         log.debug("Loading contacts")
         show_account = len(self._accounts) > 1
-        for account, _label in self._accounts:
-            client = app.get_client(account)
-            for jid, _data in client.get_module("Roster").iter():
-                contact = client.get_module("Contacts").get_contact(jid)
-
-                if isinstance(contact, GroupchatContact):
-                    # Workaround if groupchats are in the roster
-                    continue
-
-                assert isinstance(contact, BareContact)
-
-                item = ContactListItem(
-                    account,
-                    contact,
-                    jid,
-                    contact.name,
-                    scale,
-                    show_account,
-                )
-
-                self._contact_view.add(item)
-
-            self_contact = client.get_module("Contacts").get_contact(
-                client.get_own_jid().bare
-            )
-            assert isinstance(self_contact, BareContact)
-            item = ContactListItem(
-                account,
-                self_contact,
-                self_contact.jid,
-                _("Note to myself"),
-                scale,
-                show_account,
-            )
-            self._contact_view.add(item)
+        accounts = [account for account, _label in self._accounts]
+        entries = app.contact_directory.get_entries(accounts)
+        items = [
+            ContactListItem(entry.account, entry, scale, show_account)
+            for entry in entries
+        ]
+        self._contact_view.add_items(items)
 
         log.debug(
             "Loading contacts finished, model count %s", self._contact_view.get_count()
         )
 
-    def _add_groupchats(self, scale: int) -> None:
-        log.debug("Loading groupchats")
-        show_account = len(self._accounts) > 1
-        for account, _label in self._accounts:
-            client = app.get_client(account)
-            bookmarks = client.get_module("Bookmarks").bookmarks
-            for bookmark in bookmarks:
-                contact = client.get_module("Contacts").get_contact(
-                    bookmark.jid, groupchat=True
-                )
-                assert isinstance(contact, GroupchatContact)
-
-                item = ContactListItem(
-                    account,
-                    contact,
-                    bookmark.jid,
-                    contact.name,
-                    scale,
-                    show_account,
-                    groupchat=True,
-                )
-                self._contact_view.add(item)
-
-        log.debug(
-            "Loading groupchats finished, model count %s",
-            self._contact_view.get_count(),
-        )
-
     def _add_new_contact_items(self, scale: int) -> None:
         for account, _label in self._accounts:
             show_account = len(self._accounts) > 1
-            item = ContactListItem(account, None, None, None, scale, show_account)
+            item = ContactListItem(account, None, scale, show_account)
             self._new_contact_items[account] = item
             self._contact_view.add(item)
 
@@ -322,7 +265,7 @@ def _on_sort_by_show_changed(
         new_state = not action_state.get_boolean()
         app.settings.set("sort_by_show_in_start_chat", new_state)
         action.set_state(GLib.Variant.new_boolean(new_state))
-        self._contact_view.invalidate_sort()
+        self._contact_view.set_sort_by_show(new_state)
 
     def _on_page_changed(self, stack: Gtk.Stack, _param: Any) -> None:
         if stack.get_visible_child_name() == "account":
@@ -445,7 +388,7 @@ def _on_key_pressed(
                 self._ui.stack.set_visible_child_name("search")
                 return Gdk.EVENT_STOP
 
-            self._search_stopped = True
+            self._stop_search()
             self._ui.search_entry.grab_focus()
             self._global_search_view.remove_all()
             if self._ui.search_entry.get_text() != "":
@@ -673,6 +616,7 @@ def _on_global_search_toggle(self, button: Gtk.ToggleButton) -> None:
             self._ui.search_entry.set_text("")
             image.remove_css_class("accent")
             self._ui.list_stack.set_visible_child_name("contacts")
+            self._stop_search()
             self._global_search_view.remove_all()
 
     def _show_search_entry_error(self, state: bool):
@@ -689,11 +633,10 @@ def _select_new_match(self, _entry: Gtk.Entry, direction: Direction) -> None:
             self._contact_view.select(direction)
 
     def _start_search(self) -> None:
-        self._search_stopped = False
+        self._stop_search()
         accounts = app.get_connected_accounts()
         if not accounts:
             return
-        client = app.get_client(accounts[0]).connection
 
         text = self._ui.search_entry.get_text().strip()
         if not text:
@@ -701,89 +644,59 @@ def _start_search(self) -> None:
 
         self._global_search_view.start_search()
 
-        if app.settings.get("muclumbus_api_pref") == "http":
-            self._start_http_search(app.get_client(accounts[0]), text)
-        else:
-            self._start_iq_search(client, text)
-
-    @as_task
-    def _start_iq_search(self, client: NBXMPPClient, text: str):
-        _task = yield  # noqa: F841
-
-        if self._parameter_form is None:
-            result = yield client.get_module("Muclumbus").request_parameters(
-                app.settings.get("muclumbus_api_jid")
-            )
-
-            self._process_search_result(result, parameters=True)
-
-            self._parameter_form = result
-            self._parameter_form.type_ = "submit"
-
-        self._parameter_form.vars["q"].value = text
-
-        result = yield client.get_module("Muclumbus").set_search(
-            app.settings.get("muclumbus_api_jid"), self._parameter_form
+        self._muc_search = MucSearch(
+            app.get_client(accounts[0]),
+            text,
+            self._on_search_page,
+            self._on_search_error,
         )
+        self._muc_search.start()
 
-        self._process_search_result(result)
-
-        while not result.end:
-            result = yield client.get_module("Muclumbus").set_search(
-                app.settings.get("muclumbus_api_jid"),
-                self._parameter_form,
-                items_per_page=result.max,
-                after=result.last,
-            )
-
-            self._process_search_result(result)
-
-        self._global_search_view.end_search()
+    def _stop_search(self) -> None:
+        if self._muc_search is not None:
+            self._muc_search.cancel()
+            self._muc_search = None
 
-    def _start_http_search(self, client: Client, text: str) -> None:
-        self._keywords = text.split(" ")
-        self._http_search_client = client
-        client.get_module("HttpMucSearch").search(
-            self._keywords, None, self._on_http_result
-        )
+    def _on_global_edge_reached(
+        self, _scrolled: Gtk.ScrolledWindow, position: Gtk.PositionType
+    ) -> None:
+        if position == Gtk.PositionType.BOTTOM and self._muc_search is not None:
+            self._muc_search.request_more()
 
-    def _on_http_result(self, result: MuclumbusResult) -> None:
-        try:
-            self._process_search_result(result)
-        except CancelledError:
+    def _on_global_adjustment_changed(self, adjustment: Gtk.Adjustment) -> None:
+        # The edge is never reached while all results fit without scrolling
+        if self._muc_search is None or not adjustment.get_page_size():
             return
 
-        if result.end:
-            self._global_search_view.end_search()
-            return
+        if adjustment.get_upper() <= adjustment.get_page_size():
+            self._muc_search.request_more()
 
-        assert self._http_search_client is not None
-        self._http_search_client.get_module("HttpMucSearch").search(
-            self._keywords, result.last, self._on_http_result
-        )
+    def _on_search_page(self, result: MuclumbusResult) -> None:
+        assert self._muc_search is not None
+        self._global_search_view.add_items(result.items)
 
-    def _process_search_result(
-        self, result: MuclumbusResult, parameters: bool = False
-    ) -> None:
-        if self._search_stopped:
-            raise CancelledError
+        if not self._global_search_view.get_results_count():
+            if not self._muc_search.complete:
+                # Nothing to scroll yet, ask for the next page right away
+                self._muc_search.request_more()
+                return
 
-        if is_error(result):
-            assert isinstance(result, StanzaError)
-            self._ui.global_search_placeholder_stack.set_visible(False)
-            self._show_error_page(to_user_string(result))
-            raise result
+        self._global_search_view.end_search()
 
-        if parameters:
-            return
+    def _on_search_error(self, error: Exception) -> None:
+        self._global_search_view.end_search()
+        self._ui.global_search_placeholder_stack.set_visible(False)
 
-        for item in result.items:
-            self._global_search_view.add(item)
+        if isinstance(error, StanzaError):
+            self._show_error_page(to_user_string(error))
+        elif isinstance(error, TimeoutStanzaError):
+            self._show_error_page(_("The search service is not reachable."))
+        else:
+            self._show_error_page(str(error))
 
 
 class BaseListView(Generic[L, V], Gtk.ListView, SignalManager):
     _selection_model: Gtk.SingleSelection
-    _filter_model: Gtk.FilterListModel
 
     def __init__(self, list_type: L, view_type: V) -> None:
         Gtk.ListView.__init__(self)
@@ -825,7 +738,7 @@ def remove_all(self) -> None:
         self._model.remove_all()
 
     def get_listitem(self, position: int) -> L:
-        return self._filter_model.get_item(position)
+        return self._selection_model.get_item(position)
 
     def get_selected_item(self) -> L | None:
         return self._selection_model.get_selected_item()
@@ -855,21 +768,24 @@ def __init__(self) -> None:
 
         self._chat_filters = ChatFilters()
         self._scroll_id = None
-        self._search_string_list: list[str] = []
+        self._sort_by_show = app.settings.get("sort_by_show_in_start_chat")
 
-        self._sorter = Gtk.CustomSorter.new(sort_func=self._sort_func)
-        self._sort_model = Gtk.SortListModel(sorter=self._sorter)
+        self._entries: list[DirectoryEntry] = []
+        self._search = DirectorySearch(self._entries)
+        self._search_text = ""
+        self._matches: dict[DirectoryEntry, int] = {}
 
+        # Filter before sorting, so a search only sorts the matches
         self._custom_filter = Gtk.CustomFilter.new(self._filter_func)
+        self._filter_model = Gtk.FilterListModel(filter=self._custom_filter)
 
-        self._filter_model = Gtk.FilterListModel(
-            model=self._sort_model, filter=self._custom_filter
-        )
-        self._connect(
-            self._filter_model, "items-changed", self._on_filter_items_changed
+        self._sorter = Gtk.CustomSorter.new(sort_func=self._sort_func)
+        self._sort_model = Gtk.SortListModel(
+            model=self._filter_model, sorter=self._sorter
         )
+        self._connect(self._sort_model, "items-changed", self._on_filter_items_changed)
 
-        self._selection_model = Gtk.SingleSelection(model=self._filter_model)
+        self._selection_model = Gtk.SingleSelection(model=self._sort_model)
 
         self.set_model(self._selection_model)
 
@@ -890,19 +806,23 @@ def do_unroot(self) -> None:
         del self._selection_model
         del self._custom_filter
         del self._sorter
+        del self._search
+        self._entries.clear()
+        self._matches = {}
         app.check_finalize(self)
 
     def set_loading_finished(self) -> None:
-        self._sort_model.set_model(self._model)
+        self._filter_model.set_model(self._model)
 
     def get_count(self) -> int:
         return self._model.get_n_items()
 
-    def invalidate_sort(self) -> None:
+    def set_sort_by_show(self, value: bool) -> None:
+        self._sort_by_show = value
         self._sorter.changed(Gtk.SorterChange.DIFFERENT)
 
     def _on_filter_items_changed(
-        self, filter_model: Gtk.FilterListModel, _pos: int, _removed: int, _added: int
+        self, sort_model: Gtk.SortListModel, _pos: int, _removed: int, _added: int
     ) -> None:
         # Cancel any active source at first so we dont have
         # multiple timeouts running
@@ -914,7 +834,7 @@ def _on_filter_items_changed(
         # If the first item is already selected or
         # no items are in the model we dont need to trigger a scroll
 
-        if self._selection_model.get_selected() == 0 or filter_model.get_n_items() == 0:
+        if self._selection_model.get_selected() == 0 or sort_model.get_n_items() == 0:
             return
 
         def _scroll_to() -> None:
@@ -931,9 +851,8 @@ def _filter_func(self, item: ContactListItem) -> bool:
         if item.is_new:
             return True
 
-        for search_string in self._search_string_list:
-            if search_string not in item.search_string:
-                return False
+        if self._search_text and item.entry not in self._matches:
+            return False
 
         group = self._chat_filters.group
         if group is not None and group not in item.groups:
@@ -949,31 +868,33 @@ def _filter_func(self, item: ContactListItem) -> bool:
 
         return type_ == ChatTypeFilter.GROUPCHAT and is_groupchat
 
-    @staticmethod
+    def _get_sort_key(self, item: ContactListItem) -> tuple[Any, ...]:
+        is_new, groupchat, is_self, show_order, collation_key = item.sort_key
+        if not self._sort_by_show:
+            show_order = 0
+
+        # Better matches of a search come first
+        rank = self._matches.get(item.entry, 0) if item.entry is not None else 0
+        return (is_new, rank, groupchat, is_self, show_order, collation_key)
+
     def _sort_func(
+        self,
         obj1: ContactListItem,
         obj2: ContactListItem,
         _user_data: object | None,
     ) -> int:
-        if obj1.is_new != obj2.is_new:
-            return 1 if obj1.is_new else -1
-
-        if obj1.is_groupchat != obj2.is_groupchat:
-            return 1 if obj1.is_groupchat else -1
-
-        if obj1.is_self != obj2.is_self:
-            return 1 if obj1.is_self else -1
-
-        if app.settings.get("sort_by_show_in_start_chat"):
-            res = compare_show(obj1.show, obj2.show)
-            if res != 0:
-                return res
+        key1 = self._get_sort_key(obj1)
+        key2 = self._get_sort_key(obj2)
+        return (key1 > key2) - (key1 < key2)
 
-        return locale.strcoll(obj1.name.lower(), obj2.name.lower())
-
-    def add(self, item: ContactViewItem) -> None:
+    def add(self, item: ContactListItem) -> None:
         self._model.append(item)
 
+    def add_items(self, items: list[ContactListItem]) -> None:
+        self._entries.extend(item.entry for item in items if item.entry is not None)
+        self._search = DirectorySearch(self._entries)
+        self._model.splice(self._model.get_n_items(), 0, items)
+
     def remove(self, account: str, jid: JID) -> None:
         for item in cast(list[ContactListItem], self._model):
             if item.account != account or item.jid != jid:
@@ -984,8 +905,22 @@ def remove(self, account: str, jid: JID) -> None:
             break
 
     def set_search(self, text: str) -> None:
-        self._search_string_list = text.lower().split()
-        self._custom_filter.changed(Gtk.FilterChange.DIFFERENT)
+        text = " ".join(text.casefold().split())
+        if text == self._search_text:
+            return
+
+        # A query which extends the previous one only removes matches
+        if text.startswith(self._search_text):
+            change = Gtk.FilterChange.MORE_STRICT
+        elif self._search_text.startswith(text):
+            change = Gtk.FilterChange.LESS_STRICT
+        else:
+            change = Gtk.FilterChange.DIFFERENT
+
+        self._search_text = text
+        self._matches = self._search.search(text)
+        self._custom_filter.changed(change)
+        self._sorter.changed(Gtk.SorterChange.DIFFERENT)
 
     def set_chat_filter(self, value: ChatFilters) -> None:
         if self._chat_filters == value:
@@ -1010,55 +945,37 @@ class ContactListItem(GObject.Object):
     show = GObject.Property(type=object)
     status = GObject.Property(type=str)
     status_visible = GObject.Property(type=bool, default=False)
-    search_string = GObject.Property(type=str)
     menu = GObject.Property(type=Gio.Menu)
 
     def __init__(
         self,
         account: str,
-        contact: ContactT | None,
-        jid: JID | None,
-        name: str | None,
+        entry: DirectoryEntry | None,
         scale: int,
         account_visible: bool,
-        groupchat: bool = False,
     ) -> None:
-        name = name or _("Start / Join Chat")
-
+        jid = None
+        name = _("Start / Join Chat")
+        groupchat = False
         idle = None
         status = ""
         groups = []
         show = PresenceShowExt.OFFLINE
         is_self = False
-        if contact is not None and not groupchat:
-            assert isinstance(contact, BareContact)
-            groups = sorted(contact.groups)
-            status = to_one_line(contact.status)
-            idle = contact.idle_datetime
-            show = contact.show
-            is_self = contact.is_self
-
-        menu = get_start_chat_row_menu(account, jid)
-
-        is_new = jid is None
-
-        avatar_paintable = None
-        if is_new:
-            theme = get_icon_theme()
-            avatar_paintable = theme.lookup_icon(
-                "lucide-user-plus-symbolic",
-                None,
-                AvatarSize.START_CHAT,
-                scale,
-                Gtk.TextDirection.NONE,
-                0,  # type: ignore
-            )
-
-        else:
-            assert isinstance(contact, BareContact | GroupchatContact)
-            avatar_paintable = contact.get_avatar(AvatarSize.START_CHAT, scale)
-
-        search_string = "|".join((name, str(jid))).lower()
+        collation_key = ""
+        if entry is not None:
+            jid = entry.jid
+            name = entry.name
+            groupchat = entry.groupchat
+            is_self = entry.is_self
+            collation_key = entry.collation_key
+
+            contact = entry.contact
+            if isinstance(contact, BareContact):
+                groups = sorted(contact.groups)
+                status = to_one_line(contact.status)
+                idle = contact.idle_datetime
+                show = contact.show
 
         super().__init__(
             account=account,
@@ -1073,11 +990,50 @@ def __init__(
             status=status,
             status_visible=bool(status),
             groups=groups,
-            menu=menu,
-            avatar_paintable=avatar_paintable,
-            search_string=search_string,
         )
 
+        self.entry = entry
+        self._scale = scale
+        self._loaded = False
+
+        # Precomputed, so sorting does not need to access properties
+        self.sort_key = (
+            jid is None,
+            groupchat,
+            is_self,
+            ShowSortOrder[show],
+            collation_key,
+        )
+
+    def load(self) -> None:
+        """
+        Load the avatar and the menu, which are only needed once the item
+        is shown
+        """
+
+        if self._loaded:
+            return
+
+        self._loaded = True
+
+        if self.entry is None:
+            theme = get_icon_theme()
+            self.props.avatar_paintable = theme.lookup_icon(
+                "lucide-user-plus-symbolic",
+                None,
+                AvatarSize.START_CHAT,
+                self._scale,
+                Gtk.TextDirection.NONE,
+                0,  # type: ignore
+            )
+            return
+
+        assert self.entry.contact is not None
+        self.props.avatar_paintable = self.entry.contact.get_avatar(
+            AvatarSize.START_CHAT, self._scale
+        )
+        self.props.menu = get_start_chat_row_menu(self.entry.account, self.entry.jid)
+
     def __repr__(self) -> str:
         return f"ContactListItem: {self.props.account} - {self.props.jid}"
 
@@ -1108,6 +1064,8 @@ def __init__(self) -> None:
         self.add_controller(gesture_secondary_click)
 
     def bind(self, obj: ContactListItem) -> None:
+        obj.load()
+
         bind_spec = [
             ("name", self._name_label, "label"),
             ("jid", self._address_label, "label"),
@@ -1186,10 +1144,14 @@ def start_search(self) -> None:
     def end_search(self) -> None:
         self.emit("global-search-progress", False, self._results_count)
 
-    def add(self, item: MuclumbusItem) -> None:
-        self._results_count += 1
-        self.emit("global-search-progress", True, self._results_count)
-        self._model.append(GlobalListItem(item=item))
+    def get_results_count(self) -> int:
+        return self._results_count
+
+    def add_items(self, items: list[MuclumbusItem]) -> None:
+        self._results_count += len(items)
+        self._model.splice(
+            self._model.get_n_items(), 0, [GlobalListItem(item=item) for item in items]
+        )
 
 
 class GlobalListItem(GObject.Object):
@@ -138,6 +138,30 @@ def at_the_end(widget: Gtk.ScrolledWindow) -> bool:
     return adj_v.get_value() == max_scroll_pos
 
 
+def is_in_viewport(widget: Gtk.Widget) -> bool:
+    """Determines if a widget is scrolled into view of its GtkScrolledWindow.
+
+    Args:
+        widget (GtkWidget)
+
+    Returns:
+        bool: True if the widget is mapped and at least partly visible.
+    """
+    if not widget.get_mapped():
+        return False
+
+    scrolled = widget.get_ancestor(Gtk.ScrolledWindow)
+    if scrolled is None:
+        return True
+
+    success, bounds = widget.compute_bounds(scrolled)
+    if not success:
+        return False
+
+    top = bounds.get_y()
+    return top + bounds.get_height() >= 0 and top <= scrolled.get_height()
+
+
 def ensure_not_destroyed(func: Any) -> Any:
     @wraps(func)
     def func_wrapper(self: Any, *args: Any, **kwargs: Any):
@@ -19,8 +19,10 @@
 
 from gajim.common import app
 from gajim.common.i18n import _
+from gajim.common.util.datetime import utc_now
 from gajim.common.util.user_strings import format_idle_time
 from gajim.common.util.user_strings import get_uf_relative_time
+from gajim.common.util.user_strings import get_uf_relative_time_expiry
 
 from gajim.gtk.util.misc import container_remove_all
 
@@ -238,18 +240,38 @@ class TimeLabel(Gtk.Label):
     def __init__(self) -> None:
         Gtk.Label.__init__(self)
         self._timestamp = None
+        self._expiry: dt.datetime | None = None
+        self._outdated = False
         app.pulse_manager.add_callback(self.pulse)
 
     def do_unroot(self) -> None:
         app.pulse_manager.remove_callback(self.pulse)
         Gtk.Label.do_unroot(self)
 
+    def do_map(self) -> None:
+        Gtk.Label.do_map(self)
+        if self._outdated:
+            self.pulse()
+
     def set_timestamp(self, timestamp: dt.datetime) -> None:
         self._timestamp = timestamp
-        self.pulse()
+        self._update_text()
 
     def pulse(self) -> None:
         if self._timestamp is None:
             return
-        rel_string = get_uf_relative_time(self._timestamp)
-        self.set_text(rel_string)
+
+        if self._expiry is None or utc_now() < self._expiry:
+            return
+
+        if not self.get_mapped():
+            self._outdated = True
+            return
+
+        self._update_text()
+
+    def _update_text(self) -> None:
+        assert self._timestamp is not None
+        self._outdated = False
+        self._expiry = get_uf_relative_time_expiry(self._timestamp)
+        self.set_text(get_uf_relative_time(self._timestamp))
@@ -30,6 +30,7 @@
     "get_status": "(s)",
     "get_status_message": "(s)",
     "get_unread_msgs_number": "()",
+    "export_history": "(ssss)",
 }
 
 
@@ -105,6 +106,25 @@ def create_arg_parser() -> argparse.ArgumentParser:
         "get_unread_msgs_number", help="Get the unread message count"
     )
 
+    subparser = subparsers.add_parser(
+        "export_history",
+        help="Export the chat history in the background, prints the directory "
+        "the files are written to",
+    )
+    subparser.add_argument("account", type=str, help=account_help)
+    subparser.add_argument(
+        "directory", type=str, help="The directory the export is written to"
+    )
+    subparser.add_argument(
+        "--address",
+        type=str,
+        default="",
+        help="The XMPP address of the chat, all chats are exported if omitted",
+    )
+    subparser.add_argument(
+        "--format", choices=["txt", "jsonl", "xml"], default="txt", dest="format_"
+    )
+
     return parser
 
 
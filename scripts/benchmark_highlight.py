@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+# Measures how fast group chat messages are checked for highlights,
+# simulating the message rate of a high traffic room.
+
+import argparse
+import random
+import string
+import timeit
+
+from gajim.main import gi_require_versions
+
+gi_require_versions()
+
+from gajim.common.util.muc import HighlightMatcher  # noqa: E402
+
+NICKNAME = "Romeo"
+OWN_JID = "romeo@example.org"
+HIGHLIGHT_WORDS = ["gajim", "release", "omemo", "xmpp", "bug"]
+
+
+def random_word(rand: random.Random) -> str:
+    return "".join(rand.choices(string.ascii_lowercase, k=rand.randint(2, 9)))
+
+
+def create_corpus(count: int, mention_rate: float, seed: int) -> list[str]:
+    rand = random.Random(seed)
+    terms = [NICKNAME, OWN_JID, *HIGHLIGHT_WORDS]
+
+    messages: list[str] = []
+    for _ in range(count):
+        words = [random_word(rand) for _ in range(rand.randint(3, 40))]
+        if rand.random() < mention_rate:
+            words.insert(rand.randrange(len(words) + 1), rand.choice(terms))
+        messages.append(" ".join(words))
+    return messages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark highlight matching")
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--mention-rate", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    messages = create_corpus(args.messages, args.mention_rate, args.seed)
+    matcher = HighlightMatcher([*HIGHLIGHT_WORDS, NICKNAME, OWN_JID])
+
+    def run() -> int:
+        return sum(matcher.matches(message) for message in messages)
+
+    highlights = run()
+    best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+
+    print(f"Messages:   {len(messages)}")
+    print(f"Highlights: {highlights}")
+    print(f"Best run:   {best * 1000:.1f} ms")
+    print(f"Per msg:    {best / len(messages) * 1e6:.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
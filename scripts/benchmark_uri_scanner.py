@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+# Measures how fast URIs and addresses are detected in chat messages.
+# The corpus mixes plain chatter, which is the common case, with links,
+# mail and XMPP addresses, code snippets and non-ASCII text.
+
+import argparse
+import random
+import timeit
+
+from gajim.main import gi_require_versions
+
+gi_require_versions()
+
+from gajim.common.styling import find_uri_matches  # noqa: E402
+from gajim.common.styling import process  # noqa: E402
+from gajim.common.styling import process_uris  # noqa: E402
+from gajim.common.styling import URI_OR_JID_RX  # noqa: E402
+
+# (weight, message)
+CORPUS = [
+    (20, "hey, how are you?"),
+    (20, "good morning everyone"),
+    (15, "lol"),
+    (15, "ok thanks, I'll try that later"),
+    (10, "did anyone else get the update yet? it broke my notifications"),
+    (10, "Ich bin gleich wieder da, muss kurz einkaufen 🛒"),
+    (8, "ça marche, on se voit à 18h ?"),
+    (8, "привет, как дела? 😀"),
+    (8, "yes: that's what I meant, see above"),
+    (6, "meeting at 14:30 in the usual room"),
+    (
+        6,
+        "I think the problem is that the server doesn't support MAM "
+        "for this room, so the history is empty after a reconnect. "
+        "Can you check the server logs?",
+    ),
+    (5, "https://gajim.org/"),
+    (5, "have a look at https://dev.gajim.org/gajim/gajim/-/issues/12345"),
+    (
+        4,
+        "the docs are here (https://xmpp.org/extensions/xep-0313.html#query) "
+        "and here: https://xmpp.org/extensions/xep-0198.html",
+    ),
+    (4, "join us at xmpp:gajim@conference.gajim.org?join"),
+    (4, "my new address is romeo@montague.lit, please update your roster"),
+    (3, "send it to juliet@capulet.lit or mailto:nurse@capulet.lit"),
+    (3, "> quoted text from earlier\nand my *answer* to it"),
+    (3, "```\ndef main() -> None:\n    print('hello world')\n```"),
+    (2, "https://example.org/ä/ö?q=ü&x=1,"),
+    (2, "ping me @alice when you're back"),
+    (2, "ratio 16:9, time 12:00:00, ipv6 [::1] and 192.168.0.1:5222"),
+    (
+        1,
+        "Traceback (most recent call last):\n"
+        '  File "/usr/lib/python3/site-packages/gajim/main.py", line 42\n'
+        "KeyError: 'foo'",
+    ),
+]
+
+
+def create_corpus(count: int, seed: int) -> list[str]:
+    rand = random.Random(seed)
+    weights = [weight for weight, _message in CORPUS]
+    messages = [message for _weight, message in CORPUS]
+    return rand.choices(messages, weights=weights, k=count)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark URI detection")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    messages = create_corpus(args.messages, args.seed)
+    lines = [line for message in messages for line in message.splitlines()]
+
+    def run_regex() -> int:
+        return sum(len(list(URI_OR_JID_RX.finditer(line))) for line in lines)
+
+    def run_scanner() -> int:
+        return sum(len(list(find_uri_matches(line))) for line in lines)
+
+    def run_process_uris() -> int:
+        return sum(len(process_uris(message)) for message in messages)
+
+    def run_process() -> int:
+        return sum(len(process(message).blocks) for message in messages)
+
+    print(f"Messages:   {len(messages)}")
+    print(f"Matches:    {run_scanner()}")
+
+    for name, func in (
+        ("Regex", run_regex),
+        ("Scanner", run_scanner),
+        ("URIs", run_process_uris),
+        ("Styling", run_process),
+    ):
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        per_message = best / len(messages) * 1e6
+        print(f"{name + ':':<11} {best * 1000:.1f} ms ({per_message:.2f} µs/msg)")
+
+
+if __name__ == "__main__":
+    main()
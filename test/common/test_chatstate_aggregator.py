@@ -0,0 +1,97 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import unittest
+
+from nbxmpp.protocol import JID
+
+from gajim.common.chatstate_aggregator import ComposerAggregator
+
+ROOM = JID.from_string("room@conference.example.org")
+OTHER_ROOM = JID.from_string("other@conference.example.org")
+ALICE = ROOM.new_with(resource="alice")
+BOB = ROOM.new_with(resource="bob")
+
+
+class ComposerAggregatorTest(unittest.TestCase):
+    def test_changes(self) -> None:
+        aggregator = ComposerAggregator(timeout=30)
+        self.assertFalse(aggregator.has_pending())
+
+        aggregator.set_composing(ROOM, ALICE, 100)
+        aggregator.set_composing(ROOM, BOB, 100)
+        aggregator.set_composing(OTHER_ROOM, ALICE, 100)
+        self.assertEqual(aggregator.get_composers(ROOM), {ALICE, BOB})
+        self.assertCountEqual(aggregator.pop_changed(), [ROOM, OTHER_ROOM])
+        self.assertEqual(aggregator.pop_changed(), [])
+
+        # Refreshing a composer is no change
+        aggregator.set_composing(ROOM, ALICE, 101)
+        self.assertEqual(aggregator.pop_changed(), [])
+
+        # Changes which cancel each other out are not reported
+        aggregator.remove(ROOM, BOB)
+        aggregator.set_composing(ROOM, BOB, 102)
+        self.assertEqual(aggregator.pop_changed(), [])
+
+        aggregator.remove_room(ROOM)
+        self.assertEqual(aggregator.get_composers(ROOM), frozenset())
+        self.assertEqual(aggregator.pop_changed(), [ROOM])
+
+    def test_timeout(self) -> None:
+        aggregator = ComposerAggregator(timeout=30)
+        aggregator.set_composing(ROOM, ALICE, 100)
+        aggregator.set_composing(ROOM, BOB, 110.5)
+        aggregator.pop_changed()
+
+        aggregator.advance(129.9)
+        self.assertEqual(aggregator.get_composers(ROOM), {ALICE, BOB})
+
+        aggregator.advance(130)
+        self.assertEqual(aggregator.get_composers(ROOM), {BOB})
+        self.assertEqual(aggregator.pop_changed(), [ROOM])
+
+        # A refresh moves the composer to a later slot
+        aggregator.set_composing(ROOM, BOB, 135)
+        aggregator.advance(140)
+        self.assertEqual(aggregator.get_composers(ROOM), {BOB})
+
+        aggregator.advance(165)
+        self.assertEqual(aggregator.get_composers(ROOM), frozenset())
+        self.assertEqual(aggregator.pop_changed(), [ROOM])
+        self.assertFalse(aggregator.has_pending())
+
+    def test_next_expiry(self) -> None:
+        aggregator = ComposerAggregator(timeout=30)
+        self.assertIsNone(aggregator.get_next_expiry())
+
+        aggregator.set_composing(ROOM, ALICE, 100.5)
+        aggregator.set_composing(ROOM, BOB, 110)
+        self.assertTrue(aggregator.has_changes())
+        aggregator.pop_changed()
+        self.assertFalse(aggregator.has_changes())
+        self.assertEqual(aggregator.get_next_expiry(), 130)
+
+        aggregator.advance(aggregator.get_next_expiry())
+        self.assertEqual(aggregator.get_composers(ROOM), {BOB})
+        self.assertEqual(aggregator.get_next_expiry(), 140)
+
+        aggregator.remove(ROOM, BOB)
+        self.assertIsNone(aggregator.get_next_expiry())
+
+    def test_long_gap(self) -> None:
+        aggregator = ComposerAggregator(timeout=30)
+        aggregator.set_composing(ROOM, ALICE, 100)
+        aggregator.set_composing(ROOM, BOB, 120)
+
+        aggregator.advance(1000)
+        self.assertEqual(aggregator.get_composers(ROOM), frozenset())
+
+        aggregator.set_composing(ROOM, ALICE, 1000)
+        aggregator.advance(1029)
+        self.assertEqual(aggregator.get_composers(ROOM), {ALICE})
+
+
+if __name__ == "__main__":
+    unittest.main()
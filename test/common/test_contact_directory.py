@@ -0,0 +1,79 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import unittest
+
+from nbxmpp.protocol import JID
+
+from gajim.common.contact_directory import DirectoryEntry
+from gajim.common.contact_directory import DirectorySearch
+from gajim.common.contact_directory import RANK_ADDRESS_WORD
+from gajim.common.contact_directory import RANK_FUZZY
+from gajim.common.contact_directory import RANK_NAME_START
+from gajim.common.contact_directory import RANK_NAME_WORD
+from gajim.common.contact_directory import RANK_SUBSTRING
+
+ACCOUNT = "testacc"
+
+
+def mk_entry(jid: str, name: str, groupchat: bool = False) -> DirectoryEntry:
+    return DirectoryEntry(ACCOUNT, JID.from_string(jid), name, groupchat=groupchat)
+
+
+ROMEO = mk_entry("romeo@montague.lit", "Romeo Montague")
+JULIET = mk_entry("juliet@capulet.lit", "Juliet")
+NURSE = mk_entry("nurse@capulet.lit", "The Nurse")
+ROOM = mk_entry("verona@conference.capulet.lit", "Verona", groupchat=True)
+
+ENTRIES = [ROMEO, JULIET, NURSE, ROOM]
+
+
+class ContactDirectoryTest(unittest.TestCase):
+    def test_match_rank(self) -> None:
+        self.assertEqual(ROMEO.match(["rom"]), RANK_NAME_START)
+        self.assertEqual(ROMEO.match(["mon"]), RANK_NAME_WORD)
+        self.assertEqual(JULIET.match(["capu"]), RANK_ADDRESS_WORD)
+        self.assertEqual(JULIET.match(["liet"]), RANK_SUBSTRING)
+        self.assertEqual(JULIET.match(["jlt"]), RANK_FUZZY)
+        self.assertIsNone(JULIET.match(["xyz"]))
+
+        # The worst matching word counts
+        self.assertEqual(ROMEO.match(["rom", "tague"]), RANK_SUBSTRING)
+        self.assertIsNone(ROMEO.match(["rom", "juliet"]))
+
+    def test_sort_key(self) -> None:
+        entries = sorted(ENTRIES, key=lambda entry: entry.sort_key)
+        self.assertEqual(entries, [JULIET, ROMEO, NURSE, ROOM])
+
+    def test_set_name(self) -> None:
+        entry = mk_entry("tybalt@capulet.lit", "Tybalt")
+        self.assertFalse(entry.set_name("Tybalt"))
+        self.assertTrue(entry.set_name("Prince of Cats"))
+        self.assertEqual(entry.match(["cats"]), RANK_NAME_WORD)
+
+    def test_search(self) -> None:
+        search = DirectorySearch(ENTRIES)
+
+        self.assertEqual(search.search(""), {})
+        self.assertEqual(
+            search.search("CAP"),
+            {
+                JULIET: RANK_ADDRESS_WORD,
+                NURSE: RANK_ADDRESS_WORD,
+                ROOM: RANK_ADDRESS_WORD,
+            },
+        )
+
+        # Extending the query narrows down the previous matches
+        self.assertEqual(
+            search.search("cap n"), {NURSE: RANK_ADDRESS_WORD, ROOM: RANK_SUBSTRING}
+        )
+        self.assertEqual(search.search("cap nur"), {NURSE: RANK_ADDRESS_WORD})
+
+        # Other queries search all entries again
+        self.assertEqual(search.search("rom"), {ROMEO: RANK_NAME_START})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from gajim.common.emoji_index import EmojiIndex
+from gajim.common.emoji_index import EmojiIndexEntry
+
+ENTRIES = [
+    EmojiIndexEntry("😃", "grinning face with big eyes", ["face", "smile"], []),
+    EmojiIndexEntry("😄", "grinning face with smiling eyes", ["eye", "smile"], []),
+    EmojiIndexEntry(
+        "👍", "thumbs up", ["+1", "hand"], ["👍🏻", "👍🏼", "👍🏽", "👍🏾", "👍🏿"]
+    ),
+    EmojiIndexEntry("🙂", "slightly smiling face", ["face"], []),
+    EmojiIndexEntry("😊", "smiling face with smiling eyes", ["blush"], []),
+]
+
+
+class EmojiIndexTest(unittest.TestCase):
+    def test_prefix_search(self) -> None:
+        index = EmojiIndex(ENTRIES)
+
+        result = [entry.emoji for entry in index.search("thu", 8)]
+        self.assertEqual(result, ["👍"])
+
+        result = [entry.emoji for entry in index.search("blu", 8)]
+        self.assertEqual(result, ["😊"])
+
+        self.assertEqual(index.search("umbs", 8), [])
+        self.assertEqual(index.search("", 8), [])
+
+    def test_ranking(self) -> None:
+        index = EmojiIndex(ENTRIES)
+
+        # Short name start first, then other words of the short name,
+        # then keywords, each in display order
+        result = [entry.emoji for entry in index.search("smil", 8)]
+        self.assertEqual(result, ["😊", "😄", "🙂", "😃"])
+
+    def test_multiple_words(self) -> None:
+        index = EmojiIndex(ENTRIES)
+
+        result = [entry.emoji for entry in index.search("grin big", 8)]
+        self.assertEqual(result, ["😃"])
+
+        result = [entry.emoji for entry in index.search("thumbs_up", 8)]
+        self.assertEqual(result, ["👍"])
+
+    def test_limit(self) -> None:
+        index = EmojiIndex(ENTRIES)
+        self.assertEqual(len(index.search("face", 2)), 2)
+
+    def test_save_load(self) -> None:
+        index = EmojiIndex(ENTRIES)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "emoji_index_en.json"
+            index.save(path, "key1")
+
+            self.assertIsNone(EmojiIndex.load(path, "key2"))
+
+            loaded = EmojiIndex.load(path, "key1")
+            assert loaded is not None
+            self.assertEqual(len(loaded), len(index))
+            self.assertEqual(loaded.search("smil", 8), index.search("smil", 8))
+            self.assertEqual(loaded.search("thumbs", 1)[0].variations[0], "👍🏻")
+
+
+if __name__ == "__main__":
+    unittest.main()
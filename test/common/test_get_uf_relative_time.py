@@ -11,6 +11,7 @@
 from gajim.common.i18n import _
 from gajim.common.i18n import ngettext
 from gajim.common.util.user_strings import get_uf_relative_time
+from gajim.common.util.user_strings import get_uf_relative_time_expiry
 
 
 class GetRelativeTimeTest(unittest.TestCase):
@@ -86,6 +87,37 @@ def test_year(self):
         timestamp1 = datetime(2022, 1, 1, 4, 5, 6, tzinfo=UTC)
         self.assertEqual(get_uf_relative_time(timestamp1, timenow), "2022")
 
+    def test_expiry(self):
+        """Test that the string does not change before the expiry"""
+        timenow = datetime(2023, 1, 5, 12, 0, 0, tzinfo=UTC)
+        ages = [
+            timedelta(seconds=30),
+            timedelta(minutes=3, seconds=20),
+            timedelta(hours=4),
+            timedelta(hours=20),
+            timedelta(days=3),
+            timedelta(days=30),
+        ]
+
+        for age in ages:
+            timestamp = timenow - age
+            expiry = get_uf_relative_time_expiry(timestamp, timenow)
+            assert expiry is not None
+            self.assertGreater(expiry, timenow)
+
+            string = get_uf_relative_time(timestamp, timenow)
+            before_expiry = expiry.astimezone(UTC) - timedelta(seconds=1)
+            self.assertEqual(get_uf_relative_time(timestamp, before_expiry), string)
+
+        timestamp = datetime(2022, 1, 1, 4, 5, 6, tzinfo=UTC)
+        self.assertIsNone(get_uf_relative_time_expiry(timestamp, timenow))
+
+        timestamp = timenow - timedelta(minutes=3, seconds=20)
+        self.assertEqual(
+            get_uf_relative_time_expiry(timestamp, timenow),
+            timestamp + timedelta(minutes=4),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,121 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import unittest
+from datetime import datetime
+from datetime import timedelta
+from datetime import UTC
+
+from gajim.common.storage.archive.message_id_index import BloomFilter
+from gajim.common.storage.archive.message_id_index import IdType
+from gajim.common.storage.archive.message_id_index import MessageIdIndex
+from gajim.common.storage.archive.message_id_index import ScalableBloomFilter
+
+NOW = datetime.now(UTC)
+SINCE = NOW - timedelta(days=30)
+
+
+class BloomFilterTest(unittest.TestCase):
+    def test_no_false_negatives(self) -> None:
+        bloom = BloomFilter(1000)
+        ids = [f"id{i}" for i in range(1000)]
+        for id_ in ids:
+            bloom.add(id_)
+
+        self.assertTrue(all(id_ in bloom for id_ in ids))
+        self.assertFalse(bloom.is_full())
+
+        false_positives = sum(f"other{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_growth(self) -> None:
+        bloom = ScalableBloomFilter(100)
+        ids = [f"id{i}" for i in range(5000)]
+        for id_ in ids:
+            bloom.add(id_)
+
+        self.assertTrue(all(id_ in bloom for id_ in ids))
+
+        false_positives = sum(f"other{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class MessageIdIndexTest(unittest.TestCase):
+    def test_lookup(self) -> None:
+        index = MessageIdIndex()
+        key = (1, 2)
+
+        self.assertIsNone(index.lookup(key, IdType.MESSAGE_ID, "id1"))
+
+        index.load(key, [("id1", "stanzaid1"), ("id2", None)], SINCE)
+        self.assertIsNone(index.lookup(key, IdType.MESSAGE_ID, "id1", NOW))
+        self.assertIsNone(index.lookup(key, IdType.STANZA_ID, "stanzaid1", NOW))
+        self.assertFalse(index.lookup(key, IdType.STANZA_ID, "id1", NOW))
+        self.assertFalse(index.lookup(key, IdType.MESSAGE_ID, "id3", NOW))
+        self.assertIsNone(index.lookup((1, 3), IdType.MESSAGE_ID, "id3", NOW))
+
+        index.set_exists(key, IdType.MESSAGE_ID, "id1", True)
+        self.assertTrue(index.lookup(key, IdType.MESSAGE_ID, "id1"))
+
+        index.add(key, "id3", "stanzaid3")
+        self.assertTrue(index.lookup(key, IdType.MESSAGE_ID, "id3"))
+        self.assertTrue(index.lookup(key, IdType.STANZA_ID, "stanzaid3"))
+
+        stats = index.get_stats()
+        self.assertEqual(stats.lookups, 9)
+        self.assertEqual(stats.recent, 3)
+        self.assertEqual(stats.negative, 2)
+        self.assertEqual(stats.maybe, 2)
+        self.assertEqual(stats.not_loaded, 2)
+
+    def test_window(self) -> None:
+        index = MessageIdIndex()
+        key = (1, 2)
+        index.load(key, [], SINCE)
+
+        # Older messages and messages without time are not in the filters
+        old = SINCE - timedelta(days=1)
+        self.assertIsNone(index.lookup(key, IdType.MESSAGE_ID, "id1", old))
+        self.assertIsNone(index.lookup(key, IdType.MESSAGE_ID, "id1", SINCE))
+        self.assertIsNone(index.lookup(key, IdType.MESSAGE_ID, "id1"))
+        self.assertFalse(index.lookup(key, IdType.MESSAGE_ID, "id1", NOW))
+
+    def test_add_many(self) -> None:
+        index = MessageIdIndex(max_recent_ids=10)
+        key = (1, 2)
+        index.load(key, [], SINCE)
+
+        # The filters grow instead of being dropped
+        for i in range(5000):
+            index.add(key, f"id{i}", None)
+
+        self.assertTrue(index.is_loaded(key))
+        self.assertIsNone(index.lookup(key, IdType.MESSAGE_ID, "id0", NOW))
+
+    def test_invalidate(self) -> None:
+        index = MessageIdIndex()
+        key = (1, 2)
+
+        index.load(key, [], SINCE)
+        index.add(key, "id1", None)
+        self.assertTrue(index.lookup(key, IdType.MESSAGE_ID, "id1"))
+
+        index.invalidate(key)
+        self.assertFalse(index.is_loaded(key))
+        self.assertIsNone(index.lookup(key, IdType.MESSAGE_ID, "id1"))
+
+    def test_limits(self) -> None:
+        index = MessageIdIndex(max_conversations=2, max_recent_ids=2)
+        for i in range(3):
+            index.load((1, i), [], SINCE)
+            index.add((1, i), f"id{i}", None)
+
+        self.assertFalse(index.is_loaded((1, 0)))
+        self.assertTrue(index.is_loaded((1, 2)))
+        self.assertIsNone(index.lookup((1, 0), IdType.MESSAGE_ID, "id0"))
+        self.assertTrue(index.lookup((1, 1), IdType.MESSAGE_ID, "id1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,6 +5,7 @@
 import unittest
 
 from gajim.common import app
+from gajim.common.util.muc import HighlightMatcher
 from gajim.common.util.muc import message_needs_highlight
 
 app.settings.set("muc_highlight_words", "test;gajim")
@@ -66,6 +67,23 @@ def test_highlight(self):
         self.assertFalse(message_needs_highlight(f_text_url_2, NICK, JID))
         self.assertFalse(message_needs_highlight(f_text_url_3, NICK, JID))
 
+    def test_highlight_matcher(self):
+        matcher = HighlightMatcher(["a b", "a", ""])
+        # The longer string fails the boundary check, the shorter matches
+        self.assertTrue(matcher.matches("a bc"))
+        self.assertFalse(matcher.matches("ab"))
+
+        matcher = HighlightMatcher(["R.meo*"])
+        self.assertTrue(matcher.matches("hi r.meo*"))
+        self.assertFalse(matcher.matches("hi romeo"))
+
+        matcher = HighlightMatcher(["romeo"])
+        # First occurrence is preceded by an excluded char, second is not
+        self.assertTrue(matcher.matches("/romeo romeo"))
+        self.assertFalse(matcher.matches("/romeo -romeo"))
+
+        self.assertFalse(HighlightMatcher(["", ""]).matches("romeo"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,149 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from typing import Any
+
+import unittest
+from collections.abc import Callable
+
+from nbxmpp.structs import MuclumbusResult
+
+from gajim.common import app
+from gajim.common import muc_search
+from gajim.common.muc_search import get_search_key
+from gajim.common.muc_search import get_search_pages
+from gajim.common.muc_search import MucSearch
+from gajim.common.muc_search import SearchPages
+from gajim.common.settings import Settings
+
+
+def mk_page(last: str | None, end: bool = False) -> MuclumbusResult:
+    return MuclumbusResult(first=None, last=last, max=None, end=end, items=[])
+
+
+class FakeHttpMucSearch:
+    def __init__(self) -> None:
+        self.requests: list[tuple[str | None, Callable[..., Any]]] = []
+
+    def search(
+        self, keywords: list[str], last: str | None, callback: Callable[..., Any]
+    ) -> None:
+        self.requests.append((last, callback))
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.http = FakeHttpMucSearch()
+
+    def get_module(self, name: str) -> FakeHttpMucSearch:
+        assert name == "HttpMucSearch"
+        return self.http
+
+
+class MucSearchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        app.settings = Settings(in_memory=True)
+        app.settings.init()
+        app.settings.set("muclumbus_api_pref", "http")
+        muc_search._search_cache.clear()
+
+    def test_pages(self) -> None:
+        pages = SearchPages()
+        pages.add(None, mk_page("a"))
+        # Pages which do not continue the list are ignored
+        pages.add(None, mk_page("a"))
+        pages.add("x", mk_page("y"))
+        self.assertEqual(len(pages.pages), 1)
+        self.assertEqual(pages.last, "a")
+        self.assertFalse(pages.complete)
+
+        pages.add("a", mk_page("b", end=True))
+        self.assertTrue(pages.complete)
+        self.assertEqual(len(pages.pages), 2)
+
+        # A service which repeats the same page does not cause a loop
+        pages = SearchPages()
+        pages.add(None, mk_page("a"))
+        pages.add("a", mk_page("a"))
+        self.assertTrue(pages.complete)
+
+    def test_cache(self) -> None:
+        key = get_search_key("  gajim   rooms ")
+        self.assertEqual(key[2], "gajim rooms")
+        pages = get_search_pages(key)
+        self.assertIs(get_search_pages(get_search_key("gajim rooms")), pages)
+
+        pages.created -= muc_search.SEARCH_CACHE_TTL + 1
+        self.assertIsNot(get_search_pages(key), pages)
+
+        for index in range(muc_search.SEARCH_CACHE_SIZE + 1):
+            get_search_pages(get_search_key(f"query {index}"))
+        self.assertEqual(len(muc_search._search_cache), muc_search.SEARCH_CACHE_SIZE)
+
+    def test_streaming(self) -> None:
+        client = FakeClient()
+        shown: list[MuclumbusResult] = []
+        search = MucSearch(client, "gajim", shown.append, self.fail)  # type: ignore
+        search.start()
+
+        last, callback = client.http.requests.pop()
+        self.assertIsNone(last)
+        callback(mk_page("a"))
+        self.assertEqual([page.last for page in shown], ["a"])
+
+        # The next page is requested ahead, but only shown once wanted
+        last, callback = client.http.requests.pop()
+        self.assertEqual(last, "a")
+        callback(mk_page("b", end=True))
+        self.assertEqual(len(shown), 1)
+        self.assertFalse(search.complete)
+
+        search.request_more()
+        self.assertEqual([page.last for page in shown], ["a", "b"])
+        self.assertTrue(search.complete)
+        self.assertEqual(client.http.requests, [])
+
+        # The same query is answered from the cache
+        shown.clear()
+        search = MucSearch(client, "gajim", shown.append, self.fail)  # type: ignore
+        search.start()
+        search.request_more()
+        self.assertEqual([page.last for page in shown], ["a", "b"])
+        self.assertEqual(client.http.requests, [])
+
+    def test_error(self) -> None:
+        client = FakeClient()
+        shown: list[MuclumbusResult] = []
+        errors: list[Exception] = []
+        search = MucSearch(client, "gajim", shown.append, errors.append)  # type: ignore
+        search.start()
+        client.http.requests.pop()[1](mk_page("a"))
+
+        # A failed prefetch is not reported but requested again
+        client.http.requests.pop()[1](TimeoutError())
+        self.assertEqual(errors, [])
+        search.request_more()
+        last, callback = client.http.requests.pop()
+        self.assertEqual(last, "a")
+
+        callback(TimeoutError())
+        self.assertEqual(len(errors), 1)
+
+    def test_cancel(self) -> None:
+        client = FakeClient()
+        shown: list[MuclumbusResult] = []
+        search = MucSearch(client, "gajim", shown.append, self.fail)  # type: ignore
+        search.start()
+        search.cancel()
+
+        client.http.requests.pop()[1](mk_page("a"))
+        self.assertEqual(shown, [])
+        self.assertEqual(client.http.requests, [])
+
+        # The received page is still cached
+        self.assertEqual(get_search_pages(get_search_key("gajim")).last, "a")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from typing import Any
+
+import unittest
+from unittest.mock import MagicMock
+
+from nbxmpp.const import PresenceShow
+from nbxmpp.const import PresenceType
+from nbxmpp.protocol import JID
+from nbxmpp.protocol import Presence as PresenceStanza
+from nbxmpp.structs import PresenceProperties
+
+from gajim.common import app
+from gajim.common.const import SimpleClientState
+from gajim.common.events import PresenceReceived
+from gajim.common.events import ShowChanged
+from gajim.common.modules import presence
+from gajim.common.modules.contacts import BareContact
+from gajim.common.modules.contacts import ResourceContact
+from gajim.common.modules.presence import Presence
+
+ACCOUNT = "testacc"
+OWN_JID = JID.from_string("me@example.org/gajim")
+ALICE = JID.from_string("alice@example.org")
+BOB = JID.from_string("bob@example.org")
+
+
+def mk_properties(
+    jid: JID, show: PresenceShow = PresenceShow.ONLINE, is_self: bool = False
+) -> PresenceProperties:
+    return PresenceProperties(
+        own_jid=OWN_JID,
+        type=PresenceType.AVAILABLE,
+        priority=0,
+        show=show,
+        jid=jid,
+        resource=jid.resource,
+        self_presence=is_self,
+        self_bare=is_self,
+    )
+
+
+class FakeContacts:
+    def __init__(self) -> None:
+        self.contacts: dict[JID, MagicMock] = {}
+
+    def get_contact(self, jid: JID) -> MagicMock:
+        contact = self.contacts.get(jid)
+        if contact is None:
+            spec = BareContact if jid.is_bare else ResourceContact
+            contact = MagicMock(spec=spec)
+            contact.jid = jid
+            self.contacts[jid] = contact
+        return contact
+
+
+class PresenceBatchingTest(unittest.TestCase):
+    def setUp(self) -> None:
+        app.ged = MagicMock()
+
+        self._contacts = FakeContacts()
+        modules = {
+            "Contacts": self._contacts,
+            "MUC": MagicMock(**{"get_muc_data.return_value": None}),
+            "Roster": MagicMock(),
+        }
+        client = MagicMock()
+        client.account = ACCOUNT
+        client.get_module.side_effect = modules.__getitem__
+
+        self._presence = Presence(client)
+        self._presence._on_client_state_changed(
+            client, "state-changed", SimpleClientState.CONNECTED
+        )
+
+    def tearDown(self) -> None:
+        self._presence._stop_batching()
+
+    def _receive(self, properties: PresenceProperties) -> None:
+        self._presence._presence_received(MagicMock(), PresenceStanza(), properties)
+
+    def _get_raised(self, event_type: type) -> list[Any]:
+        return [
+            call.args[0]
+            for call in app.ged.raise_event.call_args_list
+            if isinstance(call.args[0], event_type)
+        ]
+
+    def test_latest_presence(self) -> None:
+        resource = ALICE.new_with(resource="phone")
+        self._receive(mk_properties(resource, PresenceShow.AWAY))
+        self._receive(mk_properties(resource, PresenceShow.DND))
+
+        contact = self._contacts.get_contact(resource)
+        contact.update_presence.assert_not_called()
+        self.assertEqual(self._get_raised(PresenceReceived), [])
+
+        self._presence._on_batch_timeout()
+
+        contact.update_presence.assert_called_once()
+        presence_data = contact.update_presence.call_args.args[0]
+        self.assertEqual(presence_data.show, PresenceShow.DND)
+        self.assertEqual(len(self._get_raised(PresenceReceived)), 1)
+
+    def test_notify_once(self) -> None:
+        for jid in (ALICE, BOB):
+            for resource in ("phone", "laptop", "tablet"):
+                self._receive(mk_properties(jid.new_with(resource=resource)))
+
+        self._presence._on_batch_timeout()
+
+        for jid in (ALICE, BOB):
+            contact = self._contacts.get_contact(jid)
+            contact.notify.assert_called_once_with("presence-update")
+
+        for resource_jid, contact in self._contacts.contacts.items():
+            if resource_jid.is_bare:
+                continue
+            contact.update_presence.assert_called_once()
+            self.assertFalse(contact.update_presence.call_args.kwargs["notify"])
+
+        self.assertEqual(len(self._get_raised(PresenceReceived)), 6)
+
+    def test_own_presence(self) -> None:
+        self._receive(mk_properties(OWN_JID, is_self=True))
+
+        contact = self._contacts.get_contact(OWN_JID)
+        contact.update_presence.assert_called_once()
+        self.assertTrue(contact.update_presence.call_args.kwargs["notify"])
+        self.assertEqual(len(self._get_raised(ShowChanged)), 1)
+        self.assertEqual(self._presence._pending_presences, {})
+
+    def test_stop_batching(self) -> None:
+        phone = ALICE.new_with(resource="phone")
+        laptop = ALICE.new_with(resource="laptop")
+        self._receive(mk_properties(phone))
+
+        assert self._presence._batching_since is not None
+        self._presence._batching_since -= presence.PRESENCE_BATCH_MAX_DURATION + 1
+
+        # The pending presences are applied before the new one
+        self._receive(mk_properties(laptop))
+
+        self.assertEqual(self._presence._pending_presences, {})
+        raised = self._get_raised(PresenceReceived)
+        self.assertEqual([event.fjid for event in raised], [str(phone), str(laptop)])
+
+        self._contacts.get_contact(phone).update_presence.assert_called_once()
+        laptop_contact = self._contacts.get_contact(laptop)
+        laptop_contact.update_presence.assert_called_once()
+        self.assertTrue(laptop_contact.update_presence.call_args.kwargs["notify"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from typing import Any
+
+import unittest
+from concurrent.futures import Future
+
+from gi.repository import GLib
+
+from gajim.common.preview_scheduler import JobObjectT
+from gajim.common.preview_scheduler import PreviewJobType
+from gajim.common.preview_scheduler import PreviewScheduler
+
+
+def run_main_loop() -> None:
+    context = GLib.MainContext.default()
+    while context.pending():
+        context.iteration(False)
+
+
+class PreviewSchedulerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._scheduler = PreviewScheduler()
+        self._future: Future[Any] = Future()
+        self._started: list[JobObjectT | None] = []
+
+    def _request(self, callback: Any = None) -> Any:
+        return self._scheduler.request(
+            "job",
+            PreviewJobType.THUMBNAIL,
+            lambda: self._future,
+            callback or self._started.append,
+        )
+
+    def test_running_job(self) -> None:
+        self._request()
+        run_main_loop()
+        self.assertEqual(self._started, [self._future])
+
+        # The callback is not called before the request is returned
+        started: list[JobObjectT | None] = []
+        self._request(started.append)
+        self.assertEqual(started, [])
+
+        run_main_loop()
+        self.assertEqual(started, [self._future])
+
+    def test_cancel_running_job_request(self) -> None:
+        self._request()
+        run_main_loop()
+
+        started: list[JobObjectT | None] = []
+        request = self._request(started.append)
+        request.cancel()
+
+        run_main_loop()
+        self.assertEqual(started, [])
+        self.assertFalse(self._future.cancelled())
+
+
+if __name__ == "__main__":
+    unittest.main()
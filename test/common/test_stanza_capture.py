@@ -0,0 +1,73 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from nbxmpp.simplexml import Node
+
+from gajim.common.stanza_capture import CapturedStanza
+from gajim.common.stanza_capture import get_stanza_type
+from gajim.common.stanza_capture import StanzaFileWriter
+from gajim.common.stanza_capture import StanzaFilter
+
+ACCOUNT = "testacc"
+
+
+class StanzaCaptureTest(unittest.TestCase):
+    def test_stanza_type(self) -> None:
+        self.assertEqual(
+            get_stanza_type("<presence xmlns='jabber:client'/>"), "presence"
+        )
+        self.assertEqual(get_stanza_type("<message>\n<body/></message>"), "message")
+        self.assertEqual(get_stanza_type("<iq/>"), "iq")
+        self.assertEqual(get_stanza_type("<r xmlns='urn:xmpp:sm:3'/>"), "stream")
+        self.assertEqual(get_stanza_type("<a h='1'/>"), "stream")
+        self.assertIsNone(get_stanza_type("<stream:features>"))
+        self.assertIsNone(get_stanza_type(""))
+        self.assertEqual(get_stanza_type(Node("iq", attrs={"type": "get"})), "iq")
+
+    def test_text(self) -> None:
+        stanza = CapturedStanza(ACCOUNT, "incoming", Node("message"))
+        self.assertEqual(stanza.type, "message")
+        self.assertTrue(stanza.text.startswith("<message"))
+        self.assertIs(stanza.text, stanza.text)
+
+    def test_filter(self) -> None:
+        presence = CapturedStanza(ACCOUNT, "incoming", "<presence/>")
+        ack = CapturedStanza(ACCOUNT, "outgoing", "<a h='1'/>")
+        other = CapturedStanza("otheracc", "incoming", "<stream:features>")
+
+        filter_ = StanzaFilter()
+        self.assertTrue(filter_.matches(presence))
+        self.assertFalse(filter_.matches(ack))
+        self.assertTrue(filter_.matches(other))
+
+        filter_ = StanzaFilter(account=ACCOUNT, types=frozenset(["stream"]))
+        self.assertFalse(filter_.matches(presence))
+        self.assertTrue(filter_.matches(ack))
+        self.assertFalse(filter_.matches(other))
+
+        filter_ = StanzaFilter(incoming=False)
+        self.assertFalse(filter_.matches(presence))
+        self.assertFalse(filter_.matches(other))
+
+    def test_file_writer(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "stanzas.log"
+            writer = StanzaFileWriter(path, max_bytes=200, backup_count=1)
+            for index in range(10):
+                writer.write(CapturedStanza(ACCOUNT, "outgoing", f"<iq id='{index}'/>"))
+            writer.close()
+
+            text = path.read_text(encoding="utf8")
+            self.assertIn("<iq id='9'/>", text)
+            self.assertIn(f"({ACCOUNT})", text)
+            self.assertTrue(path.with_name("stanzas.log.1").exists())
+            self.assertFalse(path.with_name("stanzas.log.2").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
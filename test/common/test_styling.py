@@ -665,6 +665,36 @@ def test_uris_with_text(self):
             hlinks = process_uris(text)
             self.assertEqual([link.text for link in hlinks], results, text)
 
+    def test_find_uri_matches(self):
+        texts = [self.wrap(text) for text in URIS + NONURIS + JIDS + NONJIDS]
+        texts += [text for text, _results in URIS_WITH_TEXT]
+        texts += ["no candidates here", "a:b\xa0c@d e@f\tg:h", "@:", ""]
+        for text in texts:
+            expected = [
+                (match.span(), match.group("jid"))
+                for match in styling.URI_OR_JID_RX.finditer(text)
+            ]
+            result = [
+                (match.span(), match.group("jid"))
+                for match in styling.find_uri_matches(text)
+            ]
+            self.assertEqual(result, expected, text)
+
+    def test_byte_offsets(self):
+        self.assertIsNone(styling.get_byte_offsets("ascii"))
+        self.assertEqual(styling.get_byte_offsets("aä€😀"), [0, 1, 3, 6, 10])
+
+        result = styling.process("ä *€* 😀\n_x_")
+        block = result.blocks[0]
+        assert isinstance(block, PlainBlock)
+        spans = [(span.start_byte, span.end_byte) for span in block.spans]
+        self.assertEqual(spans, [(3, 8), (14, 17)])
+
+    def test_process_cached(self):
+        result = styling.process_cached("*cached*")
+        self.assertIs(styling.process_cached("*cached*"), result)
+        self.assertEqual(result.blocks, styling.process("*cached*").blocks)
+
 
 if __name__ == "__main__":
     unittest.main()
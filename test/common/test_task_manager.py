@@ -0,0 +1,119 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import unittest
+from collections.abc import Hashable
+
+from gi.repository import GLib
+
+from gajim.common import task_manager
+from gajim.common.task_manager import Task
+from gajim.common.task_manager import TaskManager
+
+
+def run_main_loop() -> None:
+    context = GLib.MainContext.default()
+    while context.pending():
+        context.iteration(False)
+
+
+class FakeTask(Task):
+    def __init__(
+        self,
+        name: str,
+        executed: list[str],
+        priority: int = 0,
+        key: Hashable | None = None,
+        ready: bool = True,
+    ) -> None:
+        Task.__init__(self, priority)
+        self.name = name
+        self.ready = ready
+        self._key = key
+        self._executed = executed
+
+    def execute(self) -> None:
+        self._executed.append(self.name)
+
+    def preconditions_met(self) -> bool:
+        return self.ready
+
+    def get_key(self) -> Hashable | None:
+        return self._key
+
+
+class AsyncTask(FakeTask):
+    asynchronous = True
+
+
+class TaskManagerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._manager = TaskManager()
+        self._executed: list[str] = []
+
+    def tearDown(self) -> None:
+        self._manager.unregister_events()
+
+    def test_priority(self) -> None:
+        for index in range(20):
+            self._manager.add_task(FakeTask(f"low{index}", self._executed, 1))
+        self._manager.add_task(FakeTask("high", self._executed, 0))
+
+        run_main_loop()
+        self.assertEqual(len(self._executed), 21)
+        self.assertEqual(self._executed[0], "high")
+        self.assertEqual(self._manager.get_stats().executed, 21)
+
+    def test_concurrency(self) -> None:
+        tasks = [
+            AsyncTask(str(index), self._executed)
+            for index in range(task_manager.MAX_RUNNING_TASKS + 5)
+        ]
+        for task in tasks:
+            self._manager.add_task(task)
+
+        run_main_loop()
+        self.assertEqual(len(self._executed), task_manager.MAX_RUNNING_TASKS)
+        stats = self._manager.get_stats()
+        self.assertEqual(stats.running, task_manager.MAX_RUNNING_TASKS)
+        self.assertEqual(stats.queued, 5)
+
+        tasks[0].set_finished()
+        tasks[1].set_obsolete()
+        run_main_loop()
+        self.assertEqual(len(self._executed), task_manager.MAX_RUNNING_TASKS + 2)
+
+    def test_similar_tasks(self) -> None:
+        first = AsyncTask("first", self._executed, key="hash")
+        second = AsyncTask("second", self._executed, key="hash")
+        third = AsyncTask("third", self._executed, key="hash")
+        other = AsyncTask("other", self._executed, key="other")
+        for task in (first, second, third, other):
+            self._manager.add_task(task)
+
+        run_main_loop()
+        self.assertEqual(self._executed, ["first", "other"])
+
+        # The result of the first task makes the second obsolete
+        second.set_obsolete()
+        first.set_finished()
+        run_main_loop()
+        self.assertEqual(self._executed, ["first", "other", "third"])
+
+    def test_waiting(self) -> None:
+        task = FakeTask("waiting", self._executed, ready=False)
+        self._manager.add_task(task)
+        run_main_loop()
+        self.assertEqual(self._executed, [])
+        self.assertEqual(self._manager.get_stats().waiting, 1)
+
+        task.ready = True
+        self._manager.retry_waiting()
+        run_main_loop()
+        self.assertEqual(self._executed, ["waiting"])
+        self.assertEqual(self._manager.get_stats().waiting, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import time
+import unittest
+
+from nbxmpp.modules.discovery import parse_disco_info
+from nbxmpp.protocol import Iq
+from nbxmpp.protocol import JID
+from nbxmpp.structs import DiscoItem
+
+from gajim.common.storage.cache import CacheStorage
+
+ACCOUNT = "testacc"
+
+DISCO_INFO = """
+<iq xmlns="jabber:client" type="result" from="conference.example.org" id="1">
+  <query xmlns="http://jabber.org/protocol/disco#info">
+    <identity category="conference" type="text" name="Chatrooms"/>
+    <feature var="http://jabber.org/protocol/muc"/>
+  </query>
+</iq>
+"""
+
+
+class DiscoCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._cache = CacheStorage(in_memory=True)
+        self._cache.init()
+
+    def tearDown(self) -> None:
+        self._cache.shutdown()
+
+    def test_disco_info(self) -> None:
+        jid = "conference.example.org"
+        self.assertIsNone(self._cache.get_disco_info(ACCOUNT, jid, "", 60))
+
+        disco_info = parse_disco_info(Iq(node=DISCO_INFO))
+        self._cache.set_disco_info(ACCOUNT, jid, "", disco_info)
+
+        result = self._cache.get_disco_info(ACCOUNT, jid, "", 60)
+        assert result is not None
+        self.assertEqual(result.identities, disco_info.identities)
+        self.assertEqual(result.features, disco_info.features)
+
+        self.assertIsNone(self._cache.get_disco_info(ACCOUNT, jid, "node", 60))
+        self.assertIsNone(self._cache.get_disco_info("otheracc", jid, "", 60))
+
+    def test_disco_items(self) -> None:
+        jid = "conference.example.org"
+        items = [
+            DiscoItem(
+                jid=JID.from_string("room1@conference.example.org"),
+                name="Room 1",
+                node=None,
+            ),
+            DiscoItem(
+                jid=JID.from_string("conference.example.org"), name=None, node="rooms"
+            ),
+        ]
+        self._cache.set_disco_items(ACCOUNT, jid, "", items)
+        result = self._cache.get_disco_items(ACCOUNT, jid, "", 60)
+        self.assertEqual(result, items)
+        assert result is not None
+        self.assertIsInstance(result[0].jid, JID)
+
+        # A refresh replaces the stored list
+        self._cache.set_disco_items(ACCOUNT, jid, "", items[:1])
+        self.assertEqual(self._cache.get_disco_items(ACCOUNT, jid, "", 60), items[:1])
+
+    def test_max_age(self) -> None:
+        jid = "conference.example.org"
+        self._cache.set_disco_items(ACCOUNT, jid, "", [])
+
+        con = self._cache.get_connection()
+        con.execute(
+            "UPDATE disco_items_cache SET last_seen = ?", (int(time.time()) - 120,)
+        )
+
+        self.assertIsNone(self._cache.get_disco_items(ACCOUNT, jid, "", 60))
+        self.assertEqual(self._cache.get_disco_items(ACCOUNT, jid, "", 300), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,6 +6,7 @@
 
 import unittest
 from datetime import datetime
+from datetime import timedelta
 from datetime import UTC
 
 from nbxmpp.protocol import JID
@@ -22,6 +23,7 @@
 from gajim.common.storage.archive.models import Message
 from gajim.common.storage.archive.models import Occupant
 from gajim.common.storage.archive.storage import MessageArchiveStorage
+from gajim.common.util.datetime import utc_now
 
 
 class DisplayedMarkersTest(unittest.TestCase):
@@ -179,6 +181,108 @@ def test_markers_join_groupchat(self):
         self.assertEqual(marker2.occupant.id, "occupantid2")
         self.assertEqual(marker2.timestamp, datetime.fromtimestamp(2, UTC))
 
+    def test_last_display_markers(self):
+        occupants = [
+            Occupant(
+                account_=self._account,
+                remote_jid_=self._remote_jid,
+                id=f"occupantid{i}",
+                nickname=f"nickname{i}",
+                updated_at=datetime.fromtimestamp(0, UTC),
+            )
+            for i in range(2)
+        ]
+
+        now = utc_now()
+        markers = [
+            (occupants[0], "id1", now - timedelta(minutes=10)),
+            (occupants[0], "id3", now - timedelta(minutes=5)),
+            (occupants[0], "id2", now - timedelta(minutes=7)),
+            (occupants[1], "id1", now - timedelta(days=100)),
+        ]
+
+        for occupant, id_, timestamp in markers:
+            self._archive.insert_object(
+                DisplayedMarker(
+                    account_=self._account,
+                    remote_jid_=self._remote_jid,
+                    occupant_=occupant,
+                    id=id_,
+                    timestamp=timestamp,
+                ),
+                ignore_on_conflict=False,
+            )
+
+        # The marker of occupant2 is too old
+        result = self._archive.get_last_display_markers(self._account, self._remote_jid)
+        self.assertEqual(len(result), 1)
+        assert result[0].occupant is not None
+        self.assertEqual(result[0].occupant.id, "occupantid0")
+        self.assertEqual(result[0].id, "id3")
+
+        self._archive.insert_object(
+            DisplayedMarker(
+                account_=self._account,
+                remote_jid_=self._remote_jid,
+                occupant_=occupants[1],
+                id="id4",
+                timestamp=now,
+            ),
+            ignore_on_conflict=False,
+        )
+
+        result = self._archive.get_last_display_markers(self._account, self._remote_jid)
+        ids = sorted(marker.id for marker in result)
+        self.assertEqual(ids, ["id3", "id4"])
+
+    def test_delete_last_display_marker(self):
+        occupant = Occupant(
+            account_=self._account,
+            remote_jid_=self._remote_jid,
+            id="occupantid1",
+            nickname="nickname1",
+            updated_at=datetime.fromtimestamp(0, UTC),
+        )
+
+        now = utc_now()
+        for id_, timestamp in [
+            ("id1", now - timedelta(minutes=10)),
+            ("id2", now - timedelta(minutes=5)),
+        ]:
+            self._archive.insert_object(
+                DisplayedMarker(
+                    account_=self._account,
+                    remote_jid_=self._remote_jid,
+                    occupant_=occupant,
+                    id=id_,
+                    timestamp=timestamp,
+                ),
+                ignore_on_conflict=False,
+            )
+
+        pk = self._archive.insert_object(
+            Message(
+                account_=self._account,
+                remote_jid_=self._remote_jid,
+                type=MessageType.GROUPCHAT,
+                direction=ChatDirection.INCOMING,
+                timestamp=now - timedelta(minutes=6),
+                state=MessageState.ACKNOWLEDGED,
+                resource="res",
+                text="Some Message",
+                id="messageid1",
+                stanza_id="id2",
+                occupant_=None,
+            )
+        )
+
+        # Deleting the message with the latest marker falls back to the
+        # previous marker of the occupant
+        self._archive.delete_message(pk)
+
+        result = self._archive.get_last_display_markers(self._account, self._remote_jid)
+        self.assertEqual([marker.id for marker in result], ["id1"])
+
 
 if __name__ == "__main__":
     unittest.main()
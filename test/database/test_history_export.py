@@ -0,0 +1,143 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from nbxmpp.protocol import JID
+
+import gajim.common.storage.archive.models as mod
+from gajim.common import app
+from gajim.common.history_export import ExportFormat
+from gajim.common.history_export import HistoryExporter
+from gajim.common.settings import Settings
+from gajim.common.storage.archive.const import ChatDirection
+from gajim.common.storage.archive.const import MessageState
+from gajim.common.storage.archive.const import MessageType
+from gajim.common.storage.archive.storage import MessageArchiveStorage
+
+from .util import mk_utc_dt
+
+ACCOUNT = "testacc1"
+REMOTE_JID = JID.from_string("remote@jid.org")
+ROOM_JID = JID.from_string("room@conference.jid.org")
+
+
+class HistoryExportTest(unittest.TestCase):
+    def setUp(self) -> None:
+        app.settings = Settings(in_memory=True)
+        app.settings.init()
+        app.settings.add_account(ACCOUNT)
+        app.settings.set_account_setting(ACCOUNT, "address", "user@domain.org")
+
+        self._archive = MessageArchiveStorage(in_memory=True)
+        self._archive.init()
+        app.storage.archive = self._archive
+
+        self._insert_message(REMOTE_JID, None, ChatDirection.INCOMING, "Hello <you>")
+        self._insert_message(REMOTE_JID, None, ChatDirection.OUTGOING, "Hi")
+        self._insert_message(ROOM_JID, "nick", ChatDirection.INCOMING, "Hey & ho")
+
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._directory = Path(self._tmp_dir.name)
+
+    def tearDown(self) -> None:
+        self._archive.shutdown()
+        self._tmp_dir.cleanup()
+
+    def _insert_message(
+        self,
+        remote_jid: JID,
+        resource: str | None,
+        direction: ChatDirection,
+        text: str,
+    ) -> None:
+        message_type = MessageType.CHAT if resource is None else MessageType.GROUPCHAT
+        message = mod.Message(
+            account_=ACCOUNT,
+            remote_jid_=remote_jid,
+            resource=resource,
+            type=message_type,
+            direction=direction,
+            timestamp=mk_utc_dt(len(text)),
+            state=MessageState.ACKNOWLEDGED,
+            id=f"id-{text}",
+            stanza_id=f"stanza-id-{text}",
+            text=text,
+        )
+        self._archive.insert_object(message)
+
+    def _export(self, format_: ExportFormat) -> list[Path]:
+        exporter = HistoryExporter(
+            ACCOUNT, [REMOTE_JID, ROOM_JID], self._directory, format_, batch_size=1
+        )
+        result = exporter.run()
+        self.assertIsNone(result.error)
+        self.assertFalse(result.cancelled)
+        self.assertEqual(result.progress.chats_done, 2)
+        self.assertEqual(result.progress.messages, 3)
+
+        file_name = f"history.{format_.value}"
+        return [
+            self._directory / "jid.org" / "remote" / file_name,
+            self._directory / "conference.jid.org" / "room" / file_name,
+        ]
+
+    def test_export_text(self) -> None:
+        chat_path, room_path = self._export(ExportFormat.TEXT)
+
+        lines = chat_path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(lines[0], f"History for {REMOTE_JID}")
+        self.assertTrue(lines[2].endswith(" You: Hi"))
+        self.assertTrue(lines[3].endswith(f" {REMOTE_JID}: Hello <you>"))
+
+        lines = room_path.read_text(encoding="utf-8").splitlines()
+        self.assertTrue(lines[2].endswith(" nick: Hey & ho"))
+
+    def test_export_json_lines(self) -> None:
+        chat_path, _room_path = self._export(ExportFormat.JSONL)
+
+        lines = chat_path.read_text(encoding="utf-8").splitlines()
+        messages = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [message["text"] for message in messages], ["Hi", "Hello <you>"]
+        )
+        self.assertEqual(messages[0]["direction"], "outgoing")
+        self.assertEqual(messages[1]["type"], "chat")
+        self.assertEqual(messages[1]["stanza_id"], "stanza-id-Hello <you>")
+
+    def test_export_xml(self) -> None:
+        _chat_path, room_path = self._export(ExportFormat.XML)
+
+        root = ET.parse(room_path).getroot()
+        self.assertEqual(root.tag, "{urn:xmpp:pie:0}server-data")
+
+        message = root.find(
+            "./{urn:xmpp:pie:0}host/{urn:xmpp:pie:0}user/"
+            "{urn:xmpp:pie:0#mam}archive/{urn:xmpp:mam:2}result/"
+            "{urn:xmpp:forward:0}forwarded/{jabber:client}message"
+        )
+        assert message is not None
+        self.assertEqual(message.get("from"), f"{ROOM_JID}/nick")
+        self.assertEqual(message.get("to"), "user@domain.org")
+        self.assertEqual(message.get("type"), "groupchat")
+        self.assertEqual(message.findtext("{jabber:client}body"), "Hey & ho")
+
+    def test_cancel(self) -> None:
+        exporter = HistoryExporter(
+            ACCOUNT, [REMOTE_JID, ROOM_JID], self._directory, ExportFormat.TEXT
+        )
+        exporter.cancel()
+        result = exporter.run()
+
+        self.assertTrue(result.cancelled)
+        self.assertEqual(result.progress.messages, 0)
+        self.assertEqual(list(self._directory.iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
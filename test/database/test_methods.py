@@ -124,6 +124,26 @@ def test_rollback(self) -> None:
             result = s.scalar(select(mod.Encryption))
             self.assertIsNone(result)
 
+        # The rolled back encryption row must not be reused
+        m3 = mod.Message(
+            account_="testacc1",
+            remote_jid_=JID.from_string("remote1@jid.org"),
+            resource=None,
+            type=MessageType.CHAT,
+            direction=ChatDirection.INCOMING,
+            timestamp=now,
+            state=MessageState.ACKNOWLEDGED,
+            id="2",
+            stanza_id=get_uuid(),
+            encryption_=mod.Encryption(protocol="OMEMO", key="123", trust=1),
+        )
+        pk = self._archive.insert_object(m3, ignore_on_conflict=False)
+
+        message = self._archive.get_message_with_pk(pk)
+        assert message is not None
+        assert message.encryption is not None
+        self.assertEqual(message.encryption.key, "123")
+
     def test_get_conversation_jids(self) -> None:
         self._insert_messages("testacc1", count=10)
         self._insert_messages("testacc2", count=12)
@@ -247,6 +267,48 @@ def test_get_last_conversation_row(self) -> None:
 
         self.assertEqual(message.id, "messageid9")
 
+    def test_preload_last_conversation_rows(self) -> None:
+        remote_jid1 = JID.from_string("remote1@jid.org")
+        remote_jid2 = JID.from_string("remote2@jid.org")
+        unknown_jid = JID.from_string("unknown@jid.org")
+        self._insert_messages("testacc1", remote_jid=remote_jid1, count=3)
+        self._insert_messages("testacc2", remote_jid=remote_jid2, count=5)
+
+        self._archive.preload_last_conversation_rows(
+            [
+                ("testacc1", remote_jid1),
+                ("testacc2", remote_jid2),
+                ("testacc1", remote_jid2),
+                ("testacc1", unknown_jid),
+            ]
+        )
+
+        message = self._archive.get_last_conversation_row(
+            "testacc2", remote_jid2, incl_related_data=True
+        )
+        assert message is not None
+        self.assertEqual(message.id, "messageid4")
+
+        message = self._archive.get_last_conversation_row(
+            "testacc1", remote_jid2, incl_related_data=True
+        )
+        self.assertIsNone(message)
+
+        message = self._archive.get_last_conversation_row(
+            "testacc1", unknown_jid, incl_related_data=True
+        )
+        self.assertIsNone(message)
+
+        # A new message invalidates the preloaded line
+        self._insert_messages(
+            "testacc1", remote_jid=remote_jid1, message_id="newid", count=1
+        )
+        message = self._archive.get_last_conversation_row(
+            "testacc1", remote_jid1, incl_related_data=True
+        )
+        assert message is not None
+        self.assertEqual(message.id, "newid")
+
     def test_search_archive(self) -> None:
         # TODO
         return
@@ -1036,6 +1098,20 @@ def test_check_if_message_id_exists(self) -> None:
         result = self._archive.check_if_message_id_exists("testacc1", remote_jid, "xxx")
         self.assertFalse(result)
 
+        self._archive.delete_message(m.pk)
+        result = self._archive.check_if_message_id_exists("testacc1", remote_jid, "123")
+        self.assertFalse(result)
+
+        # Answered by the loaded index without a query
+        result = self._archive.check_if_message_id_exists(
+            "testacc1", remote_jid, "xxx", utc_now()
+        )
+        self.assertFalse(result)
+
+        stats = self._archive.get_message_id_index_stats()
+        self.assertEqual(stats.recent, 1)
+        self.assertEqual(stats.negative, 1)
+
     def test_block_occupants(self) -> None:
         remote_jid = JID.from_string("remote1@jid.org")
         pks: list[int] = []
@@ -1226,6 +1302,43 @@ def test_get_occupant_by_jids(self) -> None:
         self.assertEqual(occupant3.real_remote.jid, real_remote_jid3)
         self.assertEqual(occupant3.nickname, "susi")
 
+    def test_contact_cache(self) -> None:
+        jid1 = JID.from_string("contact1@jid.org")
+        jid2 = JID.from_string("contact2@jid.org")
+        jid3 = JID.from_string("contact3@jid.org")
+
+        self._archive.set_contact_value(self._account, jid1, "remote_name", "remote1")
+        self._archive.bulk_update_custom_names(
+            self._account, [(jid1, "custom1"), (jid2, "custom2")]
+        )
+
+        self._archive.preload_contacts(self._account)
+
+        contact = self._archive.get_contact(self._account, jid1)
+        assert contact is not None
+        self.assertEqual(contact.custom_name, "custom1")
+        self.assertEqual(contact.remote_name, "remote1")
+        self.assertEqual(
+            self._archive.get_contact_value(self._account, jid2, "custom_name"),
+            "custom2",
+        )
+        self.assertIsNone(self._archive.get_contact(self._account, jid3))
+
+        # The cache stays coherent after the account was preloaded
+        self._archive.set_contact_value(self._account, jid3, "avatar_sha", "sha3")
+        self._archive.bulk_update_custom_names(
+            self._account, [(jid1, "custom1"), (jid2, "new2"), (jid3, "custom3")]
+        )
+
+        contact = self._archive.get_contact(self._account, jid3)
+        assert contact is not None
+        self.assertEqual(contact.avatar_sha, "sha3")
+        self.assertEqual(contact.custom_name, "custom3")
+        self.assertEqual(
+            self._archive.get_contact_value(self._account, jid2, "custom_name"),
+            "new2",
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -205,6 +205,61 @@ def test_occupant_join(self) -> None:
         self.assertEqual(message.occupant.real_remote.jid, "real@remote.jid")
         self.assertIsInstance(message.occupant.real_remote.jid, JID)
 
+    def _insert_message_with_occupant(self, nickname: str, timestamp: int) -> int:
+        occupant_data = Occupant(
+            account_=self._account,
+            remote_jid_=self._remote_jid,
+            id="someid",
+            real_remote_jid_=JID.from_string("real@remote.jid"),
+            nickname=nickname,
+            avatar_sha="sha1",
+            updated_at=datetime.fromtimestamp(timestamp, UTC),
+        )
+
+        message_data = Message(
+            account_=self._account,
+            remote_jid_=self._remote_jid,
+            resource=nickname,
+            type=MessageType.GROUPCHAT,
+            direction=ChatDirection.INCOMING,
+            timestamp=datetime.fromtimestamp(timestamp, UTC),
+            state=MessageState.ACKNOWLEDGED,
+            id=str(timestamp),
+            text="message",
+            occupant_=occupant_data,
+        )
+
+        pk = self._archive.insert_object(message_data)
+        message = self._archive.get_message_with_pk(pk)
+        assert message is not None
+        assert message.occupant is not None
+        return message.occupant.pk
+
+    def _get_occupant(self, pk: int) -> Occupant:
+        with self._archive.get_session() as s:
+            occupant = s.scalar(select(Occupant).where(Occupant.pk == pk))
+        assert occupant is not None
+        return occupant
+
+    def test_occupant_update_interval(self) -> None:
+        pk = self._insert_message_with_occupant("peter", 1000)
+
+        # Only the timestamp changes, the occupant is not updated
+        self.assertEqual(self._insert_message_with_occupant("peter", 1060), pk)
+        occupant = self._get_occupant(pk)
+        self.assertEqual(occupant.updated_at, datetime.fromtimestamp(1000, UTC))
+
+        # The timestamp is updated once the interval passed
+        self.assertEqual(self._insert_message_with_occupant("peter", 1700), pk)
+        occupant = self._get_occupant(pk)
+        self.assertEqual(occupant.updated_at, datetime.fromtimestamp(1700, UTC))
+
+        # Changed data is updated immediately
+        self.assertEqual(self._insert_message_with_occupant("peter2", 1710), pk)
+        occupant = self._get_occupant(pk)
+        self.assertEqual(occupant.nickname, "peter2")
+        self.assertEqual(occupant.updated_at, datetime.fromtimestamp(1710, UTC))
+
 
 if __name__ == "__main__":
     unittest.main()
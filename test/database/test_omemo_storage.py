@@ -0,0 +1,88 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+from omemo_dr.state.sessionrecord import SessionRecord
+
+from gajim.common.storage.omemo import OMEMOStorage
+
+log = logging.getLogger("gajim.test.omemo_storage")
+
+
+class OMEMOStorageTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._db_path = Path(self._tmp_dir.name) / "omemo_test.db"
+        self._storage = OMEMOStorage("testacc1", self._db_path, log)  # type: ignore
+
+    def tearDown(self) -> None:
+        self._tmp_dir.cleanup()
+
+    def test_session_cache(self) -> None:
+        self.assertFalse(self._storage.contains_session("a@b.tld", 1))
+        self.assertTrue(self._storage.load_session("a@b.tld", 1).is_fresh())
+
+        record = SessionRecord()
+        self._storage.store_session("a@b.tld", 1, record)
+        self.assertTrue(self._storage.contains_session("a@b.tld", 1))
+        self.assertIs(self._storage.load_session("a@b.tld", 1), record)
+
+        self._storage.delete_session("a@b.tld", 1)
+        self.assertFalse(self._storage.contains_session("a@b.tld", 1))
+
+    def test_batch_commit(self) -> None:
+        with self._storage.batch():
+            self._storage.store_session("a@b.tld", 1, SessionRecord())
+            self._storage.store_session("a@b.tld", 2, SessionRecord())
+            self.assertTrue(self._storage._con.in_transaction)
+
+        self.assertFalse(self._storage._con.in_transaction)
+
+        storage = OMEMOStorage("testacc1", self._db_path, log)  # type: ignore
+        self.assertTrue(storage.contains_session("a@b.tld", 1))
+        self.assertTrue(storage.contains_session("a@b.tld", 2))
+
+    def test_batch_exception(self) -> None:
+        self._storage.store_session("a@b.tld", 1, SessionRecord())
+        self._storage.store_session("a@b.tld", 2, SessionRecord())
+        record1 = self._storage.load_session("a@b.tld", 1)
+        record2 = self._storage.load_session("a@b.tld", 2)
+
+        with self.assertRaises(ValueError), self._storage.batch():
+            self._storage.load_session("a@b.tld", 1)
+            record = self._storage.load_session("a@b.tld", 2)
+            self._storage.store_session("a@b.tld", 2, record)
+            raise ValueError
+
+        # Records which were loaded but not stored again are reloaded
+        self.assertIsNot(self._storage.load_session("a@b.tld", 1), record1)
+        self.assertIs(self._storage.load_session("a@b.tld", 2), record2)
+
+    def test_fetch_state(self) -> None:
+        self.assertIsNone(self._storage.get_devicelist("a@b.tld"))
+        self.assertIsNone(self._storage.get_bundle_request_timestamp("a@b.tld", 1))
+
+        self._storage.store_devicelist("a@b.tld", [1, 2])
+        self._storage.store_devicelist("c@b.tld", [])
+        self._storage.set_bundle_request_timestamp("a@b.tld", 1)
+
+        storage = OMEMOStorage("testacc1", self._db_path, log)  # type: ignore
+        result = storage.get_devicelist("a@b.tld")
+        assert result is not None
+        self.assertEqual(result[0], [1, 2])
+
+        result = storage.get_devicelist("c@b.tld")
+        assert result is not None
+        self.assertEqual(result[0], [])
+
+        self.assertIsNotNone(storage.get_bundle_request_timestamp("a@b.tld", 1))
+        self.assertIsNone(storage.get_bundle_request_timestamp("a@b.tld", 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
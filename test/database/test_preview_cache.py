@@ -0,0 +1,171 @@
+# This file is part of Gajim.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import hashlib
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from gi.repository import GLib
+
+from gajim.common import app
+from gajim.common.settings import Settings
+from gajim.common.storage.preview_cache import PreviewCacheStorage
+
+
+class PreviewCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        app.settings = Settings(in_memory=True)
+        app.settings.init()
+
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._orig_dir = Path(self._tmp_dir.name) / "downloads"
+        self._thumb_dir = Path(self._tmp_dir.name) / "downloads.thumb"
+        self._orig_dir.mkdir()
+        self._thumb_dir.mkdir()
+
+        self._cache = PreviewCacheStorage(in_memory=True)
+        self._cache._orig_dir = self._orig_dir
+        self._cache._thumb_dir = self._thumb_dir
+        self._cache.init()
+
+    def tearDown(self) -> None:
+        self._cache.shutdown()
+        self._tmp_dir.cleanup()
+
+    def _write_file(self, name: str, data: bytes) -> Path:
+        path = self._orig_dir / name
+        path.write_bytes(data)
+        return path
+
+    def _add_file(self, uri: str, path: Path) -> Path:
+        content_hash = hashlib.sha256(path.read_bytes()).hexdigest()
+        return self._cache.add_file(uri, path, content_hash)
+
+    def test_lookup(self) -> None:
+        self.assertIsNone(self._cache.get_orig_path("https://a.tld/a.png"))
+
+        path = self._write_file("a.png", b"a")
+        stored = self._add_file("https://a.tld/a.png", path)
+        self.assertEqual(stored, path)
+        self.assertEqual(self._cache.get_orig_path("https://a.tld/a.png"), path)
+
+    def test_deduplication(self) -> None:
+        path1 = self._write_file("a.png", b"same content")
+        path2 = self._write_file("b.png", b"same content")
+
+        self._add_file("https://a.tld/a.png", path1)
+        stored = self._add_file("https://b.tld/b.png", path2)
+
+        self.assertEqual(stored, path1)
+        self.assertFalse(path2.exists())
+        self.assertEqual(self._cache.get_orig_path("https://b.tld/b.png"), path1)
+
+    def test_import(self) -> None:
+        path1 = self._write_file("a.png", b"same content")
+        path2 = self._write_file("b.png", b"same content")
+        self._add_file("https://a.tld/a.png", path1)
+
+        imported: list[Path] = []
+        self._cache.import_file("https://b.tld/b.png", path2, imported.append)
+
+        context = GLib.MainContext.default()
+        deadline = time.time() + 5
+        while not imported and time.time() < deadline:
+            context.iteration(False)
+            time.sleep(0.01)
+
+        self.assertEqual(imported, [path1])
+        self.assertFalse(path2.exists())
+        self.assertEqual(self._cache.get_orig_path("https://b.tld/b.png"), path1)
+
+    def test_remove_uri(self) -> None:
+        path = self._write_file("a.png", b"a")
+        self._add_file("https://a.tld/a.png", path)
+        self._add_file("https://b.tld/a.png", path)
+
+        self._cache.remove_uri("https://a.tld/a.png")
+        self.assertIsNone(self._cache.get_orig_path("https://a.tld/a.png"))
+        self.assertIsNone(self._cache.get_orig_path("https://b.tld/a.png"))
+
+    def test_changed_content(self) -> None:
+        path = self._write_file("a.png", b"old")
+        self._add_file("https://a.tld/a.png", path)
+        self._add_file("https://b.tld/a.png", path)
+
+        # The uri is downloaded again into the same file
+        path.write_bytes(b"new")
+        self._add_file("https://a.tld/a.png", path)
+
+        self.assertEqual(len(self._cache._files), 1)
+        self.assertEqual(self._cache.get_orig_path("https://a.tld/a.png"), path)
+        self.assertIsNone(self._cache.get_orig_path("https://b.tld/a.png"))
+
+    def test_evict_shared_filename(self) -> None:
+        app.settings.set("preview_cache_max_age", 1)
+
+        path = self._write_file("a.png", b"a")
+        self._add_file("https://a.tld/a.png", path)
+        self._cache._files = {
+            hash_: file._replace(last_access=file.last_access - 2 * 24 * 3600)
+            for hash_, file in self._cache._files.items()
+        }
+
+        # An entry from an older version refers to the same file
+        file = next(iter(self._cache._files.values()))
+        self._cache._add_file_entry(
+            file._replace(content_hash="other", last_access=int(time.time()))
+        )
+
+        self._cache._evict()
+        self.assertIsNone(self._cache.get_orig_path("https://a.tld/a.png"))
+
+        time.sleep(0.1)
+        self.assertTrue(path.exists())
+
+    def test_evict_by_size(self) -> None:
+        app.settings.set("preview_cache_max_size", 1)
+
+        path1 = self._write_file("old.png", b"x" * 700 * 1024)
+        path2 = self._write_file("new.png", b"y" * 700 * 1024)
+        thumb = self._thumb_dir / "old_thumb_400.png"
+        thumb.write_bytes(b"thumb")
+
+        self._add_file("https://a.tld/old.png", path1)
+        self._cache._files = {
+            hash_: file._replace(last_access=file.last_access - 10)
+            for hash_, file in self._cache._files.items()
+        }
+        self._add_file("https://a.tld/new.png", path2)
+
+        self._cache._evict()
+
+        self.assertIsNone(self._cache.get_orig_path("https://a.tld/old.png"))
+        self.assertEqual(self._cache.get_orig_path("https://a.tld/new.png"), path2)
+
+        deadline = time.time() + 5
+        while (path1.exists() or thumb.exists()) and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.assertFalse(path1.exists())
+        self.assertFalse(thumb.exists())
+        self.assertTrue(path2.exists())
+
+    def test_evict_by_age(self) -> None:
+        app.settings.set("preview_cache_max_age", 1)
+
+        path = self._write_file("a.png", b"a")
+        self._add_file("https://a.tld/a.png", path)
+        self._cache._files = {
+            hash_: file._replace(last_access=file.last_access - 2 * 24 * 3600)
+            for hash_, file in self._cache._files.items()
+        }
+
+        self._cache._evict()
+        self.assertIsNone(self._cache.get_orig_path("https://a.tld/a.png"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -117,6 +117,23 @@ def test_insert_thread(self) -> None:
         self.assertEqual(message.thread.fk_remote_pk, 2)
         self.assertEqual(message.thread.id, "t2")
 
+    def test_remove_history(self) -> None:
+        message_data = self._create_base_message(message_id="1", thread_id="t1")
+        self._archive.insert_object(message_data)
+
+        self._archive.remove_history_for_jid(self._account, self._remote_jid)
+
+        # The removed thread is inserted again
+        message_data = self._create_base_message(message_id="2", thread_id="t1")
+        pk = self._archive.insert_object(message_data)
+
+        message = self._archive.get_message_with_pk(pk)
+
+        assert message is not None
+        assert message.thread is not None
+
+        self.assertEqual(message.thread.id, "t1")
+
 
 if __name__ == "__main__":
     unittest.main()